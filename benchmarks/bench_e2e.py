@@ -0,0 +1,139 @@
+"""
+Benchmark de bout en bout de la synchronisation des commandes.
+
+Lance, dans un processus séparé, une boutique WooCommerce et une instance
+Odoo simulées (``standins.py``) alimentées par ``OrderGenerator``, puis
+exécute ``SyncManager.sync_orders`` dans le processus courant : requêtes
+HTTP, sérialisation JSON/XML-RPC, pagination, limitation de débit et
+nouvelles tentatives sont réellement exercées.
+
+Le résultat est un objet JSON : débit (commandes/s), latence par commande
+(p50, p99), pic de mémoire résidente du processus de synchronisation et
+compteurs des serveurs simulés.
+
+Usage :
+    python benchmarks/bench_e2e.py [--orders 2000] [--wc-latency 0.02] [--odoo-latency 0.03]
+                                   [--throttle-rate 0.0] [--rate-limit 0] [--output resultats.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from standins import FakeOdoo, FakeWooCommerce, configure_settings, isolate_state, prepare_environment
+
+
+def _serve(conn, args):
+    """Processus des serveurs simulés : publie leurs URL puis leurs compteurs à l'arrêt."""
+    from fixtures import OrderGenerator
+
+    generator = OrderGenerator(seed=args.seed, guest_ratio=args.guest_ratio)
+    options = {'jitter': args.jitter, 'throttle_rate': args.throttle_rate, 'seed': args.seed}
+    with FakeWooCommerce(latency=args.wc_latency, **options) as wc, \
+            FakeOdoo(latency=args.odoo_latency, **options) as odoo:
+        wc.extend([generator.order(order_id) for order_id in range(1, args.orders + 1)])
+        conn.send((wc.url, odoo.url))
+        conn.recv()
+        conn.send({
+            'wc_requests': wc.requests, 'wc_throttled': wc.throttled,
+            'odoo_requests': odoo.requests, 'odoo_throttled': odoo.throttled,
+            'odoo_created': odoo.created.get('sale.order', 0),
+        })
+
+
+def _percentile(values, percent):
+    """Percentile (rang le plus proche) d'une liste de valeurs."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout de la synchronisation")
+    parser.add_argument('--orders', type=int, default=2000, help="Nombre de commandes dans la boutique")
+    parser.add_argument('--wc-latency', type=float, default=0.02, help="Latence WooCommerce (s)")
+    parser.add_argument('--odoo-latency', type=float, default=0.03, help="Latence Odoo (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Variation aléatoire de la latence (s)")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Part des requêtes rejetées en 429")
+    parser.add_argument('--guest-ratio', type=float, default=0.0, help="Part de commandes invitées")
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help="Limite client en appels/min (0 : pas de limite, 80 : production)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-e2e-')
+    prepare_environment(workdir)
+    rate_limit = str(args.rate_limit or 10 ** 9)
+    os.environ['WC_CALLS_PER_MINUTE'] = rate_limit
+    os.environ['ODOO_CALLS_PER_MINUTE'] = rate_limit
+
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(child, args), daemon=True)
+    server.start()
+    wc_url, odoo_url = parent.recv()
+
+    from fixtures import mute_console_logging
+    from core.sync_manager import SyncManager
+    from utils.memory import rss_bytes
+
+    mute_console_logging()
+    isolate_state(workdir)
+    configure_settings(wc_url, odoo_url)
+
+    sync = SyncManager()
+    latencies = []
+    process_order = sync._process_order
+
+    def _timed(order, *args):
+        start = time.perf_counter()
+        outcome = process_order(order, *args)
+        latencies.append(time.perf_counter() - start)
+        return outcome
+
+    sync._process_order = _timed
+    start = time.perf_counter()
+    sync.sync_orders()
+    elapsed = time.perf_counter() - start
+
+    parent.send('stop')
+    counters = parent.recv()
+    server.join()
+
+    # ru_maxrss est exprimé en Ko sous Linux
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, rss_bytes())
+    result = {
+        'benchmark': 'e2e_sync_orders',
+        'orders': args.orders,
+        'processed': len(latencies),
+        'duration_s': round(elapsed, 3),
+        'orders_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'latency_p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'peak_rss_mb': round(peak_rss / 1048576, 1),
+        'config': {
+            'wc_latency_s': args.wc_latency, 'odoo_latency_s': args.odoo_latency,
+            'jitter_s': args.jitter, 'throttle_rate': args.throttle_rate,
+            'rate_limit_per_minute': args.rate_limit, 'seed': args.seed,
+        },
+        **counters,
+    }
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Benchmark des empreintes de commandes.
+
+Compare l'ancien checksum (``sha256(str(commande))``) avec l'empreinte
+canonique ``order_fingerprint`` sur des commandes de tailles croissantes,
+enrichies de meta_data et de liens comme les réponses WooCommerce réelles.
+
+Usage :
+    python benchmarks/bench_fingerprint.py
+"""
+
+import hashlib
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.fingerprint import order_fingerprint
+from fixtures import make_bloated_order
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'lignes':>6} {'sha256(str) µs':>15} {'empreinte µs':>13}")
+    for lines in (1, 10, 50, 200):
+        order = make_bloated_order(1, lines, rng)
+        number = 2000 if lines < 50 else 200
+        legacy = min(timeit.repeat(
+            lambda: hashlib.sha256(str(order).encode()).hexdigest(), number=number, repeat=3
+        )) / number
+        fingerprint = min(timeit.repeat(
+            lambda: order_fingerprint(order), number=number, repeat=3
+        )) / number
+        print(f"{lines:>6} {legacy * 1e6:>15.1f} {fingerprint * 1e6:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
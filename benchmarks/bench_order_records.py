@@ -0,0 +1,68 @@
+"""
+Benchmark mémoire des commandes en cours de synchronisation.
+
+Mesure, avec tracemalloc, la mémoire retenue par commande lorsque les
+réponses WooCommerce sont conservées telles quelles (dict JSON complet) et
+lorsqu'elles sont projetées sur des OrderRecord, ainsi que le pic mémoire
+d'un rattrapage page par page.
+
+Usage :
+    python benchmarks/bench_order_records.py [--orders 20000] [--page 100]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.models.records import OrderRecord
+from fixtures import make_bloated_order
+
+
+def _retained(build, payloads):
+    """Mémoire retenue (octets) par les objets construits à partir des pages."""
+    tracemalloc.start()
+    kept = [item for payload in payloads for item in build(payload)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def _streamed_peak(payloads):
+    """Pic mémoire d'un parcours page par page sans conserver les commandes."""
+    tracemalloc.start()
+    for payload in payloads:
+        page = [OrderRecord.from_wc(order) for order in json.loads(payload)]
+        del page
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--page', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    orders = [make_bloated_order(i, lines=rng.randint(1, 8), rng=rng) for i in range(1, args.orders + 1)]
+    payloads = [json.dumps(orders[i:i + args.page]) for i in range(0, len(orders), args.page)]
+    del orders
+
+    as_dicts = _retained(json.loads, payloads)
+    as_records = _retained(lambda p: [OrderRecord.from_wc(o) for o in json.loads(p)], payloads)
+    print(f"{args.orders:,} commandes, pages de {args.page}")
+    print(f"dict JSON complet : {as_dicts / args.orders:>8,.0f} octets/commande")
+    print(f"OrderRecord       : {as_records / args.orders:>8,.0f} octets/commande")
+    print(f"pic d'un parcours page par page : {_streamed_peak(payloads) / 1024:,.0f} Kio")
+
+
+if __name__ == '__main__':
+    main()
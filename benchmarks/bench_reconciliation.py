@@ -0,0 +1,64 @@
+"""
+Benchmark de la réconciliation des montants par lot.
+
+Compare la vérification commande par commande (``_check_order_amounts``)
+avec ``reconcile_amounts`` sur des pages de commandes, pour estimer le
+temps de validation d'un rattrapage de plusieurs millions de lignes.
+
+Usage :
+    python benchmarks/bench_reconciliation.py [--orders 200000] [--page 100]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import reconciliation
+from core.reconciliation import reconcile_amounts
+from core.validator import _check_order_amounts
+from fixtures import make_order
+
+
+def _timed(func, pages):
+    start = time.perf_counter()
+    for page in pages:
+        func(page)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--page', type=int, default=100, help="Commandes par page")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(42)
+    orders = [make_order(i, lines=rng.randint(1, 20), rng=rng) for i in range(1, args.orders + 1)]
+    lines = sum(len(order['line_items']) for order in orders)
+    pages = [orders[i:i + args.page] for i in range(0, len(orders), args.page)]
+
+    def per_order(page):
+        for order in page:
+            _check_order_amounts(order)
+
+    results = {'par_commande': _timed(per_order, pages)}
+    if reconciliation._numpy() is not None:
+        results['lot_numpy'] = _timed(reconcile_amounts, pages)
+    numpy_module, reconciliation.np = reconciliation.np, None
+    results['lot_python'] = _timed(reconcile_amounts, pages)
+    reconciliation.np = numpy_module
+
+    print(f"{len(orders):,} commandes, {lines:,} lignes, pages de {args.page}")
+    for name, duration in results.items():
+        print(f"{name:<14} {duration:8.2f}s  {lines / duration:>12,.0f} lignes/s")
+
+
+if __name__ == '__main__':
+    main()
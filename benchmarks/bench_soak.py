@@ -0,0 +1,103 @@
+"""
+Test d'endurance mémoire de la synchronisation résidente.
+
+Relance ``SyncManager.sync_orders`` en boucle dans un même processus contre
+les serveurs simulés de ``standins.py`` (de nouvelles commandes sont créées
+avant chaque passage), relève la mémoire résidente après chaque passage et
+calcule la pente de croissance (régression linéaire) après la phase de
+chauffe. Le script échoue (code 1) si la mémoire croît plus vite que
+``--max-growth`` Mo/heure.
+
+Usage :
+    python benchmarks/bench_soak.py [--duration 7200] [--orders 50] [--max-growth 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, UTC
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from standins import FakeOdoo, FakeWooCommerce, configure_settings, isolate_state, prepare_environment
+
+
+def _slope_mb_per_hour(samples):
+    """Pente (Mo/heure) de la régression linéaire des échantillons (secondes, octets)."""
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in samples) / n
+    mean_m = sum(m for _, m in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if not var:
+        return 0.0
+    cov = sum((t - mean_t) * (m - mean_m) for t, m in samples)
+    return cov / var * 3600 / 1048576
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test d'endurance mémoire de la synchronisation")
+    parser.add_argument('--duration', type=float, default=600, help="Durée totale en secondes")
+    parser.add_argument('--orders', type=int, default=50, help="Nouvelles commandes par passage")
+    parser.add_argument('--interval', type=float, default=0, help="Pause entre deux passages (s)")
+    parser.add_argument('--warmup', type=float, default=0.25, help="Part de la durée ignorée (chauffe)")
+    parser.add_argument('--max-growth', type=float, default=5.0, help="Croissance tolérée (Mo/heure)")
+    parser.add_argument('--budget-mb', type=int, default=0, help="Budget mémoire du MemoryGuard (Mo)")
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help="Limite client en appels/min (0 : pas de limite, 80 : production)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='soak-')
+    prepare_environment(workdir)
+    os.environ['WC_CALLS_PER_MINUTE'] = os.environ['ODOO_CALLS_PER_MINUTE'] = str(args.rate_limit or 10 ** 9)
+
+    from fixtures import mute_console_logging
+    from core.sync_manager import SyncManager
+    from utils.memory import MemoryGuard, rss_bytes
+
+    mute_console_logging()
+    isolate_state(workdir)
+    rng = random.Random(42)
+
+    with FakeWooCommerce() as wc, FakeOdoo() as odoo:
+        configure_settings(wc.url, odoo.url)
+        sync = SyncManager(memory_guard=MemoryGuard(budget_mb=args.budget_mb))
+        start = time.monotonic()
+        samples = []
+        runs = 0
+        while time.monotonic() - start < args.duration:
+            # Commandes créées « après » la dernière synchronisation
+            created = (datetime.now(UTC) + timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S')
+            wc.add_orders(args.orders, rng=rng, created_gmt=created)
+            sync.sync_orders()
+            wc.clear()
+            runs += 1
+            samples.append((time.monotonic() - start, rss_bytes()))
+            if args.interval:
+                time.sleep(args.interval)
+
+    steady = [sample for sample in samples if sample[0] >= args.duration * args.warmup]
+    growth = _slope_mb_per_hour(steady)
+    result = {
+        'benchmark': 'soak',
+        'duration_s': round(samples[-1][0], 1) if samples else 0,
+        'runs': runs,
+        'orders_created': odoo.created.get('sale.order', 0),
+        'rss_start_mb': round(samples[0][1] / 1048576, 1) if samples else 0,
+        'rss_end_mb': round(samples[-1][1] / 1048576, 1) if samples else 0,
+        'growth_mb_per_hour': round(growth, 2),
+        'max_growth_mb_per_hour': args.max_growth,
+        'passed': growth <= args.max_growth,
+    }
+    print(json.dumps(result))
+    return 0 if result['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
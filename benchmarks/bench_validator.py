@@ -0,0 +1,74 @@
+"""
+Microbenchmark du validateur de commandes et de clients.
+
+Compare la validation unitaire (une exception par enregistrement invalide)
+avec l'API par lot ``validate_orders``/``validate_customers``. Le débit est
+mesuré sur un seul thread, c'est donc un débit par cœur.
+
+Usage :
+    python benchmarks/bench_validator.py [--count 20000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.exceptions import ValidationError
+from core.validator import (
+    validate_order, validate_orders, validate_customer, validate_customers
+)
+from fixtures import make_order, make_customer
+
+
+def _throughput(func, records, repeat=3):
+    """Retourne le meilleur débit (enregistrements/s) sur plusieurs essais."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(records)
+        best = min(best, time.perf_counter() - start)
+    return len(records) / best
+
+
+def _one_by_one(validate):
+    def run(records):
+        for record in records:
+            try:
+                validate(record)
+            except ValidationError:
+                pass
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=20000)
+    args = parser.parse_args()
+
+    # Les journaux sont coupés pour mesurer le coût de la validation seule
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(42)
+    orders = [make_order(i, lines=rng.randint(1, 8), rng=rng) for i in range(1, args.count + 1)]
+    # 5 % de commandes invalides pour exercer le chemin d'erreur
+    for order in orders[::20]:
+        order.pop('customer_id')
+    customers = [make_customer(i, rng=rng) for i in range(1, args.count + 1)]
+
+    results = {
+        'orders_unitaires': _throughput(_one_by_one(validate_order), orders),
+        'orders_lot': _throughput(validate_orders, orders),
+        'clients_unitaires': _throughput(_one_by_one(validate_customer), customers),
+        'clients_lot': _throughput(validate_customers, customers),
+    }
+    for name, rate in results.items():
+        print(f"{name:<20} {rate:>12,.0f} enregistrements/s/cœur")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Test de charge de l'ingestion des webhooks WooCommerce.
+
+Rejoue des rafales de webhooks ``order.created`` à débit fixe (boucle
+ouverte : chaque envoi est planifié à l'avance, la latence est mesurée
+depuis l'instant prévu et inclut donc l'attente due à un serveur saturé)
+et rapporte la latence d'acquittement (p50, p90, p99, p99.9, max) et la
+répartition des réponses (202, 503, erreurs).
+
+Les webhooks proviennent d'un enregistrement JSON Lines (``--recording`` :
+une ligne par webhook, soit le corps seul, soit ``{"headers": {...},
+"body": {...}}``) ou, à défaut, sont générés par ``OrderGenerator``.
+
+Sans ``--url``, le serveur (scripts/webhook_server.py) est lancé dans un
+processus séparé avec une synchronisation simulée durant ``--sync-time``
+secondes : seul le chemin d'ingestion est mesuré.
+
+Usage :
+    python benchmarks/bench_webhook.py [--rate 2000] [--duration 10] [--connections 32]
+                                       [--recording webhooks.jsonl] [--url http://hote:8090/webhook]
+                                       [--output resultats.json]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_e2e import _percentile
+from standins import prepare_environment
+
+WEBHOOK_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'WooCommerce/8.5.0 Hookshot (WordPress/6.4.2)',
+    'X-WC-Webhook-Source': 'https://shop.example.com/',
+    'X-WC-Webhook-Topic': 'order.created',
+    'X-WC-Webhook-Resource': 'order',
+    'X-WC-Webhook-Event': 'created',
+    'X-WC-Webhook-ID': '1',
+}
+
+
+def load_recording(path):
+    """
+    Charge un enregistrement de webhooks.
+
+    Args:
+        path (str): Fichier JSON Lines
+
+    Returns:
+        list: Couples (en-têtes, corps encodé)
+    """
+    webhooks = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'body' in record and 'headers' in record:
+                headers, body = dict(WEBHOOK_HEADERS, **record['headers']), record['body']
+            else:
+                headers, body = WEBHOOK_HEADERS, record
+            webhooks.append((headers, json.dumps(body).encode()))
+    return webhooks
+
+
+def generate_webhooks(count, seed=42):
+    """Webhooks ``order.created`` générés par OrderGenerator."""
+    from fixtures import OrderGenerator
+
+    generator = OrderGenerator(seed=seed)
+    return [
+        (WEBHOOK_HEADERS, json.dumps(generator.order(order_id)).encode())
+        for order_id in range(1, count + 1)
+    ]
+
+
+def _serve(conn, sync_time, threads):
+    """Processus serveur : publie son URL, puis le nombre de synchronisations à l'arrêt."""
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+    from fixtures import mute_console_logging
+    from core.webhook_queue import WebhookQueue
+    from werkzeug.serving import make_server
+    import webhook_server
+
+    mute_console_logging()
+    ingest = WebhookQueue(run_sync=lambda: time.sleep(sync_time))
+    app = webhook_server.create_app(ingest)
+    if webhook_server.waitress is not None:
+        from waitress.server import create_server
+
+        server = create_server(app, host='127.0.0.1', port=0, threads=threads)
+        port, run, shutdown = server.effective_port, server.run, server.close
+    else:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        port, run, shutdown = server.server_port, server.serve_forever, server.shutdown
+    threading.Thread(target=run, daemon=True).start()
+    conn.send(f'http://127.0.0.1:{port}/webhook')
+    conn.recv()
+    shutdown()
+    ingest.stop(timeout=sync_time + 5)
+    conn.send({'sync_runs': ingest.runs, 'server': 'waitress' if webhook_server.waitress else 'werkzeug'})
+
+
+class _Sender(threading.Thread):
+    """Connexion persistante envoyant les webhooks qui lui sont attribués."""
+
+    def __init__(self, url, webhooks, slots, start_at, rate):
+        super().__init__(daemon=True)
+        self.url = urlparse(url)
+        self.webhooks = webhooks
+        self.slots = slots
+        self.start_at = start_at
+        self.rate = rate
+        self.latencies = []
+        self.statuses = {}
+
+    def _connect(self):
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=30)
+
+    def run(self):
+        conn = self._connect()
+        for slot in self.slots:
+            scheduled = self.start_at + slot / self.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            headers, body = self.webhooks[slot % len(self.webhooks)]
+            try:
+                conn.request('POST', self.url.path or '/webhook', body, headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = self._connect()
+                status = 'error'
+            self.latencies.append(time.perf_counter() - scheduled)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        conn.close()
+
+
+def run_load(url, webhooks, rate, duration, connections):
+    """
+    Envoie ``rate × duration`` webhooks à débit fixe.
+
+    Returns:
+        tuple: (latences en secondes, répartition des statuts, durée réelle)
+    """
+    total = int(rate * duration)
+    start_at = time.perf_counter() + 0.2
+    senders = [
+        _Sender(url, webhooks, range(i, total, connections), start_at, rate)
+        for i in range(connections)
+    ]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    elapsed = time.perf_counter() - start_at
+    latencies = [latency for sender in senders for latency in sender.latencies]
+    statuses = {}
+    for sender in senders:
+        for status, count in sender.statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'ingestion des webhooks")
+    parser.add_argument('--rate', type=float, default=2000, help="Webhooks par seconde")
+    parser.add_argument('--duration', type=float, default=10, help="Durée de la rafale (s)")
+    parser.add_argument('--connections', type=int, default=32, help="Connexions simultanées")
+    parser.add_argument('--recording', help="Webhooks enregistrés (JSON Lines)")
+    parser.add_argument('--url', help="URL d'un serveur déjà lancé (sinon serveur local)")
+    parser.add_argument('--sync-time', type=float, default=2.0,
+                        help="Durée de la synchronisation simulée du serveur local (s)")
+    parser.add_argument('--threads', type=int, default=16, help="Threads du serveur local")
+    parser.add_argument('--output', help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    webhooks = load_recording(args.recording) if args.recording else generate_webhooks(1000)
+
+    server = None
+    url = args.url
+    if not url:
+        prepare_environment(tempfile.mkdtemp(prefix='bench-webhook-'))
+        parent, child = multiprocessing.Pipe()
+        server = multiprocessing.Process(target=_serve, args=(child, args.sync_time, args.threads), daemon=True)
+        server.start()
+        url = parent.recv()
+
+    latencies, statuses, elapsed = run_load(url, webhooks, args.rate, args.duration, args.connections)
+
+    result = {
+        'benchmark': 'webhook_ingestion',
+        'target_rate': args.rate,
+        'sent': len(latencies),
+        'achieved_rate': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'statuses': statuses,
+        'ack_p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'ack_p90_ms': round(_percentile(latencies, 90) * 1000, 2),
+        'ack_p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'ack_p999_ms': round(_percentile(latencies, 99.9) * 1000, 2),
+        'ack_max_ms': round(max(latencies, default=0) * 1000, 2),
+        'config': {'duration_s': args.duration, 'connections': args.connections,
+                   'recording': args.recording, 'url': args.url},
+    }
+    if server is not None:
+        parent.send('stop')
+        result.update(parent.recv())
+        server.join()
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
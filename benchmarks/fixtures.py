@@ -0,0 +1,230 @@
+"""
+Données synthétiques partagées par les benchmarks.
+Génère des commandes et clients au format WooCommerce.
+"""
+
+import itertools
+import random
+
+
+def make_order(order_id, lines=3, rng=None):
+    """
+    Construit une commande WooCommerce cohérente.
+
+    Args:
+        order_id (int): Identifiant de la commande
+        lines (int): Nombre de lignes de commande
+        rng (random.Random, optional): Générateur pseudo-aléatoire
+
+    Returns:
+        dict: Commande au format WooCommerce
+    """
+    rng = rng or random
+    line_items = []
+    for i in range(lines):
+        quantity = rng.randint(1, 5)
+        price = rng.randint(100, 10000) / 100
+        line_items.append({
+            'id': order_id * 100 + i,
+            'product_id': rng.randint(1, 5000),
+            'name': f'Produit {i}',
+            'quantity': quantity,
+            'price': price,
+            'total': f'{price * quantity:.2f}',
+        })
+    total = sum(float(item['total']) for item in line_items)
+    return {
+        'id': order_id,
+        'customer_id': rng.randint(1, 100000),
+        'date_created': '2024-01-01T10:00:00',
+        'status': 'processing',
+        'total': f'{total:.2f}',
+        'line_items': line_items,
+    }
+
+
+def make_bloated_order(order_id, lines=3, rng=None):
+    """
+    Construit une commande avec les champs volumineux renvoyés par l'API
+    WooCommerce (meta_data, liens, adresses).
+
+    Args:
+        order_id (int): Identifiant de la commande
+        lines (int): Nombre de lignes de commande
+        rng (random.Random, optional): Générateur pseudo-aléatoire
+
+    Returns:
+        dict: Commande au format WooCommerce
+    """
+    order = make_order(order_id, lines=lines, rng=rng)
+    order['meta_data'] = [
+        {'id': i, 'key': f'_meta_{i}', 'value': 'x' * 40} for i in range(20)
+    ]
+    order['_links'] = {'self': [{'href': f'https://shop.example.com/wp-json/wc/v3/orders/{order_id}'}]}
+    address = {
+        'first_name': 'Client', 'last_name': str(order_id), 'company': '',
+        'address_1': '1 rue de la Paix', 'address_2': '', 'city': 'Paris',
+        'state': '', 'postcode': '75001', 'country': 'FR',
+    }
+    order['billing'] = dict(address, email=f'client{order_id}@example.com', phone='0102030405')
+    order['shipping'] = dict(address)
+    for item in order['line_items']:
+        item['meta_data'] = [{'id': 1, 'key': 'pa_taille', 'value': 'M'}]
+        item['taxes'] = [{'id': 1, 'total': '0.00', 'subtotal': '0.00'}]
+    return order
+
+
+def make_customer(customer_id, rng=None):
+    """
+    Construit un client WooCommerce.
+
+    Args:
+        customer_id (int): Identifiant du client
+        rng (random.Random, optional): Générateur pseudo-aléatoire
+
+    Returns:
+        dict: Client au format WooCommerce
+    """
+    rng = rng or random
+    return {
+        'id': customer_id,
+        'email': f'client{customer_id}@example.com',
+        'first_name': 'Client',
+        'last_name': str(customer_id),
+        'billing': {
+            'phone': '0102030405',
+            'address_1': f'{rng.randint(1, 200)} rue de la Paix',
+            'address_2': '',
+            'city': 'Paris',
+            'postcode': '75001',
+            'country': rng.choice(['FR', 'BE', 'CH']),
+        },
+    }
+
+
+def _zipf_cum_weights(size, exponent):
+    """Poids cumulés d'une loi de Zipf sur les rangs 1..size."""
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    total = sum(weights)
+    return list(itertools.accumulate(w / total for w in weights))
+
+
+class OrderGenerator:
+    """
+    Génère des commandes WooCommerce aux distributions réalistes.
+
+    - catalogue : popularité des produits selon une loi de Zipf, prix
+      log-normaux (médiane ~25 €), 10 % de variations ;
+    - clients : popularité selon une loi de Zipf plus plate (quelques clients
+      fidèles reviennent souvent), commandes invitées (customer_id 0)
+      optionnelles — la synchronisation les rejette faute de client ;
+    - paniers : nombre de lignes géométrique (moyenne ~2,5), quantités
+      surtout unitaires, TVA 20 %, frais de port et frais occasionnels.
+
+    Les montants sont cohérents (total = lignes + frais + port + taxes) : les
+    commandes passent la réconciliation du validateur.
+    """
+
+    def __init__(self, seed=42, products=5000, customers=20000, zipf_s=1.1, guest_ratio=0.0):
+        """
+        Args:
+            seed (int): Graine du générateur pseudo-aléatoire
+            products (int): Taille du catalogue
+            customers (int): Nombre de clients
+            zipf_s (float): Exposant de la loi de Zipf (popularité des produits)
+            guest_ratio (float): Part des commandes passées sans compte client
+        """
+        self.rng = random.Random(seed)
+        self.guest_ratio = guest_ratio
+        self._product_weights = _zipf_cum_weights(products, zipf_s)
+        self._customer_ids = range(1, customers + 1)
+        self._customer_weights = _zipf_cum_weights(customers, 0.8)
+        self.catalog = [
+            {
+                'product_id': product_id,
+                'variation_id': product_id * 10 if self.rng.random() < 0.1 else 0,
+                'name': f'Produit {product_id}',
+                'sku': f'SKU-{product_id:05d}',
+                'price': round(self.rng.lognormvariate(3.2, 0.8), 2),
+            }
+            for product_id in range(1, products + 1)
+        ]
+
+    def _customer_id(self):
+        """Client de la commande (0 pour une commande invitée)."""
+        if self.guest_ratio and self.rng.random() < self.guest_ratio:
+            return 0
+        return self.rng.choices(self._customer_ids, cum_weights=self._customer_weights)[0]
+
+    def _quantity(self):
+        """Quantité d'une ligne : surtout 1, parfois davantage."""
+        return 1 if self.rng.random() < 0.7 else self.rng.randint(2, 6)
+
+    def order(self, order_id, created_gmt='2024-01-01T10:00:00'):
+        """
+        Construit une commande.
+
+        Args:
+            order_id (int): Identifiant de la commande
+            created_gmt (str): Date de création GMT
+
+        Returns:
+            dict: Commande au format WooCommerce
+        """
+        rng = self.rng
+        lines = min(1 + int(rng.expovariate(1 / 1.5)), 30)
+        products = rng.choices(self.catalog, cum_weights=self._product_weights, k=lines)
+        line_items = []
+        for i, product in enumerate(products):
+            quantity = self._quantity()
+            line_total = round(product['price'] * quantity, 2)
+            line_items.append({
+                'id': order_id * 100 + i,
+                'product_id': product['product_id'],
+                'variation_id': product['variation_id'],
+                'name': product['name'],
+                'sku': product['sku'],
+                'quantity': quantity,
+                'price': product['price'],
+                'total': f'{line_total:.2f}',
+                'total_tax': f'{line_total * 0.2:.2f}',
+            })
+        fee_lines = []
+        if rng.random() < 0.05:
+            fee_lines.append({'name': 'Emballage cadeau', 'total': '3.50', 'total_tax': '0.70'})
+        shipping_total = 0.0 if rng.random() < 0.3 else rng.choice([4.90, 6.90, 9.90])
+        total_tax = sum(float(item['total_tax']) for item in line_items + fee_lines)
+        total = (
+            sum(float(item['total']) for item in line_items + fee_lines)
+            + shipping_total + total_tax
+        )
+        return {
+            'id': order_id,
+            'status': 'processing',
+            'currency': 'EUR',
+            'customer_id': self._customer_id(),
+            'date_created': created_gmt,
+            'date_created_gmt': created_gmt,
+            'total': f'{total:.2f}',
+            'total_tax': f'{total_tax:.2f}',
+            'shipping_total': f'{shipping_total:.2f}',
+            'line_items': line_items,
+            'fee_lines': fee_lines,
+            'shipping_lines': [{'method_id': 'flat_rate', 'total': f'{shipping_total:.2f}'}],
+        }
+
+
+def mute_console_logging():
+    """
+    Retire les handlers console du logger de l'application.
+
+    Les handlers fichiers sont conservés : leur coût fait partie de la mesure.
+    """
+    import logging
+    import utils.logging_utils  # noqa: F401  (charge la configuration)
+
+    for name in ('sync_woocommerce_odoo', ''):
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            if type(handler) is logging.StreamHandler:
+                logger.removeHandler(handler)
@@ -0,0 +1,393 @@
+"""
+Suite de microbenchmarks des fonctions du chemin critique, avec garde de
+régression.
+
+Chaque cas est mesuré à plusieurs tailles de charge utile (nombre de lignes
+de commande, volume de meta_data, longueur du message d'audit, nombre de
+lignes en base). Le temps retenu est le meilleur temps par appel sur
+plusieurs répétitions, chaque répétition durant au moins ``--min-time``
+secondes.
+
+Les résultats sont comparés au fichier de référence ``baseline.json`` : le
+script échoue (code 1) si un cas est plus lent que la référence au-delà du
+seuil ``--threshold`` (20 % par défaut, multiplié pour les écritures sur
+disque, plus bruitées) et qu'une seconde mesure confirme la régression.
+Avec ``--normalize``, les mesures sont ramenées à la vitesse de la machine
+de référence par une charge de calibration. Une optimisation du chemin
+critique s'accompagne d'une mise à jour de la référence
+(``--update-baseline``), mesurée sur la même machine.
+
+Usage :
+    python benchmarks/microbench.py [--filter validate_order] [--threshold 0.2] [--normalize]
+                                    [--update-baseline] [--output resultats.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fixtures import make_bloated_order, make_customer, make_order
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Tailles des charges utiles : lignes de commande, entrées meta_data du client,
+# longueur du message d'audit, lignes présentes en base
+ORDER_LINES = (1, 10, 100)
+CUSTOMER_META = (0, 20, 200)
+AUDIT_MESSAGE = (32, 512, 4096)
+DB_ROWS = (100, 10000, 100000)
+
+
+def _orders(lines, count=64, bloated=False):
+    rng = random.Random(lines)
+    build = make_bloated_order if bloated else make_order
+    return [build(order_id, lines=lines, rng=rng) for order_id in range(1, count + 1)]
+
+
+def _cycle(records):
+    """Fournit les enregistrements à tour de rôle (évite de mesurer un seul objet en cache)."""
+    return itertools.cycle(records).__next__
+
+
+def bench_map_wc_order_to_odoo(lines, workdir):
+    from core.models.order import map_wc_order_to_odoo
+
+    next_order = _cycle(_orders(lines, bloated=True))
+    return lambda: map_wc_order_to_odoo(next_order())
+
+
+def bench_order_transform(lines, workdir):
+    from core.transformers.order_transformer import OrderTransformer
+
+    transformer = OrderTransformer()
+    next_order = _cycle(_orders(lines, bloated=True))
+    return lambda: transformer.transform(next_order())
+
+
+def bench_customer_transform(meta, workdir):
+    from core.transformers.customer_transformer import CustomerTransformer
+
+    rng = random.Random(meta)
+    customers = []
+    for customer_id in range(1, 65):
+        customer = make_customer(customer_id, rng=rng)
+        customer['meta_data'] = [{'id': i, 'key': f'_meta_{i}', 'value': 'x' * 40} for i in range(meta)]
+        customers.append(customer)
+    transformer = CustomerTransformer()
+    next_customer = _cycle(customers)
+    return lambda: transformer.transform(next_customer())
+
+
+def bench_validate_order(lines, workdir):
+    from core.validator import validate_order
+
+    next_order = _cycle(_orders(lines, bloated=True))
+    return lambda: validate_order(next_order())
+
+
+def bench_log_audit(length, workdir):
+    from utils import helpers
+
+    helpers.AUDIT_LOG = os.path.join(workdir, f'audit_{length}.csv')
+    message = 'x' * length
+    order_ids = itertools.count(1)
+    return lambda: helpers.log_audit(next(order_ids), 'success', message)
+
+
+def _seed_db(rows, workdir):
+    """Crée une base de ``rows`` commandes synchronisées et la désigne comme base courante."""
+    from utils import database
+
+    database.DB_PATH = os.path.join(workdir, f'sync_{rows}.db')
+    database.init_db()
+    with database.get_connection() as conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO synced_orders(order_id) VALUES (?)',
+            ((str(order_id),) for order_id in range(1, rows + 1)),
+        )
+        conn.commit()
+    return database
+
+
+def bench_db_lookup_hit(rows, workdir):
+    database = _seed_db(rows, workdir)
+    rng = random.Random(rows)
+    order_ids = [rng.randint(1, rows) for _ in range(1024)]
+    next_id = _cycle(order_ids)
+    return lambda: database.is_order_already_synced_db(next_id())
+
+
+def bench_db_lookup_miss(rows, workdir):
+    database = _seed_db(rows, workdir)
+    order_ids = itertools.count(rows + 1)
+    return lambda: database.is_order_already_synced_db(next(order_ids))
+
+
+def bench_db_insert(rows, workdir):
+    database = _seed_db(rows, workdir)
+    order_ids = itertools.count(10 ** 9)
+    return lambda: database.mark_order_as_synced_db(next(order_ids))
+
+
+def bench_db_record_pending(rows, workdir):
+    database = _seed_db(rows, workdir)
+    order_ids = itertools.count(1)
+    return lambda: database.record_pending_order(next(order_ids) % rows, 1704103200.0, 'Erreur Odoo')
+
+
+# (nom, tailles, fabrique, facteur de seuil) : la fabrique prépare les données
+# et retourne la fonction mesurée, appelée sans argument. Les cas qui écrivent
+# sur disque (journaux fichiers, ajout au CSV, commit SQLite) sont plus bruités
+# que le calcul pur : leur seuil de régression est multiplié par le facteur.
+CASES = (
+    ('map_wc_order_to_odoo', ORDER_LINES, bench_map_wc_order_to_odoo, 1),
+    ('OrderTransformer.transform', ORDER_LINES, bench_order_transform, 2),
+    ('CustomerTransformer.transform', CUSTOMER_META, bench_customer_transform, 2),
+    ('validate_order', ORDER_LINES, bench_validate_order, 2),
+    ('log_audit', AUDIT_MESSAGE, bench_log_audit, 2),
+    ('db.is_order_already_synced.hit', DB_ROWS, bench_db_lookup_hit, 2),
+    ('db.is_order_already_synced.miss', DB_ROWS, bench_db_lookup_miss, 2),
+    ('db.mark_order_as_synced', DB_ROWS, bench_db_insert, 3),
+    ('db.record_pending_order', DB_ROWS, bench_db_record_pending, 3),
+)
+
+
+def _calibration_workload():
+    """Charge de référence en Python pur (dictionnaires, chaînes, flottants)."""
+    record = {'id': 1, 'lines': [{'qty': i, 'price': i * 1.5} for i in range(20)]}
+    return sum(line['qty'] * line['price'] for line in record['lines']) + len(str(record))
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """
+    Mesure le meilleur temps par appel d'une fonction.
+
+    Le nombre d'appels par répétition est calibré pour que chaque répétition
+    dure au moins ``min_time`` secondes ; le minimum des répétitions est le
+    moins sensible au bruit de la machine.
+
+    Args:
+        func (callable): Fonction mesurée, appelée sans argument
+        repeat (int): Nombre de répétitions
+        min_time (float): Durée minimale d'une répétition (s)
+
+    Returns:
+        float: Temps par appel en nanosecondes
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e9
+
+
+def case_key(name, size):
+    """Clé d'un cas dans les résultats et la référence (ex. ``validate_order[10]``)."""
+    return f'{name}[{size}]'
+
+
+def run_cases(workdir, pattern=None, repeat=5, min_time=0.05, keys=None):
+    """
+    Exécute les cas de la suite.
+
+    Args:
+        workdir (str): Dossier temporaire (base SQLite, fichier d'audit)
+        pattern (str, optional): Sous-chaîne filtrant les noms de cas
+        repeat (int): Nombre de répétitions par cas
+        min_time (float): Durée minimale d'une répétition (s)
+        keys (set, optional): Clés des seuls cas à exécuter
+
+    Returns:
+        dict: Temps par appel (ns) par clé de cas
+    """
+    results = {}
+    for name, sizes, factory, _ in CASES:
+        if pattern and pattern not in name:
+            continue
+        for size in sizes:
+            if keys is not None and case_key(name, size) not in keys:
+                continue
+            func = factory(size, workdir)
+            results[case_key(name, size)] = round(measure(func, repeat, min_time), 1)
+    return results
+
+
+def calibrate(repeat=5, min_time=0.05):
+    """
+    Mesure la vitesse de la machine sur une charge de référence fixe.
+
+    Returns:
+        float: Temps par appel de la charge de référence (ns)
+    """
+    return round(measure(_calibration_workload, repeat, min_time), 1)
+
+
+def case_thresholds(threshold):
+    """Seuil de régression de chaque cas (seuil global × facteur du cas)."""
+    return {
+        case_key(name, size): threshold * scale
+        for name, sizes, _, scale in CASES for size in sizes
+    }
+
+
+def compare(results, baseline, threshold, speed=1.0):
+    """
+    Compare les résultats à la référence.
+
+    Args:
+        results (dict): Temps par appel (ns) par clé de cas
+        baseline (dict): Temps de référence par clé de cas
+        threshold (float or dict): Ralentissement toléré (0.2 : +20 %),
+            global ou par clé de cas
+        speed (float): Rapport entre la calibration courante et celle de la
+            référence ; les mesures sont ramenées à la vitesse de la
+            machine de référence avant comparaison
+
+    Returns:
+        list: Tuples (clé, référence, mesure, ratio, statut) où le statut
+        vaut ``ok``, ``regression``, ``improvement`` ou ``new``
+    """
+    rows = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            rows.append((key, None, current, None, 'new'))
+            continue
+        limit = threshold.get(key, 0.0) if isinstance(threshold, dict) else threshold
+        ratio = current / speed / reference
+        if ratio > 1 + limit:
+            status = 'regression'
+        elif ratio < 1 / (1 + limit):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append((key, reference, current, ratio, status))
+    return rows
+
+
+def load_baseline(path=BASELINE_FILE):
+    """
+    Charge le fichier de référence.
+
+    Returns:
+        dict: Contenu du fichier (``machine`` et ``results``), vide s'il n'existe pas
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def machine_info():
+    """Description de la machine de mesure, enregistrée avec la référence."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def _format_ns(value):
+    if value is None:
+        return '-'
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('µs', 1e3)):
+        if value >= scale:
+            return f'{value / scale:.2f} {unit}'
+    return f'{value:.0f} ns'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filter', help="Ne mesurer que les cas dont le nom contient ce texte")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Ralentissement toléré (0.2 : +20 %%)")
+    parser.add_argument('--repeat', type=int, default=7, help="Répétitions par cas")
+    parser.add_argument('--min-time', type=float, default=0.05, help="Durée minimale d'une répétition (s)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Fichier de référence")
+    parser.add_argument('--normalize', action='store_true',
+                        help="Ramener les mesures à la vitesse de la machine de référence (calibration)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Enregistrer les mesures comme nouvelle référence")
+    parser.add_argument('--output', help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='microbench-')
+    from standins import isolate_state, prepare_environment
+
+    prepare_environment(workdir)
+    from fixtures import mute_console_logging
+
+    mute_console_logging()
+    isolate_state(workdir)
+
+    # Calibration avant et après la suite : le minimum écarte une perturbation passagère
+    calibration = calibrate(args.repeat, args.min_time)
+    results = run_cases(workdir, args.filter, args.repeat, args.min_time)
+    calibration = min(calibration, calibrate(args.repeat, args.min_time))
+    baseline = load_baseline(args.baseline)
+    if baseline.get('machine', {}).get('platform') not in (None, platform.platform()):
+        print("Attention : la référence a été mesurée sur une autre machine "
+              f"({baseline['machine']['platform']}) ; utilisez --normalize ou régénérez-la")
+    speed = 1.0
+    if args.normalize and baseline.get('calibration_ns'):
+        speed = calibration / baseline['calibration_ns']
+        print(f"Vitesse relative à la machine de référence : {1 / speed:.2f}")
+    thresholds = case_thresholds(args.threshold)
+    rows = compare(results, baseline.get('results', {}), thresholds, speed)
+
+    # Une régression n'est retenue que si une seconde mesure la confirme
+    suspects = {row[0] for row in rows if row[4] == 'regression'}
+    if suspects and not args.update_baseline:
+        for key, value in run_cases(workdir, args.filter, args.repeat, args.min_time, suspects).items():
+            results[key] = min(results[key], value)
+        rows = compare(results, baseline.get('results', {}), thresholds, speed)
+
+    print(f"{'cas':<42} {'référence':>12} {'mesure':>12} {'ratio':>7}  statut")
+    for key, reference, current, ratio, status in rows:
+        ratio_text = f'{ratio:.2f}' if ratio is not None else '-'
+        print(f"{key:<42} {_format_ns(reference):>12} {_format_ns(current):>12} {ratio_text:>7}  {status}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'machine': machine_info(), 'calibration_ns': calibration,
+                       'results': results}, f, indent=2)
+
+    if args.update_baseline:
+        merged = dict(baseline.get('results', {}), **results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': machine_info(), 'calibration_ns': calibration,
+                       'results': dict(sorted(merged.items()))}, f, indent=2)
+            f.write('\n')
+        print(f"Référence mise à jour : {args.baseline}")
+        return 0
+
+    regressions = [row for row in rows if row[4] == 'regression']
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Serveurs locaux simulant WooCommerce et Odoo pour les benchmarks.
+
+- FakeWooCommerce : API REST ``/wp-json/wc/v3/orders`` (pagination par
+  ``page`` ou ``offset``, en-têtes X-WP-Total / X-WP-TotalPages, filtre
+  ``after`` sur ``date_created_gmt``) ;
+- FakeOdoo : endpoints XML-RPC ``/xmlrpc/2/common`` (authenticate) et
+  ``/xmlrpc/2/object`` (execute_kw ``create``), ainsi que ``/jsonrpc``
+  (services ``common`` et ``object``).
+
+Les deux serveurs acceptent une latence configurable (``latency`` et
+``jitter``, en secondes) et répondent 429 à une proportion ``throttle_rate``
+des requêtes (avec l'en-tête Retry-After). Ils comptent les requêtes reçues
+et les réponses 429 émises.
+
+Les serveurs tournent dans des threads du processus courant. Ils exercent
+la sérialisation JSON/XML-RPC et la pile HTTP réelles des clients, sans
+dépendre d'une boutique ni d'une instance Odoo.
+
+Exemple :
+    with FakeWooCommerce(latency=0.02) as wc, FakeOdoo(throttle_rate=0.01) as odoo:
+        wc.add_orders(100)
+        configure_settings(wc.url, odoo.url)
+        SyncManager().sync_orders()
+"""
+
+import itertools
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xmlrpc.server import SimpleXMLRPCDispatcher, SimpleXMLRPCRequestHandler
+
+from fixtures import make_order
+
+
+class _StandIn:
+    """Serveur HTTP lancé dans un thread, utilisable comme gestionnaire de contexte."""
+
+    server_class = ThreadingHTTPServer
+
+    def __init__(self, handler, latency=0.0, jitter=0.0, throttle_rate=0.0, seed=0):
+        """
+        Args:
+            handler: Classe de gestionnaire de requêtes
+            latency (float): Latence ajoutée à chaque réponse (s)
+            jitter (float): Variation aléatoire maximale de la latence (s)
+            throttle_rate (float): Proportion de requêtes rejetées en 429
+            seed (int): Graine du tirage des latences et des rejets
+        """
+        self.server = self.server_class(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.requests = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self):
+        """
+        Applique la latence simulée et décide si la requête est rejetée.
+
+        Returns:
+            bool: True si la requête doit recevoir une réponse 429
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            rejected = self.throttle_rate > 0 and self._rng.random() < self.throttle_rate
+            if rejected:
+                self.throttled += 1
+        if delay:
+            time.sleep(delay)
+        return not rejected
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _QuietHandler:
+    """Gestionnaire sans journal d'accès, avec réponses JSON et 429."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_throttled(self):
+        self._send_json(429, {'code': 'too_many_requests'}, {'Retry-After': 1})
+
+
+class _WooCommerceHandler(_QuietHandler, BaseHTTPRequestHandler):
+    """Gestionnaire des requêtes REST WooCommerce."""
+
+    def do_GET(self):
+        standin = self.server.standin
+        if not standin.admit():
+            self._send_throttled()
+            return
+        url = urlparse(self.path)
+        if not url.path.rstrip('/').endswith('/orders'):
+            self._send_json(404, {'code': 'rest_no_route'})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        orders = standin.select(query.get('status'), query.get('after'))
+        per_page = int(query.get('per_page', 10))
+        if 'offset' in query:
+            start = int(query['offset'])
+        else:
+            start = (int(query.get('page', 1)) - 1) * per_page
+        page = orders[start:start + per_page]
+        if '_fields' in query:
+            fields = query['_fields'].split(',')
+            page = [{field: order[field] for field in fields if field in order} for order in page]
+        self._send_json(200, page, {
+            'X-WP-Total': len(orders),
+            'X-WP-TotalPages': max(math.ceil(len(orders) / per_page), 1),
+        })
+
+
+class FakeWooCommerce(_StandIn):
+    """
+    Boutique WooCommerce simulée, alimentée par ``add_orders`` ou ``extend``.
+    """
+
+    def __init__(self, **options):
+        """
+        Args:
+            **options: Latence et rejets simulés (voir _StandIn)
+        """
+        super().__init__(_WooCommerceHandler, **options)
+        self.orders = []
+        self._ids = itertools.count(1)
+
+    def add_orders(self, count, lines=3, rng=None, created_gmt='2024-01-01T10:00:00'):
+        """
+        Ajoute des commandes synthétiques simples à la boutique.
+
+        Args:
+            count (int): Nombre de commandes
+            lines (int): Nombre de lignes par commande
+            rng (random.Random, optional): Générateur pseudo-aléatoire
+            created_gmt (str): Date de création GMT des commandes
+        """
+        with self._lock:
+            for _ in range(count):
+                order = make_order(next(self._ids), lines=lines, rng=rng)
+                order['date_created_gmt'] = created_gmt
+                self.orders.append(order)
+
+    def extend(self, orders):
+        """
+        Ajoute des commandes déjà construites (ex. par OrderGenerator).
+
+        Args:
+            orders (list): Commandes au format WooCommerce
+        """
+        with self._lock:
+            self.orders.extend(orders)
+
+    def clear(self):
+        """Vide la boutique (les identifiants continuent de croître)."""
+        with self._lock:
+            self.orders = []
+
+    def select(self, status=None, after=None):
+        """Commandes correspondant aux filtres ``status`` et ``after``."""
+        with self._lock:
+            orders = list(self.orders)
+        if status:
+            orders = [order for order in orders if order.get('status') == status]
+        if after:
+            after = after[:19]
+            orders = [order for order in orders if order.get('date_created_gmt', '') > after]
+        return orders
+
+
+class _OdooHandler(_QuietHandler, SimpleXMLRPCRequestHandler):
+    """Gestionnaire XML-RPC (``/xmlrpc/2/*``) et JSON-RPC (``/jsonrpc``)."""
+
+    rpc_paths = ('/xmlrpc/2/common', '/xmlrpc/2/object')
+
+    def do_POST(self):
+        standin = self.server.standin
+        if not standin.admit():
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self._send_throttled()
+            return
+        if self.path == '/jsonrpc':
+            self._do_jsonrpc()
+            return
+        super().do_POST()
+
+    def _do_jsonrpc(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        params = request.get('params', {})
+        try:
+            result = self.server.standin.dispatch(
+                f"/{params.get('service')}", params.get('method'), params.get('args', [])
+            )
+            response = {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+        except Exception as e:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': 200, 'message': str(e)}}
+        self._send_json(200, response)
+
+    def _dispatch(self, method, params):
+        return self.server.standin.dispatch(self.path, method, params)
+
+
+class _XMLRPCServer(ThreadingHTTPServer, SimpleXMLRPCDispatcher):
+    """Serveur XML-RPC multi-threadé."""
+
+    _send_traceback_header = False
+    logRequests = False
+
+    def __init__(self, address, handler):
+        ThreadingHTTPServer.__init__(self, address, handler)
+        SimpleXMLRPCDispatcher.__init__(self, allow_none=True, encoding=None)
+
+
+class FakeOdoo(_StandIn):
+    """
+    Instance Odoo simulée : authentification et création d'enregistrements.
+    """
+
+    server_class = _XMLRPCServer
+
+    def __init__(self, **options):
+        """
+        Args:
+            **options: Latence et rejets simulés (voir _StandIn)
+        """
+        super().__init__(_OdooHandler, **options)
+        self.created = {}
+        self._ids = itertools.count(1)
+
+    def dispatch(self, path, method, params):
+        """Traite un appel RPC (XML-RPC ou JSON-RPC)."""
+        if path.endswith('/common') and method in ('authenticate', 'login'):
+            return 2
+        if path.endswith('/object') and method == 'execute_kw':
+            model, rpc_method = params[3], params[4]
+            if rpc_method == 'create':
+                with self._lock:
+                    record_id = next(self._ids)
+                    self.created[model] = self.created.get(model, 0) + 1
+                return record_id
+        raise Exception(f"Méthode non simulée : {path} {method}")
+
+
+def configure_settings(wc_url, odoo_url):
+    """
+    Pointe la configuration de l'application vers les serveurs simulés.
+
+    Args:
+        wc_url (str): URL de la boutique simulée (FakeWooCommerce.url)
+        odoo_url (str): URL de l'instance Odoo simulée (FakeOdoo.url)
+    """
+    from config import settings
+
+    settings.WC_API_URL = wc_url
+    settings.WC_CONSUMER_KEY = 'ck_bench'
+    settings.WC_CONSUMER_SECRET = 'cs_bench'
+    settings.ODOO_URL = odoo_url
+    settings.ODOO_DB = 'bench'
+    settings.ODOO_USER = 'admin'
+    settings.ODOO_PASSWORD = 'admin'
+
+
+def prepare_environment(workdir):
+    """
+    Prépare les variables d'environnement d'une exécution de benchmark.
+
+    À appeler avant tout import de ``config`` : la configuration est lue à
+    l'import. Les métriques passent en mode multi-processus comme dans les
+    points d'entrée (``init_metrics``).
+
+    Args:
+        workdir (str): Dossier temporaire de l'exécution
+    """
+    for key, value in (
+        ('WC_API_URL', 'http://127.0.0.1'), ('WC_CONSUMER_KEY', 'ck_bench'),
+        ('WC_CONSUMER_SECRET', 'cs_bench'), ('ODOO_URL', 'http://127.0.0.1'),
+        ('ODOO_DB', 'bench'), ('ODOO_USER', 'admin'), ('ODOO_PASSWORD', 'admin'),
+    ):
+        os.environ.setdefault(key, value)
+    # Importé avant de fixer le dossier : prometheus_client passerait sinon
+    # lui-même en mode multi-processus, sans l'identifiant de processus du module
+    from utils.metrics import init_metrics
+
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(workdir, 'metrics')
+    init_metrics()
+
+
+def isolate_state(workdir):
+    """
+    Redirige la base locale, l'audit, la date de dernière synchronisation,
+    les curseurs et le fichier d'avancement vers le dossier de l'exécution.
+
+    Args:
+        workdir (str): Dossier temporaire de l'exécution
+    """
+    from utils import database, helpers, progress, sync_state
+
+    database.DB_PATH = os.path.join(workdir, 'sync_local.db')
+    progress.PROGRESS_FILE = os.path.join(workdir, 'sync_progress.json')
+    helpers.AUDIT_LOG = os.path.join(workdir, 'sync_audit.csv')
+    sync_state.SYNC_FILE = os.path.join(workdir, 'last_synced_at.txt')
+    sync_state.CURSOR_FILE = os.path.join(workdir, 'sync_cursors.json')
@@ -2,6 +2,10 @@
 Module de configuration centralisé pour l'application.
 Ce module charge et valide les variables d'environnement nécessaires
 pour la synchronisation entre WooCommerce et Odoo.
+
+La validation n'a pas lieu à l'import : les points d'entrée qui appellent
+les API (scripts/sync_orders.py, scripts/webhook_server.py) appellent
+validate_settings() au démarrage.
 """
 
 import os
@@ -33,7 +37,15 @@ ODOO_PASSWORD = os.getenv("ODOO_PASSWORD")
 # Fréquence de synchronisation en minutes (défaut: 10 minutes)
 SYNC_FREQUENCY = int(os.getenv("SYNC_FREQUENCY", 10))
 
-def validate_settings():
+# Limites de débit côté client, en appels par minute (adapter selon les quotas)
+WC_CALLS_PER_MINUTE = int(os.getenv("WC_CALLS_PER_MINUTE", 80))
+ODOO_CALLS_PER_MINUTE = int(os.getenv("ODOO_CALLS_PER_MINUTE", 80))
+# Budget propre au retour des statuts de commande vers WooCommerce (orders/batch)
+WC_STATUS_CALLS_PER_MINUTE = int(os.getenv("WC_STATUS_CALLS_PER_MINUTE", 20))
+# Capacité d'écriture Odoo partagée entre les boutiques (mode multi-boutiques)
+ODOO_WRITE_CALLS_PER_MINUTE = int(os.getenv("ODOO_WRITE_CALLS_PER_MINUTE", ODOO_CALLS_PER_MINUTE))
+
+def validate_settings(woocommerce=True):
     """
     Valide que toutes les variables d'environnement requises sont définies.
     
@@ -45,15 +57,19 @@ def validate_settings():
     - ODOO_DB : Nom de la base de données Odoo
     - ODOO_USER : Nom d'utilisateur Odoo
     - ODOO_PASSWORD : Mot de passe Odoo
+
+    Args:
+        woocommerce (bool): Vérifier aussi les variables WooCommerce (inutiles
+            en mode multi-boutiques, voir config/stores.py)
     
     Raises:
         EnvironmentError: Si une ou plusieurs variables sont manquantes
     """
     missing = []
-    for var in [
-        "WC_API_URL", "WC_CONSUMER_KEY", "WC_CONSUMER_SECRET",
-        "ODOO_URL", "ODOO_DB", "ODOO_USER", "ODOO_PASSWORD"
-    ]:
+    required = ["ODOO_URL", "ODOO_DB", "ODOO_USER", "ODOO_PASSWORD"]
+    if woocommerce:
+        required = ["WC_API_URL", "WC_CONSUMER_KEY", "WC_CONSUMER_SECRET"] + required
+    for var in required:
         if not globals().get(var):
             missing.append(var)
     if missing:
@@ -61,6 +77,3 @@ def validate_settings():
             f"Variables d'environnement manquantes : {', '.join(missing)}. "
             "Vérifiez votre fichier .env."
         )
-
-# Validation des paramètres au démarrage
-validate_settings()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Configuration multi-boutiques : plusieurs boutiques WooCommerce
+synchronisées vers une même instance Odoo.
+
+Les boutiques sont décrites dans un fichier JSON (STORES_FILE, ``stores.json``
+à la racine du projet par défaut), sous forme de liste :
+
+    [
+        {"name": "boutique_fr", "wc_api_url": "https://fr.example.com/wp-json/wc/v3",
+         "company_id": 1, "pricelist_id": 1, "calls_per_minute": 80, "weight": 2},
+        {"name": "boutique_be", "wc_api_url": "https://be.example.com/wp-json/wc/v3",
+         "company_id": 2, "pricelist_id": 3}
+    ]
+
+Les clés d'API peuvent figurer dans le fichier (``consumer_key``,
+``consumer_secret``) ou, de préférence, dans l'environnement :
+``WC_CONSUMER_KEY_<NOM>`` et ``WC_CONSUMER_SECRET_<NOM>`` (nom en
+majuscules, ex. ``WC_CONSUMER_KEY_BOUTIQUE_FR``).
+
+Sans fichier de boutiques, la synchronisation reste à une seule boutique
+(variables WC_API_URL, WC_CONSUMER_KEY et WC_CONSUMER_SECRET).
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+
+from config import settings
+
+STORES_FILE = os.getenv('STORES_FILE', os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../stores.json')))
+
+# Nom de boutique : sert de suffixe aux fichiers d'état locaux
+_NAME = re.compile(r'^[a-z0-9_-]+$')
+
+
+@dataclass(frozen=True)
+class Store:
+    """
+    Boutique WooCommerce synchronisée vers Odoo.
+
+    Attributes:
+        name (str): Nom court (minuscules, chiffres, ``_`` et ``-``)
+        wc_api_url (str): URL de l'API WooCommerce de la boutique
+        consumer_key (str): Clé consommateur WooCommerce
+        consumer_secret (str): Secret consommateur WooCommerce
+        company_id (int): Société Odoo des commandes de la boutique
+        pricelist_id (int): Liste de prix Odoo des commandes de la boutique
+        calls_per_minute (int): Budget d'appels WooCommerce par minute
+        status_calls_per_minute (int): Budget du retour des statuts (orders/batch)
+        weight (int): Part relative de la capacité d'écriture Odoo partagée
+    """
+
+    name: str
+    wc_api_url: str
+    consumer_key: str
+    consumer_secret: str
+    company_id: int = None
+    pricelist_id: int = None
+    calls_per_minute: int = settings.WC_CALLS_PER_MINUTE
+    status_calls_per_minute: int = settings.WC_STATUS_CALLS_PER_MINUTE
+    weight: int = 1
+
+    def odoo_order_defaults(self):
+        """
+        Champs ajoutés aux commandes Odoo de la boutique.
+
+        Returns:
+            dict: Société et liste de prix configurées
+        """
+        return {field: value for field, value in (
+            ('company_id', self.company_id), ('pricelist_id', self.pricelist_id)
+        ) if value is not None}
+
+
+def load_stores(path=None):
+    """
+    Charge la liste des boutiques.
+
+    Args:
+        path (str, optional): Fichier JSON des boutiques (STORES_FILE par défaut)
+
+    Returns:
+        list: Boutiques (Store), vide si le fichier n'existe pas
+
+    Raises:
+        EnvironmentError: Si une boutique est incomplète ou mal nommée
+    """
+    path = path or STORES_FILE
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        entries = json.load(f)
+    stores, errors = [], []
+    for entry in entries:
+        name = entry.get('name', '')
+        if not _NAME.match(name):
+            errors.append(f"nom de boutique invalide : {name!r}")
+            continue
+        if any(store.name == name for store in stores):
+            errors.append(f"boutique {name} déclarée deux fois")
+            continue
+        values = dict(entry)
+        suffix = name.upper().replace('-', '_')
+        values.setdefault('consumer_key', os.getenv(f'WC_CONSUMER_KEY_{suffix}'))
+        values.setdefault('consumer_secret', os.getenv(f'WC_CONSUMER_SECRET_{suffix}'))
+        missing = [key for key in ('wc_api_url', 'consumer_key', 'consumer_secret') if not values.get(key)]
+        if missing:
+            errors.append(f"boutique {name} : {', '.join(missing)} manquant(s)")
+            continue
+        try:
+            stores.append(Store(**values))
+        except TypeError as e:
+            errors.append(f"boutique {name} : {e}")
+    if errors:
+        raise EnvironmentError(f"Configuration des boutiques invalide ({path}) : {' ; '.join(errors)}")
+    return stores
+
+
+def store_names(stores=None):
+    """
+    Noms des boutiques dont l'état local est suivi (relevés, purge).
+
+    Args:
+        stores (list, optional): Boutiques (Store), ``load_stores()`` par défaut
+
+    Returns:
+        list: Noms des boutiques, ou ``[None]`` en mode à une seule boutique
+            (à passer tels quels à ``use_store``)
+    """
+    stores = load_stores() if stores is None else stores
+    return [store.name for store in stores] or [None]
@@ -0,0 +1,256 @@
+"""
+Synchronisation des clients d'Odoo vers WooCommerce.
+
+Les partenaires clients (``res.partner`` avec ``customer_rank`` positif et
+une adresse email) modifiés dans Odoo sont relevés par ``write_date``, par
+pages de CUSTOMER_PAGE_SIZE, puis convertis par ``map_odoo_customer_to_wc``.
+Ils sont envoyés par lots de CUSTOMER_BATCH_SIZE (100, maximum accepté par
+WooCommerce) via ``customers/batch`` : mise à jour si le client WooCommerce
+associé est connu, création sinon. Une création refusée parce que l'email
+existe déjà est convertie en mise à jour du client trouvé par email.
+
+Prévention des boucles : l'empreinte de la dernière fiche envoyée est
+conservée par partenaire (table wc_customers). Un partenaire dont la fiche
+convertie n'a pas changé n'est pas renvoyé, ce qui écarte les
+modifications de champs non synchronisés. Toute écriture de partenaire
+WooCommerce -> Odoo doit enregistrer sa fiche par ``remember_partner``
+pour ne pas revenir vers la boutique : le client Odoo de SyncManager la
+reçoit en ``on_partner_written`` et l'appelle après
+``OdooClient.create_customer``, mais aucune synchronisation ne crée
+aujourd'hui de partenaire.
+
+Les pages sont lues par clé (``write_date``, ``id``) et le curseur
+(sync_cursors.customers.json), position ``[write_date, id]`` du dernier
+partenaire lu, avance après chaque page envoyée ; une requête en échec
+interrompt le relevé, repris à la page en cours au passage suivant. Les partenaires refusés un par un sont conservés
+avec leur nombre de tentatives (sync_cursors.customers_retry.json) et
+renvoyés aux passages suivants, puis abandonnés après
+CUSTOMER_MAX_ATTEMPTS tentatives.
+
+Exemple :
+    customers = CustomerSync()
+    customers.run_once()
+"""
+
+import os
+
+from core.fingerprint import payload_fingerprint
+from core.models.customer import map_odoo_customer_to_wc
+from core.models.mapping import COUNTRY_IDS
+from core.reverse_sync import ReverseSync, batch_results, cursor_position, read_changed
+from utils.database import get_wc_customers, init_db, save_wc_customers
+from utils.logging_utils import log_error, log_info, log_warning
+from utils.metrics import customer_sync_counter
+from utils.sync_state import get_cursor, set_cursor
+
+# Partenaires lus par requête Odoo
+CUSTOMER_PAGE_SIZE = int(os.getenv('CUSTOMER_PAGE_SIZE', 200))
+# Clients par requête groupée WooCommerce (100 au plus)
+CUSTOMER_BATCH_SIZE = int(os.getenv('CUSTOMER_BATCH_SIZE', 100))
+# Période de relevé des changements dans Odoo en mode résident (s)
+CUSTOMER_POLL_INTERVAL = float(os.getenv('CUSTOMER_POLL_INTERVAL', 60))
+# Recouvrement du curseur (s, voir core/reverse_sync.py)
+CUSTOMER_CURSOR_OVERLAP = int(os.getenv('CUSTOMER_CURSOR_OVERLAP', 60))
+# Envois d'un partenaire refusé avant abandon
+CUSTOMER_MAX_ATTEMPTS = int(os.getenv('CUSTOMER_MAX_ATTEMPTS', 5))
+
+PARTNER_FIELDS = ['name', 'email', 'phone', 'street', 'city', 'zip', 'country_id', 'write_date']
+# Codes d'erreur WooCommerce : email déjà utilisé, client supprimé
+_EMAIL_EXISTS = 'registration-error-email-exists'
+_INVALID_ID = 'woocommerce_rest_invalid_id'
+# ID de pays Odoo -> code pays WooCommerce
+_COUNTRY_CODES = {country_id: code for code, country_id in COUNTRY_IDS.items()}
+
+CURSOR = 'customers'
+# Partenaires refusés à renvoyer : identifiant -> tentatives
+RETRY_CURSOR = 'customers_retry'
+
+
+def partner_to_wc(partner):
+    """
+    Convertit un partenaire Odoo (lu par search_read ou au format d'écriture)
+    en client WooCommerce.
+
+    Args:
+        partner (dict): Partenaire Odoo
+
+    Returns:
+        dict: Client au format WooCommerce
+    """
+    # Champs vides d'Odoo : False
+    values = {field: value if value is not False else '' for field, value in partner.items()}
+    country = values.get('country_id')
+    # Champ many2one : [id, nom]
+    if isinstance(country, (list, tuple)):
+        country = country[0]
+    values['country_id'] = _COUNTRY_CODES.get(country, '')
+    return map_odoo_customer_to_wc(values)
+
+
+def remember_partner(odoo_id, partner, wc_id=None):
+    """
+    Enregistre la fiche d'un partenaire écrit dans Odoo depuis WooCommerce,
+    pour qu'elle ne soit pas renvoyée vers la boutique.
+
+    Args:
+        odoo_id (int): Identifiant du partenaire Odoo
+        partner (dict): Valeurs écrites dans Odoo
+        wc_id (int, optional): Client WooCommerce d'origine
+    """
+    init_db()
+    known = get_wc_customers([odoo_id]).get(odoo_id, (None, None))
+    save_wc_customers({odoo_id: (wc_id or known[0], payload_fingerprint(partner_to_wc(partner)))})
+
+
+class CustomerSync(ReverseSync):
+    """
+    Relevé des partenaires modifiés dans Odoo et envoi groupé vers WooCommerce.
+    """
+
+    loop_error = "Erreur lors de la synchronisation des clients"
+
+    def __init__(self, wc=None, odoo=None, page_size=CUSTOMER_PAGE_SIZE, batch_size=CUSTOMER_BATCH_SIZE):
+        """
+        Args:
+            wc (WooCommerceClient, optional): Client WooCommerce
+            odoo (OdooClient, optional): Client Odoo
+            page_size (int): Partenaires lus par requête Odoo
+            batch_size (int): Clients par requête groupée WooCommerce
+        """
+        super().__init__(wc, odoo)
+        self.page_size = page_size
+        self.batch_size = batch_size
+
+    def run_once(self):
+        """
+        Renvoie les partenaires refusés aux passages précédents, puis relève les
+        partenaires modifiés depuis le curseur et les envoie, page par page.
+
+        Returns:
+            dict: Nombre de partenaires par issue ('created', 'updated', 'skipped',
+            'failed'), et ``interrupted`` si une requête a échoué
+        """
+        stats = dict.fromkeys(('created', 'updated', 'skipped', 'failed'), 0)
+        cursor = get_cursor(CURSOR)
+        retry = get_cursor(RETRY_CURSOR) or {}
+        failed = set()
+        domain = [('customer_rank', '>', 0), ('email', '!=', False)]
+        try:
+            if retry:
+                # Partenaires supprimés ou sans email depuis : abandonnés
+                partners = self.odoo.search_read(
+                    'res.partner', domain + [('id', 'in', [int(odoo_id) for odoo_id in retry])], PARTNER_FIELDS
+                )
+                self.push(partners, stats, failed)
+            for partners in read_changed(self.odoo, 'res.partner', domain, PARTNER_FIELDS,
+                                         cursor_position(cursor, CUSTOMER_CURSOR_OVERLAP), self.page_size):
+                self.push(partners, stats, failed)
+                last = [partners[-1]['write_date'], partners[-1]['id']]
+                if cursor is None or isinstance(cursor, str) or last > cursor:
+                    cursor = last
+                    set_cursor(CURSOR, cursor)
+        except Exception as e:
+            log_error("Synchronisation des clients interrompue, reprise au prochain passage", exc_info=e)
+            stats['interrupted'] = True
+        self._save_retry(retry, failed, stats.get('interrupted', False))
+        for outcome in ('created', 'updated', 'skipped', 'failed'):
+            if stats[outcome]:
+                customer_sync_counter.labels(outcome).inc(stats[outcome])
+        log_info(f"Clients WooCommerce : {stats['created']} créé(s), {stats['updated']} mis à jour, "
+                 f"{stats['skipped']} inchangé(s), {stats['failed']} échec(s)")
+        return stats
+
+    def _save_retry(self, retry, failed, interrupted):
+        """
+        Enregistre les partenaires refusés à renvoyer au passage suivant.
+
+        Args:
+            retry (dict): Partenaires à renvoyer en début de passage -> tentatives
+            failed (set): Partenaires refusés pendant le passage
+            interrupted (bool): Passage interrompu : les partenaires à renvoyer
+                non traités sont conservés
+        """
+        pending = dict(retry) if interrupted else {}
+        for odoo_id in sorted(failed):
+            attempts = retry.get(str(odoo_id), 0) + 1
+            if attempts >= CUSTOMER_MAX_ATTEMPTS:
+                log_warning(f"Client Odoo {odoo_id} abandonné après {attempts} envoi(s) refusé(s)")
+                pending.pop(str(odoo_id), None)
+                continue
+            pending[str(odoo_id)] = attempts
+        if pending != retry:
+            set_cursor(RETRY_CURSOR, pending or None)
+
+    def push(self, partners, stats, failed=None):
+        """
+        Envoie vers WooCommerce les partenaires dont la fiche a changé.
+
+        Args:
+            partners (list): Partenaires Odoo lus par search_read
+            stats (dict): Compteurs par issue, mis à jour
+            failed (set, optional): Partenaires refusés, complété
+
+        Raises:
+            WooCommerceAPIError: Si une requête groupée échoue
+        """
+        links = get_wc_customers(partner['id'] for partner in partners)
+        operations = []
+        for partner in partners:
+            customer = partner_to_wc(partner)
+            fingerprint = payload_fingerprint(customer)
+            wc_id, known = links.get(partner['id'], (None, None))
+            if fingerprint == known:
+                # Fiche déjà échangée : écriture de la synchronisation ou champ non suivi
+                stats['skipped'] += 1
+                continue
+            operations.append((partner['id'], wc_id, customer, fingerprint))
+        failed = set() if failed is None else failed
+        for start in range(0, len(operations), self.batch_size):
+            retry = self._send(operations[start:start + self.batch_size], stats, failed)
+            if retry:
+                self._send(retry, stats, failed)
+
+    def _send(self, operations, stats, failed):
+        """
+        Envoie un lot de créations et de mises à jour.
+
+        Returns:
+            list: Créations refusées pour email existant, converties en mises à jour
+        """
+        creates = [op for op in operations if op[1] is None]
+        updates = [op for op in operations if op[1] is not None]
+        results = self.wc.batch_customers(
+            creates=[customer for _, _, customer, _ in creates],
+            updates=[dict(customer, id=wc_id) for _, wc_id, customer, _ in updates],
+        )
+        saved, retry = {}, []
+        for kind, ops in (('create', creates), ('update', updates)):
+            for (odoo_id, wc_id, customer, fingerprint), result, error in batch_results(ops, results[kind]):
+                if not error:
+                    saved[odoo_id] = (result.get('id', wc_id), fingerprint)
+                    stats['created' if kind == 'create' else 'updated'] += 1
+                    continue
+                if kind == 'create' and error.get('code') == _EMAIL_EXISTS:
+                    existing = self.wc.get_customer_by_email(customer['email'])
+                    if existing:
+                        retry.append((odoo_id, existing['id'], customer, fingerprint))
+                        continue
+                if kind == 'update' and error.get('code') == _INVALID_ID:
+                    # Client supprimé dans WooCommerce : recréé à la prochaine modification
+                    saved[odoo_id] = (None, None)
+                stats['failed'] += 1
+                failed.add(odoo_id)
+                log_warning(f"Client Odoo {odoo_id} refusé par WooCommerce : {error.get('message', error)}")
+        if saved:
+            save_wc_customers(saved)
+        return retry
+
+    def run(self, interval=CUSTOMER_POLL_INTERVAL, stop=None):
+        """
+        Boucle résidente : relevé et envoi toutes les ``interval`` secondes.
+
+        Args:
+            interval (float): Période de relevé (s)
+            stop (threading.Event, optional): Arrêt de la boucle
+        """
+        super().run(interval, stop)
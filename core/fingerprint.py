@@ -0,0 +1,138 @@
+"""
+Empreintes canoniques des commandes pour la détection de changements.
+
+Seuls les champs utiles à la synchronisation sont pris en compte, dans un
+ordre fixe, avec des montants normalisés en centimes, des identifiants et
+quantités sous forme canonique et des lignes triées : l'empreinte ne dépend
+donc ni de l'ordre des clés du JSON, ni du format des nombres ('10', '10.0',
+10.0, 10), ni des champs ignorés (liens, meta_data...).
+Le hachage utilise blake2b avec un condensé de 8 octets, bien plus rapide
+qu'un sha256 sur la représentation complète de la commande.
+
+Exemple :
+    if order_fingerprint(wc_order) != stored_fingerprint:
+        ...  # la commande a changé depuis la dernière synchronisation
+"""
+
+import json
+from decimal import Decimal, InvalidOperation
+from hashlib import blake2b
+
+from core.reconciliation import to_cents
+
+# Taille du condensé en octets (16 caractères hexadécimaux)
+DIGEST_SIZE = 8
+
+# Champs d'en-tête de commande pris en compte, dans l'ordre canonique
+ORDER_FIELDS = ('id', 'status', 'customer_id', 'currency', 'date_created')
+ORDER_MONEY_FIELDS = ('total', 'total_tax', 'shipping_total', 'discount_total')
+LINE_FIELDS = ('product_id', 'variation_id', 'quantity')
+LINE_MONEY_FIELDS = ('total', 'total_tax')
+# Identifiants et quantités, comparés par valeur numérique
+NUMERIC_FIELDS = frozenset(('id', 'customer_id', 'product_id', 'variation_id', 'quantity'))
+
+
+def _digest(data):
+    """Retourne le condensé hexadécimal blake2b de données binaires."""
+    return blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def canonical_number(value):
+    """
+    Forme canonique d'un identifiant ou d'une quantité.
+
+    2, '2', 2.0 et Decimal('2.00') donnent tous '2' ; 2.5 et '2.50' donnent
+    '2.5'. Une valeur non numérique (None, texte) est conservée telle quelle.
+
+    Args:
+        value: Valeur WooCommerce (int, float, Decimal ou str)
+
+    Returns:
+        str: Représentation canonique
+    """
+    if type(value) is int:
+        return str(value)
+    if value is None or isinstance(value, bool):
+        return str(value)
+    try:
+        number = Decimal(value.strip() if isinstance(value, str) else str(value))
+    except InvalidOperation:
+        return str(value)
+    if not number.is_finite():
+        return str(value)
+    if number == number.to_integral_value():
+        return str(int(number))
+    return format(number.normalize(), 'f')
+
+
+def _converters(fields):
+    """Conversion en texte de chaque champ : canonique pour les champs numériques."""
+    return tuple((field, canonical_number if field in NUMERIC_FIELDS else str) for field in fields)
+
+
+_ORDER_CONVERTERS = _converters(ORDER_FIELDS)
+_LINE_CONVERTERS = _converters(LINE_FIELDS)
+
+
+def _canonical_line(item):
+    """Représentation canonique d'une ligne de commande."""
+    get = item.get
+    return ":".join(
+        [convert(get(field)) for field, convert in _LINE_CONVERTERS]
+        + [str(to_cents(get(field))) for field in LINE_MONEY_FIELDS]
+    )
+
+
+def canonical_order(wc_order):
+    """
+    Construit la représentation canonique d'une commande.
+
+    Args:
+        wc_order (dict): Commande WooCommerce
+
+    Returns:
+        str: Valeurs normalisées des champs suivis, lignes triées
+
+    Raises:
+        ValueError: Si un montant n'est pas convertible
+    """
+    get = wc_order.get
+    header = (
+        [convert(get(field)) for field, convert in _ORDER_CONVERTERS]
+        + [str(to_cents(get(field))) for field in ORDER_MONEY_FIELDS]
+    )
+    lines = sorted(map(_canonical_line, get('line_items') or ()))
+    return "|".join(header) + "|" + ";".join(lines)
+
+
+def order_fingerprint(wc_order):
+    """
+    Calcule l'empreinte canonique d'une commande.
+
+    Args:
+        wc_order (dict): Commande WooCommerce
+
+    Returns:
+        str: Empreinte hexadécimale de 16 caractères
+
+    Raises:
+        ValueError: Si un montant n'est pas convertible
+    """
+    return _digest(canonical_order(wc_order).encode())
+
+
+def payload_fingerprint(data):
+    """
+    Calcule l'empreinte d'une structure JSON quelconque (clés triées).
+
+    Utile pour les données déjà normalisées, comme une commande au format
+    Odoo ou une fiche client à envoyer.
+
+    Args:
+        data: Structure sérialisable en JSON
+
+    Returns:
+        str: Empreinte hexadécimale de 16 caractères
+    """
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return _digest(encoded.encode())
@@ -0,0 +1,237 @@
+"""
+Santé approfondie de la synchronisation, servie depuis un cache.
+
+Un thread de fond (``HealthProber``) relève toutes les HEALTH_PROBE_INTERVAL
+secondes :
+- l'état local : curseur de synchronisation (last_synced_at) et son retard,
+  date de la dernière exécution réussie, taille et ancienneté de la file des
+  nouvelles tentatives (pending_orders) ; en mode multi-boutiques
+  (config/stores.py), celui de chaque boutique, sous ``use_store`` ;
+- l'accessibilité de WooCommerce et d'Odoo, avec le temps d'aller-retour
+  mesuré (requêtes non authentifiées, bornées par HEALTH_PROBE_TIMEOUT).
+
+L'endpoint ``/health/deep`` ne fait que lire le dernier relevé : un
+répartiteur de charge qui l'interroge en boucle ne déclenche aucun appel
+aux API et n'attend jamais une API lente.
+
+Exemple :
+    prober = HealthProber().start()
+    report = prober.report()
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import settings
+from config.stores import store_names
+from utils import database, sync_state
+from utils.logging_utils import log_error
+from utils.store_context import store_path, use_store
+
+# Période de relevé et délai maximal d'une sonde (s)
+HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', 30))
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', 5))
+# Retard du curseur au-delà duquel la synchronisation est jugée en retard (s)
+HEALTH_MAX_CURSOR_LAG = float(os.getenv('HEALTH_MAX_CURSOR_LAG', 3 * settings.SYNC_FREQUENCY * 60))
+
+
+def probe_woocommerce(timeout=HEALTH_PROBE_TIMEOUT):
+    """
+    Requête GET sur l'URL de l'API WooCommerce.
+
+    Sans authentification, une réponse 4xx prouve l'accessibilité ; une
+    erreur 5xx (boutique ou proxy en panne) lève une exception.
+    """
+    import requests
+
+    response = requests.get(settings.WC_API_URL, timeout=timeout)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response.status_code
+
+
+def probe_odoo(timeout=HEALTH_PROBE_TIMEOUT):
+    """Appel XML-RPC ``version`` d'Odoo (sans authentification)."""
+    import requests
+    import xmlrpc.client
+
+    response = requests.post(
+        f"{settings.ODOO_URL}/xmlrpc/2/common", data=xmlrpc.client.dumps((), 'version'),
+        headers={'Content-Type': 'text/xml'}, timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.status_code
+
+
+UPSTREAMS = {
+    'woocommerce': probe_woocommerce,
+    'odoo': probe_odoo,
+}
+
+
+def local_state(now=None):
+    """
+    État local de la synchronisation (boutique courante, voir ``use_store``).
+
+    Args:
+        now (float, optional): Instant de référence (maintenant par défaut)
+
+    Returns:
+        dict: Curseur, retard, dernière exécution réussie et file des nouvelles tentatives
+    """
+    now = time.time() if now is None else now
+    state = {'cursor': sync_state.get_last_synced_at(), 'cursor_lag_s': None,
+             'last_success_at': None, 'retry_backlog': None, 'oldest_retry_age_s': None}
+    sync_file, db_path = store_path(sync_state.SYNC_FILE), store_path(database.DB_PATH)
+    if state['cursor']:
+        cursor = datetime.fromisoformat(state['cursor']).timestamp()
+        state['cursor_lag_s'] = round(max(now - cursor, 0), 1)
+    if os.path.exists(sync_file):
+        # Le curseur n'est écrit qu'à la fin d'une exécution réussie
+        state['last_success_at'] = datetime.fromtimestamp(
+            os.path.getmtime(sync_file)).astimezone().isoformat()
+    if os.path.exists(db_path):
+        with sqlite3.connect(db_path, timeout=HEALTH_PROBE_TIMEOUT) as conn:
+            # Commandes abandonnées (database.PENDING_MAX_ATTEMPTS) : plus retentées
+            count, oldest = conn.execute(
+                'SELECT COUNT(*), MIN(created_at) FROM pending_orders WHERE attempts < ?',
+                (database.PENDING_MAX_ATTEMPTS,)
+            ).fetchone()
+        state['retry_backlog'] = count
+        state['oldest_retry_age_s'] = round(max(now - oldest, 0), 1) if oldest is not None else None
+    return state
+
+
+class HealthProber:
+    """
+    Relevé périodique de la santé dans un thread de fond.
+    """
+
+    def __init__(self, upstreams=None, interval=HEALTH_PROBE_INTERVAL, timeout=HEALTH_PROBE_TIMEOUT,
+                 stores=None):
+        """
+        Args:
+            upstreams (dict, optional): Nom -> sonde ``f(timeout)`` levant une
+                exception si l'API est injoignable (UPSTREAMS par défaut)
+            interval (float): Période de relevé (s)
+            timeout (float): Délai maximal d'une sonde (s)
+            stores (list, optional): Boutiques (Store) dont l'état local est
+                relevé (``load_stores()`` à chaque relevé par défaut)
+        """
+        self.upstreams = UPSTREAMS if upstreams is None else upstreams
+        self.stores = stores
+        self.interval = interval
+        self.timeout = timeout
+        self._report = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre le thread de relevé (sans effet s'il tourne déjà)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Arrête le thread de relevé."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def _probe(self, probe):
+        start = time.perf_counter()
+        try:
+            probe(self.timeout)
+        except Exception as e:
+            return {'reachable': False, 'rtt_ms': None, 'error': str(e)[:200]}
+        return {'reachable': True, 'rtt_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+    def _local_state(self, now, store=None):
+        try:
+            with use_store(store):
+                return local_state(now)
+        except Exception as e:
+            where = f" de la boutique {store}" if store else ""
+            log_error(f"Relevé de santé : lecture de l'état local{where} impossible", exc_info=e)
+            return {'error': str(e)[:200]}
+
+    def refresh(self):
+        """
+        Effectue un relevé complet et remplace le cache.
+
+        L'état local est rangé sous ``sync`` en mode à une seule boutique,
+        sous ``stores`` (boutique -> état) en mode multi-boutiques.
+
+        Returns:
+            dict: Relevé
+        """
+        report = {'checked_at': time.time()}
+        try:
+            names = store_names(self.stores)
+        except Exception as e:
+            log_error("Relevé de santé : lecture des boutiques impossible", exc_info=e)
+            report['sync'] = {'error': str(e)[:200]}
+            names = []
+        if names == [None]:
+            report['sync'] = self._local_state(report['checked_at'])
+        elif names:
+            report['stores'] = {name: self._local_state(report['checked_at'], name) for name in names}
+        # Sondes en parallèle : le relevé dure au plus un délai de sonde
+        results = {}
+        threads = [
+            threading.Thread(target=lambda n=name, p=probe: results.__setitem__(n, self._probe(p)),
+                             daemon=True)
+            for name, probe in self.upstreams.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(self.timeout + 1)
+        report['upstreams'] = {
+            name: results.get(name, {'reachable': False, 'rtt_ms': None, 'error': 'timeout'})
+            for name in self.upstreams
+        }
+        self._report = report
+        return report
+
+    def report(self, now=None):
+        """
+        Dernier relevé, enrichi de son âge et d'un statut global.
+
+        Le statut vaut ``down`` si aucun relevé récent n'existe (thread
+        arrêté ou bloqué) ou si l'état local (d'une boutique) est illisible,
+        ``degraded`` si une API est injoignable ou si le curseur d'une
+        boutique est en retard, ``ok`` sinon.
+
+        Args:
+            now (float, optional): Instant de référence (maintenant par défaut)
+
+        Returns:
+            dict: Relevé avec ``status`` et ``age_s``
+        """
+        now = time.time() if now is None else now
+        report = self._report
+        if report is None:
+            return {'status': 'down', 'reason': 'aucun relevé disponible'}
+        age = now - report['checked_at']
+        result = dict(report, age_s=round(age, 1))
+        states = list(report.get('stores', {}).values()) or [report['sync']]
+        lagging = any(state.get('cursor_lag_s') is not None and state['cursor_lag_s'] > HEALTH_MAX_CURSOR_LAG
+                      for state in states)
+        if age > 3 * self.interval + self.timeout or any('error' in state for state in states):
+            result['status'] = 'down'
+        elif not all(upstream['reachable'] for upstream in report['upstreams'].values()) or lagging:
+            result['status'] = 'degraded'
+        else:
+            result['status'] = 'ok'
+        return result
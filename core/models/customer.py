@@ -2,8 +2,17 @@
 Module de mapping des clients entre WooCommerce et Odoo.
 Ce module gère la transformation des données clients
 entre les formats WooCommerce et Odoo.
+Le sens WooCommerce -> Odoo utilise la spécification CUSTOMER_SPEC
+(core/models/mapping.py).
 """
 
+from core.models.mapping import CUSTOMER_SPEC, compile_mapping
+
+# Sous-ensemble de la spécification utilisé pour les fiches partenaires
+_map_customer = compile_mapping(CUSTOMER_SPEC, only=(
+    'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'
+))
+
 def map_wc_customer_to_odoo(wc_customer):
     """
     Convertit un client WooCommerce en format Odoo.
@@ -26,15 +35,7 @@ def map_wc_customer_to_odoo(wc_customer):
     Returns:
         dict: Client au format Odoo
     """
-    return {
-        "name": f"{wc_customer.get('first_name', '')} {wc_customer.get('last_name', '')}".strip(),
-        "email": wc_customer.get("email", ""),
-        "phone": wc_customer.get("billing", {}).get("phone", ""),
-        "street": wc_customer.get("billing", {}).get("address_1", ""),
-        "city": wc_customer.get("billing", {}).get("city", ""),
-        "zip": wc_customer.get("billing", {}).get("postcode", ""),
-        "country_id": wc_customer.get("billing", {}).get("country", "")
-    }
+    return _map_customer(wc_customer)
 
 def map_odoo_customer_to_wc(odoo_customer):
     """
@@ -0,0 +1,186 @@
+"""
+Spécification déclarative des correspondances WooCommerce -> Odoo.
+
+Les champs Odoo des commandes et des clients sont décrits une seule fois
+ici, puis compilés en fonctions de transformation par enregistrement.
+Les transformateurs (``core/transformers``) et les fonctions de mapping
+(``core/models``) utilisent tous cette même spécification.
+
+Exemple :
+    map_order = compile_mapping(ORDER_SPEC)
+    odoo_order = map_order(wc_order)
+"""
+
+from utils.logging_utils import log_warning
+
+# Correspondance des codes pays WooCommerce vers les IDs de pays Odoo
+# (à compléter selon vos besoins)
+COUNTRY_IDS = {
+    'FR': 76,  # France
+    'BE': 22,  # Belgique
+    'CH': 209, # Suisse
+}
+
+
+def to_float(value):
+    """Convertit un montant WooCommerce en float (None vaut 0)."""
+    return float(value) if value is not None else 0.0
+
+
+def country_to_odoo_id(country_code):
+    """
+    Convertit le code pays WooCommerce en ID de pays Odoo.
+
+    Args:
+        country_code (str): Code pays WooCommerce
+
+    Returns:
+        int: ID du pays dans Odoo, ou False si le code n'est pas mappé
+    """
+    country_id = COUNTRY_IDS.get(country_code)
+    if not country_id:
+        log_warning(f"Code pays non mappé: {country_code}")
+        return False
+    return country_id
+
+
+def full_name(record):
+    """Construit le nom complet à partir du prénom et du nom."""
+    return f"{record.get('first_name', '')} {record.get('last_name', '')}".strip()
+
+
+class Field:
+    """
+    Champ Odoo lu depuis un chemin de la donnée WooCommerce.
+
+    Args:
+        target (str): Nom du champ Odoo
+        source (str): Chemin source, les niveaux étant séparés par des points
+            (ex: 'billing.phone')
+        convert (callable, optional): Conversion appliquée à la valeur lue
+        default: Valeur utilisée si la source est absente
+    """
+
+    def __init__(self, target, source, convert=None, default=None):
+        self.target = target
+        self.source = source
+        self.convert = convert
+        self.default = default
+
+    def compile(self, only=None):
+        """Retourne la fonction ``record -> valeur`` du champ."""
+        *parents, key = self.source.split('.')
+        convert = self.convert
+        default = self.default
+
+        def getter(record):
+            for parent in parents:
+                record = record.get(parent) or {}
+            value = record.get(key, default)
+            return convert(value) if convert is not None else value
+        return getter
+
+
+class Const(Field):
+    """Champ Odoo de valeur constante."""
+
+    def __init__(self, target, value):
+        super().__init__(target, None, default=value)
+
+    def compile(self, only=None):
+        value = self.default
+        return lambda record: value
+
+
+class Computed(Field):
+    """Champ Odoo calculé à partir de l'enregistrement complet."""
+
+    def __init__(self, target, func):
+        super().__init__(target, None, convert=func)
+
+    def compile(self, only=None):
+        return self.convert
+
+
+class Lines(Field):
+    """
+    Lignes one2many Odoo construites à partir d'une liste WooCommerce.
+
+    Chaque élément source est transformé avec la sous-spécification et
+    encapsulé dans une commande de création Odoo ``(0, 0, valeurs)``.
+    """
+
+    def __init__(self, target, source, spec):
+        super().__init__(target, source)
+        self.spec = spec
+
+    def compile(self, only=None):
+        map_line = compile_mapping(self.spec, only)
+        source = self.source
+        return lambda record: [(0, 0, map_line(line)) for line in record.get(source) or ()]
+
+
+def compile_mapping(spec, only=None):
+    """
+    Compile une spécification en fonction de transformation.
+
+    Args:
+        spec (tuple): Champs de la spécification
+        only (iterable, optional): Champs à conserver. Les champs des lignes
+            sont désignés par un chemin pointé (ex: 'order_line.price_unit') ;
+            un champ de lignes sans sous-champ listé est conservé en entier.
+
+    Returns:
+        callable: Fonction ``record -> dict`` au format Odoo
+    """
+    selected = None if only is None else set(only)
+    getters = []
+    for field in spec:
+        nested = None
+        if selected is not None:
+            prefix = f"{field.target}."
+            nested = [name[len(prefix):] for name in selected if name.startswith(prefix)]
+            if field.target not in selected and not nested:
+                continue
+        getters.append((field.target, field.compile(nested or None)))
+    getters = tuple(getters)
+
+    def mapper(record):
+        return {target: getter(record) for target, getter in getters}
+    return mapper
+
+
+ORDER_LINE_SPEC = (
+    Field('product_id', 'product_id'),
+    Field('name', 'name'),
+    Field('product_uom_qty', 'quantity', default=1),
+    Field('price_unit', 'price', to_float, default=0),
+    Field('price_subtotal', 'total', to_float, default=0),
+)
+
+ORDER_SPEC = (
+    Computed('name', lambda order: f"SO{order.get('id')}"),
+    Field('partner_id', 'customer_id'),  # À adapter (chercher ou créer le client)
+    Field('date_order', 'date_created'),
+    Field('amount_total', 'total', to_float, default=0),
+    Const('state', 'draft'),
+    Lines('order_line', 'line_items', ORDER_LINE_SPEC),
+)
+
+# Les champs absents valent "" : XML-RPC ne sait pas transmettre None
+CUSTOMER_SPEC = (
+    Computed('name', full_name),
+    Field('email', 'email', default=''),
+    Field('phone', 'billing.phone', default=''),
+    Field('street', 'billing.address_1', default=''),
+    Field('street2', 'billing.address_2', default=''),
+    Field('city', 'billing.city', default=''),
+    Field('zip', 'billing.postcode', default=''),
+    Field('country_id', 'billing.country', country_to_odoo_id, default=''),
+    Const('customer_rank', 1),
+    Const('type', 'contact'),
+)
+
+# Champs obligatoires côté WooCommerce pour chaque spécification
+ORDER_REQUIRED_FIELDS = ('id', 'customer_id', 'date_created', 'total', 'line_items')
+CUSTOMER_REQUIRED_FIELDS = ('id', 'email', 'first_name', 'last_name')
@@ -2,8 +2,20 @@
 Module de mapping des commandes entre WooCommerce et Odoo.
 Ce module contient les fonctions de transformation des données
 de commandes du format WooCommerce vers le format Odoo.
+Les champs sont ceux de la spécification ORDER_SPEC (core/models/mapping.py).
 """
 
+from core.models.mapping import ORDER_SPEC, compile_mapping
+from utils.tracing import span
+
+# Sous-ensemble de la spécification envoyé à Odoo lors de la synchronisation
+_map_order = compile_mapping(ORDER_SPEC, only=(
+    'partner_id',
+    'order_line.product_id',
+    'order_line.product_uom_qty',
+    'order_line.price_unit',
+))
+
 def map_wc_order_to_odoo(wc_order):
     """
     Convertit une commande WooCommerce en format Odoo.
@@ -28,13 +40,5 @@ def map_wc_order_to_odoo(wc_order):
         Le partner_id doit être adapté pour utiliser l'ID Odoo
         correspondant au client WooCommerce.
     """
-    return {
-        "partner_id": wc_order["customer_id"],  # À adapter (chercher ou créer le client)
-        "order_line": [
-            (0, 0, {
-                "product_id": item["product_id"],
-                "product_uom_qty": item["quantity"],
-                "price_unit": item["price"]
-            }) for item in wc_order["line_items"]
-        ]
-    }
\ No newline at end of file
+    with span("mapping.map_wc_order_to_odoo"):
+        return _map_order(wc_order)
@@ -0,0 +1,139 @@
+"""
+Représentation compacte des commandes en cours de synchronisation.
+
+Une commande WooCommerce complète (meta_data, liens, adresses...) pèse
+plusieurs kilo-octets en mémoire alors que la synchronisation n'en lit
+qu'une quinzaine de champs. Lors d'un rattrapage, chaque page de réponse
+est projetée dès sa lecture sur des enregistrements à ``__slots__`` ne
+contenant que ces champs ; combinée au paramètre ``_fields`` de l'API
+WooCommerce (``WC_ORDER_FIELDS``), la mémoire par commande reste proche de
+ce que la synchronisation utilise réellement.
+
+Les enregistrements exposent ``get`` et ``[]`` comme un dict : le
+validateur, les transformateurs et l'empreinte les acceptent tels quels.
+"""
+
+from dataclasses import dataclass, fields
+
+
+class _RecordAccess:
+    """Accès de type dict aux champs d'un enregistrement compact."""
+
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        """
+        Retourne la valeur d'un champ, ou ``default`` s'il est absent ou vide.
+
+        Args:
+            key (str): Nom du champ WooCommerce
+            default: Valeur par défaut
+
+        Returns:
+            Valeur du champ
+        """
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def to_dict(self):
+        """Retourne l'enregistrement sous forme de dict (champs renseignés)."""
+        result = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is None:
+                continue
+            if isinstance(value, tuple):
+                value = [item.to_dict() for item in value]
+            result[field.name] = value
+        return result
+
+
+@dataclass(slots=True)
+class LineRecord(_RecordAccess):
+    """Ligne de commande, de frais ou de port réduite aux champs synchronisés."""
+
+    product_id: object = None
+    variation_id: object = None
+    name: object = None
+    sku: object = None
+    quantity: object = None
+    price: object = None
+    total: object = None
+    total_tax: object = None
+
+    @classmethod
+    def from_wc(cls, item):
+        """
+        Projette une ligne WooCommerce.
+
+        Args:
+            item (dict): Ligne au format WooCommerce
+
+        Returns:
+            LineRecord: Ligne compacte
+        """
+        get = item.get
+        return cls(
+            get('product_id'), get('variation_id'), get('name'), get('sku'),
+            get('quantity'), get('price'), get('total'), get('total_tax'),
+        )
+
+
+def _lines(items):
+    """Projette une liste de lignes WooCommerce en tuple de LineRecord."""
+    return tuple(map(LineRecord.from_wc, items or ()))
+
+
+@dataclass(slots=True)
+class OrderRecord(_RecordAccess):
+    """Commande réduite aux champs lus par la synchronisation."""
+
+    id: object = None
+    status: object = None
+    currency: object = None
+    customer_id: object = None
+    date_created: object = None
+    date_created_gmt: object = None
+    date_modified_gmt: object = None
+    total: object = None
+    total_tax: object = None
+    shipping_total: object = None
+    shipping_tax: object = None
+    discount_total: object = None
+    line_items: tuple = ()
+    fee_lines: tuple = ()
+    shipping_lines: tuple = ()
+
+    @classmethod
+    def from_wc(cls, order):
+        """
+        Projette une commande WooCommerce.
+
+        Args:
+            order (dict): Commande au format WooCommerce
+
+        Returns:
+            OrderRecord: Commande compacte
+        """
+        get = order.get
+        return cls(
+            get('id'), get('status'), get('currency'), get('customer_id'),
+            get('date_created'), get('date_created_gmt'), get('date_modified_gmt'),
+            get('total'), get('total_tax'), get('shipping_total'),
+            get('shipping_tax'), get('discount_total'),
+            _lines(get('line_items')), _lines(get('fee_lines')),
+            _lines(get('shipping_lines')),
+        )
+
+
+# Champs demandés à l'API WooCommerce via le paramètre _fields
+WC_ORDER_FIELDS = ','.join(field.name for field in fields(OrderRecord))
@@ -0,0 +1,121 @@
+"""
+Synchronisation de plusieurs boutiques WooCommerce vers une même instance Odoo.
+
+Chaque boutique (config/stores.py) est synchronisée dans son propre thread,
+au sein d'un seul processus :
+- état local propre (base, date de dernière synchronisation, curseurs,
+  audit), sélectionné par ``use_store`` (utils/store_context.py) ;
+- client WooCommerce propre, avec ses clés et ses budgets de débit ;
+- société et liste de prix Odoo de la boutique ajoutées à ses commandes ;
+- retour des statuts de commande vers la boutique (core/status_writeback.py).
+
+La capacité d'écriture Odoo (ODOO_WRITE_CALLS_PER_MINUTE) est partagée par
+un ``FairScheduler`` : une boutique qui rattrape un gros arriéré n'empêche
+pas les autres de synchroniser leurs nouvelles commandes, chacune recevant
+une part des créations de commandes proportionnelle à son poids.
+
+Exemple :
+    MultiStoreSync(load_stores()).run(loop=True)
+"""
+
+import threading
+
+from config import settings
+from core.resilience import FairScheduler
+from utils.logging_utils import log_error, log_info
+from utils.metrics import sync_duration_histogram, sync_error_counter, sync_success_counter
+from utils.store_context import use_store
+from utils.sync_state import sync_lock
+
+
+def _default_workers(store, scheduler):
+    """Gestionnaire de synchronisation et retour des statuts d'une boutique."""
+    from core.status_writeback import STATUS_WRITEBACK, StatusWriteBack
+    from core.sync_manager import SyncManager
+
+    sync = SyncManager(store=store, odoo_scheduler=scheduler)
+    return sync, StatusWriteBack(sync.wc, sync.odoo) if STATUS_WRITEBACK else None
+
+
+class MultiStoreSync:
+    """
+    Synchronisation concurrente de plusieurs boutiques, un thread par boutique.
+    """
+
+    def __init__(self, stores, calls_per_minute=None, make_workers=None):
+        """
+        Args:
+            stores (list): Boutiques (Store)
+            calls_per_minute (int, optional): Capacité d'écriture Odoo partagée
+                (ODOO_WRITE_CALLS_PER_MINUTE par défaut)
+            make_workers (callable, optional): ``f(store, scheduler)`` retournant
+                le gestionnaire de synchronisation et le retour des statuts (ou
+                None) d'une boutique, appelée dans le contexte de la boutique
+        """
+        self.stores = stores
+        self.scheduler = FairScheduler(
+            calls_per_minute or settings.ODOO_WRITE_CALLS_PER_MINUTE,
+            weights={store.name: store.weight for store in stores},
+        )
+        self.make_workers = make_workers or _default_workers
+        self.results = {}
+
+    def _run_store(self, store, loop, interval, stop):
+        with use_store(store.name):
+            try:
+                sync, writeback = self.make_workers(store, self.scheduler)
+            except Exception as e:
+                sync_error_counter.inc()
+                log_error(f"Boutique {store.name} : initialisation impossible", exc_info=e)
+                self.results[store.name] = str(e)
+                return
+            while True:
+                self.results[store.name] = self._sync_once(store, sync, writeback)
+                if not loop or stop.wait(interval):
+                    return
+
+    def _sync_once(self, store, sync, writeback):
+        """Une synchronisation de la boutique ; retourne None ou l'erreur rencontrée."""
+        try:
+            with sync_duration_histogram.time():
+                sync.sync_orders(trigger="poll")
+            sync_success_counter.inc()
+            log_info(f"Boutique {store.name} : synchronisation terminée")
+        except Exception as e:
+            sync_error_counter.inc()
+            log_error(f"Boutique {store.name} : erreur lors de la synchronisation", exc_info=e)
+            return str(e)
+        if writeback is not None:
+            try:
+                with sync_lock():
+                    writeback.run_once()
+            except Exception as e:
+                # Le retour des statuts reprendra au prochain passage
+                log_error(f"Boutique {store.name} : erreur lors du retour des statuts", exc_info=e)
+        return None
+
+    def run(self, loop=False, interval=None, stop=None):
+        """
+        Synchronise toutes les boutiques en parallèle.
+
+        Args:
+            loop (bool): Rester résident et resynchroniser chaque boutique
+                toutes les ``interval`` secondes
+            interval (float, optional): Période (SYNC_FREQUENCY minutes par défaut)
+            stop (threading.Event, optional): Arrêt des boucles
+
+        Returns:
+            dict: Boutique -> None si la dernière synchronisation a réussi, erreur sinon
+        """
+        interval = settings.SYNC_FREQUENCY * 60 if interval is None else interval
+        stop = stop or threading.Event()
+        threads = [
+            threading.Thread(target=self._run_store, args=(store, loop, interval, stop),
+                             name=f'sync-{store.name}', daemon=True)
+            for store in self.stores
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return dict(self.results)
@@ -6,29 +6,43 @@ Ce module gère toutes les interactions avec l'API Odoo via XML-RPC, incluant :
 - Gestion des erreurs d'API
 """
 
-import xmlrpc.client
 from config import settings
 from core.exceptions import OdooAPIError
+from core.resilience import rate_limited_retry
 from utils.logging_utils import (
     log_procedure, log_error, log_info, log_api_call,
     log_performance
 )
-from tenacity import retry, wait_exponential, stop_after_attempt
-from ratelimit import limits, sleep_and_retry
+from utils.metrics import (
+    api_rate_limit_gauge, api_throttled_counter, observe_api_call
+)
+from utils.tracing import span
 import time
 
+# Limite de débit côté client (ODOO_CALLS_PER_MINUTE, adapter selon quota Odoo)
+ODOO_CALLS_PER_MINUTE = settings.ODOO_CALLS_PER_MINUTE
+
 class OdooClient:
     """
     Client pour interagir avec l'API Odoo via XML-RPC.
     Utilise les paramètres de configuration pour l'authentification.
     """
     
-    def __init__(self):
+    def __init__(self, on_partner_written=None):
         """
         Initialise le client Odoo avec les paramètres de configuration.
         Établit la connexion XML-RPC et authentifie l'utilisateur.
+
+        Args:
+            on_partner_written (callable, optional): ``f(partner_id, values, wc_id)``
+                appelée après chaque écriture de partenaire (ex.
+                ``remember_partner`` de core/customer_sync.py)
         """
+        self.on_partner_written = on_partner_written
         log_info("Initialisation du client Odoo")
+        # Import différé : xmlrpc.client charge http.client et le parseur XML
+        import xmlrpc.client
+
         try:
             # Connexion aux endpoints XML-RPC d'Odoo
             log_info(f"Connexion à l'API Odoo: {settings.ODOO_URL}")
@@ -46,6 +60,7 @@ class OdooClient:
                 log_error(error_msg)
                 raise OdooAPIError(error_msg)
                 
+            api_rate_limit_gauge.labels("odoo").set(ODOO_CALLS_PER_MINUTE)
             log_info("Client Odoo initialisé avec succès")
             
         except Exception as e:
@@ -54,9 +69,7 @@ class OdooClient:
             raise OdooAPIError(error_msg)
 
     @log_procedure("Création de commande Odoo")
-    @sleep_and_retry
-    @limits(calls=80, period=60)  # 80 appels par minute (adapter selon quota Odoo)
-    @retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(5))
+    @rate_limited_retry("odoo", "sale.order/create", ODOO_CALLS_PER_MINUTE)
     def create_order(self, order_data):
         """
         Crée une nouvelle commande dans Odoo.
@@ -78,34 +91,38 @@ class OdooClient:
             log_api_call("Odoo", "POST", "sale.order/create")
             
             # Création de la commande
-            order_id = self.models.execute_kw(
-                settings.ODOO_DB, self.uid, settings.ODOO_PASSWORD,
-                "sale.order", "create", [order_data]
-            )
+            with span("odoo.execute_kw", **{"rpc.model": "sale.order", "rpc.method": "create"}):
+                order_id = self.models.execute_kw(
+                    settings.ODOO_DB, self.uid, settings.ODOO_PASSWORD,
+                    "sale.order", "create", [order_data]
+                )
             
             # Log de la performance
             duration = time.time() - start_time
+            observe_api_call("odoo", "sale.order/create", "execute_kw", duration)
             log_performance("Création de commande Odoo", duration)
             
             log_info(f"Commande Odoo créée avec succès (ID: {order_id})")
             return order_id
             
         except Exception as e:
+            self._record_throttling(e)
             error_msg = f"Erreur lors de la création de la commande dans Odoo : {e}"
             log_error(error_msg, exc_info=e)
             log_api_call("Odoo", "POST", "sale.order/create", error=str(e))
             raise OdooAPIError(error_msg)
 
     @log_procedure("Création de client Odoo")
-    @sleep_and_retry
-    @limits(calls=80, period=60)  # 80 appels par minute (adapter selon quota Odoo)
-    @retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(5))
-    def create_customer(self, customer_data):
+    @rate_limited_retry("odoo", "res.partner/create", ODOO_CALLS_PER_MINUTE)
+    def create_customer(self, customer_data, wc_id=None):
         """
         Crée un nouveau client dans Odoo.
+
+        La fiche écrite est transmise à ``on_partner_written``, s'il est défini.
         
         Args:
             customer_data (dict): Données du client au format Odoo
+            wc_id (int, optional): Client WooCommerce d'origine
             
         Returns:
             int: ID du client créé dans Odoo
@@ -121,20 +138,81 @@ class OdooClient:
             log_api_call("Odoo", "POST", "res.partner/create")
             
             # Création du client
-            customer_id = self.models.execute_kw(
-                settings.ODOO_DB, self.uid, settings.ODOO_PASSWORD,
-                "res.partner", "create", [customer_data]
-            )
+            with span("odoo.execute_kw", **{"rpc.model": "res.partner", "rpc.method": "create"}):
+                customer_id = self.models.execute_kw(
+                    settings.ODOO_DB, self.uid, settings.ODOO_PASSWORD,
+                    "res.partner", "create", [customer_data]
+                )
             
             # Log de la performance
             duration = time.time() - start_time
+            observe_api_call("odoo", "res.partner/create", "execute_kw", duration)
             log_performance("Création de client Odoo", duration)
             
             log_info(f"Client Odoo créé avec succès (ID: {customer_id})")
+            if self.on_partner_written is not None:
+                self.on_partner_written(customer_id, customer_data, wc_id)
             return customer_id
             
         except Exception as e:
+            self._record_throttling(e)
             error_msg = f"Erreur lors de la création du client dans Odoo : {e}"
             log_error(error_msg, exc_info=e)
             log_api_call("Odoo", "POST", "res.partner/create", error=str(e))
-            raise OdooAPIError(error_msg)
\ No newline at end of file
+            raise OdooAPIError(error_msg)
+
+    @rate_limited_retry("odoo", "search_read", ODOO_CALLS_PER_MINUTE)
+    def search_read(self, model, domain, fields, offset=0, limit=None, order=None):
+        """
+        Lit les enregistrements d'un modèle Odoo correspondant à un domaine.
+
+        Args:
+            model (str): Modèle Odoo (ex. 'stock.quant')
+            domain (list): Domaine de recherche Odoo
+            fields (list): Champs à lire
+            offset (int): Nombre d'enregistrements à sauter
+            limit (int, optional): Nombre maximal d'enregistrements
+            order (str, optional): Tri (ex. 'write_date asc, id asc')
+
+        Returns:
+            list: Enregistrements (dictionnaires)
+
+        Raises:
+            OdooAPIError: Si une erreur survient lors de la lecture
+        """
+        options = {"fields": fields, "offset": offset}
+        if limit:
+            options["limit"] = limit
+        if order:
+            options["order"] = order
+        try:
+            start_time = time.time()
+            log_api_call("Odoo", "GET", f"{model}/search_read")
+            with span("odoo.execute_kw", **{"rpc.model": model, "rpc.method": "search_read"}):
+                records = self.models.execute_kw(
+                    settings.ODOO_DB, self.uid, settings.ODOO_PASSWORD,
+                    model, "search_read", [domain], options
+                )
+            duration = time.time() - start_time
+            observe_api_call("odoo", f"{model}/search_read", "execute_kw", duration)
+            log_performance(f"Lecture {model} Odoo", duration)
+            return records
+
+        except Exception as e:
+            self._record_throttling(e)
+            error_msg = f"Erreur lors de la lecture de {model} dans Odoo : {e}"
+            log_error(error_msg, exc_info=e)
+            log_api_call("Odoo", "GET", f"{model}/search_read", error=str(e))
+            raise OdooAPIError(error_msg)
+
+    def _record_throttling(self, error):
+        """
+        Comptabilise une réponse 429 renvoyée par le serveur Odoo.
+
+        Args:
+            error (Exception): Erreur levée par l'appel XML-RPC
+        """
+        import xmlrpc.client
+
+        if isinstance(error, xmlrpc.client.ProtocolError) and error.errcode == 429:
+            api_throttled_counter.labels("odoo").inc()
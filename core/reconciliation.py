@@ -0,0 +1,345 @@
+"""
+Réconciliation des montants de commandes par lot.
+
+Les montants WooCommerce sont convertis en centimes entiers, ce qui rend les
+comparaisons exactes. Pour un lot, toutes les lignes sont aplaties dans des
+tableaux et les sommes par commande sont calculées en une seule passe
+vectorisée avec NumPy lorsqu'il est installé ; sinon un calcul en Python pur,
+équivalent, est utilisé. NumPy n'est importé qu'à la première réconciliation
+d'un lot : son import est le plus coûteux du démarrage.
+
+Le total attendu d'une commande est :
+    somme(lignes) + somme(frais) + frais de port + total des taxes
+"""
+
+# Module NumPy, None s'il n'est pas installé (chargé par _numpy())
+_NOT_LOADED = object()
+np = _NOT_LOADED
+
+
+def _numpy():
+    """
+    Importe NumPy au premier appel.
+
+    Returns:
+        module: NumPy, ou None s'il n'est pas installé
+    """
+    global np
+    if np is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:  # NumPy est optionnel
+            numpy = None
+        np = numpy
+    return np
+
+# Tolérance par défaut, en centimes, pour absorber les arrondis
+DEFAULT_TOLERANCE_CENTS = 1
+
+
+def to_cents(value):
+    """
+    Convertit un montant WooCommerce (str, float ou int) en centimes.
+
+    Args:
+        value: Montant à convertir ('' et None valent 0)
+
+    Returns:
+        int: Montant en centimes
+
+    Raises:
+        ValueError: Si la valeur n'est pas un montant
+    """
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        raise ValueError(f"Montant invalide: {value!r}")
+    try:
+        return round(float(value) * 100)
+    except TypeError:
+        raise ValueError(f"Montant invalide: {value!r}")
+
+
+def _sum_cents(items, field='total'):
+    """Somme en centimes d'un champ sur une liste de lignes."""
+    return sum(to_cents(item.get(field)) for item in items or ())
+
+
+def order_amount_diffs(order):
+    """
+    Calcule les écarts de montants d'une commande.
+
+    Args:
+        order (dict): Commande WooCommerce
+
+    Returns:
+        tuple: (écart total, écart taxes, écart frais de port) en centimes
+
+    Raises:
+        ValueError: Si un montant n'est pas convertible
+    """
+    lines = order.get('line_items') or ()
+    fees = order.get('fee_lines') or ()
+    shipping_total = to_cents(order.get('shipping_total'))
+    total_tax = to_cents(order.get('total_tax'))
+    expected = _sum_cents(lines) + _sum_cents(fees) + shipping_total + total_tax
+    detailed_tax = (
+        _sum_cents(lines, 'total_tax') + _sum_cents(fees, 'total_tax')
+        + to_cents(order.get('shipping_tax'))
+    )
+    return (
+        to_cents(order.get('total')) - expected,
+        total_tax - detailed_tax,
+        shipping_total - _sum_cents(order.get('shipping_lines')),
+    )
+
+
+def describe_mismatch(total_diff, tax_diff, shipping_diff):
+    """
+    Construit le message d'erreur associé à des écarts de montants.
+
+    Args:
+        total_diff (int): Écart sur le total, en centimes
+        tax_diff (int): Écart sur les taxes, en centimes
+        shipping_diff (int): Écart sur les frais de port, en centimes
+
+    Returns:
+        str: Message d'erreur
+    """
+    return (
+        "Montants de commande invalides: "
+        f"écart_total={total_diff / 100:.2f}, "
+        f"écart_taxes={tax_diff / 100:.2f}, "
+        f"écart_port={shipping_diff / 100:.2f}"
+    )
+
+
+class ReconciliationResult:
+    """
+    Résultat d'une réconciliation de lot.
+
+    Attributes:
+        order_ids (list): Identifiants des commandes, dans l'ordre du lot
+        total_diff (list): Écart sur le total par commande, en centimes
+        tax_diff (list): Écart sur les taxes par commande, en centimes
+        shipping_diff (list): Écart sur les frais de port par commande, en centimes
+        mismatches (list): Index des commandes dont un écart dépasse la tolérance
+        invalid (list): Index des commandes contenant un montant illisible
+    """
+
+    __slots__ = (
+        'order_ids', 'total_diff', 'tax_diff', 'shipping_diff',
+        'mismatches', 'invalid'
+    )
+
+    def __init__(self, order_ids, total_diff, tax_diff, shipping_diff, mismatches, invalid):
+        self.order_ids = order_ids
+        self.total_diff = total_diff
+        self.tax_diff = tax_diff
+        self.shipping_diff = shipping_diff
+        self.mismatches = mismatches
+        self.invalid = invalid
+
+    @property
+    def failing_order_ids(self):
+        """Identifiants des commandes en écart ou illisibles, dans l'ordre du lot."""
+        failing = sorted(set(self.mismatches) | set(self.invalid))
+        return [self.order_ids[i] for i in failing]
+
+    def message(self, index):
+        """
+        Retourne le message d'erreur d'une commande en échec.
+
+        Args:
+            index (int): Index de la commande dans le lot
+
+        Returns:
+            str: Message d'erreur
+        """
+        if index in self.invalid:
+            return "Montants de ligne invalides"
+        return describe_mismatch(
+            self.total_diff[index], self.tax_diff[index], self.shipping_diff[index]
+        )
+
+
+def _flatten(orders):
+    """
+    Aplatit les montants bruts d'un lot dans des tableaux parallèles.
+
+    Les lignes et frais de toutes les commandes sont mis bout à bout, de même
+    que les lignes de port ; un tableau d'index indique la commande de
+    rattachement de chaque élément. Les valeurs restent brutes (chaînes
+    WooCommerce) : la conversion en centimes est faite par le moteur de calcul.
+    """
+    order_ids = []
+    headers = []  # (total, total_tax, shipping_total, shipping_tax) par commande
+    owner, amount, tax = [], [], []  # lignes et frais
+    ship_owner, ship_amount = [], []
+
+    for index, order in enumerate(orders):
+        get = order.get
+        order_ids.append(get('id'))
+        headers.append((get('total'), get('total_tax'), get('shipping_total'), get('shipping_tax')))
+        for key in ('line_items', 'fee_lines'):
+            for item in get(key) or ():
+                owner.append(index)
+                amount.append(item.get('total'))
+                tax.append(item.get('total_tax'))
+        for item in get('shipping_lines') or ():
+            ship_owner.append(index)
+            ship_amount.append(item.get('total'))
+
+    return order_ids, headers, (owner, amount, tax), (ship_owner, ship_amount)
+
+
+def _cents_array(values):
+    """
+    Convertit une liste de montants bruts en centimes (tableau NumPy).
+
+    Raises:
+        ValueError: Si un montant est un booléen (refusé comme par to_cents)
+    """
+    if bool in map(type, values):
+        raise ValueError("Montant booléen dans le lot")
+    floats = np.array([value or 0 for value in values], dtype=np.float64)
+    return np.rint(floats * 100).astype(np.int64)
+
+
+def _diffs_numpy(count, headers, items, shipping):
+    """
+    Calcule les écarts par commande avec NumPy.
+
+    Raises:
+        ValueError: Si un montant du lot n'est pas convertible
+    """
+    header = _cents_array([value for row in headers for value in row]).reshape(count, 4)
+    owner = np.asarray(items[0], dtype=np.int64)
+    amount, tax = _cents_array(items[1]), _cents_array(items[2])
+    ship_owner = np.asarray(shipping[0], dtype=np.int64)
+    ship_amount = _cents_array(shipping[1])
+
+    # bincount additionne en float64 : exact pour des centimes < 2**53
+    lines = np.bincount(owner, weights=amount, minlength=count).astype(np.int64)
+    line_tax = np.bincount(owner, weights=tax, minlength=count).astype(np.int64)
+    shipped = np.bincount(ship_owner, weights=ship_amount, minlength=count).astype(np.int64)
+
+    total, total_tax, shipping_total, shipping_tax = header.T
+    total_diff = total - (lines + shipping_total + total_tax)
+    tax_diff = total_tax - (line_tax + shipping_tax)
+    shipping_diff = shipping_total - shipped
+    return total_diff, tax_diff, shipping_diff
+
+
+def _diffs_python(count, headers, items, shipping):
+    """
+    Calcule les écarts par commande en Python pur.
+
+    Une commande contenant un montant illisible est signalée dans la liste
+    retournée en dernier ; ses écarts valent 0.
+    """
+    invalid = set()
+
+    def cents(index, value):
+        try:
+            return to_cents(value)
+        except ValueError:
+            invalid.add(index)
+            return 0
+
+    lines = [0] * count
+    line_tax = [0] * count
+    shipped = [0] * count
+    for index, item_total, item_tax in zip(*items):
+        lines[index] += cents(index, item_total)
+        line_tax[index] += cents(index, item_tax)
+    for index, ship_total in zip(*shipping):
+        shipped[index] += cents(index, ship_total)
+
+    total_diff, tax_diff, shipping_diff = [], [], []
+    for i, row in enumerate(headers):
+        total, total_tax, shipping_total, shipping_tax = (cents(i, value) for value in row)
+        if i in invalid:
+            total_diff.append(0)
+            tax_diff.append(0)
+            shipping_diff.append(0)
+            continue
+        total_diff.append(total - (lines[i] + shipping_total + total_tax))
+        tax_diff.append(total_tax - (line_tax[i] + shipping_tax))
+        shipping_diff.append(shipping_total - shipped[i])
+    return total_diff, tax_diff, shipping_diff, sorted(invalid)
+
+
+def reconcile_amounts(orders, tolerance=DEFAULT_TOLERANCE_CENTS):
+    """
+    Réconcilie les montants d'un lot de commandes en une seule passe.
+
+    Args:
+        orders (list): Commandes WooCommerce (une page ou plus)
+        tolerance (int): Écart toléré, en centimes
+
+    Returns:
+        ReconciliationResult: Écarts par commande et commandes en échec
+    """
+    try:
+        order_ids, headers, items, shipping = _flatten(orders)
+    except AttributeError:
+        # Une commande ou une ligne n'est pas un objet : traitement unitaire
+        return _reconcile_one_by_one(orders, tolerance)
+    count = len(order_ids)
+
+    diffs = None
+    if count and _numpy() is not None:
+        try:
+            diffs = _diffs_numpy(count, headers, items, shipping)
+        except (TypeError, ValueError):
+            # Montant illisible dans le lot : le calcul Python les localise
+            diffs = None
+
+    if diffs is not None:
+        total_diff, tax_diff, shipping_diff = diffs
+        over = (
+            (np.abs(total_diff) > tolerance)
+            | (np.abs(tax_diff) > tolerance)
+            | (np.abs(shipping_diff) > tolerance)
+        )
+        mismatches = np.flatnonzero(over).tolist()
+        total_diff, tax_diff, shipping_diff = (
+            total_diff.tolist(), tax_diff.tolist(), shipping_diff.tolist()
+        )
+        invalid = []
+    else:
+        total_diff, tax_diff, shipping_diff, invalid = _diffs_python(
+            count, headers, items, shipping
+        )
+        mismatches = [
+            i for i in range(count)
+            if abs(total_diff[i]) > tolerance
+            or abs(tax_diff[i]) > tolerance
+            or abs(shipping_diff[i]) > tolerance
+        ]
+
+    return ReconciliationResult(
+        order_ids, total_diff, tax_diff, shipping_diff, mismatches, invalid
+    )
+
+
+def _reconcile_one_by_one(orders, tolerance):
+    """Réconcilie un lot mal formé commande par commande."""
+    order_ids, total_diff, tax_diff, shipping_diff = [], [], [], []
+    mismatches, invalid = [], []
+    for index, order in enumerate(orders):
+        try:
+            order_ids.append(order.get('id'))
+            diffs = order_amount_diffs(order)
+        except (AttributeError, ValueError):
+            invalid.append(index)
+            diffs = (0, 0, 0)
+        if any(abs(diff) > tolerance for diff in diffs):
+            mismatches.append(index)
+        total_diff.append(diffs[0])
+        tax_diff.append(diffs[1])
+        shipping_diff.append(diffs[2])
+    return ReconciliationResult(
+        order_ids, total_diff, tax_diff, shipping_diff, mismatches, invalid
+    )
@@ -0,0 +1,141 @@
+"""
+Limitation de débit et nouvelles tentatives des appels API.
+
+Le décorateur ``rate_limited_retry`` compose, comme auparavant directement
+sur les méthodes des clients :
+
+    sleep_and_retry(limits(...)(retry(...)(méthode)))
+
+mais ne l'assemble qu'au premier appel : ``tenacity`` et ``ratelimit`` ne
+sont importés que par les processus qui appellent réellement une API, et non
+par ceux qui se contentent d'importer les clients (healthcheck, dashboard,
+serveur de webhooks avant le premier webhook).
+
+Chaque méthode décorée dispose de son propre budget d'appels par minute.
+Un client peut déclarer une portée de budget (``rate_scope``, ex. le nom
+de sa boutique en mode multi-boutiques) : chaque portée dispose alors de
+ses propres budgets, fixés par ``rate_budget(endpoint, défaut)``.
+
+``FairScheduler`` répartit équitablement une capacité d'appels partagée
+(les écritures Odoo) entre plusieurs boutiques synchronisées en parallèle.
+"""
+
+import functools
+import heapq
+import itertools
+import threading
+import time
+
+from utils.metrics import count_retry
+
+
+def rate_limited_retry(api, endpoint, calls_per_minute, attempts=5):
+    """
+    Décorateur : limitation de débit côté client et nouvelles tentatives
+    exponentielles (2 à 10 s), assemblés au premier appel.
+
+    Args:
+        api (str): API appelée ('woocommerce' ou 'odoo'), pour les métriques
+        endpoint (str): Point d'accès appelé, pour les métriques
+        calls_per_minute (int): Budget d'appels par minute de la méthode (par
+            portée si le client déclare ``rate_scope``)
+        attempts (int): Nombre maximal de tentatives
+
+    Returns:
+        callable: Décorateur
+    """
+    def decorator(func):
+        # Portée -> méthode assemblée (None : client sans portée)
+        wrapped = {}
+        lock = threading.Lock()
+
+        def build(calls):
+            from ratelimit import limits, sleep_and_retry
+            from tenacity import retry, stop_after_attempt, wait_exponential
+
+            return sleep_and_retry(limits(calls=calls, period=60)(
+                retry(wait=wait_exponential(multiplier=1, min=2, max=10),
+                      stop=stop_after_attempt(attempts),
+                      before_sleep=count_retry(api, endpoint))(func)
+            ))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            scope = getattr(args[0], 'rate_scope', None) if args else None
+            method = wrapped.get(scope)
+            if method is None:
+                with lock:
+                    method = wrapped.get(scope)
+                    if method is None:
+                        calls = calls_per_minute if scope is None \
+                            else args[0].rate_budget(endpoint, calls_per_minute)
+                        method = wrapped[scope] = build(calls)
+            return method(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class FairScheduler:
+    """
+    Capacité d'appels partagée, répartie équitablement entre locataires.
+
+    Les appels sont espacés régulièrement (``calls_per_minute``). Quand
+    plusieurs locataires attendent, le prochain créneau revient à celui dont
+    l'étiquette virtuelle est la plus basse : chaque appel avance l'étiquette
+    de son locataire de ``1 / poids``. Une boutique qui importe un gros
+    arriéré ne prive donc pas les autres : chacune obtient sa part, au
+    prorata de son poids. Un locataire inactif ne cumule pas de crédit.
+
+    Exemple :
+        scheduler = FairScheduler(80, weights={"boutique_fr": 2})
+        scheduler.acquire("boutique_fr")
+        odoo.create_order(data)
+    """
+
+    def __init__(self, calls_per_minute, weights=None, clock=time.monotonic):
+        """
+        Args:
+            calls_per_minute (int): Capacité partagée, en appels par minute
+            weights (dict, optional): Locataire -> poids (1 par défaut)
+            clock (callable): Horloge monotone (s)
+        """
+        self.interval = 60.0 / calls_per_minute
+        self.weights = weights or {}
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._tags = {}
+        self._virtual = 0.0
+        self._next_slot = 0.0
+        self._seq = itertools.count()
+
+    def acquire(self, tenant):
+        """
+        Attend le créneau d'un appel pour ``tenant``.
+
+        Args:
+            tenant (str): Locataire (nom de la boutique)
+
+        Returns:
+            float: Temps d'attente (s)
+        """
+        start = self.clock()
+        with self._cond:
+            tag = max(self._virtual, self._tags.get(tenant, 0.0)) + 1.0 / self.weights.get(tenant, 1)
+            self._tags[tenant] = tag
+            ticket = (tag, next(self._seq), tenant)
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                if self._waiting[0] is ticket:
+                    now = self.clock()
+                    delay = self._next_slot - now
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._virtual = tag
+            self._next_slot = max(now, self._next_slot) + self.interval
+            self._cond.notify_all()
+        return self.clock() - start
@@ -0,0 +1,173 @@
+"""
+Socle commun des synchronisations d'Odoo vers WooCommerce : stock
+(core/stock_sync.py), statuts de commande (core/status_writeback.py) et
+clients (core/customer_sync.py).
+
+- Clients WooCommerce et Odoo créés à la demande, base locale initialisée.
+- Relevé par ``write_date`` à partir d'un curseur nommé (utils/sync_state.py),
+  position ``[write_date, id]`` du dernier enregistrement traité. Le curseur
+  est relu avec un recouvrement de quelques secondes : une transaction Odoo
+  validée après un relevé peut porter une ``write_date`` antérieure à la
+  plus récente déjà lue, et serait sinon manquée.
+- Pagination par clé (``write_date``, ``id``) plutôt que par décalage : un
+  enregistrement modifié pendant le relevé passe en fin de parcours sans
+  décaler les suivants, dont aucun n'est sauté.
+- Lecture des résultats d'une requête groupée WooCommerce (``…/batch``) :
+  un élément sans résultat (réponse tronquée) est traité comme refusé.
+- Boucle résidente qui journalise les erreurs sans s'arrêter.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from utils.database import init_db
+from utils.logging_utils import log_error
+
+# Format des dates Odoo (UTC)
+ODOO_DATETIME = '%Y-%m-%d %H:%M:%S'
+
+# Erreur attribuée aux éléments sans résultat dans la réponse d'une requête groupée
+TRUNCATED = {'code': 'truncated_response', 'message': "réponse tronquée, aucun résultat pour cet élément"}
+
+
+def cursor_since(cursor, overlap):
+    """
+    Date de début du relevé Odoo : curseur moins le recouvrement.
+
+    Args:
+        cursor (str): Plus récente ``write_date`` déjà traitée, ou None
+        overlap (int): Recouvrement (s)
+
+    Returns:
+        str: Date au format Odoo, ou None si le curseur est absent (relevé complet)
+    """
+    if not cursor:
+        return None
+    return (datetime.strptime(cursor, ODOO_DATETIME) - timedelta(seconds=overlap)).strftime(ODOO_DATETIME)
+
+
+def cursor_position(cursor, overlap):
+    """
+    Position de départ d'un relevé Odoo.
+
+    Args:
+        cursor (list): Position ``[write_date, id]`` du dernier enregistrement
+            traité (ou ``write_date`` seule, ancien format), ou None
+        overlap (int): Recouvrement (s)
+
+    Returns:
+        tuple: (write_date, id) à partir de laquelle relire, reculée du
+        recouvrement, ou None si le curseur est absent (relevé complet)
+    """
+    if not cursor:
+        return None
+    write_date, record_id = (cursor, 0) if isinstance(cursor, str) else cursor
+    if overlap:
+        # (date, 0) : tous les enregistrements de cette date et des suivantes
+        return cursor_since(write_date, overlap), 0
+    return write_date, record_id
+
+
+def read_changed(odoo, model, domain, fields, position, limit):
+    """
+    Parcourt par pages les enregistrements modifiés après une position.
+
+    Args:
+        odoo (OdooClient): Client Odoo
+        model (str): Modèle Odoo
+        domain (list): Conditions du relevé
+        fields (list): Champs lus (``write_date`` est ajouté)
+        position (tuple): (write_date, id) exclue, ou None pour tout relire
+        limit (int): Enregistrements par requête
+
+    Yields:
+        list: Enregistrements d'une page, par ``write_date`` puis ``id`` croissants
+    """
+    fields = fields if 'write_date' in fields else fields + ['write_date']
+    while True:
+        page_domain = list(domain)
+        if position:
+            write_date, record_id = position
+            page_domain += ['|', ('write_date', '>', write_date),
+                            '&', ('write_date', '=', write_date), ('id', '>', record_id)]
+        records = odoo.search_read(model, page_domain, fields, limit=limit, order='write_date asc, id asc')
+        if records:
+            yield records
+        if len(records) < limit:
+            return
+        position = (records[-1]['write_date'], records[-1]['id'])
+
+
+def batch_results(items, results):
+    """
+    Associe chaque élément envoyé par requête groupée à son résultat.
+
+    Args:
+        items (list): Éléments envoyés, dans l'ordre de la requête
+        results (list): Résultats renvoyés par WooCommerce, dans le même ordre
+
+    Yields:
+        tuple: (élément, résultat, erreur) ; l'erreur vaut None si l'élément
+        est accepté, TRUNCATED s'il n'a pas de résultat
+    """
+    for index, item in enumerate(items):
+        if index >= len(results):
+            yield item, None, TRUNCATED
+            continue
+        result = results[index]
+        yield item, result, result.get('error') if isinstance(result, dict) else None
+
+
+class ReverseSync(ABC):
+    """
+    Synchronisation Odoo -> WooCommerce relevée par curseur ``write_date``.
+
+    Les sous-classes définissent ``run_once`` et, si la boucle résidente
+    fait autre chose qu'un passage complet, ``step``.
+    """
+
+    # Message journalisé lorsqu'un tour de la boucle résidente échoue
+    loop_error = "Erreur lors de la synchronisation Odoo -> WooCommerce"
+
+    def __init__(self, wc=None, odoo=None):
+        """
+        Args:
+            wc (WooCommerceClient, optional): Client WooCommerce
+            odoo (OdooClient, optional): Client Odoo
+        """
+        if wc is None or odoo is None:
+            from core.odoo_client import OdooClient
+            from core.wc_client import WooCommerceClient
+
+            wc = wc or WooCommerceClient()
+            odoo = odoo or OdooClient()
+        self.wc = wc
+        self.odoo = odoo
+        init_db()
+
+    @abstractmethod
+    def run_once(self):
+        """Un relevé suivi d'un envoi."""
+
+    def step(self):
+        """Un tour de la boucle résidente (``run_once`` par défaut)."""
+        self.run_once()
+
+    def run(self, interval, stop=None):
+        """
+        Boucle résidente : un tour toutes les ``interval`` secondes.
+
+        Args:
+            interval (float): Période de relevé (s)
+            stop (threading.Event, optional): Arrêt de la boucle
+        """
+        while stop is None or not stop.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                log_error(self.loop_error, exc_info=e)
+            if stop is not None:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
@@ -0,0 +1,216 @@
+"""
+Retour vers WooCommerce de l'avancement des commandes dans Odoo.
+
+Chaque commande créée dans Odoo est suivie dans la base locale (table
+order_status, alimentée à la synchronisation). Les commandes Odoo modifiées
+sont relevées par ``write_date`` et leur statut est déduit :
+- ``created`` : devis, pas encore confirmé ;
+- ``confirmed`` : commande confirmée (``state`` sale ou done) ;
+- ``delivered`` : livraison effectuée (``effective_date`` renseignée) ;
+- ``invoiced`` : livrée et entièrement facturée ;
+- ``cancelled`` : commande annulée.
+
+Les statuts changés sont envoyés par lots de STATUS_BATCH_SIZE (100,
+maximum accepté par WooCommerce) via ``orders/batch`` : statut WooCommerce
+(``completed`` une fois livrée, ``cancelled``) et métadonnées
+``odoo_order_ref`` / ``odoo_status``. Les appels ont leur propre budget de
+débit (WC_STATUS_CALLS_PER_MINUTE).
+
+Relevé : seules les commandes Odoo modifiées depuis le curseur
+(sync_cursors.order_status.json) sont lues, par pages, puis rapprochées des
+commandes suivies ; les commandes jamais relevées sont lues par identifiant.
+Le coût d'un passage dépend donc des changements dans Odoo, pas du nombre
+de commandes suivies. Le curseur n'avance qu'une fois les statuts relevés
+enregistrés.
+
+Reprise : le statut accepté par WooCommerce est conservé par commande
+(``sent_status``) ; une commande refusée ou non envoyée est renvoyée au
+passage suivant.
+
+Exemple :
+    writeback = StatusWriteBack()
+    writeback.run_once()
+"""
+
+import os
+
+from core.reverse_sync import ReverseSync, batch_results, cursor_position, read_changed
+from utils.database import (
+    get_order_statuses, get_tracked_order_statuses, get_unpolled_order_statuses,
+    get_unsent_order_statuses, mark_order_statuses_sent, update_order_statuses,
+)
+from utils.logging_utils import log_error, log_info, log_warning
+from utils.metrics import status_writeback_counter
+from utils.sync_state import get_cursor, set_cursor
+
+# Retour des statuts après chaque synchronisation des commandes (1 : activé)
+STATUS_WRITEBACK = os.getenv('STATUS_WRITEBACK', '1') == '1'
+# Commandes par requête groupée WooCommerce (100 au plus)
+STATUS_BATCH_SIZE = int(os.getenv('STATUS_BATCH_SIZE', 100))
+# Recouvrement du curseur (s, voir core/reverse_sync.py)
+STATUS_CURSOR_OVERLAP = int(os.getenv('STATUS_CURSOR_OVERLAP', 60))
+
+# Statut suivi -> statut WooCommerce (None : statut WooCommerce inchangé)
+WC_STATUSES = {
+    'created': None,
+    'confirmed': None,
+    'delivered': 'completed',
+    'invoiced': 'completed',
+    'cancelled': 'cancelled',
+}
+# Statuts qui n'évoluent plus : commandes non relues au premier relevé
+FINAL_STATUSES = ('invoiced', 'cancelled')
+
+_ODOO_FIELDS = ['name', 'state', 'invoice_status', 'effective_date', 'write_date']
+# Enregistrements par requête Odoo
+_READ_LIMIT = 1000
+
+CURSOR = 'order_status'
+
+
+def odoo_status(order):
+    """
+    Déduit le statut suivi d'une commande Odoo.
+
+    Args:
+        order (dict): Commande Odoo (state, invoice_status, effective_date)
+
+    Returns:
+        str: Statut suivi
+    """
+    if order.get('state') == 'cancel':
+        return 'cancelled'
+    if order.get('effective_date'):
+        return 'invoiced' if order.get('invoice_status') == 'invoiced' else 'delivered'
+    if order.get('state') in ('sale', 'done'):
+        return 'confirmed'
+    return 'created'
+
+
+class StatusWriteBack(ReverseSync):
+    """
+    Relevé des statuts des commandes dans Odoo et envoi groupé vers WooCommerce.
+    """
+
+    loop_error = "Erreur lors du retour des statuts"
+
+    def __init__(self, wc=None, odoo=None, batch_size=STATUS_BATCH_SIZE):
+        """
+        Args:
+            wc (WooCommerceClient, optional): Client WooCommerce
+            odoo (OdooClient, optional): Client Odoo
+            batch_size (int): Commandes par requête groupée
+        """
+        super().__init__(wc, odoo)
+        self.batch_size = batch_size
+
+    def _read(self, ids):
+        """Commandes Odoo parmi ``ids``."""
+        ids = sorted(ids)
+        for start in range(0, len(ids), _READ_LIMIT):
+            yield self.odoo.search_read('sale.order', [('id', 'in', ids[start:start + _READ_LIMIT])], _ODOO_FIELDS)
+
+    def poll(self):
+        """
+        Relève dans Odoo le statut des commandes suivies et enregistre les changements.
+
+        Sans curseur (premier relevé), les commandes suivies non définitives
+        sont lues par identifiant ; ensuite, seules les commandes Odoo
+        modifiées depuis le curseur, et les commandes jamais relevées.
+
+        Returns:
+            int: Nombre de commandes dont le statut a changé
+        """
+        cursor = get_cursor(CURSOR)
+        changes, position = {}, None
+        if cursor is None:
+            tracked = get_tracked_order_statuses(final=FINAL_STATUSES)
+            pages = self._read(tracked)
+        else:
+            tracked = None
+            pages = read_changed(self.odoo, 'sale.order', [], _ODOO_FIELDS,
+                                 cursor_position(cursor, STATUS_CURSOR_OVERLAP), _READ_LIMIT)
+        for records in pages:
+            self._collect(records, tracked or get_order_statuses(record['id'] for record in records), changes)
+            for record in records:
+                if record.get('write_date') and (position is None or
+                                                 (record['write_date'], record['id']) > tuple(position)):
+                    position = [record['write_date'], record['id']]
+        # Commandes créées depuis le dernier relevé : lues quelle que soit leur date
+        fresh = get_unpolled_order_statuses()
+        for records in self._read(set(fresh) - set(changes)):
+            self._collect(records, fresh, changes)
+        if changes:
+            update_order_statuses({order_id: change for order_id, change in changes.values()})
+        if position and position != cursor:
+            set_cursor(CURSOR, position)
+        return len(changes)
+
+    def _collect(self, records, tracked, changes):
+        """Ajoute à ``changes`` (odoo_id -> (order_id, (ref, statut))) les statuts changés."""
+        for record in records:
+            if record['id'] not in tracked:
+                continue
+            order_id, ref, status = tracked[record['id']]
+            new_status = odoo_status(record)
+            if (record['name'], new_status) != (ref, status):
+                changes[record['id']] = (order_id, (record['name'], new_status))
+
+    def flush(self):
+        """
+        Envoie vers WooCommerce les statuts non encore acceptés.
+
+        Returns:
+            dict: Nombre de commandes par issue ('updated', 'failed')
+        """
+        stats = {'updated': 0, 'failed': 0}
+        rows = get_unsent_order_statuses()
+        for start in range(0, len(rows), self.batch_size):
+            self._send(rows[start:start + self.batch_size], stats)
+        for outcome, count in stats.items():
+            if count:
+                status_writeback_counter.labels(outcome).inc(count)
+        if rows:
+            log_info(f"Statuts renvoyés vers WooCommerce : {stats['updated']} commande(s), "
+                     f"{stats['failed']} échec(s)")
+        return stats
+
+    def _send(self, rows, stats):
+        """Envoie un lot de statuts et enregistre ceux acceptés."""
+        updates = []
+        for order_id, ref, status in rows:
+            update = {'id': int(order_id), 'meta_data': [
+                {'key': 'odoo_order_ref', 'value': ref},
+                {'key': 'odoo_status', 'value': status},
+            ]}
+            if WC_STATUSES.get(status):
+                update['status'] = WC_STATUSES[status]
+            updates.append(update)
+        try:
+            results = self.wc.batch_update_orders(updates)
+        except Exception as e:
+            log_error(f"Échec du renvoi groupé des statuts ({len(rows)} commande(s))", exc_info=e)
+            stats['failed'] += len(rows)
+            return
+        # Commandes refusées ou sans résultat (réponse tronquée) : renvoyées au passage suivant
+        sent = {}
+        for (order_id, _, status), _, error in batch_results(rows, results):
+            if error:
+                stats['failed'] += 1
+                log_warning(f"Statut de la commande {order_id} refusé par WooCommerce : "
+                            f"{error.get('message', error)}")
+                continue
+            sent[order_id] = status
+        if sent:
+            mark_order_statuses_sent(sent)
+        stats['updated'] += len(sent)
+
+    def run_once(self):
+        """
+        Relève les statuts puis envoie les changements.
+
+        Returns:
+            dict: Nombre de commandes par issue
+        """
+        self.poll()
+        return self.flush()
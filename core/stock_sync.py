@@ -0,0 +1,271 @@
+"""
+Synchronisation des niveaux de stock d'Odoo vers WooCommerce.
+
+Les quantités modifiées sont relevées dans Odoo par ``write_date`` :
+- ``stock.quant`` des emplacements internes (mouvements de stock) ;
+- ``product.product`` (création d'article, changement de référence).
+La quantité poussée est le champ STOCK_QTY_FIELD de l'article (``free_qty``
+par défaut : stock physique moins les réservations, pour éviter de vendre
+en ligne un stock déjà promis).
+
+Les changements sont regroupés par SKU (``default_code``) pendant
+STOCK_COALESCE_WINDOW secondes : plusieurs mouvements d'un même article
+pendant une promotion ne produisent qu'une mise à jour, avec la dernière
+quantité. L'envoi utilise les endpoints groupés de WooCommerce,
+``products/batch`` et ``products/<id>/variations/batch``, par lots de
+STOCK_BATCH_SIZE (100, maximum accepté par WooCommerce).
+
+L'association SKU -> produit/variation WooCommerce est conservée dans la
+base locale (table wc_products) ; les SKU inconnus sont recherchés par
+lots de 100. Le curseur (sync_cursors.stock.json), position
+``[write_date, id]`` par modèle, n'avance qu'une fois toutes les mises à
+jour envoyées.
+
+Exemple :
+    stock = StockSync()
+    stock.run_once()
+"""
+
+import math
+import os
+import time
+
+from core.reverse_sync import ReverseSync, batch_results, cursor_position, read_changed
+from utils.database import forget_wc_product, get_wc_products, save_wc_products
+from utils.logging_utils import log_error, log_info, log_warning
+from utils.metrics import stock_pending_gauge, stock_updates_counter
+from utils.sync_state import get_cursor, set_cursor
+
+# Mises à jour par requête groupée WooCommerce (100 au plus)
+STOCK_BATCH_SIZE = int(os.getenv('STOCK_BATCH_SIZE', 100))
+# Fenêtre de regroupement des changements d'un même SKU (s)
+STOCK_COALESCE_WINDOW = float(os.getenv('STOCK_COALESCE_WINDOW', 10))
+# Période de relevé des changements dans Odoo en mode résident (s)
+STOCK_POLL_INTERVAL = float(os.getenv('STOCK_POLL_INTERVAL', 5))
+# Champ de quantité d'Odoo poussé vers WooCommerce
+STOCK_QTY_FIELD = os.getenv('STOCK_QTY_FIELD', 'free_qty')
+# Recouvrement du curseur (s, voir core/reverse_sync.py)
+STOCK_CURSOR_OVERLAP = int(os.getenv('STOCK_CURSOR_OVERLAP', 60))
+
+# Enregistrements lus par requête Odoo
+_READ_LIMIT = 1000
+# Modèles relevés -> champ de l'article
+_MODELS = (('stock.quant', 'product_id'), ('product.product', 'id'))
+# Code d'erreur WooCommerce d'un produit supprimé
+_INVALID_ID = ('woocommerce_rest_product_invalid_id', 'woocommerce_rest_product_variation_invalid_id')
+
+CURSOR = 'stock'
+
+
+class StockSync(ReverseSync):
+    """
+    Relevé des stocks modifiés dans Odoo et envoi groupé vers WooCommerce.
+    """
+
+    loop_error = "Erreur lors de la synchronisation du stock"
+
+    def __init__(self, wc=None, odoo=None, batch_size=STOCK_BATCH_SIZE,
+                 window=STOCK_COALESCE_WINDOW, qty_field=STOCK_QTY_FIELD):
+        """
+        Args:
+            wc (WooCommerceClient, optional): Client WooCommerce
+            odoo (OdooClient, optional): Client Odoo
+            batch_size (int): Mises à jour par requête groupée
+            window (float): Fenêtre de regroupement par SKU (s)
+            qty_field (str): Champ de quantité d'Odoo
+        """
+        super().__init__(wc, odoo)
+        self.batch_size = batch_size
+        self.window = window
+        self.qty_field = qty_field
+        # SKU -> quantité à envoyer, et instant du plus ancien changement en attente
+        self.pending = {}
+        self.pending_since = None
+        # SKU -> dernière quantité envoyée avec succès
+        self.pushed = {}
+        self._next_cursor = None
+
+    def _read_changed(self, model, field, position):
+        """Identifiants d'articles modifiés après ``position`` et position du dernier enregistrement lu."""
+        domain = [('location_id.usage', '=', 'internal')] if model == 'stock.quant' else []
+        product_ids, last = set(), None
+        for records in read_changed(self.odoo, model, domain, [field], position, _READ_LIMIT):
+            for record in records:
+                value = record[field]
+                # Champ many2one : [id, nom]
+                product_ids.add(value[0] if isinstance(value, (list, tuple)) else value)
+            last = [records[-1]['write_date'], records[-1]['id']]
+        return product_ids, last
+
+    def poll(self, now=None):
+        """
+        Relève les quantités modifiées dans Odoo et les met en attente par SKU.
+
+        Args:
+            now (float, optional): Instant du relevé (maintenant par défaut)
+
+        Returns:
+            int: Nombre d'articles relevés
+        """
+        now = time.time() if now is None else now
+        cursor = self._next_cursor or get_cursor(CURSOR) or {}
+        if isinstance(cursor, str):
+            # Ancien format : une write_date commune aux deux modèles
+            cursor = {model: cursor for model, _ in _MODELS}
+        product_ids, next_cursor = set(), dict(cursor)
+        for model, field in _MODELS:
+            ids, last = self._read_changed(model, field, cursor_position(cursor.get(model), STOCK_CURSOR_OVERLAP))
+            product_ids |= ids
+            if last:
+                next_cursor[model] = last
+
+        ids = sorted(product_ids)
+        for start in range(0, len(ids), _READ_LIMIT):
+            for product in self.odoo.search_read(
+                'product.product', [('id', 'in', ids[start:start + _READ_LIMIT])],
+                ['default_code', self.qty_field]
+            ):
+                if product.get('default_code'):
+                    self._queue(product['default_code'], product.get(self.qty_field) or 0, now)
+        self._next_cursor = next_cursor or None
+        stock_pending_gauge.set(len(self.pending))
+        return len(ids)
+
+    def _queue(self, sku, quantity, now):
+        """Met en attente la quantité d'un SKU ; la dernière valeur l'emporte."""
+        # Quantité entière, jamais négative : WooCommerce ne doit pas vendre un stock absent
+        quantity = max(math.floor(quantity), 0)
+        if sku not in self.pending and self.pushed.get(sku) == quantity:
+            return
+        self.pending[sku] = quantity
+        if self.pending_since is None:
+            self.pending_since = now
+
+    def due(self, now=None):
+        """
+        Indique si la fenêtre de regroupement des changements en attente est écoulée.
+
+        Args:
+            now (float, optional): Instant de référence (maintenant par défaut)
+
+        Returns:
+            bool: True si un envoi doit avoir lieu
+        """
+        now = time.time() if now is None else now
+        return bool(self.pending) and now - self.pending_since >= self.window
+
+    def _resolve(self, skus):
+        """SKU -> (product_id, parent_id) WooCommerce, recherchés par lots si inconnus."""
+        products = get_wc_products(skus)
+        unknown = [sku for sku in skus if sku not in products]
+        found = {}
+        for start in range(0, len(unknown), 100):
+            for product in self.wc.get_products_by_sku(unknown[start:start + 100]):
+                if product.get('sku') and product.get('type') != 'variable':
+                    found[product['sku']] = (product['id'], product.get('parent_id') or 0)
+        if found:
+            save_wc_products(found)
+            products.update(found)
+        return products
+
+    def flush(self, now=None):
+        """
+        Envoie les quantités en attente vers WooCommerce par requêtes groupées.
+
+        Les SKU en échec restent en attente pour le prochain envoi ; les SKU
+        absents de WooCommerce sont abandonnés.
+
+        Args:
+            now (float, optional): Instant de l'envoi (maintenant par défaut)
+
+        Returns:
+            dict: Nombre de mises à jour par issue ('updated', 'failed', 'unknown_sku')
+        """
+        now = time.time() if now is None else now
+        stats = {'updated': 0, 'failed': 0, 'unknown_sku': 0}
+        products = self._resolve(list(self.pending))
+        for sku in [sku for sku in self.pending if sku not in products]:
+            log_warning(f"SKU {sku} absent de WooCommerce : stock non synchronisé")
+            stats['unknown_sku'] += 1
+            del self.pending[sku]
+        # Produits simples (parent 0) d'une part, variations par produit parent d'autre part
+        groups = {}
+        for sku, quantity in self.pending.items():
+            product_id, parent_id = products[sku]
+            groups.setdefault(parent_id, []).append((sku, product_id, quantity))
+
+        for parent_id, items in groups.items():
+            for start in range(0, len(items), self.batch_size):
+                self._send(parent_id, items[start:start + self.batch_size], stats)
+
+        for outcome, count in stats.items():
+            if count:
+                stock_updates_counter.labels(outcome).inc(count)
+        if self.pending:
+            # Nouvel essai après une fenêtre complète
+            self.pending_since = now
+        else:
+            self.pending_since = None
+            if self._next_cursor:
+                set_cursor(CURSOR, self._next_cursor)
+        stock_pending_gauge.set(len(self.pending))
+        log_info(f"Stock WooCommerce : {stats['updated']} mise(s) à jour, {stats['failed']} échec(s), "
+                 f"{stats['unknown_sku']} SKU inconnu(s)")
+        return stats
+
+    def _send(self, parent_id, items, stats):
+        """Envoie un lot de mises à jour d'un même parent (0 : produits simples)."""
+        updates = [{'id': product_id, 'manage_stock': True, 'stock_quantity': quantity}
+                   for _, product_id, quantity in items]
+        try:
+            results = self.wc.batch_update_products(updates, parent_id=parent_id or None)
+        except Exception as e:
+            log_error(f"Échec de la mise à jour groupée du stock ({len(items)} SKU)", exc_info=e)
+            stats['failed'] += len(items)
+            return
+        # Éléments refusés ou sans résultat (réponse tronquée) : restent en attente
+        for (sku, _, quantity), _, error in batch_results(items, results):
+            if error:
+                stats['failed'] += 1
+                log_warning(f"Stock du SKU {sku} refusé par WooCommerce : {error.get('message', error)}")
+                if error.get('code') in _INVALID_ID:
+                    # Produit supprimé : nouvelle recherche par SKU au prochain envoi
+                    forget_wc_product(sku)
+                continue
+            stats['updated'] += 1
+            self.pushed[sku] = quantity
+            if self.pending.get(sku) == quantity:
+                del self.pending[sku]
+
+    def run_once(self):
+        """
+        Relève les changements puis les envoie immédiatement.
+
+        Returns:
+            dict: Nombre de mises à jour par issue
+        """
+        self.poll()
+        if not self.pending:
+            if self._next_cursor:
+                set_cursor(CURSOR, self._next_cursor)
+            return {'updated': 0, 'failed': 0, 'unknown_sku': 0}
+        return self.flush()
+
+    def step(self):
+        """Tour de la boucle résidente : relevé, envoi à l'échéance de la fenêtre de regroupement."""
+        self.poll()
+        if self.due():
+            self.flush()
+        elif not self.pending and self._next_cursor:
+            set_cursor(CURSOR, self._next_cursor)
+
+    def run(self, interval=STOCK_POLL_INTERVAL, stop=None):
+        """
+        Boucle résidente : relevé toutes les ``interval`` secondes, envoi à
+        l'échéance de la fenêtre de regroupement.
+
+        Args:
+            interval (float): Période de relevé (s)
+            stop (threading.Event, optional): Arrêt de la boucle
+        """
+        super().run(interval, stop)
@@ -9,6 +9,7 @@ Cette classe orchestre le processus de synchronisation des commandes, incluant :
 """
 
 from .wc_client import WooCommerceClient
+from .customer_sync import remember_partner
 from .odoo_client import OdooClient
 from .models.order import map_wc_order_to_odoo
 from utils.logger import logger
@@ -17,99 +18,337 @@ from utils.logging_utils import (
     log_sync_operation, log_api_call, log_performance,
     log_data_transformation
 )
-from core.validator import validate_order
-from utils.database import init_db, is_order_already_synced_db, mark_order_as_synced_db
-from utils.helpers import log_audit
-from utils.sync_state import get_last_synced_at, set_last_synced_at
+from core.exceptions import ValidationError
+from core.validator import validate_order, validate_orders
+from utils.database import (
+    init_db, is_order_already_synced_db, mark_order_as_synced_db,
+    record_pending_order, get_oldest_pending_created_at, get_retryable_pending_orders,
+    forget_pending_orders, PENDING_MAX_ATTEMPTS, UNPROCESSED_CURSOR
+)
+from utils.helpers import log_audit, wc_gmt_timestamp
+from utils.sync_state import get_last_synced_at, set_last_synced_at, set_cursor, sync_lock
+from utils.metrics import (
+    time_stage, record_order_outcome, sync_queue_depth_gauge,
+    observe_order_freshness, set_oldest_unsynced_age, observe_odoo_queue_wait
+)
+from utils.tracing import start_trace, span, new_run_id, record_error
+from utils.memory import MemoryGuard
+from utils.progress import SyncProgress
 import time
 
+# Nombre nominal de commandes par page WooCommerce (réduit si le budget mémoire est dépassé)
+SYNC_PAGE_SIZE = 100
+# Commandes en échec relues par requête WooCommerce (paramètre include, 100 au plus)
+PENDING_RETRY_CHUNK = 100
+
 class SyncManager:
     """
     Gestionnaire de synchronisation qui coordonne le processus de transfert
     des commandes de WooCommerce vers Odoo.
     """
     
-    def __init__(self):
+    def __init__(self, memory_guard=None, store=None, odoo_scheduler=None):
         """
         Initialise les clients WooCommerce et Odoo, et la base de données locale.
+
+        En mode multi-boutiques, le gestionnaire est créé dans le contexte de
+        sa boutique (``use_store``, utils/store_context.py) : base et fichiers
+        d'état locaux propres à la boutique.
+
+        Args:
+            memory_guard (MemoryGuard, optional): Garde mémoire ajustant la taille
+                des pages (budget MEMORY_BUDGET_MB par défaut)
+            store (Store, optional): Boutique synchronisée (config/stores.py)
+            odoo_scheduler (FairScheduler, optional): Capacité d'écriture Odoo
+                partagée entre les boutiques
         """
         log_info("Initialisation du gestionnaire de synchronisation")
-        self.wc = WooCommerceClient()
-        self.odoo = OdooClient()
+        self.store = store
+        self.odoo_scheduler = odoo_scheduler
+        self.wc = WooCommerceClient(store) if store is not None else WooCommerceClient()
+        # Partenaires écrits depuis WooCommerce : non renvoyés par la synchronisation des clients
+        self.odoo = OdooClient(on_partner_written=remember_partner)
+        self.memory = memory_guard or MemoryGuard()
         init_db()
         log_info("Gestionnaire de synchronisation initialisé")
 
     @log_procedure("Synchronisation des commandes")
-    def sync_orders(self):
+    def sync_orders(self, trigger="poll"):
         """
         Synchronise les commandes de WooCommerce vers Odoo.
         
         Le processus comprend :
-        1. Récupération des commandes WooCommerce
-        2. Pour chaque commande :
+        1. Nouvelle tentative des commandes en échec lors des exécutions
+           précédentes (voir ``retry_pending``)
+        2. Récupération des commandes WooCommerce, de la plus ancienne à la plus
+           récente, page par page (taille ajustée au budget mémoire)
+        3. Pour chaque commande :
            - Vérification si déjà synchronisée
            - Validation des données
            - Transformation en format Odoo
            - Création dans Odoo
            - Marquage comme synchronisée
            - Journalisation de l'audit
+
+        Args:
+            trigger (str): Déclencheur de la synchronisation ('poll' ou 'webhook'),
+                utilisé pour la métrique de fraîcheur
+        """
+        # Une seule synchronisation à la fois sur la base locale, tous processus confondus
+        with sync_lock():
+            progress = None
+            try:
+                # Récupération de la date de dernière synchronisation
+                last_synced = get_last_synced_at()
+                run_id = new_run_id()
+                progress = SyncProgress(trigger, run_id)
+                log_info(f"Dernière synchronisation à : {last_synced} (exécution {run_id})")
+                try:
+                    self.retry_pending(trigger, progress)
+                except Exception as e:
+                    # Les commandes restent en file pour la prochaine exécution
+                    log_error("Erreur lors des nouvelles tentatives des commandes en échec", exc_info=e)
+                # Récupération des commandes WooCommerce incrémentale, page par page
+                offset = 0
+                while True:
+                    per_page = self.memory.batch_size(SYNC_PAGE_SIZE)
+                    start_time = time.time()
+                    with time_stage("fetch"), start_trace("sync.fetch", trigger=trigger):
+                        orders = self.wc.get_orders(after=last_synced, per_page=per_page, offset=offset,
+                                                    order="asc")
+                    log_performance("Récupération des commandes WooCommerce", time.time() - start_time)
+                    log_info(f"{len(orders)} commandes récupérées")
+                    progress.page(len(orders), self.wc.last_total)
+                
+                    self._track_unprocessed(orders)
+                    self._process_batch(orders, trigger, progress)
+                    if len(orders) < per_page:
+                        break
+                    offset += len(orders)
+            
+                # Mise à jour de la date de dernière synchronisation
+                with time_stage("state_commit"), span("sync.state_commit"):
+                    set_cursor(UNPROCESSED_CURSOR, None)
+                    set_last_synced_at()
+                set_oldest_unsynced_age(get_oldest_pending_created_at())
+                progress.finish()
+            
+            except Exception as e:
+                log_error("Erreur lors de la synchronisation", exc_info=e)
+                if progress is not None:
+                    progress.finish(error=e)
+                raise
+
+    @log_procedure("Rattrapage des commandes")
+    def backfill(self, after=None, per_page=100):
         """
+        Rattrape l'historique des commandes page par page.
+
+        Les commandes sont demandées avec ``_fields`` et projetées sur des
+        enregistrements compacts : la mémoire utilisée dépend de la taille
+        d'une page, pas du volume total importé. La taille des pages est
+        réduite si le budget mémoire est dépassé. La date de dernière
+        synchronisation n'est pas modifiée.
+
+        Args:
+            after (str, optional): Date ISO 8601 à partir de laquelle rattraper
+            per_page (int): Nombre de commandes par page (max 100)
+
+        Returns:
+            int: Nombre de commandes traitées
+        """
+        processed = 0
+        run_id = new_run_id()
+        progress = SyncProgress("backfill", run_id)
+        log_info(f"Rattrapage depuis {after} (exécution {run_id})")
+        pages = self.wc.iter_orders(after=after, per_page=per_page, page_size=self.memory.batch_size)
         try:
-            # Récupération de la date de dernière synchronisation
-            last_synced = get_last_synced_at()
-            log_info(f"Dernière synchronisation à : {last_synced}")
-            # Récupération des commandes WooCommerce incrémentale
-            start_time = time.time()
-            orders = self.wc.get_orders(after=last_synced) if last_synced else self.wc.get_orders()
-            log_performance("Récupération des commandes WooCommerce", time.time() - start_time)
-            log_info(f"{len(orders)} commandes récupérées")
+            while True:
+                with time_stage("fetch"), start_trace("sync.fetch", trigger="backfill"):
+                    page = next(pages, None)
+                if page is None:
+                    break
+                progress.page(len(page), self.wc.last_total)
+                # Verrou pris page par page : les synchronisations régulières s'intercalent
+                with sync_lock():
+                    self._process_batch(page, "backfill", progress)
+                processed += len(page)
+                log_info(f"Rattrapage : {processed} commandes traitées")
+        except Exception as e:
+            progress.finish(error=e)
+            raise
+        progress.finish()
+        return processed
+
+    def retry_pending(self, trigger="poll", progress=None):
+        """
+        Retente les commandes en échec lors des exécutions précédentes.
+
+        Le curseur de synchronisation a dépassé ces commandes : elles sont
+        relues dans WooCommerce par identifiant (paramètre ``include``). Une
+        commande qui n'est plus renvoyée (supprimée ou sortie du statut
+        synchronisé) est retirée de la file ; une commande encore en échec
+        après PENDING_MAX_ATTEMPTS tentatives est abandonnée et n'est plus
+        retentée (elle reste visible dans pending_orders jusqu'à la purge).
+
+        Args:
+            trigger (str): Déclencheur de la synchronisation
+            progress (SyncProgress, optional): Avancement de l'exécution en cours
+
+        Returns:
+            int: Nombre de commandes retentées
+        """
+        order_ids = get_retryable_pending_orders()
+        retried = 0
+        for start in range(0, len(order_ids), PENDING_RETRY_CHUNK):
+            chunk = order_ids[start:start + PENDING_RETRY_CHUNK]
+            with time_stage("fetch"), start_trace("sync.fetch", trigger=trigger):
+                orders = self.wc.get_orders(include=chunk, per_page=len(chunk))
+            returned = {str(order['id']) for order in orders}
+            gone = [order_id for order_id in chunk if order_id not in returned]
+            if gone:
+                forget_pending_orders(gone)
+                log_warning(f"{len(gone)} commande(s) en échec plus à synchroniser, retirée(s) de la file : "
+                            f"{', '.join(gone)}")
+            self._process_batch(orders, trigger, progress)
+            retried += len(orders)
+        if order_ids:
+            log_info(f"Nouvelles tentatives : {retried} commande(s) en échec retentée(s)")
+        return retried
+
+    def _track_unprocessed(self, orders):
+        """
+        Enregistre la création de la plus ancienne commande récupérée, avant
+        son traitement, et publie l'ancienneté correspondante.
+
+        Les pages étant parcourues de la plus ancienne à la plus récente, la
+        jauge couvre aussi les commandes en attente de traitement, et pas
+        seulement celles en échec ; le dashboard la recalcule à partir du
+        même curseur (``get_oldest_pending_created_at``).
+
+        Args:
+            orders (list): Commandes de la page récupérée
+        """
+        created = [created_at for created_at in
+                   (wc_gmt_timestamp(order.get('date_created_gmt')) for order in orders)
+                   if created_at is not None]
+        set_cursor(UNPROCESSED_CURSOR, min(created) if created else None)
+        set_oldest_unsynced_age(get_oldest_pending_created_at())
+
+    def _process_batch(self, orders, trigger="poll", progress=None):
+        """
+        Synchronise un lot de commandes en publiant la profondeur de file restante,
+        puis l'ancienneté de la plus ancienne commande non synchronisée.
+
+        Le lot est validé en une seule passe (``validate_orders`` : montants
+        réconciliés ensemble) avant le traitement commande par commande.
+
+        Args:
+            orders (list): Commandes WooCommerce récupérées
+            trigger (str): Déclencheur de la synchronisation (voir utils.metrics.TRIGGERS)
+            progress (SyncProgress, optional): Avancement de l'exécution en cours
+        """
+        remaining = len(orders)
+        sync_queue_depth_gauge.set(remaining)
+        with time_stage("validate"), start_trace("sync.validate", trigger=trigger, **{"orders.count": remaining}):
+            errors = validate_orders(orders)
+        for order, order_errors in zip(orders, errors):
+            outcome = self._process_order(order, trigger, order_errors)
+            if progress is not None:
+                progress.order(outcome)
+            remaining -= 1
+            sync_queue_depth_gauge.set(remaining)
+        set_oldest_unsynced_age(get_oldest_pending_created_at())
+
+    def _process_order(self, order, trigger="poll", validation_errors=None):
+        """
+        Synchronise une commande WooCommerce vers Odoo.
+
+        Étapes : vérification si déjà synchronisée, validation, transformation,
+        création dans Odoo, marquage comme synchronisée et audit. Les erreurs
+        sont journalisées, auditées et la commande est conservée comme
+        non synchronisée (pending_orders) sans interrompre le lot.
+
+        Args:
+            order (dict): Commande WooCommerce (dict ou OrderRecord)
+            trigger (str): Déclencheur de la synchronisation
+            validation_errors (list, optional): Erreurs de validation calculées
+                pour tout le lot par ``_process_batch`` (None : la commande est
+                validée seule)
+
+        Returns:
+            str: Issue du traitement ('success', 'ignored' ou 'error')
+        """
+        with start_trace("sync.order", **{"order.id": order.get('id'), "trigger": trigger}):
+            try:
+                order_id = order["id"]
+                log_sync_operation("order_processing", {"order_id": order_id})
             
-            for order in orders:
-                try:
-                    order_id = order["id"]
-                    log_sync_operation("order_processing", {"order_id": order_id})
-                    
-                    # Vérification si la commande a déjà été synchronisée
-                    if is_order_already_synced_db(order_id):
-                        log_warning(f"Commande {order_id} déjà synchronisée")
-                        log_audit(order_id, "ignored", "Déjà synchronisée")
-                        continue
-                    
-                    # Validation des données de la commande
+                # Vérification si la commande a déjà été synchronisée
+                with time_stage("dedup"), span("sync.dedup"):
+                    already_synced = is_order_already_synced_db(order_id)
+                if already_synced:
+                    log_warning(f"Commande {order_id} déjà synchronisée")
+                    log_audit(order_id, "ignored", "Déjà synchronisée")
+                    record_order_outcome("ignored")
+                    return "ignored"
+            
+                # Validation des données de la commande
+                if validation_errors is None:
                     log_info(f"Validation de la commande {order_id}")
-                    validate_order(order)
-                    
-                    # Transformation des données pour Odoo
-                    log_info(f"Transformation de la commande {order_id}")
-                    start_time = time.time()
+                    with time_stage("validate"), span("sync.validate"):
+                        validate_order(order)
+                elif validation_errors:
+                    raise ValidationError("; ".join(validation_errors))
+            
+                # Transformation des données pour Odoo
+                log_info(f"Transformation de la commande {order_id}")
+                start_time = time.time()
+                with time_stage("transform"), span("sync.transform"):
                     odoo_order_data = map_wc_order_to_odoo(order)
-                    log_performance(f"Transformation commande {order_id}", time.time() - start_time)
-                    log_data_transformation("WooCommerce", "Odoo", order_id, "Transformation des données pour Odoo terminée")
-                    
-                    # Création de la commande dans Odoo
-                    log_info(f"Création de la commande {order_id} dans Odoo")
-                    start_time = time.time()
-                    self.odoo.create_order(odoo_order_data)
-                    log_performance(f"Création commande Odoo {order_id}", time.time() - start_time)
-                    
-                    # Marquage de la commande comme synchronisée
-                    mark_order_as_synced_db(order_id)
-                    log_info(f"Commande {order_id} marquée comme synchronisée")
-                    
+                    if self.store is not None:
+                        odoo_order_data.update(self.store.odoo_order_defaults())
+                log_performance(f"Transformation commande {order_id}", time.time() - start_time)
+                log_data_transformation("WooCommerce", "Odoo", order_id, "Transformation des données pour Odoo terminée")
+            
+                # Création de la commande dans Odoo
+                log_info(f"Création de la commande {order_id} dans Odoo")
+                if self.odoo_scheduler is not None:
+                    # Créneau d'écriture Odoo partagé équitablement entre les boutiques
+                    with span("sync.odoo_queue"):
+                        observe_odoo_queue_wait(self.store.name, self.odoo_scheduler.acquire(self.store.name))
+                start_time = time.time()
+                with time_stage("odoo_write"), span("sync.odoo_write"):
+                    odoo_id = self.odoo.create_order(odoo_order_data)
+                created_in_odoo_at = time.time()
+                log_performance(f"Création commande Odoo {order_id}", time.time() - start_time)
+            
+                # Marquage de la commande comme synchronisée
+                with time_stage("state_commit"), span("sync.state_commit"):
+                    mark_order_as_synced_db(order_id, odoo_id)
                     log_audit(order_id, "success", "Synchronisation OK")
-                    log_sync_operation("order_success", {"order_id": order_id})
-                    
-                except Exception as ve:
-                    log_error(f"Erreur lors du traitement de la commande {order.get('id', '?')}", exc_info=ve)
-                    log_audit(order.get('id', '?'), "error", str(ve))
-                    log_sync_operation("order_error", {
-                        "order_id": order.get('id', '?'),
-                        "error": str(ve)
-                    })
-                    
-            # Mise à jour de la date de dernière synchronisation
-            set_last_synced_at()
+                log_info(f"Commande {order_id} marquée comme synchronisée")
             
-        except Exception as e:
-            log_error("Erreur lors de la synchronisation", exc_info=e)
-            raise
\ No newline at end of file
+                record_order_outcome("success")
+                observe_order_freshness(
+                    trigger, wc_gmt_timestamp(order.get('date_created_gmt')), created_in_odoo_at
+                )
+                log_sync_operation("order_success", {"order_id": order_id})
+                return "success"
+            
+            except Exception as ve:
+                log_error(f"Erreur lors du traitement de la commande {order.get('id', '?')}", exc_info=ve)
+                log_audit(order.get('id', '?'), "error", str(ve))
+                record_order_outcome("error")
+                record_error(ve)
+                if order.get('id') is not None:
+                    attempts = record_pending_order(
+                        order.get('id'), wc_gmt_timestamp(order.get('date_created_gmt')), str(ve)
+                    )
+                    if attempts >= PENDING_MAX_ATTEMPTS:
+                        log_warning(f"Commande {order['id']} abandonnée après {attempts} tentatives")
+                log_sync_operation("order_error", {
+                    "order_id": order.get('id', '?'),
+                    "error": str(ve)
+                })
+                return "error"
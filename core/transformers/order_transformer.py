@@ -1,6 +1,7 @@
 """
 Transformateur de commandes WooCommerce vers Odoo.
 Ce module gère la transformation des données de commandes entre les deux systèmes.
+Les champs produits sont ceux de la spécification ORDER_SPEC (core/models/mapping.py).
 """
 
 from utils.logging_utils import (
@@ -8,77 +9,69 @@ from utils.logging_utils import (
     log_data_transformation
 )
 from core.exceptions import TransformationError
-import hashlib
+from core.models.mapping import ORDER_SPEC, ORDER_REQUIRED_FIELDS, compile_mapping
+from core.fingerprint import order_fingerprint, payload_fingerprint
+from utils.tracing import span
 
 class OrderTransformer:
     """
     Transforme les données de commandes WooCommerce au format Odoo.
     Gère la conversion des champs et la validation des données.
     """
-    
-    def __init__(self):
-        """Initialise le transformateur de commandes."""
+
+    # Fonction de transformation compilée une seule fois pour toutes les instances
+    _map_order = staticmethod(compile_mapping(ORDER_SPEC))
+
+    def __init__(self, checksum=False):
+        """
+        Initialise le transformateur de commandes.
+
+        Args:
+            checksum (bool): Calculer et journaliser les empreintes avant et
+                après transformation (désactivé par défaut)
+        """
         log_info("Initialisation du transformateur de commandes")
-    
+        self.checksum = checksum
+
     @log_procedure("Transformation de commande")
     def transform(self, wc_order):
         """
         Transforme une commande WooCommerce au format Odoo.
-        
+
         Args:
             wc_order (dict): Commande WooCommerce
-            
+
         Returns:
             dict: Commande au format Odoo
-            
+
         Raises:
             TransformationError: Si la transformation échoue
         """
         try:
             log_info(f"Transformation de la commande WooCommerce #{wc_order.get('id')}")
-            # Validation checksum avant transformation
-            pre_hash = hashlib.sha256(str(wc_order).encode()).hexdigest()
-            log_info(f"Checksum avant transformation: {pre_hash}")
-            
-            # Log de la transformation des données
-            log_data_transformation(
-                "WooCommerce -> Odoo",
-                "order",
-                wc_order.get('id'),
-                "Début de la transformation"
-            )
-            
+            if self.checksum:
+                # Empreinte canonique de la commande avant transformation
+                pre_hash = order_fingerprint(wc_order)
+                log_info(f"Checksum avant transformation: {pre_hash}")
+
             # Validation des données requises
             if not self._validate_order(wc_order):
                 error_msg = f"Données de commande invalides pour l'ordre #{wc_order.get('id')}"
                 log_error(error_msg)
                 raise TransformationError(error_msg)
-            
+
             # Transformation des données
-            odoo_order = {
-                'name': f"SO{wc_order.get('id')}",
-                'partner_id': wc_order.get('customer_id'),
-                'date_order': wc_order.get('date_created'),
-                'amount_total': float(wc_order.get('total', 0)),
-                'state': 'draft',
-                'order_line': self._transform_order_lines(wc_order)
-            }
-            
-            # Validation checksum après transformation
-            post_hash = hashlib.sha256(str(odoo_order).encode()).hexdigest()
-            log_info(f"Checksum après transformation: {post_hash}")
-            
-            # Log de la transformation réussie
-            log_data_transformation(
-                "WooCommerce -> Odoo",
-                "order",
-                wc_order.get('id'),
-                "Transformation réussie"
-            )
-            
+            with span("transformer.transform_order"):
+                odoo_order = self._map_order(wc_order)
+
+            if self.checksum:
+                # Empreinte de la commande au format Odoo
+                post_hash = payload_fingerprint(odoo_order)
+                log_info(f"Checksum après transformation: {post_hash}")
+
             log_info(f"Commande #{wc_order.get('id')} transformée avec succès")
             return odoo_order
-            
+
         except Exception as e:
             error_msg = f"Erreur lors de la transformation de la commande #{wc_order.get('id')}: {e}"
             log_error(error_msg, exc_info=e)
@@ -89,56 +82,61 @@ class OrderTransformer:
                 f"Échec de la transformation: {str(e)}"
             )
             raise TransformationError(error_msg)
-    
+
+    def transform_many(self, wc_orders):
+        """
+        Transforme un lot de commandes WooCommerce au format Odoo.
+
+        Les commandes doivent avoir été validées au préalable : le lot est
+        journalisé une seule fois et la première commande incomplète
+        interrompt la transformation.
+
+        La synchronisation (SyncManager) ne passe pas par ce transformateur :
+        elle n'envoie à Odoo que le sous-ensemble de champs de
+        ``map_wc_order_to_odoo`` et isole les erreurs commande par commande,
+        là où une commande incomplète interrompt ici tout le lot.
+
+        Args:
+            wc_orders (list): Commandes WooCommerce
+
+        Returns:
+            list: Commandes au format Odoo, dans l'ordre du lot
+
+        Raises:
+            TransformationError: Si une commande est incomplète ou invalide
+        """
+        map_order = self._map_order
+        odoo_orders = []
+        for wc_order in wc_orders:
+            if not all(wc_order.get(field) for field in ORDER_REQUIRED_FIELDS):
+                error_msg = f"Données de commande invalides pour l'ordre #{wc_order.get('id')}"
+                log_error(error_msg)
+                raise TransformationError(error_msg)
+            try:
+                odoo_orders.append(map_order(wc_order))
+            except Exception as e:
+                error_msg = f"Erreur lors de la transformation de la commande #{wc_order.get('id')}: {e}"
+                log_error(error_msg, exc_info=e)
+                raise TransformationError(error_msg)
+        log_info(f"{len(odoo_orders)} commandes transformées")
+        return odoo_orders
+
     def _validate_order(self, wc_order):
         """
         Valide les données de la commande WooCommerce.
-        
+
         Args:
             wc_order (dict): Commande WooCommerce
-            
+
         Returns:
             bool: True si la commande est valide
         """
-        required_fields = ['id', 'customer_id', 'date_created', 'total', 'line_items']
-        missing_fields = [field for field in required_fields if not wc_order.get(field)]
-        
+        missing_fields = [field for field in ORDER_REQUIRED_FIELDS if not wc_order.get(field)]
+
         if missing_fields:
             log_warning(
                 f"Champs manquants dans la commande #{wc_order.get('id')}: {', '.join(missing_fields)}"
             )
             return False
-            
+
         return True
-    
-    def _transform_order_lines(self, wc_order):
-        """
-        Transforme les lignes de commande WooCommerce au format Odoo.
-        
-        Args:
-            wc_order (dict): Commande WooCommerce
-            
-        Returns:
-            list: Lignes de commande au format Odoo
-        """
-        try:
-            log_info(f"Transformation des lignes de commande pour l'ordre #{wc_order.get('id')}")
-            
-            order_lines = []
-            for item in wc_order.get('line_items', []):
-                order_line = {
-                    'product_id': item.get('product_id'),
-                    'name': item.get('name'),
-                    'product_uom_qty': item.get('quantity', 1),
-                    'price_unit': float(item.get('price', 0)),
-                    'price_subtotal': float(item.get('total', 0))
-                }
-                order_lines.append((0, 0, order_line))
-                
-            log_info(f"{len(order_lines)} lignes transformées pour l'ordre #{wc_order.get('id')}")
-            return order_lines
-            
-        except Exception as e:
-            error_msg = f"Erreur lors de la transformation des lignes de commande: {e}"
-            log_error(error_msg, exc_info=e)
-            raise TransformationError(error_msg)
\ No newline at end of file
@@ -1,219 +1,294 @@
 """
 Module de validation des données.
 Ce module gère la validation des données entre WooCommerce et Odoo.
+
+Les règles sont décrites de manière déclarative (champs obligatoires,
+types attendus, contrôles transverses) puis compilées une seule fois
+en un schéma qui vérifie un enregistrement en un seul passage.
 """
 
+import re
+
 from utils.logging_utils import (
-    log_procedure, log_error, log_info, log_warning,
-    log_data_transformation
+    log_error, log_info, log_debug, log_data_transformation
 )
 from core.exceptions import ValidationError
+from utils.tracing import span
+from core.reconciliation import (
+    DEFAULT_TOLERANCE_CENTS, describe_mismatch, order_amount_diffs,
+    reconcile_amounts
+)
+
+# Expression compilée une seule fois pour la validation des emails
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def _is_amount(value):
+    """Indique si une valeur est convertible en montant."""
+    if isinstance(value, bool):
+        return False
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_email(value):
+    """Indique si une valeur est une adresse email valide."""
+    return isinstance(value, str) and EMAIL_PATTERN.match(value) is not None
+
+
+def _is_list(value):
+    """Indique si une valeur est une liste (ou un tuple d'un enregistrement compact)."""
+    return isinstance(value, (list, tuple))
+
+
+# Vérificateurs de type disponibles dans les schémas
+TYPE_CHECKS = {
+    'amount': (_is_amount, "Montant invalide"),
+    'email': (_is_email, "Email invalide"),
+    'list': (_is_list, "Liste attendue"),
+}
+
+
+def _check_order_amounts(order_data):
+    """
+    Vérifie la cohérence du total avec les lignes, taxes et frais de port.
+
+    Args:
+        order_data (dict): Données de la commande
+
+    Returns:
+        str: Message d'erreur, ou None si les montants sont cohérents
+    """
+    try:
+        diffs = order_amount_diffs(order_data)
+    except (AttributeError, ValueError):
+        return "Montants de ligne invalides"
+    if any(abs(diff) > DEFAULT_TOLERANCE_CENTS for diff in diffs):
+        return describe_mismatch(*diffs)
+    return None
+
+
+class RecordSchema:
+    """
+    Schéma de validation compilé.
+
+    Chaque champ est décrit par un tuple ``(nom, obligatoire, type)`` où le
+    type est une clé de ``TYPE_CHECKS`` ou None. Les contrôles transverses
+    reçoivent l'enregistrement complet et retournent un message d'erreur ou
+    None ; ils ne sont exécutés que si tous les champs sont valides.
+    """
+
+    def __init__(self, label, fields, checks=()):
+        """
+        Compile le schéma.
+
+        Args:
+            label (str): Libellé de l'entité dans les messages (ex: 'la commande')
+            fields (iterable): Tuples ``(nom, obligatoire, type)``
+            checks (iterable): Contrôles transverses ``record -> str | None``
+        """
+        self.label = label
+        self._fields = tuple(
+            (name, required) + (TYPE_CHECKS[kind] if kind else (None, None))
+            for name, required, kind in fields
+        )
+        self._checks = tuple(checks)
+
+    def errors(self, record, checks=True):
+        """
+        Valide un enregistrement en un seul passage.
+
+        Args:
+            record (dict): Enregistrement à valider (dict ou enregistrement
+                compact offrant ``get``)
+            checks (bool): Exécuter aussi les contrôles transverses
+
+        Returns:
+            list: Messages d'erreur (vide si l'enregistrement est valide)
+        """
+        if not hasattr(record, 'get'):
+            return [f"Format invalide pour {self.label}: objet attendu"]
+
+        missing = []
+        invalid = []
+        for name, required, check, message in self._fields:
+            value = record.get(name)
+            if not value:
+                if required:
+                    missing.append(name)
+            elif check is not None and not check(value):
+                invalid.append(f"{message}: {name}")
+
+        errors = []
+        if missing:
+            errors.append(f"Champs manquants dans {self.label}: {', '.join(missing)}")
+        errors.extend(invalid)
+        if errors or not checks:
+            return errors
+
+        for check in self._checks:
+            error = check(record)
+            if error:
+                errors.append(error)
+        return errors
+
+
+ORDER_SCHEMA = RecordSchema(
+    'la commande',
+    fields=(
+        ('id', True, None),
+        ('customer_id', True, None),
+        ('total', True, 'amount'),
+        ('line_items', True, 'list'),
+    ),
+    checks=(_check_order_amounts,),
+)
+
+CUSTOMER_SCHEMA = RecordSchema(
+    'le client',
+    fields=(
+        ('id', True, None),
+        ('email', True, 'email'),
+        ('first_name', True, None),
+        ('last_name', True, None),
+    ),
+)
+
 
 class DataValidator:
     """
     Valide les données entre WooCommerce et Odoo.
     Assure la cohérence et l'intégrité des données.
     """
-    
+
     def __init__(self):
         """Initialise le validateur de données."""
         log_info("Initialisation du validateur de données")
-    
-    @log_procedure("Validation de commande")
-    def validate_order(self, order_data):
+
+    def _validate(self, schema, data_type, record):
         """
-        Valide les données d'une commande.
-        
+        Valide un enregistrement et lève une exception en cas d'échec.
+
         Args:
-            order_data (dict): Données de la commande
-            
-        Returns:
-            bool: True si la commande est valide
-            
+            schema (RecordSchema): Schéma à appliquer
+            data_type (str): Type de donnée ('order' ou 'customer')
+            record (dict): Enregistrement à valider
+
         Raises:
             ValidationError: Si la validation échoue
         """
-        try:
-            log_info(f"Validation de la commande #{order_data.get('id')}")
-            
-            # Log de la validation
-            log_data_transformation(
-                "Validation",
-                "order",
-                order_data.get('id'),
-                "Début de la validation"
-            )
-            
-            # Vérification des champs obligatoires
-            required_fields = ['id', 'customer_id', 'total', 'line_items']
-            missing_fields = [field for field in required_fields if not order_data.get(field)]
-            
-            if missing_fields:
-                error_msg = f"Champs manquants dans la commande: {', '.join(missing_fields)}"
-                log_error(error_msg)
-                log_data_transformation(
-                    "Validation",
-                    "order",
-                    order_data.get('id'),
-                    f"Échec de la validation: {error_msg}"
-                )
-                raise ValidationError(error_msg)
-            
-            # Vérification des montants
-            if not self._validate_amounts(order_data):
-                error_msg = "Montants de commande invalides"
-                log_error(error_msg)
-                log_data_transformation(
-                    "Validation",
-                    "order",
-                    order_data.get('id'),
-                    f"Échec de la validation: {error_msg}"
-                )
-                raise ValidationError(error_msg)
-            
-            # Log de la validation réussie
+        errors = schema.errors(record)
+        if errors:
+            record_id = record.get('id') if hasattr(record, 'get') else None
+            error_msg = "; ".join(errors)
+            log_error(error_msg)
             log_data_transformation(
                 "Validation",
-                "order",
-                order_data.get('id'),
-                "Validation réussie"
-            )
-            
-            log_info(f"Commande #{order_data.get('id')} validée avec succès")
-            return True
-            
-        except Exception as e:
-            error_msg = f"Erreur lors de la validation de la commande #{order_data.get('id')}: {e}"
-            log_error(error_msg, exc_info=e)
-            log_data_transformation(
-                "Validation",
-                "order",
-                order_data.get('id'),
-                f"Échec de la validation: {str(e)}"
+                data_type,
+                record_id,
+                f"Échec de la validation: {error_msg}"
             )
             raise ValidationError(error_msg)
-    
-    def _validate_amounts(self, order_data):
+
+    def validate_order(self, order_data):
         """
-        Valide les montants de la commande.
-        
+        Valide les données d'une commande.
+
         Args:
             order_data (dict): Données de la commande
-            
+
         Returns:
-            bool: True si les montants sont valides
+            bool: True si la commande est valide
+
+        Raises:
+            ValidationError: Si la validation échoue
         """
-        try:
-            total = float(order_data.get('total', 0))
-            line_items_total = sum(
-                float(item.get('total', 0)) for item in order_data.get('line_items', [])
-            )
-            
-            # Vérification de la cohérence des montants
-            if abs(total - line_items_total) > 0.01:  # Tolérance de 0.01 pour les arrondis
-                log_warning(
-                    f"Différence de montant détectée pour la commande #{order_data.get('id')}: "
-                    f"total={total}, somme_lignes={line_items_total}"
-                )
-                return False
-            
-            return True
-
-        except Exception as e:
-            error_msg = f"Erreur lors de la validation des montants: {e}"
-            log_error(error_msg, exc_info=e)
-            return False
-    
-    @log_procedure("Validation de client")
+        log_debug(f"Validation de la commande #{order_data.get('id')}")
+        with span("validator.validate_order"):
+            self._validate(ORDER_SCHEMA, "order", order_data)
+        log_debug(f"Commande #{order_data.get('id')} validée avec succès")
+        return True
+
+    def validate_orders(self, orders):
+        """
+        Valide un lot de commandes sans lever d'exception.
+
+        Les champs sont vérifiés commande par commande, puis les montants des
+        commandes restantes sont réconciliés en une seule passe.
+
+        Args:
+            orders (list): Commandes à valider
+
+        Returns:
+            list: Liste de listes d'erreurs, alignée sur le lot d'entrée
+        """
+        field_errors = ORDER_SCHEMA.errors
+        errors = [field_errors(order, checks=False) for order in orders]
+        candidates = [i for i, order_errors in enumerate(errors) if not order_errors]
+        if candidates:
+            result = reconcile_amounts([orders[i] for i in candidates])
+            for index in result.invalid + result.mismatches:
+                errors[candidates[index]].append(result.message(index))
+        return errors
+
     def validate_customer(self, customer_data):
         """
         Valide les données d'un client.
-        
+
         Args:
             customer_data (dict): Données du client
-            
+
         Returns:
             bool: True si le client est valide
-            
+
         Raises:
             ValidationError: Si la validation échoue
         """
-        try:
-            log_info(f"Validation du client #{customer_data.get('id')}")
-            
-            # Log de la validation
-            log_data_transformation(
-                "Validation",
-                "customer",
-                customer_data.get('id'),
-                "Début de la validation"
-            )
-            
-            # Vérification des champs obligatoires
-            required_fields = ['id', 'email', 'first_name', 'last_name']
-            missing_fields = [field for field in required_fields if not customer_data.get(field)]
-            
-            if missing_fields:
-                error_msg = f"Champs manquants dans le client: {', '.join(missing_fields)}"
-                log_error(error_msg)
-                log_data_transformation(
-                    "Validation",
-                    "customer",
-                    customer_data.get('id'),
-                    f"Échec de la validation: {error_msg}"
-                )
-                raise ValidationError(error_msg)
-            
-            # Vérification de l'email
-            if not self._validate_email(customer_data.get('email')):
-                error_msg = f"Email invalide pour le client #{customer_data.get('id')}"
-                log_error(error_msg)
-                log_data_transformation(
-                    "Validation",
-                    "customer",
-                    customer_data.get('id'),
-                    f"Échec de la validation: {error_msg}"
-                )
-                raise ValidationError(error_msg)
-            
-            # Log de la validation réussie
-            log_data_transformation(
-                "Validation",
-                "customer",
-                customer_data.get('id'),
-                "Validation réussie"
-            )
-            
-            log_info(f"Client #{customer_data.get('id')} validé avec succès")
-            return True
-            
-        except Exception as e:
-            error_msg = f"Erreur lors de la validation du client #{customer_data.get('id')}: {e}"
-            log_error(error_msg, exc_info=e)
-            log_data_transformation(
-                "Validation",
-                "customer",
-                customer_data.get('id'),
-                f"Échec de la validation: {str(e)}"
-            )
-            raise ValidationError(error_msg)
-    
+        log_debug(f"Validation du client #{customer_data.get('id')}")
+        self._validate(CUSTOMER_SCHEMA, "customer", customer_data)
+        log_debug(f"Client #{customer_data.get('id')} validé avec succès")
+        return True
+
+    def validate_customers(self, customers):
+        """
+        Valide un lot de clients sans lever d'exception.
+
+        Args:
+            customers (list): Clients à valider
+
+        Returns:
+            list: Liste de listes d'erreurs, alignée sur le lot d'entrée
+        """
+        errors = CUSTOMER_SCHEMA.errors
+        return [errors(customer) for customer in customers]
+
     def _validate_email(self, email):
         """
         Valide le format d'une adresse email.
-        
+
         Args:
             email (str): Adresse email à valider
-            
+
         Returns:
             bool: True si l'email est valide
         """
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return _is_email(email)
+
+
+# Validateur partagé par les fonctions de façade
+_validator = None
+
+
+def _get_validator():
+    """Retourne le validateur partagé, créé au premier appel."""
+    global _validator
+    if _validator is None:
+        _validator = DataValidator()
+    return _validator
 
-# Ajout d'une fonction de façade pour la validation d'une commande
-from core.validator import DataValidator
 
 def validate_order(order_data):
     """
@@ -225,8 +300,17 @@ def validate_order(order_data):
     Raises:
         ValidationError: Si la validation échoue
     """
-    validator = DataValidator()
-    return validator.validate_order(order_data)
+    return _get_validator().validate_order(order_data)
+
+def validate_orders(orders):
+    """
+    Fonction de façade pour valider un lot de commandes.
+    Args:
+        orders (list): Commandes à valider
+    Returns:
+        list: Liste de listes d'erreurs par commande (vide si valide)
+    """
+    return _get_validator().validate_orders(orders)
 
 def validate_customer(customer_data):
     """
@@ -238,5 +322,14 @@ def validate_customer(customer_data):
     Raises:
         ValidationError: Si la validation échoue
     """
-    validator = DataValidator()
-    return validator.validate_customer(customer_data)
+    return _get_validator().validate_customer(customer_data)
+
+def validate_customers(customers):
+    """
+    Fonction de façade pour valider un lot de clients.
+    Args:
+        customers (list): Clients à valider
+    Returns:
+        list: Liste de listes d'erreurs par client (vide si valide)
+    """
+    return _get_validator().validate_customers(customers)
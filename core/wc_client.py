@@ -3,20 +3,30 @@ Client pour l'API WooCommerce.
 Ce module gère toutes les interactions avec l'API WooCommerce, incluant :
 - Récupération des commandes
 - Récupération des clients
+- Recherche des produits par SKU et mises à jour groupées (``…/batch``)
+- Retour groupé des statuts de commande (``orders/batch``)
+- Création et mise à jour groupées des clients (``customers/batch``)
 - Gestion des erreurs d'API
 """
 
-from woocommerce import API
 from config import settings
 from core.exceptions import WooCommerceAPIError
+from core.models.records import OrderRecord, WC_ORDER_FIELDS
+from core.resilience import rate_limited_retry
 from utils.logging_utils import (
     log_procedure, log_error, log_info, log_api_call,
     log_performance
 )
-import requests
 import time
-from tenacity import retry, wait_exponential, stop_after_attempt
-from ratelimit import limits, sleep_and_retry
+from utils.metrics import (
+    api_rate_limit_gauge, api_rate_limit_remaining_gauge, observe_api_call
+)
+from utils.tracing import span
+
+# Limite de débit côté client (WC_CALLS_PER_MINUTE, adapter selon quota WooCommerce)
+WC_CALLS_PER_MINUTE = settings.WC_CALLS_PER_MINUTE
+# Budget distinct du retour des statuts de commande (orders/batch)
+WC_STATUS_CALLS_PER_MINUTE = settings.WC_STATUS_CALLS_PER_MINUTE
 
 class WooCommerceClient:
     """
@@ -24,61 +34,168 @@ class WooCommerceClient:
     Utilise les paramètres de configuration pour l'authentification.
     """
     
-    def __init__(self):
+    def __init__(self, store=None):
         """
         Initialise le client WooCommerce avec les paramètres de configuration.
         Utilise les variables d'environnement pour les credentials.
+
+        Args:
+            store (Store, optional): Boutique (mode multi-boutiques) : URL,
+                clés et budgets de débit propres (voir config/stores.py)
         """
         log_info("Initialisation du client WooCommerce")
+        # Import différé : woocommerce charge requests et urllib3
+        from woocommerce import API
+
+        self.store = store
+        # Portée des budgets de débit (voir core/resilience.py)
+        self.rate_scope = store.name if store is not None else None
         self.wcapi = API(
-            url=settings.WC_API_URL,
-            consumer_key=settings.WC_CONSUMER_KEY,
-            consumer_secret=settings.WC_CONSUMER_SECRET,
+            url=store.wc_api_url if store is not None else settings.WC_API_URL,
+            consumer_key=store.consumer_key if store is not None else settings.WC_CONSUMER_KEY,
+            consumer_secret=store.consumer_secret if store is not None else settings.WC_CONSUMER_SECRET,
             version="wc/v3"
         )
+        api_rate_limit_gauge.labels("woocommerce").set(WC_CALLS_PER_MINUTE)
+        # Nombre total de commandes annoncé par la dernière page (en-tête X-WP-Total)
+        self.last_total = None
         log_info("Client WooCommerce initialisé")
 
     @log_procedure("Récupération des commandes WooCommerce")
-    @sleep_and_retry
-    @limits(calls=80, period=60)  # 80 appels par minute (adapter selon quota WooCommerce)
-    @retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(5))
-    def get_orders(self, status="processing", after=None):
+    def get_orders(self, status="processing", after=None, page=None, per_page=None,
+                   fields=None, compact=False, offset=None, include=None, order=None):
         """
         Récupère les commandes WooCommerce avec un statut spécifique et optionnellement après une date donnée.
         
         Args:
             status (str): Statut des commandes à récupérer (par défaut: "processing")
             after (str): Date ISO 8601 (ex: '2024-01-01T00:00:00') pour ne récupérer que les commandes récentes
+            page (int, optional): Numéro de page à récupérer
+            per_page (int, optional): Nombre de commandes par page (max 100)
+            fields (str, optional): Champs à demander via le paramètre ``_fields``
+            compact (bool): Projeter les commandes sur des OrderRecord
+            offset (int, optional): Nombre de commandes à sauter (prioritaire sur ``page``)
+            include (list, optional): Identifiants des seules commandes à récupérer
+            order (str, optional): Tri par date, 'asc' ou 'desc' (défaut WooCommerce)
             
         Returns:
-            list: Liste des commandes au format JSON
+            list: Liste des commandes au format JSON (ou d'OrderRecord si compact)
             
         Raises:
             WooCommerceAPIError: Si une erreur survient lors de l'appel API
         """
+        params = {"status": status}
+        if after:
+            params["after"] = after
+        if page:
+            params["page"] = page
+        if per_page:
+            params["per_page"] = per_page
+        if fields:
+            params["_fields"] = fields
+        if offset:
+            params["offset"] = offset
+        if include:
+            params["include"] = ",".join(str(order_id) for order_id in include)
+        if order:
+            params["order"] = order
+        orders, _ = self._get_orders_page(params, compact)
+        return orders
+
+    def iter_orders(self, status="processing", after=None, per_page=100, compact=True, page_size=None):
+        """
+        Parcourt toutes les pages de commandes, une page à la fois.
+
+        Destiné aux rattrapages volumineux : seule la page courante est
+        conservée sous forme JSON, et par défaut les commandes sont projetées
+        sur des OrderRecord en ne demandant que les champs utiles.
+
+        Args:
+            status (str): Statut des commandes à récupérer
+            after (str, optional): Date ISO 8601 de début
+            per_page (int): Nombre de commandes par page (max 100)
+            compact (bool): Projeter les commandes sur des OrderRecord
+            page_size (callable, optional): Retourne la taille de la prochaine page
+                (ex. ``MemoryGuard.batch_size``) ; la pagination se fait alors par
+                ``offset`` pour que la taille puisse varier d'une page à l'autre
+
+        Yields:
+            list: Commandes d'une page
+
+        Raises:
+            WooCommerceAPIError: Si une erreur survient lors de l'appel API
+        """
+        params = {"status": status, "per_page": per_page, "page": 1}
+        if after:
+            params["after"] = after
+        if compact:
+            params["_fields"] = WC_ORDER_FIELDS
+        if page_size is not None:
+            del params["page"]
+            params["offset"] = 0
+            while True:
+                params["per_page"] = page_size(per_page)
+                orders, _ = self._get_orders_page(dict(params), compact)
+                if orders:
+                    yield orders
+                if len(orders) < params["per_page"]:
+                    return
+                params["offset"] += len(orders)
+        while True:
+            orders, total_pages = self._get_orders_page(dict(params), compact)
+            if orders:
+                yield orders
+            if not orders or params["page"] >= total_pages:
+                return
+            params["page"] += 1
+
+    @rate_limited_retry("woocommerce", "orders", WC_CALLS_PER_MINUTE)
+    def _get_orders_page(self, params, compact=False):
+        """
+        Récupère une page de commandes.
+
+        Args:
+            params (dict): Paramètres de la requête
+            compact (bool): Projeter les commandes sur des OrderRecord
+
+        Returns:
+            tuple: (commandes, nombre total de pages annoncé par WooCommerce)
+
+        Raises:
+            WooCommerceAPIError: Si une erreur survient lors de l'appel API
+        """
+        import requests  # déjà chargé par le client WooCommerce
+
         try:
-            log_info(f"Récupération des commandes avec le statut: {status} après: {after}")
+            log_info(f"Récupération des commandes avec les paramètres: {params}")
             start_time = time.time()
-            params = {"status": status}
-            if after:
-                params["after"] = after
             
             # Log de l'appel API
-            log_api_call("WooCommerce", "GET", f"orders?status={status}&after={after}")
+            log_api_call("WooCommerce", "GET", f"orders?status={params.get('status')}&after={params.get('after')}")
             
             # Appel à l'API
-            response = self.wcapi.get("orders", params=params)
+            with span("woocommerce.get", **{"http.route": "orders", "page": params.get("page", 1)}) as current:
+                response = self.wcapi.get("orders", params=params)
+                if current is not None:
+                    current.set_attribute("http.status_code", response.status_code)
+            duration = time.time() - start_time
+            observe_api_call("woocommerce", "orders", "GET", duration, response.status_code)
+            self._record_rate_limit(response)
             response.raise_for_status()
             
             # Log de la performance
-            duration = time.time() - start_time
             log_performance("Récupération des commandes WooCommerce", duration)
             
-            # Log du résultat
+            # Projection immédiate : le JSON complet de la page est libéré au retour
             orders = response.json()
+            if compact:
+                orders = [OrderRecord.from_wc(order) for order in orders]
             log_info(f"{len(orders)} commandes récupérées")
             
-            return orders
+            total_pages = int(response.headers.get("X-WP-TotalPages", 1) or 1)
+            total = response.headers.get("X-WP-Total")
+            self.last_total = int(total) if total and total.isdigit() else None
+            return orders, total_pages
             
         except requests.RequestException as e:
             error_msg = f"Erreur lors de la récupération des commandes WooCommerce : {e}"
@@ -97,6 +214,8 @@ class WooCommerceClient:
         Raises:
             WooCommerceAPIError: Si une erreur survient lors de l'appel API
         """
+        import requests  # déjà chargé par le client WooCommerce
+
         try:
             log_info("Récupération des clients")
             start_time = time.time()
@@ -106,10 +225,12 @@ class WooCommerceClient:
             
             # Appel à l'API
             response = self.wcapi.get("customers")
+            duration = time.time() - start_time
+            observe_api_call("woocommerce", "customers", "GET", duration, response.status_code)
+            self._record_rate_limit(response)
             response.raise_for_status()
             
             # Log de la performance
-            duration = time.time() - start_time
             log_performance("Récupération des clients WooCommerce", duration)
             
             # Log du résultat
@@ -122,4 +243,198 @@ class WooCommerceClient:
             error_msg = f"Erreur lors de la récupération des clients WooCommerce : {e}"
             log_error(error_msg, exc_info=e)
             log_api_call("WooCommerce", "GET", "customers", error=str(e))
-            raise WooCommerceAPIError(error_msg)
\ No newline at end of file
+            raise WooCommerceAPIError(error_msg)
+
+    @rate_limited_retry("woocommerce", "products", WC_CALLS_PER_MINUTE)
+    def get_products_by_sku(self, skus):
+        """
+        Recherche les produits et variations WooCommerce par SKU.
+
+        Args:
+            skus (list): SKU recherchés (100 au plus)
+
+        Returns:
+            list: Produits et variations trouvés (id, sku, parent_id, type)
+
+        Raises:
+            WooCommerceAPIError: Si une erreur survient lors de l'appel API
+        """
+        import requests  # déjà chargé par le client WooCommerce
+
+        params = {"sku": ",".join(skus), "per_page": 100, "_fields": "id,sku,parent_id,type"}
+        try:
+            start_time = time.time()
+            log_api_call("WooCommerce", "GET", "products?sku=…")
+            with span("woocommerce.get", **{"http.route": "products"}):
+                response = self.wcapi.get("products", params=params)
+            observe_api_call("woocommerce", "products", "GET", time.time() - start_time, response.status_code)
+            self._record_rate_limit(response)
+            response.raise_for_status()
+            return response.json()
+
+        except requests.RequestException as e:
+            error_msg = f"Erreur lors de la recherche des produits WooCommerce : {e}"
+            log_error(error_msg, exc_info=e)
+            log_api_call("WooCommerce", "GET", "products", error=str(e))
+            raise WooCommerceAPIError(error_msg)
+
+    @rate_limited_retry("woocommerce", "products/batch", WC_CALLS_PER_MINUTE)
+    def batch_update_products(self, updates, parent_id=None):
+        """
+        Met à jour jusqu'à 100 produits, ou variations d'un même produit, en une requête.
+
+        Args:
+            updates (list): Mises à jour (dictionnaires contenant ``id``)
+            parent_id (int, optional): Produit parent : met à jour ses variations
+                via ``products/<parent_id>/variations/batch``
+
+        Returns:
+            list: Éléments ``update`` de la réponse ; un élément en échec
+            contient une clé ``error``
+
+        Raises:
+            WooCommerceAPIError: Si la requête échoue
+        """
+        endpoint = f"products/{parent_id}/variations/batch" if parent_id else "products/batch"
+        route = "products/variations/batch" if parent_id else "products/batch"
+        return self._post_batch(endpoint, route, {"update": updates}).get("update", [])
+
+    @rate_limited_retry("woocommerce", "orders/batch", WC_STATUS_CALLS_PER_MINUTE)
+    def batch_update_orders(self, updates):
+        """
+        Met à jour jusqu'à 100 commandes en une requête (``orders/batch``).
+
+        Budget de débit propre (WC_STATUS_CALLS_PER_MINUTE) : le retour des
+        statuts ne consomme pas le budget de la synchronisation des commandes.
+
+        Args:
+            updates (list): Mises à jour (dictionnaires contenant ``id``)
+
+        Returns:
+            list: Éléments ``update`` de la réponse ; un élément en échec
+            contient une clé ``error``
+
+        Raises:
+            WooCommerceAPIError: Si la requête échoue
+        """
+        return self._post_batch("orders/batch", "orders/batch", {"update": updates}).get("update", [])
+
+    @rate_limited_retry("woocommerce", "customers", WC_CALLS_PER_MINUTE)
+    def get_customer_by_email(self, email):
+        """
+        Recherche un client WooCommerce par adresse email.
+
+        Args:
+            email (str): Adresse email
+
+        Returns:
+            dict: Client (id, email), ou None s'il n'existe pas
+
+        Raises:
+            WooCommerceAPIError: Si une erreur survient lors de l'appel API
+        """
+        import requests  # déjà chargé par le client WooCommerce
+
+        params = {"email": email, "role": "all", "_fields": "id,email"}
+        try:
+            start_time = time.time()
+            log_api_call("WooCommerce", "GET", "customers?email=…")
+            with span("woocommerce.get", **{"http.route": "customers"}):
+                response = self.wcapi.get("customers", params=params)
+            observe_api_call("woocommerce", "customers", "GET", time.time() - start_time, response.status_code)
+            self._record_rate_limit(response)
+            response.raise_for_status()
+            customers = response.json()
+            return customers[0] if customers else None
+
+        except requests.RequestException as e:
+            error_msg = f"Erreur lors de la recherche du client WooCommerce : {e}"
+            log_error(error_msg, exc_info=e)
+            log_api_call("WooCommerce", "GET", "customers", error=str(e))
+            raise WooCommerceAPIError(error_msg)
+
+    @rate_limited_retry("woocommerce", "customers/batch", WC_CALLS_PER_MINUTE)
+    def batch_customers(self, creates=(), updates=()):
+        """
+        Crée et met à jour jusqu'à 100 clients en une requête (``customers/batch``).
+
+        Args:
+            creates (list): Clients à créer
+            updates (list): Mises à jour (dictionnaires contenant ``id``)
+
+        Returns:
+            dict: Éléments ``create`` et ``update`` de la réponse, dans l'ordre
+            de la requête ; un élément en échec contient une clé ``error``
+
+        Raises:
+            WooCommerceAPIError: Si la requête échoue
+        """
+        result = self._post_batch("customers/batch", "customers/batch",
+                                  {"create": list(creates), "update": list(updates)})
+        return {"create": result.get("create", []), "update": result.get("update", [])}
+
+    def _post_batch(self, endpoint, route, payload):
+        """
+        Envoie une requête groupée (``{"create": [...], "update": [...]}``).
+
+        Args:
+            endpoint (str): Endpoint appelé
+            route (str): Route publiée dans les métriques et les traces
+            payload (dict): Listes d'opérations par type
+
+        Returns:
+            dict: Réponse de l'API
+
+        Raises:
+            WooCommerceAPIError: Si la requête échoue
+        """
+        import requests  # déjà chargé par le client WooCommerce
+
+        size = sum(len(items) for items in payload.values())
+        try:
+            start_time = time.time()
+            log_api_call("WooCommerce", "POST", endpoint)
+            with span("woocommerce.post", **{"http.route": route, "batch.size": size}) as current:
+                response = self.wcapi.post(endpoint, payload)
+                if current is not None:
+                    current.set_attribute("http.status_code", response.status_code)
+            duration = time.time() - start_time
+            observe_api_call("woocommerce", route, "POST", duration, response.status_code)
+            self._record_rate_limit(response)
+            response.raise_for_status()
+            log_performance(f"Mise à jour groupée WooCommerce ({size})", duration)
+            return response.json()
+
+        except requests.RequestException as e:
+            error_msg = f"Erreur lors de la mise à jour groupée WooCommerce ({endpoint}) : {e}"
+            log_error(error_msg, exc_info=e)
+            log_api_call("WooCommerce", "POST", endpoint, error=str(e))
+            raise WooCommerceAPIError(error_msg)
+
+    def rate_budget(self, endpoint, default):
+        """
+        Budget d'appels par minute d'un endpoint pour la boutique du client.
+
+        Args:
+            endpoint (str): Endpoint décoré
+            default (int): Budget par défaut de la méthode
+
+        Returns:
+            int: Budget d'appels par minute
+        """
+        if self.store is None:
+            return default
+        if endpoint == "orders/batch":
+            return self.store.status_calls_per_minute
+        return self.store.calls_per_minute
+
+    def _record_rate_limit(self, response):
+        """
+        Publie le quota restant annoncé par l'API, s'il est présent.
+
+        Args:
+            response (requests.Response): Réponse de l'API WooCommerce
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            api_rate_limit_remaining_gauge.labels("woocommerce").set(int(remaining))
@@ -0,0 +1,137 @@
+"""
+File d'ingestion des webhooks WooCommerce.
+
+Le serveur de webhooks ne fait dans le chemin de la requête que le travail
+bon marché : décodage, mise en file, réponse 202. Un unique thread de fond
+vide la file et lance la synchronisation dans le processus, en regroupant
+tous les webhooks reçus pendant la synchronisation précédente : une rafale
+de milliers de webhooks (ventes flash) se traduit par quelques
+synchronisations successives, et non par un processus par requête.
+
+La synchronisation étant incrémentale (date de dernière synchronisation),
+un seul passage traite toutes les commandes annoncées par les webhooks
+regroupés. Le service ``sync`` résident tournant sur la même base, chaque
+passage attend la fin de la synchronisation en cours (``sync_lock``,
+utils/sync_state.py) plutôt que de traiter les mêmes commandes en parallèle.
+
+Une file pleine (WEBHOOK_QUEUE_SIZE) fait répondre 503 : la boutique
+renverra le webhook et la synchronisation périodique rattrape les commandes
+manquées.
+
+Exemple :
+    ingest = WebhookQueue()
+    ingest.start()
+    ingest.submit(order_id)
+"""
+
+import os
+import queue
+import threading
+
+from utils.logging_utils import log_error, log_info
+from utils.metrics import (
+    webhook_queue_depth_gauge, webhook_rejected_counter, webhook_sync_runs_counter
+)
+
+# Nombre maximal de webhooks en attente avant de répondre 503
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 10000))
+
+_STOP = object()
+
+
+def _default_sync():
+    """Synchronisation déclenchée par webhook, avec un gestionnaire réutilisé."""
+    from core.sync_manager import SyncManager
+
+    if _default_sync.manager is None:
+        _default_sync.manager = SyncManager()
+    _default_sync.manager.sync_orders(trigger="webhook")
+
+
+_default_sync.manager = None
+
+
+class WebhookQueue:
+    """
+    File bornée de webhooks consommée par un thread de synchronisation.
+    """
+
+    def __init__(self, run_sync=None, maxsize=None):
+        """
+        Args:
+            run_sync (callable, optional): Synchronisation à lancer, sans
+                argument (SyncManager.sync_orders déclenché par webhook par défaut)
+            maxsize (int, optional): Capacité de la file (WEBHOOK_QUEUE_SIZE par défaut)
+        """
+        self.run_sync = run_sync or _default_sync
+        self._queue = queue.Queue(maxsize=maxsize or WEBHOOK_QUEUE_SIZE)
+        self._thread = None
+        self.runs = 0
+
+    def start(self):
+        """Démarre le thread de synchronisation (sans effet s'il tourne déjà)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name='webhook-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Arrête le thread après les webhooks déjà en file.
+
+        Args:
+            timeout (float, optional): Attente maximale (s)
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, order_id):
+        """
+        Met un webhook en file, sans bloquer.
+
+        Args:
+            order_id: Identifiant de la commande annoncée par le webhook
+
+        Returns:
+            bool: False si la file est pleine
+        """
+        try:
+            self._queue.put_nowait(order_id)
+        except queue.Full:
+            webhook_rejected_counter.inc()
+            return False
+        webhook_queue_depth_gauge.inc()
+        return True
+
+    def depth(self):
+        """Nombre de webhooks en attente."""
+        return self._queue.qsize()
+
+    def _drain(self, first):
+        """Retire de la file tous les webhooks disponibles."""
+        batch = [first]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _worker(self):
+        """Boucle du thread : une synchronisation par groupe de webhooks."""
+        while True:
+            batch = self._drain(self._queue.get())
+            stop = _STOP in batch
+            order_ids = [order_id for order_id in batch if order_id is not _STOP]
+            webhook_queue_depth_gauge.dec(len(order_ids))
+            if order_ids:
+                log_info(f"Synchronisation déclenchée par {len(order_ids)} webhook(s)")
+                webhook_sync_runs_counter.inc()
+                self.runs += 1
+                try:
+                    self.run_sync()
+                except Exception as e:
+                    log_error(f"Erreur lors de la synchronisation déclenchée par webhook : {e}", exc_info=e)
+            if stop:
+                return
@@ -3,24 +3,43 @@ Dashboard d'administration pour la synchronisation WooCommerce ↔ Odoo.
 Ce module fournit une interface web simple pour :
 - Visualiser et télécharger les logs d'audit
 - Purger la base de données locale et les logs
-- Lancer des synchronisations manuelles
+- Lancer des synchronisations manuelles et suivre leur avancement en direct
+  (server-sent events, voir utils/progress.py)
 - Exposer des métriques pour Prometheus
 """
 
-from flask import Flask, send_file, render_template_string, redirect, url_for, Response
+import sys
 import os
+# Ajout du répertoire parent au PYTHONPATH pour permettre l'import des modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import (
+    Flask, send_file, send_from_directory, render_template_string, redirect, url_for, Response, abort,
+    stream_with_context
+)
 import subprocess
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 from dotenv import load_dotenv
+import json
 import time
 
-# Initialisation de l'application Flask
-app = Flask(__name__)
-
 # Chargement des variables d'environnement depuis .env
 load_dotenv()
 
+from utils.metrics import (
+    dashboard_sync_launch_counter, dashboard_uptime_gauge, init_metrics, render_metrics,
+    set_oldest_unsynced_age
+)
+from config.stores import store_names
+from utils.database import init_db, get_oldest_pending_created_at
+from utils.profiler import PROFILES_DIR, list_profiles
+from utils import progress as sync_progress
+from utils.store_context import store_path, use_store
+
+# Initialisation de l'application Flask
+app = Flask(__name__)
+
 # Configuration de Sentry pour le monitoring des erreurs
 ds = os.getenv('SENTRY_DSN')
 if ds:
@@ -31,9 +50,11 @@ if ds:
         environment=os.getenv('ENV', 'development')
     )
 
-# Variables globales pour les métriques
-start_time = time.time()  # Timestamp de démarrage pour l'uptime
-sync_count = 0  # Compteur de synchronisations
+# Timestamp de démarrage pour l'uptime
+start_time = time.time()
+
+# Intervalle entre deux commentaires de maintien du flux d'avancement (s)
+PROGRESS_KEEPALIVE = 15
 
 @app.route('/')
 def index():
@@ -45,9 +66,34 @@ def index():
     <h1>Sync WooCommerce ↔ Odoo</h1>
     <ul>
       <li><a href="/audit">Télécharger l'audit</a></li>
-      <li><a href="/purge">Purger la base locale et l'audit</a></li>
+      <li><a href="/purge">Purger les données locales anciennes</a></li>
       <li><a href="/sync">Lancer une synchronisation</a></li>
+      <li><a href="/profiles">Profils de performance</a></li>
     </ul>
+    <h2>Exécution en cours</h2>
+    <div id="progress"><p>Aucune exécution publiée.</p></div>
+    <script>
+      const container = document.getElementById('progress');
+      const views = {};
+      const source = new EventSource('/sync/progress');
+      source.addEventListener('progress', (event) => {
+        const p = JSON.parse(event.data);
+        // Une ligne par boutique en mode multi-boutiques
+        const key = p.store || '';
+        if (!views[key]) {
+          if (!Object.keys(views).length) container.innerHTML = '';
+          views[key] = container.appendChild(document.createElement('p'));
+        }
+        const view = views[key];
+        const total = p.expected ? ` / ${p.expected}` : '';
+        const eta = p.eta_s !== null ? `, fin estimée dans ${Math.round(p.eta_s)} s` : '';
+        view.textContent = (p.store ? `[${p.store}] ` : '')
+          + `${p.trigger} ${p.run_id || ''} : ${p.state}, ${p.pages} page(s), `
+          + `${p.processed}${total} commande(s) traitée(s) (${p.success} OK, ${p.ignored} ignorée(s), `
+          + `${p.errors} erreur(s)), ${p.orders_per_s} commandes/s${eta}`
+          + (p.error ? ` : ${p.error}` : '');
+      });
+    </script>
     ''')
 
 @app.route('/audit')
@@ -65,7 +111,8 @@ def audit():
 def purge():
     """
     Lance le script de purge des données locales.
-    Supprime la base SQLite et le fichier d'audit.
+    Supprime les lignes de la base SQLite et de l'audit plus anciennes que
+    PURGE_RETENTION_DAYS jours.
     """
     subprocess.call(['python', 'scripts/purge_local_data.py'])
     return redirect(url_for('index'))
@@ -76,30 +123,130 @@ def sync():
     Lance une synchronisation manuelle.
     Incrémente le compteur de synchronisations.
     """
-    global sync_count
     subprocess.Popen(['python', 'scripts/sync_orders.py'])
-    sync_count += 1
+    dashboard_sync_launch_counter.inc()
     return redirect(url_for('index'))
 
+def progress_files(stores=None):
+    """
+    Fichier d'avancement de chaque boutique.
+
+    Args:
+        stores (list, optional): Boutiques (Store), ``load_stores()`` par défaut
+
+    Returns:
+        dict: Boutique (None en mode à une seule boutique) -> fichier d'avancement
+    """
+    files = {}
+    for name in store_names(stores):
+        with use_store(name):
+            files[name] = store_path(sync_progress.PROGRESS_FILE)
+    return files
+
+def progress_events(path=None, poll=sync_progress.SYNC_PROGRESS_INTERVAL, keepalive=PROGRESS_KEEPALIVE,
+                    stores=None):
+    """
+    Flux server-sent events de l'avancement de la synchronisation.
+
+    Chaque fichier d'avancement n'est relu que lorsque sa date de
+    modification change ; un commentaire est envoyé régulièrement pour
+    maintenir la connexion ouverte à travers les proxys. En mode
+    multi-boutiques, les événements portent le nom de la boutique (``store``).
+
+    Args:
+        path (str, optional): Fichier d'avancement (celui de chaque boutique par défaut)
+        poll (float): Intervalle de vérification des fichiers (s)
+        keepalive (float): Intervalle des commentaires de maintien (s)
+        stores (list, optional): Boutiques (Store), ``load_stores()`` par défaut
+
+    Yields:
+        str: Événements ``progress`` au format text/event-stream
+    """
+    files = {None: path} if path else progress_files(stores)
+    last_change = {}
+    last_sent = time.time()
+    yield 'retry: 2000\n\n'
+    while True:
+        for store, file in files.items():
+            try:
+                change = os.stat(file).st_mtime_ns
+            except OSError:
+                continue
+            if change == last_change.get(store):
+                continue
+            last_change[store] = change
+            data = sync_progress.read_progress(file)
+            if data is not None:
+                if store:
+                    data['store'] = store
+                last_sent = time.time()
+                yield f'event: progress\ndata: {json.dumps(data)}\n\n'
+        if time.time() - last_sent >= keepalive:
+            last_sent = time.time()
+            yield ': keepalive\n\n'
+        time.sleep(poll)
+
+@app.route('/sync/progress')
+def sync_progress_stream():
+    """
+    Diffuse en direct l'avancement de l'exécution en cours (pages récupérées,
+    commandes traitées, débit, erreurs, temps restant estimé).
+    """
+    return Response(
+        stream_with_context(progress_events()), mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/profiles')
+def profiles():
+    """
+    Liste les profils de performance récents de la synchronisation.
+    Les profils sont déclenchés par le signal USR2 envoyé au processus de
+    synchronisation (voir utils/profiler.py).
+    """
+    return render_template_string('''
+    <h1>Profils de performance</h1>
+    <p>Déclencher un profil : <code>docker kill -s USR2 sync_woocommerce_odoo</code></p>
+    <ul>
+    {% for name, size, modified in profiles %}
+      <li><a href="/profiles/{{ name }}">{{ name }}</a> ({{ size }} octets, {{ modified.strftime('%Y-%m-%d %H:%M:%S') }})</li>
+    {% else %}
+      <li>Aucun profil disponible.</li>
+    {% endfor %}
+    </ul>
+    ''', profiles=list_profiles())
+
+@app.route('/profiles/<name>')
+def download_profile(name):
+    """
+    Télécharge un profil au format collapsed stacks (flamegraph.pl, speedscope).
+    """
+    if name not in {profile[0] for profile in list_profiles()}:
+        abort(404)
+    return send_from_directory(PROFILES_DIR, name, as_attachment=True, mimetype='text/plain')
+
 @app.route('/metrics')
 def metrics():
     """
     Endpoint Prometheus pour les métriques.
-    Expose :
+    Agrège les métriques de tous les processus (synchronisation, webhooks,
+    dashboard) écrites dans PROMETHEUS_MULTIPROC_DIR, dont :
     - Uptime du dashboard
     - Nombre de synchronisations lancées
+    - Ancienneté de la plus ancienne commande non synchronisée, toutes
+      boutiques confondues (recalculée à chaque collecte)
     """
-    uptime = int(time.time() - start_time)
-    metrics = f"""
-# HELP app_uptime_seconds Uptime du dashboard en secondes
-# TYPE app_uptime_seconds counter
-app_uptime_seconds {uptime}
-# HELP app_sync_count Nombre de synchronisations lancées via le dashboard
-# TYPE app_sync_count counter
-app_sync_count {sync_count}
-"""
-    return Response(metrics, mimetype='text/plain')
+    dashboard_uptime_gauge.set(int(time.time() - start_time))
+    oldest = []
+    for name in store_names():
+        with use_store(name):
+            init_db()
+            oldest.append(get_oldest_pending_created_at())
+    set_oldest_unsynced_age(min((created_at for created_at in oldest if created_at is not None), default=None))
+    output, content_type = render_metrics()
+    return Response(output, mimetype=content_type)
 
 if __name__ == '__main__':
     # Démarrage du serveur Flask sur le port 8081
+    init_metrics()
     app.run(host='0.0.0.0', port=8081)
@@ -1,27 +1,370 @@
 """
 Script de sauvegarde automatique des bases et logs.
-Copie les fichiers critiques dans un dossier backup avec horodatage.
+
+La base locale est sauvegardée à chaud avec l'API de sauvegarde en ligne de
+SQLite (voir ``snapshot``) : la copie obtenue est cohérente (jamais de
+fichier à moitié écrit) et une synchronisation en cours n'est jamais
+bloquée longtemps.
+
+Les sauvegardes sont compressées (gzip) et incrémentales :
+- une sauvegarde complète ``sync_local_<horodatage>.full.gz`` est la base
+  compressée (restaurable par simple ``gunzip``) ;
+- les suivantes ``sync_local_<horodatage>.delta.gz`` ne contiennent que les
+  pages modifiées depuis la sauvegarde précédente, repérées par l'empreinte
+  de chaque page (fichier ``sync_local.pages``).
+Une nouvelle sauvegarde complète démarre une chaîne toutes les
+BACKUP_FULL_EVERY sauvegardes, ou si la taille de page a changé. L'index
+``sync_local.chain.json`` décrit la chaîne courante ; la restauration
+(``restore``) n'a besoin que des fichiers de sauvegarde.
+
+En mode multi-boutiques, la base de chaque boutique (``sync_local.<boutique>.db``)
+a sa propre chaîne dans ``stores/<boutique>/``.
+
+Les logs sont versés dans l'archive dédupliquée ``logs_archive/`` (voir
+scripts/log_archive.py) plutôt que recopiés intégralement à chaque fois.
+
+Usage :
+    python scripts/backup.py                    # sauvegarde (complète ou incrémentale)
+    python scripts/backup.py --full             # force une sauvegarde complète
+    python scripts/backup.py --restore cible.db [--upto sync_local_<horodatage>.delta.gz]
+    python scripts/backup.py --restore cible.db --store boutique_fr
 """
+import argparse
+import glob
+import gzip
+import hashlib
+import json
 import os
 import shutil
+import sqlite3
+import struct
+import time
 from datetime import datetime
 
+from log_archive import archive_logs
+
 BACKUP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../backups'))
 DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sync_local.db'))
 LOGS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../logs'))
 
-os.makedirs(BACKUP_DIR, exist_ok=True)
+# Pages copiées par pas de sauvegarde en ligne, et pause entre deux pas (s)
+BACKUP_STEP_PAGES = int(os.getenv('BACKUP_STEP_PAGES', 256))
+BACKUP_STEP_SLEEP = float(os.getenv('BACKUP_STEP_SLEEP', 0.005))
+# Reprises de la copie par pas (base modifiée entre deux pas) avant la copie en une étape
+BACKUP_MAX_RESTARTS = int(os.getenv('BACKUP_MAX_RESTARTS', 3))
+# Nombre de sauvegardes d'une chaîne (une complète puis des incrémentales)
+BACKUP_FULL_EVERY = int(os.getenv('BACKUP_FULL_EVERY', 7))
+
+CHAIN_INDEX = 'sync_local.chain.json'
+PAGE_HASHES = 'sync_local.pages'
+STAGING = '.sync_local.staging.db'
+
+_DELTA_MAGIC = b'SLDELTA1'
+_DELTA_HEADER = struct.Struct('>8sII')
+_PAGE_NUMBER = struct.Struct('>I')
+_HASH_SIZE = 16
+
+
+def _page_hash(page):
+    return hashlib.blake2b(page, digest_size=_HASH_SIZE).digest()
+
+
+class _BackupRestarted(Exception):
+    """La sauvegarde par pas a redémarré trop souvent (écritures concurrentes)."""
+
+
+def snapshot(db_path, target, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP,
+             max_restarts=BACKUP_MAX_RESTARTS):
+    """
+    Copie cohérente d'une base SQLite en cours d'utilisation.
+
+    En mode WAL (réglage posé par utils/database.init_db), la copie lit un
+    instantané de la base en une seule étape sans bloquer les écrivains. En
+    mode journal classique, elle procède par pas de ``pages`` pages et relâche
+    le verrou entre deux pas ; SQLite reprend la copie au début si la base est
+    modifiée entre deux pas : après ``max_restarts`` reprises, la fin de la
+    copie est faite en une seule étape (les écritures attendent alors la fin
+    de la copie).
+
+    Args:
+        db_path (str): Base source
+        target (str): Fichier de destination (écrasé)
+        pages (int): Pages copiées par pas
+        sleep (float): Pause entre deux pas (s), pendant laquelle les écritures reprennent
+        max_restarts (int): Reprises tolérées avant la copie en une étape
+
+    Returns:
+        int: Taille de page de la base
+    """
+    if os.path.exists(target):
+        os.remove(target)
+    source = sqlite3.connect(db_path)
+    dest = sqlite3.connect(target)
+    try:
+        if source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            source.backup(dest)
+        else:
+            state = {'remaining': None, 'restarts': 0}
+
+            def progress(status, remaining, total):
+                if state['remaining'] is not None and remaining > state['remaining']:
+                    state['restarts'] += 1
+                    if state['restarts'] > max_restarts:
+                        raise _BackupRestarted()
+                state['remaining'] = remaining
+
+            try:
+                source.backup(dest, pages=pages, progress=progress, sleep=sleep)
+            except _BackupRestarted:
+                print(f"Sauvegarde par pas reprise {max_restarts} fois : copie en une étape")
+                source.backup(dest)
+        return dest.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        dest.close()
+        source.close()
+
+
+def _load_chain(backup_dir):
+    path = os.path.join(backup_dir, CHAIN_INDEX)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_chain(backup_dir, chain):
+    path = os.path.join(backup_dir, CHAIN_INDEX)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(chain, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _load_hashes(backup_dir):
+    path = os.path.join(backup_dir, PAGE_HASHES)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _save_hashes(backup_dir, hashes):
+    path = os.path.join(backup_dir, PAGE_HASHES)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(hashes)
+    os.replace(path + '.tmp', path)
+
+
+def _iter_pages(path, page_size):
+    with open(path, 'rb') as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                return
+            yield page
+
+
+def _write_full(staging, page_size, target):
+    """Compresse toute la copie et retourne les empreintes de ses pages."""
+    hashes = bytearray()
+    with gzip.open(target, 'wb', compresslevel=6) as out:
+        for page in _iter_pages(staging, page_size):
+            hashes += _page_hash(page)
+            out.write(page)
+    return bytes(hashes)
+
+
+def _write_delta(staging, page_size, previous, target):
+    """
+    Écrit les pages modifiées depuis ``previous`` (empreintes de la sauvegarde précédente).
+
+    Returns:
+        tuple: (nouvelles empreintes, nombre de pages écrites)
+    """
+    hashes = bytearray()
+    changed = 0
+    page_count = os.path.getsize(staging) // page_size
+    with gzip.open(target, 'wb', compresslevel=6) as out:
+        out.write(_DELTA_HEADER.pack(_DELTA_MAGIC, page_size, page_count))
+        for number, page in enumerate(_iter_pages(staging, page_size)):
+            digest = _page_hash(page)
+            hashes += digest
+            offset = number * _HASH_SIZE
+            if previous[offset:offset + _HASH_SIZE] != digest:
+                out.write(_PAGE_NUMBER.pack(number))
+                out.write(page)
+                changed += 1
+    return bytes(hashes), changed
+
+
+def _backup_name(backup_dir, kind):
+    """Nom de sauvegarde horodaté, unique et trié chronologiquement."""
+    stem = f"sync_local_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    suffix = 1
+    name = stem
+    while glob.glob(os.path.join(backup_dir, f'{name}.*.gz')):
+        name = f'{stem}_{suffix:02d}'
+        suffix += 1
+    return f'{name}.{kind}.gz'
+
+
+def backup_database(db_path=DB_PATH, backup_dir=BACKUP_DIR, full=False):
+    """
+    Sauvegarde la base locale, en ne conservant que les pages modifiées si possible.
+
+    Args:
+        db_path (str): Base à sauvegarder
+        backup_dir (str): Dossier des sauvegardes
+        full (bool): Forcer une sauvegarde complète
+
+    Returns:
+        dict: Entrée ajoutée à l'index de la chaîne (fichier, type, pages)
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    staging = os.path.join(backup_dir, STAGING)
+    start = time.monotonic()
+    page_size = snapshot(db_path, staging)
+    try:
+        chain = _load_chain(backup_dir)
+        previous = _load_hashes(backup_dir)
+        incremental = (
+            not full and chain is not None and previous is not None
+            and chain.get('page_size') == page_size
+            and len(chain.get('entries', [])) < BACKUP_FULL_EVERY
+        )
+        if incremental:
+            name = _backup_name(backup_dir, 'delta')
+            hashes, changed = _write_delta(staging, page_size, previous, os.path.join(backup_dir, name))
+            entry = {'file': name, 'type': 'delta', 'pages': len(hashes) // _HASH_SIZE, 'changed': changed}
+            chain['entries'].append(entry)
+        else:
+            name = _backup_name(backup_dir, 'full')
+            hashes = _write_full(staging, page_size, os.path.join(backup_dir, name))
+            pages = len(hashes) // _HASH_SIZE
+            entry = {'file': name, 'type': 'full', 'pages': pages, 'changed': pages}
+            chain = {'page_size': page_size, 'entries': [entry]}
+        entry['created'] = datetime.now().isoformat()
+        entry['duration_s'] = round(time.monotonic() - start, 3)
+        _save_hashes(backup_dir, hashes)
+        _save_chain(backup_dir, chain)
+    finally:
+        os.remove(staging)
+    return entry
+
+
+def _apply_delta(path, target):
+    with gzip.open(path, 'rb') as delta:
+        magic, page_size, page_count = _DELTA_HEADER.unpack(delta.read(_DELTA_HEADER.size))
+        if magic != _DELTA_MAGIC:
+            raise ValueError(f"Fichier incrémental invalide : {path}")
+        with open(target, 'r+b') as out:
+            while True:
+                header = delta.read(_PAGE_NUMBER.size)
+                if not header:
+                    break
+                (number,) = _PAGE_NUMBER.unpack(header)
+                out.seek(number * page_size)
+                out.write(delta.read(page_size))
+            out.truncate(page_count * page_size)
+
+
+def _chains(backup_dir):
+    """
+    Regroupe les sauvegardes en chaînes, de la plus ancienne à la plus récente.
+
+    Returns:
+        list: Chaînes, chacune étant la liste des chemins (complète puis incrémentales)
+    """
+    chains = []
+    for path in sorted(glob.glob(os.path.join(backup_dir, 'sync_local_*.gz'))):
+        if path.endswith('.full.gz') or not chains:
+            chains.append([])
+        chains[-1].append(path)
+    return chains
+
+
+def restore(target, backup_dir=BACKUP_DIR, upto=None):
+    """
+    Reconstruit la base à partir d'une chaîne de sauvegardes.
+
+    Args:
+        target (str): Fichier de base à écrire (écrasé)
+        backup_dir (str): Dossier des sauvegardes
+        upto (str, optional): Nom de la sauvegarde à restaurer (par défaut la plus récente)
+
+    Returns:
+        list: Fichiers appliqués
+
+    Raises:
+        FileNotFoundError: Si la sauvegarde demandée n'existe pas
+    """
+    chains = [chain for chain in _chains(backup_dir) if chain[0].endswith('.full.gz')]
+    if upto:
+        chains = [chain for chain in chains if os.path.join(backup_dir, upto) in chain]
+    if not chains:
+        raise FileNotFoundError(f"Aucune sauvegarde {upto or ''} dans {backup_dir}")
+    applied = []
+    for path in chains[-1]:
+        if path.endswith('.full.gz'):
+            with gzip.open(path, 'rb') as source, open(target, 'wb') as out:
+                shutil.copyfileobj(source, out, 1024 * 1024)
+        else:
+            _apply_delta(path, target)
+        applied.append(os.path.basename(path))
+        if applied[-1] == upto:
+            break
+    return applied
+
+
+def prune(backup_dir=BACKUP_DIR, keep=7):
+    """
+    Supprime les sauvegardes les plus anciennes sans casser de chaîne.
+
+    Une chaîne (sauvegarde complète et incrémentales suivantes) est conservée
+    entière dès qu'elle contient l'une des ``keep`` sauvegardes les plus
+    récentes ; la chaîne courante n'est jamais supprimée.
+
+    Args:
+        backup_dir (str): Dossier des sauvegardes
+        keep (int): Nombre de sauvegardes récentes à conserver
+    """
+    chains = _chains(backup_dir)
+    recent = set(sorted(path for chain in chains for path in chain)[-keep:])
+    for chain in chains[:-1]:
+        if not recent.intersection(chain):
+            for path in chain:
+                os.remove(path)
+
 
-def backup():
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+def backup(full=False):
+    os.makedirs(BACKUP_DIR, exist_ok=True)
     # Sauvegarde de la base
     if os.path.exists(DB_PATH):
-        shutil.copy(DB_PATH, os.path.join(BACKUP_DIR, f'sync_local_{timestamp}.db'))
-    # Sauvegarde des logs
+        entry = backup_database(full=full)
+        print(f"Base sauvegardée ({entry['type']}, {entry['changed']}/{entry['pages']} pages "
+              f"en {entry['duration_s']} s) : {entry['file']}")
+    # Bases des boutiques (mode multi-boutiques, voir utils/store_context.py)
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(DB_PATH), 'sync_local.*.db'))):
+        store = os.path.basename(path)[len('sync_local.'):-len('.db')]
+        entry = backup_database(path, os.path.join(BACKUP_DIR, 'stores', store), full=full)
+        print(f"Base de la boutique {store} sauvegardée ({entry['type']}, "
+              f"{entry['changed']}/{entry['pages']} pages) : {entry['file']}")
+    # Sauvegarde des logs : archive dédupliquée, seuls les blocs nouveaux sont écrits
     if os.path.exists(LOGS_DIR):
-        dest_logs = os.path.join(BACKUP_DIR, f'logs_{timestamp}')
-        shutil.copytree(LOGS_DIR, dest_logs)
+        stats = archive_logs(LOGS_DIR, os.path.join(BACKUP_DIR, 'logs_archive'))
+        print(f"Logs archivés ({stats['files']} fichier(s), {stats['read_bytes']} octets lus, "
+              f"{stats['new_blocks']} nouveau(x) bloc(s)) : {stats['manifest']}")
     print(f"Backup effectué dans {BACKUP_DIR}")
 
 if __name__ == '__main__':
-    backup()
+    parser = argparse.ArgumentParser(description="Sauvegarde de la base locale et des logs")
+    parser.add_argument('--full', action='store_true', help="Forcer une sauvegarde complète")
+    parser.add_argument('--restore', metavar='CIBLE', help="Reconstruire une sauvegarde dans CIBLE")
+    parser.add_argument('--upto', help="Sauvegarde à restaurer (par défaut la plus récente)")
+    parser.add_argument('--store', help="Boutique dont la base est à restaurer (mode multi-boutiques)")
+    args = parser.parse_args()
+    if args.restore:
+        backup_dir = os.path.join(BACKUP_DIR, 'stores', args.store) if args.store else BACKUP_DIR
+        applied = restore(args.restore, backup_dir, upto=args.upto)
+        print(f"Base reconstruite dans {args.restore} ({len(applied)} fichier(s) appliqué(s))")
+    else:
+        backup(full=args.full)
@@ -9,13 +9,22 @@ import smtplib
 from email.mime.text import MIMEText
 
 backup_script = os.path.abspath(os.path.join(os.path.dirname(__file__), 'backup.py'))
+sys.path.insert(0, os.path.dirname(backup_script))
+
+from backup import prune
+import log_archive
 
 def cleanup_old_backups(backup_dir, keep=7):
     """Supprime les backups les plus anciens, ne garde que les N plus récents."""
+    # Chaînes de sauvegardes compressées : jamais coupées au milieu
+    prune(backup_dir, keep=keep)
+    # Archive des logs : manifestes expirés puis blocs qui ne sont plus référencés
+    log_archive.prune(os.path.join(backup_dir, 'logs_archive'), keep=keep)
+    # Anciennes copies non compressées
     files = sorted(glob.glob(os.path.join(backup_dir, 'sync_local_*.db')), reverse=True)
     for old_file in files[keep:]:
         os.remove(old_file)
-    log_dirs = sorted(glob.glob(os.path.join(backup_dir, 'logs_*')), reverse=True)
+    log_dirs = sorted(glob.glob(os.path.join(backup_dir, 'logs_[0-9]*')), reverse=True)
     for old_dir in log_dirs[keep:]:
         if os.path.isdir(old_dir):
             import shutil
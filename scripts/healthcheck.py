@@ -1,17 +1,35 @@
-from flask import Flask, jsonify
+"""
+Endpoints de santé.
+
+- ``/health`` : vérification superficielle (présence de la base locale) ;
+- ``/health/deep`` : retard du curseur, file des nouvelles tentatives,
+  dernière exécution réussie et accessibilité de WooCommerce et d'Odoo avec
+  leur temps d'aller-retour. La réponse provient du cache du relevé de fond
+  (core/health.py) : elle ne déclenche jamais d'appel aux API. Code 503 si
+  le relevé est absent ou périmé, 200 sinon (``status`` : ok ou degraded).
+
+Usage :
+    python scripts/healthcheck.py
+"""
+import sys
 import os
-import sentry_sdk
-from sentry_sdk.integrations.flask import FlaskIntegration
-from dotenv import load_dotenv
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-app = Flask(__name__)
+from flask import Flask, jsonify
+from dotenv import load_dotenv
 
 # Charger les variables d'environnement
 load_dotenv()
 
+from core.health import HealthProber
+
 # Initialiser Sentry si DSN présent
 ds = os.getenv('SENTRY_DSN')
 if ds:
+    # Import différé : sentry_sdk n'est chargé que s'il est configuré
+    import sentry_sdk
+    from sentry_sdk.integrations.flask import FlaskIntegration
+
     sentry_sdk.init(
         dsn=ds,
         integrations=[FlaskIntegration()],
@@ -19,14 +37,36 @@ if ds:
         environment=os.getenv('ENV', 'development')
     )
 
-@app.route('/health')
-def health():
-    # Vérifie la présence des fichiers critiques
-    db_exists = os.path.exists(os.path.join(os.path.dirname(__file__), '../sync_local.db'))
-    return jsonify({
-        'status': 'ok',
-        'db_exists': db_exists
-    })
+
+def create_app(prober=None):
+    """
+    Crée l'application des endpoints de santé.
+
+    Args:
+        prober (HealthProber, optional): Relevé de fond (démarré ici)
+
+    Returns:
+        Flask: Application WSGI
+    """
+    app = Flask(__name__)
+    app.prober = (prober or HealthProber()).start()
+
+    @app.route('/health')
+    def health():
+        # Vérifie la présence des fichiers critiques
+        db_exists = os.path.exists(os.path.join(os.path.dirname(__file__), '../sync_local.db'))
+        return jsonify({
+            'status': 'ok',
+            'db_exists': db_exists
+        })
+
+    @app.route('/health/deep')
+    def health_deep():
+        report = app.prober.report()
+        return jsonify(report), 503 if report['status'] == 'down' else 200
+
+    return app
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
+    create_app().run(host='0.0.0.0', port=8080)
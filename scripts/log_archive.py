@@ -0,0 +1,260 @@
+"""
+Archive des logs adressée par contenu et dédupliquée.
+
+Chaque fichier de ``logs/`` est découpé en blocs de taille fixe
+(LOG_ARCHIVE_BLOCK_SIZE, 1 Mio par défaut). Un bloc est stocké une seule
+fois, compressé (gzip), sous le nom de son empreinte blake2b :
+
+    backups/logs_archive/blocks/ab/abcdef….gz
+
+Chaque sauvegarde écrit un manifeste ``manifests/logs_<horodatage>.json``
+listant, pour chaque fichier, sa taille et la suite de ses blocs. Un fichier
+rotaté inchangé n'est donc stocké qu'une fois quel que soit le nombre de
+sauvegardes, et un log en cours d'écriture n'ajoute que ses nouveaux blocs.
+
+Le coût d'une sauvegarde suit le volume de logs nouveaux et non le volume
+total : un fichier dont l'inode, la taille et la date de modification n'ont
+pas changé n'est pas relu, et un fichier qui a seulement grandi (ajout en fin
+de fichier) n'est relu qu'à partir de son dernier bloc complet, après
+vérification de l'empreinte de ce bloc.
+
+La rétention (``prune``) supprime les manifestes les plus anciens puis les
+blocs qu'aucun manifeste restant ne référence.
+
+Usage :
+    python scripts/log_archive.py archive
+    python scripts/log_archive.py list
+    python scripts/log_archive.py restore logs_<horodatage>.json dossier_cible
+    python scripts/log_archive.py prune --keep 7
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+LOGS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../logs'))
+ARCHIVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../backups/logs_archive'))
+
+# Taille des blocs de déduplication (octets)
+LOG_ARCHIVE_BLOCK_SIZE = int(os.getenv('LOG_ARCHIVE_BLOCK_SIZE', 1024 * 1024))
+
+
+def _block_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _block_path(archive_dir, digest):
+    return os.path.join(archive_dir, 'blocks', digest[:2], f'{digest}.gz')
+
+
+def _manifests(archive_dir):
+    """Manifestes, du plus ancien au plus récent."""
+    return sorted(glob.glob(os.path.join(archive_dir, 'manifests', 'logs_*.json')))
+
+
+def load_manifest(path):
+    """
+    Charge un manifeste.
+
+    Args:
+        path (str): Chemin du manifeste
+
+    Returns:
+        dict: Manifeste (``created``, ``block_size``, ``files``)
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+class _BlockStore:
+    """Magasin de blocs compressés, avec statistiques d'écriture."""
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.new_blocks = 0
+        self.stored_bytes = 0
+
+    def put(self, data):
+        """Stocke un bloc s'il est absent et retourne son empreinte."""
+        digest = _block_hash(data)
+        path = _block_path(self.archive_dir, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path + '.tmp', 'wb', compresslevel=6) as out:
+                out.write(data)
+            os.replace(path + '.tmp', path)
+            self.new_blocks += 1
+            self.stored_bytes += os.path.getsize(path)
+        return digest
+
+
+def _reusable_prefix(path, stat, previous, block_size):
+    """
+    Blocs d'une version précédente encore valides pour un fichier.
+
+    Returns:
+        list: Empreintes des blocs complets inchangés (vide si le fichier a
+        été remplacé, tronqué ou réécrit)
+    """
+    if not previous or previous.get('inode') != stat.st_ino or stat.st_size < previous['size']:
+        return []
+    full = previous['size'] // block_size
+    if not full:
+        return []
+    # Un log ne fait que grandir : le dernier bloc complet suffit à le vérifier
+    with open(path, 'rb') as f:
+        f.seek((full - 1) * block_size)
+        if _block_hash(f.read(block_size)) != previous['blocks'][full - 1]:
+            return []
+    return previous['blocks'][:full]
+
+
+def archive_logs(logs_dir=LOGS_DIR, archive_dir=ARCHIVE_DIR, block_size=LOG_ARCHIVE_BLOCK_SIZE):
+    """
+    Archive les logs et écrit le manifeste de la sauvegarde.
+
+    Args:
+        logs_dir (str): Dossier des logs
+        archive_dir (str): Dossier de l'archive
+        block_size (int): Taille des blocs (octets)
+
+    Returns:
+        dict: Statistiques (manifeste, fichiers, octets lus, blocs et octets ajoutés)
+    """
+    os.makedirs(os.path.join(archive_dir, 'manifests'), exist_ok=True)
+    manifests = _manifests(archive_dir)
+    previous = {}
+    if manifests:
+        last = load_manifest(manifests[-1])
+        if last.get('block_size') == block_size:
+            previous = last['files']
+    by_inode = {entry.get('inode'): entry for entry in previous.values()}
+
+    store = _BlockStore(archive_dir)
+    files = {}
+    read_bytes = 0
+    for root, _, names in os.walk(logs_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, logs_dir)
+            stat = os.stat(path)
+            # Un log rotaté (sync.log → sync.log.1) garde son inode
+            before = by_inode.get(stat.st_ino) or previous.get(relative)
+            if (before and before.get('inode') == stat.st_ino and before['size'] == stat.st_size
+                    and before.get('mtime_ns') == stat.st_mtime_ns):
+                files[relative] = before
+                continue
+            blocks = _reusable_prefix(path, stat, before, block_size)
+            size = len(blocks) * block_size
+            with open(path, 'rb') as f:
+                f.seek(size)
+                # Lecture bornée à la taille relevée : un log qui grandit
+                # pendant l'archivage sera complété à la sauvegarde suivante
+                while size < stat.st_size:
+                    data = f.read(min(block_size, stat.st_size - size))
+                    if not data:
+                        break
+                    size += len(data)
+                    read_bytes += len(data)
+                    blocks.append(store.put(data))
+            files[relative] = {
+                'size': size,
+                'inode': stat.st_ino,
+                'mtime_ns': stat.st_mtime_ns,
+                'blocks': blocks,
+            }
+
+    name = f"logs_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+    path = os.path.join(archive_dir, 'manifests', name)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'created': datetime.now().isoformat(), 'block_size': block_size, 'files': files}, f)
+    os.replace(path + '.tmp', path)
+    return {
+        'manifest': name,
+        'files': len(files),
+        'read_bytes': read_bytes,
+        'new_blocks': store.new_blocks,
+        'stored_bytes': store.stored_bytes,
+    }
+
+
+def restore_logs(manifest, target_dir, archive_dir=ARCHIVE_DIR):
+    """
+    Reconstruit les logs d'une sauvegarde.
+
+    Args:
+        manifest (str): Nom du manifeste (ex. ``logs_20240101_020000_000000.json``)
+        target_dir (str): Dossier de destination
+        archive_dir (str): Dossier de l'archive
+
+    Returns:
+        int: Nombre de fichiers restaurés
+    """
+    content = load_manifest(os.path.join(archive_dir, 'manifests', manifest))
+    for relative, entry in content['files'].items():
+        path = os.path.join(target_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as out:
+            for digest in entry['blocks']:
+                with gzip.open(_block_path(archive_dir, digest), 'rb') as block:
+                    out.write(block.read())
+    return len(content['files'])
+
+
+def prune(archive_dir=ARCHIVE_DIR, keep=7):
+    """
+    Supprime les manifestes les plus anciens et les blocs devenus inutiles.
+
+    Args:
+        archive_dir (str): Dossier de l'archive
+        keep (int): Nombre de manifestes récents à conserver
+
+    Returns:
+        tuple: (manifestes supprimés, blocs supprimés)
+    """
+    manifests = _manifests(archive_dir)
+    expired = manifests[:-keep] if keep else manifests
+    for path in expired:
+        os.remove(path)
+    referenced = set()
+    for path in _manifests(archive_dir):
+        for entry in load_manifest(path)['files'].values():
+            referenced.update(entry['blocks'])
+    removed = 0
+    for path in glob.glob(os.path.join(archive_dir, 'blocks', '*', '*.gz')):
+        if os.path.basename(path)[:-3] not in referenced:
+            os.remove(path)
+            removed += 1
+    return len(expired), removed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Archive dédupliquée des logs")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('archive', help="Archiver les logs")
+    commands.add_parser('list', help="Lister les sauvegardes")
+    restore_parser = commands.add_parser('restore', help="Restaurer une sauvegarde")
+    restore_parser.add_argument('manifest')
+    restore_parser.add_argument('target')
+    prune_parser = commands.add_parser('prune', help="Appliquer la rétention")
+    prune_parser.add_argument('--keep', type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == 'archive':
+        stats = archive_logs()
+        print(f"Logs archivés ({stats['manifest']}) : {stats['files']} fichier(s), "
+              f"{stats['read_bytes']} octets lus, {stats['new_blocks']} nouveau(x) bloc(s)")
+    elif args.command == 'list':
+        for path in _manifests(ARCHIVE_DIR):
+            content = load_manifest(path)
+            size = sum(entry['size'] for entry in content['files'].values())
+            print(f"{os.path.basename(path)}  {len(content['files'])} fichier(s)  {size} octets")
+    elif args.command == 'restore':
+        count = restore_logs(args.manifest, args.target)
+        print(f"{count} fichier(s) restauré(s) dans {args.target}")
+    else:
+        manifests, blocks = prune(keep=args.keep)
+        print(f"{manifests} manifeste(s) et {blocks} bloc(s) supprimé(s)")
@@ -1,22 +1,222 @@
 """
 Script de monitoring simple : vérifie la taille de la base, le nombre d'erreurs, etc.
 Peut être lancé en cron ou intégré à un dashboard.
+
+Les logs sont lus de façon incrémentale (``LogScanner``) : pour chaque
+fichier, l'inode et la position de lecture sont conservés dans un fichier
+d'état (MONITORING_STATE_FILE) et seuls les octets ajoutés depuis le passage
+précédent sont analysés. Une rotation (fichier renommé ou tronqué) est
+détectée par le changement d'inode ou de taille ; la fin non lue de l'ancien
+fichier est récupérée s'il existe encore sous ``<nom>.1``.
+
+Les erreurs sont comptées par catégorie et par tranche de
+MONITORING_BUCKET_SECONDS secondes, sur une fenêtre glissante de
+MONITORING_WINDOW_HOURS heures : l'état reste de taille bornée et le coût
+d'un passage ne dépend que du volume de logs nouveaux. Les compteurs sont
+publiés comme métriques (``log_errors_total``, ``log_errors_window``).
 """
+import json
 import os
-import glob
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+STATE_PATH = os.getenv('MONITORING_STATE_FILE', os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../monitoring_state.json')))
+# Largeur d'une tranche de comptage (s) et profondeur de la fenêtre glissante (h)
+MONITORING_BUCKET_SECONDS = int(os.getenv('MONITORING_BUCKET_SECONDS', 300))
+MONITORING_WINDOW_HOURS = int(os.getenv('MONITORING_WINDOW_HOURS', 24))
+
+# Taille des lectures (octets)
+_CHUNK_SIZE = 1024 * 1024
+
+# Ligne produite par le format détaillé de config/logging.conf
+_LINE = re.compile(
+    rb'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),\d+ - \S+ - (ERROR|CRITICAL) - \[[^\]]*\] - (.*)$'
+)
+
+# Catégories d'erreurs, dans l'ordre de priorité ; 'other' par défaut
+CATEGORIES = (
+    ('validation', re.compile(rb'Champs manquants|invalide|validation', re.I)),
+    ('woocommerce', re.compile(rb'WooCommerce|WC ', re.I)),
+    ('odoo', re.compile(rb'Odoo', re.I)),
+    ('transform', re.compile(rb'transformation|mapping', re.I)),
+    ('webhook', re.compile(rb'webhook', re.I)),
+    ('sync', re.compile(rb'synchronisation|commande', re.I)),
+)
+
+
+def categorize(message):
+    """
+    Catégorie d'un message d'erreur.
+
+    Args:
+        message (bytes): Message de la ligne de log
+
+    Returns:
+        str: Nom de la catégorie
+    """
+    for name, pattern in CATEGORIES:
+        if pattern.search(message):
+            return name
+    return 'other'
+
+
+class LogScanner:
+    """
+    Lecture incrémentale des logs et comptage glissant des erreurs.
+
+    Args:
+        state_path (str): Fichier d'état (positions de lecture et compteurs)
+        bucket_seconds (int): Largeur d'une tranche de comptage (s)
+        window_hours (int): Profondeur de la fenêtre glissante (h)
+    """
+
+    def __init__(self, state_path=STATE_PATH, bucket_seconds=MONITORING_BUCKET_SECONDS,
+                 window_hours=MONITORING_WINDOW_HOURS):
+        self.state_path = state_path
+        self.bucket_seconds = bucket_seconds
+        self.window = window_hours * 3600
+        self.files = {}
+        self.buckets = {}
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            self.files = state.get('files', {})
+            self.buckets = state.get('buckets', {})
+
+    def _count(self, line, new):
+        match = _LINE.match(line)
+        if match is None:
+            # Niveau non erreur ou suite de trace (exc_info)
+            return
+        timestamp = time.mktime(time.strptime(match.group(1).decode(), '%Y-%m-%d %H:%M:%S'))
+        bucket = str(int(timestamp) // self.bucket_seconds * self.bucket_seconds)
+        category = categorize(match.group(3))
+        counts = self.buckets.setdefault(bucket, {})
+        counts[category] = counts.get(category, 0) + 1
+        new[category] = new.get(category, 0) + 1
+
+    def _read(self, path, offset, new):
+        """Analyse les lignes complètes à partir de ``offset`` ; retourne la nouvelle position."""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            pending = b''
+            while True:
+                chunk = f.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b'\n')
+                # Une ligne en cours d'écriture sera lue au passage suivant
+                pending = lines.pop()
+                for line in lines:
+                    self._count(line, new)
+                offset += len(chunk)
+        return offset - len(pending)
+
+    def scan(self, path):
+        """
+        Analyse les octets ajoutés à un fichier de log depuis le dernier passage.
+
+        Args:
+            path (str): Fichier de log
+
+        Returns:
+            dict: Nouvelles erreurs par catégorie
+        """
+        new = {}
+        known = self.files.get(path)
+        if not os.path.exists(path):
+            return new
+        stat = os.stat(path)
+        offset = 0
+        if known and known['inode'] == stat.st_ino and known['offset'] <= stat.st_size:
+            offset = known['offset']
+        elif known and known['inode'] != stat.st_ino:
+            # Fichier rotaté : terminer la lecture de l'ancien s'il est encore là
+            rotated = f'{path}.1'
+            if os.path.exists(rotated) and os.stat(rotated).st_ino == known['inode']:
+                self._read(rotated, known['offset'], new)
+        self.files[path] = {'inode': stat.st_ino, 'offset': self._read(path, offset, new)}
+        return new
+
+    def expire(self, now=None):
+        """Supprime les tranches sorties de la fenêtre glissante."""
+        horizon = (time.time() if now is None else now) - self.window
+        for bucket in [b for b in self.buckets if int(b) + self.bucket_seconds <= horizon]:
+            del self.buckets[bucket]
+
+    def totals(self):
+        """
+        Erreurs par catégorie sur la fenêtre glissante.
+
+        Returns:
+            dict: Nombre d'erreurs par catégorie
+        """
+        totals = {}
+        for counts in self.buckets.values():
+            for category, count in counts.items():
+                totals[category] = totals.get(category, 0) + count
+        return totals
+
+    def save(self):
+        """Écrit l'état de façon atomique."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump({'files': self.files, 'buckets': self.buckets}, f)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+
+def export_metrics(new, totals):
+    """
+    Publie les erreurs relevées comme métriques Prometheus.
+
+    Args:
+        new (dict): Nouvelles erreurs par catégorie (compteur)
+        totals (dict): Erreurs par catégorie sur la fenêtre glissante (jauge)
+    """
+    from utils.metrics import log_errors_counter, log_errors_window_gauge
+
+    for category, count in new.items():
+        log_errors_counter.labels(category).inc(count)
+    for category in [name for name, _ in CATEGORIES] + ['other']:
+        log_errors_window_gauge.labels(category).set(totals.get(category, 0))
+
 
 def check_db_size(db_path):
     if os.path.exists(db_path):
         size = os.path.getsize(db_path)
         print(f"Taille de la base : {size/1024:.1f} Ko")
 
-def count_errors(log_path):
-    if os.path.exists(log_path):
-        with open(log_path) as f:
-            errors = [l for l in f if 'ERROR' in l]
-        print(f"Nombre d'erreurs dans les logs : {len(errors)}")
+def count_errors(log_path, state_path=STATE_PATH):
+    """
+    Compte les erreurs ajoutées au log et publie les compteurs glissants.
+
+    Args:
+        log_path (str): Fichier de log des erreurs
+        state_path (str): Fichier d'état du lecteur incrémental
+
+    Returns:
+        dict: Erreurs par catégorie sur la fenêtre glissante
+    """
+    scanner = LogScanner(state_path)
+    new = scanner.scan(log_path)
+    scanner.expire()
+    scanner.save()
+    totals = scanner.totals()
+    export_metrics(new, totals)
+    print(f"Nombre d'erreurs dans les logs : {sum(new.values())} nouvelle(s), "
+          f"{sum(totals.values())} sur {scanner.window // 3600} h")
+    for category, count in sorted(totals.items()):
+        print(f"  {category} : {count}")
+    return totals
 
 def main():
+    from utils.metrics import init_metrics
+
+    init_metrics()
     db = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sync_local.db'))
     log = os.path.abspath(os.path.join(os.path.dirname(__file__), '../logs/errors.log'))
     check_db_size(db)
@@ -1,44 +1,293 @@
 """
 Script de purge des données locales.
-Ce script supprime les fichiers de données locaux :
-- La base de données SQLite (sync_local.db)
-- Le fichier d'audit CSV (sync_audit.csv)
 
-Utilisé pour :
+Par défaut, purge par ancienneté (rétention) :
+- les lignes de synced_orders synchronisées avant la date limite ;
+- les lignes de pending_orders (nouvelles tentatives) non retentées depuis
+  la date limite ;
+- les lignes de order_status (retour des statuts) inchangées depuis la
+  date limite ;
+- les entrées du fichier d'audit CSV (sync_audit.csv) antérieures à la date
+  limite.
+Les lignes récentes, donc l'information de dédoublonnage utile à la
+synchronisation en cours, sont conservées.
+
+Les suppressions se font par petits lots (PURGE_BATCH_SIZE lignes), chacun
+dans sa propre transaction courte suivie d'une pause : une synchronisation
+concurrente n'attend jamais plus d'un lot. L'espace libéré est ensuite
+rendu au système par ``PRAGMA incremental_vacuum``, lui aussi par pas de
+PURGE_VACUUM_PAGES pages. Une base créée avant le mode ``auto_vacuum``
+incrémental doit être convertie une fois (``--convert``, qui exécute un
+VACUUM complet, bloquant).
+
+En mode multi-boutiques (config/stores.py), chaque opération porte sur la
+base et l'audit de chaque boutique (``sync_local.<boutique>.db``,
+``sync_audit.<boutique>.csv``).
+
+``--all`` conserve l'ancien comportement : suppression complète de la base
+SQLite et du fichier d'audit, pour :
 - Réinitialiser l'état de la synchronisation
 - Nettoyer les données de test
 - Résoudre les problèmes de synchronisation
+
+Usage :
+    python scripts/purge_local_data.py [--days 90]
+    python scripts/purge_local_data.py --convert
+    python scripts/purge_local_data.py --all
 """
 
+import argparse
 import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.stores import store_names
+from utils.helpers import audit_lock
+from utils.store_context import store_path, use_store
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../sync_local.db')
+AUDIT_PATH = os.path.join(os.path.dirname(__file__), '../sync_audit.csv')
 
 # Liste des fichiers à supprimer
 # Les chemins sont relatifs à la racine du projet
 FILES_TO_PURGE = [
-    os.path.join(os.path.dirname(__file__), '../sync_local.db'),  # Base de données SQLite
-    os.path.join(os.path.dirname(__file__), '../sync_audit.csv'),  # Fichier d'audit
+    DB_PATH,  # Base de données SQLite
+    AUDIT_PATH,  # Fichier d'audit
 ]
 
+# Ancienneté au-delà de laquelle les données sont purgées (jours)
+PURGE_RETENTION_DAYS = int(os.getenv('PURGE_RETENTION_DAYS', 90))
+# Lignes supprimées par transaction, et pause entre deux lots (s)
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))
+PURGE_BATCH_SLEEP = float(os.getenv('PURGE_BATCH_SLEEP', 0.05))
+# Pages rendues au système par pas de vacuum incrémental
+PURGE_VACUUM_PAGES = int(os.getenv('PURGE_VACUUM_PAGES', 256))
+
+# Table -> colonne de date (TIMESTAMP UTC, format SQLite CURRENT_TIMESTAMP)
+RETENTION_TABLES = {
+    'synced_orders': 'synced_at',
+    'pending_orders': 'updated_at',
+    'order_status': 'updated_at',
+}
+
+
+def _connect(db_path):
+    # Attendre qu'une synchronisation libère le verrou plutôt qu'échouer
+    return sqlite3.connect(db_path, timeout=30)
+
+
+def purge_old_rows(db_path=DB_PATH, cutoff=None, batch_size=PURGE_BATCH_SIZE, pause=PURGE_BATCH_SLEEP):
+    """
+    Supprime par lots les lignes antérieures à la date limite.
+
+    Les lignes sont parcourues par rowid croissant, c'est-à-dire par ordre
+    d'insertion : les plus anciennes sont en tête de table et chaque lot
+    s'arrête dès qu'il est complet, sans parcourir toute la table.
+
+    Args:
+        db_path (str): Base SQLite
+        cutoff (datetime): Date limite (UTC) ; par défaut maintenant moins PURGE_RETENTION_DAYS
+        batch_size (int): Lignes supprimées par transaction
+        pause (float): Pause entre deux lots (s)
+
+    Returns:
+        dict: Nombre de lignes supprimées par table
+    """
+    cutoff = cutoff or datetime.now(timezone.utc) - timedelta(days=PURGE_RETENTION_DAYS)
+    limit = cutoff.strftime('%Y-%m-%d %H:%M:%S')
+    deleted = {}
+    conn = _connect(db_path)
+    try:
+        for table, column in RETENTION_TABLES.items():
+            deleted[table] = 0
+            while True:
+                with conn:
+                    count = conn.execute(f'''
+                        DELETE FROM {table} WHERE rowid IN (
+                            SELECT rowid FROM {table} WHERE {column} < ? ORDER BY rowid LIMIT ?
+                        )
+                    ''', (limit, batch_size)).rowcount
+                deleted[table] += count
+                if count < batch_size:
+                    break
+                time.sleep(pause)
+    finally:
+        conn.close()
+    return deleted
+
+
+def compact(db_path=DB_PATH, pages=PURGE_VACUUM_PAGES, pause=PURGE_BATCH_SLEEP):
+    """
+    Rend au système les pages libres de la base, par pas.
+
+    Args:
+        db_path (str): Base SQLite
+        pages (int): Pages libérées par pas
+        pause (float): Pause entre deux pas (s)
+
+    Returns:
+        int: Nombre de pages libérées, ou None si la base n'est pas en
+        mode ``auto_vacuum`` incrémental (voir ``convert``)
+    """
+    conn = _connect(db_path)
+    try:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return None
+        freed = 0
+        while True:
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free:
+                return freed
+            # execute() ne libère qu'une page par appel : executescript va jusqu'au bout du pas
+            conn.executescript(f'PRAGMA incremental_vacuum({min(pages, free)});')
+            freed += min(pages, free)
+            time.sleep(pause)
+    finally:
+        conn.close()
+
+
+def convert(db_path=DB_PATH):
+    """
+    Passe une base existante en ``auto_vacuum`` incrémental (VACUUM complet, bloquant).
+
+    Args:
+        db_path (str): Base SQLite
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+
+def purge_audit(audit_path=AUDIT_PATH, cutoff=None):
+    """
+    Supprime du fichier d'audit les entrées antérieures à la date limite.
+
+    Le fichier est réécrit à côté puis substitué, sous le verrou exclusif
+    de l'audit (``audit_lock``) : les ajouts des synchronisations en cours
+    attendent la substitution et aucune entrée n'est perdue.
+
+    Args:
+        audit_path (str): Fichier d'audit CSV
+        cutoff (datetime): Date limite (heure locale, comme les entrées d'audit) ;
+            par défaut maintenant moins PURGE_RETENTION_DAYS
+
+    Returns:
+        int: Nombre d'entrées supprimées
+    """
+    if not os.path.exists(audit_path):
+        return 0
+    cutoff = cutoff or datetime.now() - timedelta(days=PURGE_RETENTION_DAYS)
+    limit = cutoff.isoformat()
+    removed = 0
+    with audit_lock(audit_path, exclusive=True):
+        with open(audit_path, newline='') as source, open(audit_path + '.tmp', 'w', newline='') as out:
+            for line in source:
+                # Première colonne : date ISO (comparable lexicographiquement)
+                if line[:1].isdigit() and line[:len(limit)] < limit:
+                    removed += 1
+                    continue
+                if removed and not line[:1].isdigit():
+                    # Suite d'un message multiligne d'une entrée supprimée
+                    continue
+                # Fichier chronologique : tout le reste est récent
+                out.write(line)
+                break
+            if removed:
+                out.writelines(source)
+        if not removed:
+            os.remove(audit_path + '.tmp')
+            return 0
+        os.replace(audit_path + '.tmp', audit_path)
+    return removed
+
+
+def purge_older_than(days=PURGE_RETENTION_DAYS, db_path=DB_PATH, audit_path=AUDIT_PATH):
+    """
+    Purge les données plus anciennes que ``days`` jours puis compacte la base.
+
+    Args:
+        days (int): Rétention en jours
+        db_path (str): Base SQLite
+        audit_path (str): Fichier d'audit CSV
+
+    Returns:
+        dict: Lignes supprimées par table, entrées d'audit supprimées et pages libérées
+    """
+    result = {}
+    if os.path.exists(db_path):
+        result.update(purge_old_rows(db_path, datetime.now(timezone.utc) - timedelta(days=days)))
+        result['freed_pages'] = compact(db_path)
+    result['audit'] = purge_audit(audit_path, datetime.now() - timedelta(days=days))
+    return result
+
+
+def purge_stores_older_than(days=PURGE_RETENTION_DAYS, stores=None):
+    """
+    Purge par ancienneté la base et l'audit de chaque boutique.
+
+    Args:
+        days (int): Rétention en jours
+        stores (list, optional): Boutiques (Store), ``load_stores()`` par défaut
+
+    Returns:
+        dict: Boutique (None en mode à une seule boutique) -> résultat de ``purge_older_than``
+    """
+    results = {}
+    for name in store_names(stores):
+        with use_store(name):
+            results[name] = purge_older_than(days, store_path(DB_PATH), store_path(AUDIT_PATH))
+    return results
+
+
 def purge():
     """
-    Supprime les fichiers de données locaux.
-    
+    Supprime les fichiers de données locaux (de chaque boutique).
+
     Pour chaque fichier :
     1. Vérifie s'il existe
     2. Le supprime s'il existe
     3. Affiche un message de confirmation
-    
+
     Note:
         Cette opération est irréversible.
         Toutes les données de synchronisation seront perdues.
     """
-    for f in FILES_TO_PURGE:
-        if os.path.exists(f):
-            os.remove(f)
-            print(f"Supprimé : {f}")
-        else:
-            print(f"Déjà absent : {f}")
+    for name in store_names():
+        with use_store(name):
+            for f in map(store_path, FILES_TO_PURGE):
+                if os.path.exists(f):
+                    os.remove(f)
+                    print(f"Supprimé : {f}")
+                else:
+                    print(f"Déjà absent : {f}")
 
 if __name__ == "__main__":
-    # Exécution de la purge si le script est lancé directement
-    purge()
+    parser = argparse.ArgumentParser(description="Purge des données locales")
+    parser.add_argument('--days', type=int, default=PURGE_RETENTION_DAYS, help="Rétention en jours")
+    parser.add_argument('--convert', action='store_true',
+                        help="Passer la base en auto_vacuum incrémental (VACUUM complet)")
+    parser.add_argument('--all', action='store_true', help="Supprimer la base et l'audit")
+    args = parser.parse_args()
+    if args.all:
+        purge()
+    elif args.convert:
+        for name in store_names():
+            with use_store(name):
+                if os.path.exists(store_path(DB_PATH)):
+                    convert(store_path(DB_PATH))
+                    print(f"Base {store_path(DB_PATH)} passée en auto_vacuum incrémental")
+    else:
+        for name, result in purge_stores_older_than(args.days).items():
+            where = f" (boutique {name})" if name else ""
+            print(f"Purge des données de plus de {args.days} jours{where} : "
+                  f"{result.get('synced_orders', 0)} commande(s) synchronisée(s), "
+                  f"{result.get('pending_orders', 0)} nouvelle(s) tentative(s), "
+                  f"{result['audit']} entrée(s) d'audit")
+            if 'freed_pages' in result and result['freed_pages'] is None:
+                print("Base sans auto_vacuum incrémental : lancer une fois --convert pour récupérer l'espace")
@@ -0,0 +1,42 @@
+"""
+Affiche les traces de synchronisation exportées dans logs/traces.jsonl.
+
+Exemples :
+    python scripts/show_trace.py --order 42
+    python scripts/show_trace.py --slowest 5
+"""
+
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tracing import TRACE_FILE, format_trace, load_traces
+
+
+def _root(spans):
+    """Span racine d'une trace."""
+    return next(record for record in spans if record['parent_id'] is None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Affiche les traces de synchronisation")
+    parser.add_argument("--file", default=TRACE_FILE, help="Fichier de traces")
+    parser.add_argument("--order", help="Identifiant de la commande WooCommerce")
+    parser.add_argument("--run", help="Identifiant d'exécution (run.id)")
+    parser.add_argument("--slowest", type=int, default=1, help="Nombre de traces les plus lentes à afficher")
+    args = parser.parse_args()
+
+    traces = [spans for spans in load_traces(args.file).values() if any(r['parent_id'] is None for r in spans)]
+    if args.order:
+        traces = [t for t in traces if str(_root(t)['attributes'].get('order.id')) == args.order]
+    if args.run:
+        traces = [t for t in traces if _root(t)['attributes'].get('run.id') == args.run]
+    traces.sort(key=lambda t: _root(t)['duration_ms'], reverse=True)
+
+    if not traces:
+        print("Aucune trace correspondante.")
+    for spans in traces[:args.slowest]:
+        print(f"=== Trace {spans[0]['trace_id']} ===")
+        print(format_trace(spans))
+        print()
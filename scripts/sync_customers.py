@@ -0,0 +1,48 @@
+"""
+Synchronisation des clients d'Odoo vers WooCommerce.
+
+Relève les partenaires clients modifiés dans Odoo (res.partner, par
+write_date) et les crée ou met à jour dans WooCommerce par requêtes
+groupées (voir core/customer_sync.py).
+
+Avec ``--loop``, le processus reste résident : relevé toutes les
+CUSTOMER_POLL_INTERVAL secondes.
+
+Usage :
+    python scripts/sync_customers.py [--loop]
+"""
+
+import argparse
+import sys
+import os
+# Ajout du répertoire parent au PYTHONPATH pour permettre l'import des modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import settings
+from core.customer_sync import CustomerSync
+from utils.metrics import init_metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronisation des clients Odoo → WooCommerce")
+    parser.add_argument("--loop", action="store_true",
+                        help="Rester résident et relever les changements toutes les CUSTOMER_POLL_INTERVAL secondes")
+    args = parser.parse_args()
+    init_metrics()
+    print("=== Synchronisation des clients Odoo → WooCommerce ===")
+    try:
+        settings.validate_settings()
+        customers = CustomerSync()
+        if args.loop:
+            customers.run()
+        else:
+            stats = customers.run_once()
+            print(f"Clients synchronisés : {stats['created']} créé(s), {stats['updated']} mis à jour, "
+                  f"{stats['skipped']} inchangé(s), {stats['failed']} échec(s)")
+            if stats.get('interrupted'):
+                sys.exit(1)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"Erreur inattendue : {e}")
+        sys.exit(1)
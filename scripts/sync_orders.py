@@ -2,30 +2,141 @@
 Script principal de synchronisation des commandes entre WooCommerce et Odoo.
 Ce script est exécuté par le conteneur Docker 'sync' et gère la synchronisation
 automatique des commandes de WooCommerce vers Odoo.
+
+Avec ``--loop``, le processus reste résident et relance la synchronisation
+toutes les SYNC_FREQUENCY minutes ; la taille des lots est alors ajustée au
+budget mémoire MEMORY_BUDGET_MB (voir utils/memory.py).
+
+Après chaque synchronisation, l'avancement des commandes dans Odoo est
+renvoyé vers WooCommerce (core/status_writeback.py, désactivable par
+STATUS_WRITEBACK=0), sous le verrou de synchronisation (sync.lock).
+
+Avec ``--backfill [--after DATE]``, l'historique des commandes est rattrapé
+page par page sur des enregistrements compacts (SyncManager.backfill), sans
+modifier la date de dernière synchronisation.
+
+Usage :
+    python scripts/sync_orders.py [--loop]
+    python scripts/sync_orders.py --backfill --after 2024-01-01
 """
 
+import argparse
 import sys
 import os
+import time
+from datetime import datetime
 # Ajout du répertoire parent au PYTHONPATH pour permettre l'import des modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from config import settings
+from core.status_writeback import STATUS_WRITEBACK, StatusWriteBack
 from core.sync_manager import SyncManager
-from utils.metrics import start_metrics_server, sync_success_counter, sync_error_counter, sync_duration_histogram
+from utils.profiler import install_signal_handler
+from utils.sync_state import sync_lock
+from utils.metrics import init_metrics, sync_success_counter, sync_error_counter, sync_duration_histogram
 
-if __name__ == "__main__":
-    print("=== Synchronisation WooCommerce → Odoo ===")
-    # Démarre le serveur Prometheus sur le port 8001
-    start_metrics_server(port=8001)
+
+def run_once(sync, trigger, writeback=None):
+    """
+    Exécute une synchronisation en mettant à jour les métriques globales.
+
+    Args:
+        sync (SyncManager): Gestionnaire de synchronisation
+        trigger (str): Déclencheur de la synchronisation
+        writeback (StatusWriteBack, optional): Retour des statuts vers WooCommerce
+    """
     try:
-        # Initialisation du gestionnaire de synchronisation
-        sync = SyncManager()
         # Lancement de la synchronisation des commandes avec mesure Prometheus
         with sync_duration_histogram.time():
-            sync.sync_orders()
+            sync.sync_orders(trigger=trigger)
         sync_success_counter.inc()
         print("Synchronisation terminée.")
     except Exception as e:
         sync_error_counter.inc()
         import traceback
         traceback.print_exc()
-        print(f"Erreur inattendue : {e}")
\ No newline at end of file
+        print(f"Erreur inattendue : {e}")
+    if writeback is not None:
+        try:
+            # Même verrou que la synchronisation : un seul processus relève et renvoie les statuts
+            with sync_lock():
+                stats = writeback.run_once()
+            print(f"Statuts renvoyés vers WooCommerce : {stats['updated']} commande(s), "
+                  f"{stats['failed']} échec(s)")
+        except Exception as e:
+            # Le retour des statuts reprendra au prochain passage
+            print(f"Erreur lors du retour des statuts : {e}")
+
+
+def run_backfill(sync, after=None):
+    """
+    Rattrape l'historique des commandes en mettant à jour les métriques globales.
+
+    Args:
+        sync (SyncManager): Gestionnaire de synchronisation
+        after (str, optional): Date ISO 8601 à partir de laquelle rattraper
+
+    Returns:
+        bool: True si le rattrapage est allé à son terme
+    """
+    try:
+        with sync_duration_histogram.time():
+            processed = sync.backfill(after=after)
+        sync_success_counter.inc()
+        print(f"Rattrapage terminé : {processed} commande(s) traitée(s).")
+        return True
+    except Exception as e:
+        sync_error_counter.inc()
+        import traceback
+        traceback.print_exc()
+        print(f"Erreur inattendue : {e}")
+        return False
+
+
+def _iso_date(value):
+    """Date ou date-heure ISO 8601 (ex. 2024-01-01), normalisée pour le paramètre ``after``."""
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date ISO 8601 invalide : {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronisation WooCommerce → Odoo")
+    parser.add_argument("--trigger", choices=["poll", "webhook"], default="poll",
+                        help="Déclencheur de la synchronisation (métrique de fraîcheur)")
+    parser.add_argument("--loop", action="store_true",
+                        help="Rester résident et synchroniser toutes les SYNC_FREQUENCY minutes")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Rattraper l'historique des commandes (enregistrements compacts)")
+    parser.add_argument("--after", type=_iso_date,
+                        help="Avec --backfill : date ISO 8601 à partir de laquelle rattraper")
+    args = parser.parse_args()
+    if args.after and not args.backfill:
+        parser.error("--after n'est utilisable qu'avec --backfill")
+    if args.backfill and args.loop:
+        parser.error("--backfill et --loop sont incompatibles")
+    # Profilage à la demande : docker kill -s USR2 <conteneur>
+    install_signal_handler()
+    print("=== Synchronisation WooCommerce → Odoo ===")
+    # Les métriques sont écrites dans PROMETHEUS_MULTIPROC_DIR et exposées
+    # par le dashboard (/metrics) : aucun port n'est ouvert ici
+    init_metrics()
+    try:
+        # Validation de la configuration, puis initialisation du gestionnaire
+        settings.validate_settings()
+        sync = SyncManager()
+        writeback = StatusWriteBack(sync.wc, sync.odoo) if STATUS_WRITEBACK and not args.backfill else None
+    except Exception as e:
+        sync_error_counter.inc()
+        import traceback
+        traceback.print_exc()
+        print(f"Erreur inattendue : {e}")
+        sys.exit(1)
+
+    if args.backfill:
+        sys.exit(0 if run_backfill(sync, args.after) else 1)
+    run_once(sync, args.trigger, writeback)
+    while args.loop:
+        time.sleep(settings.SYNC_FREQUENCY * 60)
+        run_once(sync, args.trigger, writeback)
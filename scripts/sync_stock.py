@@ -0,0 +1,46 @@
+"""
+Synchronisation des niveaux de stock d'Odoo vers WooCommerce.
+
+Relève les quantités modifiées dans Odoo (stock.quant, product.product) et
+les pousse vers WooCommerce par requêtes groupées (voir core/stock_sync.py).
+
+Avec ``--loop``, le processus reste résident : relevé toutes les
+STOCK_POLL_INTERVAL secondes et envoi des changements regroupés par SKU
+toutes les STOCK_COALESCE_WINDOW secondes.
+
+Usage :
+    python scripts/sync_stock.py [--loop]
+"""
+
+import argparse
+import sys
+import os
+# Ajout du répertoire parent au PYTHONPATH pour permettre l'import des modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import settings
+from core.stock_sync import StockSync
+from utils.metrics import init_metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronisation du stock Odoo → WooCommerce")
+    parser.add_argument("--loop", action="store_true",
+                        help="Rester résident et relever les changements toutes les STOCK_POLL_INTERVAL secondes")
+    args = parser.parse_args()
+    init_metrics()
+    print("=== Synchronisation du stock Odoo → WooCommerce ===")
+    try:
+        settings.validate_settings()
+        stock = StockSync()
+        if args.loop:
+            stock.run()
+        else:
+            stats = stock.run_once()
+            print(f"Stock synchronisé : {stats['updated']} mise(s) à jour, {stats['failed']} échec(s), "
+                  f"{stats['unknown_sku']} SKU inconnu(s)")
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"Erreur inattendue : {e}")
+        sys.exit(1)
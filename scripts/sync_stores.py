@@ -0,0 +1,55 @@
+"""
+Synchronisation de plusieurs boutiques WooCommerce vers une même instance Odoo.
+
+Les boutiques sont décrites dans STORES_FILE (voir config/stores.py) et
+synchronisées en parallèle dans un seul processus, chacune avec son état
+local, ses clés, ses budgets de débit et sa société/liste de prix Odoo. La
+capacité d'écriture Odoo est répartie équitablement entre elles (voir
+core/multi_store.py).
+
+Avec ``--loop``, le processus reste résident et resynchronise chaque
+boutique toutes les SYNC_FREQUENCY minutes.
+
+Usage :
+    python scripts/sync_stores.py [--loop]
+"""
+
+import argparse
+import sys
+import os
+# Ajout du répertoire parent au PYTHONPATH pour permettre l'import des modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import settings
+from config.stores import STORES_FILE, load_stores
+from core.multi_store import MultiStoreSync
+from utils.metrics import init_metrics
+from utils.profiler import install_signal_handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronisation multi-boutiques WooCommerce → Odoo")
+    parser.add_argument("--loop", action="store_true",
+                        help="Rester résident et synchroniser toutes les SYNC_FREQUENCY minutes")
+    args = parser.parse_args()
+    # Profilage à la demande : docker kill -s USR2 <conteneur>
+    install_signal_handler()
+    init_metrics()
+    print("=== Synchronisation multi-boutiques WooCommerce → Odoo ===")
+    try:
+        settings.validate_settings(woocommerce=False)
+        stores = load_stores()
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"Erreur inattendue : {e}")
+        sys.exit(1)
+    if not stores:
+        print(f"Aucune boutique déclarée dans {STORES_FILE} : utiliser scripts/sync_orders.py")
+        sys.exit(1)
+
+    print(f"Boutiques : {', '.join(store.name for store in stores)}")
+    results = MultiStoreSync(stores).run(loop=args.loop)
+    for name, error in results.items():
+        print(f"{name} : {'OK' if error is None else f'échec ({error})'}")
+    sys.exit(0 if all(error is None for error in results.values()) else 1)
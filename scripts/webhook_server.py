@@ -1,15 +1,44 @@
-from flask import Flask, request, jsonify
+"""
+Serveur de réception des webhooks WooCommerce.
+
+Le chemin de la requête se limite au décodage du corps, à la mise en file
+(core/webhook_queue.py) et à la réponse 202 : la synchronisation tourne dans
+un thread de fond du même processus et regroupe les webhooks reçus pendant
+la synchronisation précédente.
+
+Par défaut, l'application est servie par waitress (serveur WSGI multi-threadé
+de production) s'il est installé, sinon par le serveur multi-threadé de
+Werkzeug. ``--dev`` lance le serveur de développement Flask.
+
+Usage :
+    python scripts/webhook_server.py [--host 0.0.0.0] [--port 8090] [--threads 8] [--dev]
+"""
+
+import argparse
+import sys
 import os
-import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, request, jsonify
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 from dotenv import load_dotenv
 
-app = Flask(__name__)
-
-# Charger les variables d'environnement
+# Charger les variables d'environnement (avant utils.metrics)
 load_dotenv()
 
+from config import settings
+from core.webhook_queue import WebhookQueue
+from utils.metrics import init_metrics, webhook_received_counter
+
+try:
+    import waitress
+except ImportError:  # waitress est optionnel
+    waitress = None
+
+# Nombre de threads du serveur WSGI
+WEBHOOK_THREADS = int(os.getenv('WEBHOOK_THREADS', 8))
+
 # Initialiser Sentry si DSN présent
 ds = os.getenv('SENTRY_DSN')
 if ds:
@@ -20,13 +49,68 @@ if ds:
         environment=os.getenv('ENV', 'development')
     )
 
-@app.route('/webhook', methods=['POST'])
-def webhook():
-    # Ici, on pourrait vérifier la signature du webhook pour la sécurité
-    data = request.json
-    # Déclenche la synchronisation (en tâche de fond)
-    subprocess.Popen(['python', 'scripts/sync_orders.py'])
-    return jsonify({'status': 'sync triggered'}), 202
+
+def create_app(ingest=None):
+    """
+    Crée l'application de réception des webhooks.
+
+    Args:
+        ingest (WebhookQueue, optional): File d'ingestion (démarrée ici)
+
+    Returns:
+        Flask: Application WSGI
+    """
+    app = Flask(__name__)
+    app.ingest = (ingest or WebhookQueue()).start()
+
+    @app.route('/webhook', methods=['POST'])
+    def webhook():
+        # Ici, on pourrait vérifier la signature du webhook pour la sécurité
+        data = request.get_json(silent=True)
+        if data is None:
+            # Ping envoyé par WooCommerce à la création du webhook (formulaire webhook_id=…)
+            if request.form.get('webhook_id'):
+                return jsonify({'status': 'pong'}), 200
+            return jsonify({'status': 'invalid payload'}), 400
+        webhook_received_counter.inc()
+        if not app.ingest.submit(data.get('id') if isinstance(data, dict) else None):
+            return jsonify({'status': 'queue full'}), 503, {'Retry-After': '5'}
+        return jsonify({'status': 'queued'}), 202
+
+    return app
+
+
+def serve(app, host='0.0.0.0', port=8090, threads=WEBHOOK_THREADS):
+    """
+    Sert l'application avec un serveur WSGI multi-threadé.
+
+    Args:
+        app (Flask): Application WSGI
+        host (str): Adresse d'écoute
+        port (int): Port d'écoute
+        threads (int): Nombre de threads de traitement des requêtes
+    """
+    if waitress is not None:
+        waitress.serve(app, host=host, port=port, threads=threads, ident=None)
+        return
+    from werkzeug.serving import make_server
+
+    print("waitress non installé : serveur multi-threadé Werkzeug")
+    make_server(host, port, app, threaded=True).serve_forever()
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8090)
+    parser = argparse.ArgumentParser(description="Réception des webhooks WooCommerce")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--threads', type=int, default=WEBHOOK_THREADS, help="Threads du serveur WSGI")
+    parser.add_argument('--dev', action='store_true', help="Serveur de développement Flask")
+    args = parser.parse_args()
+    # La synchronisation déclenchée par les webhooks a besoin des identifiants API
+    settings.validate_settings()
+    init_metrics()
+    app = create_app()
+    if args.dev:
+        app.run(host=args.host, port=args.port)
+    else:
+        serve(app, args.host, args.port, args.threads)
@@ -0,0 +1,88 @@
+import sys
+import os
+from unittest.mock import MagicMock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from utils import database, helpers, progress, sync_state
+
+
+_OPERATORS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+}
+
+
+def _matches(record, domain):
+    """Évalue un domaine Odoo (notation préfixée, '&' implicite) ; les champs absents sont ignorés."""
+    def term(index):
+        item = domain[index]
+        if item in ('&', '|'):
+            left, index = term(index + 1)
+            right, index = term(index)
+            return (left and right) if item == '&' else (left or right), index
+        field, operator, value = item
+        return field not in record or _OPERATORS[operator](record[field], value), index + 1
+
+    index, result = 0, True
+    while index < len(domain):
+        value, index = term(index)
+        result = result and value
+    return result
+
+
+class FakeOdoo:
+    """Odoo minimal : enregistrements par modèle, filtrés par domaine, triés par (write_date, id), paginés."""
+
+    def __init__(self):
+        self.records = {}
+        # Modèle et nombre d'enregistrements de chaque lecture
+        self.reads = []
+
+    def write(self, model, record_id, **values):
+        record = self.records.setdefault(model, {}).setdefault(record_id, {'id': record_id})
+        record.update(values)
+        return record
+
+    def search_read(self, model, domain, fields, offset=0, limit=None, order=None):
+        records = [record for record in self.records.get(model, {}).values() if _matches(record, domain)]
+        records.sort(key=lambda record: (record['write_date'], record['id']))
+        records = records[offset:offset + limit if limit else None]
+        self.reads.append((model, len(records)))
+        return records
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    """État local (base, date de synchronisation, curseurs, avancement, audit) dans tmp_path."""
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'sync_local.db'))
+    monkeypatch.setattr(sync_state, 'SYNC_FILE', str(tmp_path / 'last_synced_at.txt'))
+    monkeypatch.setattr(sync_state, 'CURSOR_FILE', str(tmp_path / 'sync_cursors.json'))
+    monkeypatch.setattr(sync_state, 'SYNC_LOCK_FILE', str(tmp_path / 'sync.lock'))
+    monkeypatch.setattr(progress, 'PROGRESS_FILE', str(tmp_path / 'sync_progress.json'))
+    monkeypatch.setattr(helpers, 'AUDIT_LOG', str(tmp_path / 'sync_audit.csv'))
+    return tmp_path
+
+
+@pytest.fixture
+def odoo():
+    return FakeOdoo()
+
+
+@pytest.fixture
+def wc():
+    """Client WooCommerce dont les requêtes groupées acceptent tous les éléments."""
+    wc = MagicMock()
+    wc.batch_update_products.side_effect = lambda updates, parent_id=None: [
+        {'id': update['id'], 'stock_quantity': update['stock_quantity']} for update in updates
+    ]
+    wc.batch_update_orders.side_effect = lambda updates: [{'id': update['id']} for update in updates]
+    wc.batch_customers.side_effect = lambda creates=(), updates=(): {
+        'create': [{'id': 5000 + i, 'email': customer['email']} for i, customer in enumerate(creates)],
+        'update': [{'id': update['id']} for update in updates],
+    }
+    return wc
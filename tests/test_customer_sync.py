@@ -0,0 +1,160 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.customer_sync import CustomerSync, partner_to_wc, remember_partner
+from utils import database, sync_state
+
+
+def set_partner(odoo, partner_id, write_date, **values):
+    partner = {'name': f'Client {partner_id}', 'email': f'c{partner_id}@example.com', 'phone': False,
+               'street': '1 rue de la Paix', 'city': 'Paris', 'zip': '75002',
+               'country_id': [76, 'France'], 'write_date': write_date}
+    partner.update(values)
+    odoo.write('res.partner', partner_id, **partner)
+
+
+def test_partner_to_wc():
+    customer = partner_to_wc({'name': 'Jean Dupont', 'email': 'jean@example.com', 'phone': False,
+                              'street': '1 rue', 'city': 'Lyon', 'zip': '69001', 'country_id': [76, 'France']})
+    assert customer == {'first_name': 'Jean', 'last_name': 'Dupont', 'email': 'jean@example.com',
+                        'billing': {'phone': '', 'address_1': '1 rue', 'city': 'Lyon',
+                                    'postcode': '69001', 'country': 'FR'}}
+    # Format d'écriture Odoo (ID de pays entier) : même fiche
+    assert partner_to_wc({'name': 'Jean Dupont', 'email': 'jean@example.com', 'phone': '',
+                          'street': '1 rue', 'city': 'Lyon', 'zip': '69001', 'country_id': 76}) == customer
+
+
+def test_partners_are_created_then_updated_in_batches(state, odoo, wc):
+    for i in range(1, 251):
+        set_partner(odoo, i, '2024-05-01 10:00:00')
+    customers = CustomerSync(wc=wc, odoo=odoo, page_size=200)
+
+    stats = customers.run_once()
+    assert stats == {'created': 250, 'updated': 0, 'skipped': 0, 'failed': 0}
+    # Deux pages Odoo : 100 + 100, puis 50
+    assert [len(call.kwargs['creates']) for call in wc.batch_customers.call_args_list] == [100, 100, 50]
+    assert sync_state.get_cursor('customers') == ['2024-05-01 10:00:00', 250]
+
+    # Adresse corrigée dans Odoo : une seule mise à jour, vers le client créé
+    wc.batch_customers.reset_mock()
+    set_partner(odoo, 7, '2024-05-01 11:00:00', street='2 avenue Foch')
+    stats = customers.run_once()
+    assert stats['updated'] == 1
+    (call,) = wc.batch_customers.call_args_list
+    assert call.kwargs['creates'] == []
+    assert call.kwargs['updates'][0]['id'] == 5006
+    assert call.kwargs['updates'][0]['billing']['address_1'] == '2 avenue Foch'
+
+
+def test_own_writes_are_not_echoed(state, odoo, wc):
+    database.init_db()
+    # Client créé dans Odoo par la synchronisation WooCommerce -> Odoo
+    remember_partner(1, {'name': 'Client 1', 'email': 'c1@example.com', 'phone': '',
+                         'street': '1 rue de la Paix', 'city': 'Paris', 'zip': '75002', 'country_id': 76},
+                     wc_id=42)
+    set_partner(odoo, 1, '2024-05-01 10:00:00')
+    # Champ non synchronisé modifié : fiche WooCommerce inchangée
+    set_partner(odoo, 2, '2024-05-01 10:00:00')
+    customers = CustomerSync(wc=wc, odoo=odoo)
+    customers.run_once()
+    wc.batch_customers.reset_mock()
+    set_partner(odoo, 2, '2024-05-01 12:00:00', function='Acheteur')
+
+    stats = customers.run_once()
+    assert stats['skipped'] == 2
+    wc.batch_customers.assert_not_called()
+
+
+def test_existing_email_becomes_update(state, odoo, wc):
+    set_partner(odoo, 1, '2024-05-01 10:00:00')
+    wc.batch_customers.side_effect = [
+        {'create': [{'id': 0, 'error': {'code': 'registration-error-email-exists',
+                                        'message': 'Un compte existe déjà.'}}], 'update': []},
+        {'create': [], 'update': [{'id': 99}]},
+    ]
+    wc.get_customer_by_email.return_value = {'id': 99, 'email': 'c1@example.com'}
+    customers = CustomerSync(wc=wc, odoo=odoo)
+
+    stats = customers.run_once()
+    assert stats == {'created': 0, 'updated': 1, 'skipped': 0, 'failed': 0}
+    assert wc.batch_customers.call_args_list[1].kwargs['updates'][0]['id'] == 99
+    assert database.get_wc_customers([1])[1][0] == 99
+
+
+def test_request_failure_keeps_cursor(state, odoo, wc):
+    set_partner(odoo, 1, '2024-05-01 10:00:00')
+    wc.batch_customers.side_effect = Exception("503")
+    customers = CustomerSync(wc=wc, odoo=odoo)
+
+    assert customers.run_once()['interrupted']
+    assert sync_state.get_cursor('customers') is None
+
+
+def test_rejected_partner_is_retried_then_dropped(state, odoo, wc, monkeypatch):
+    monkeypatch.setattr('core.customer_sync.CUSTOMER_MAX_ATTEMPTS', 3)
+    monkeypatch.setattr('core.customer_sync.CUSTOMER_CURSOR_OVERLAP', 0)
+    set_partner(odoo, 2, '2024-05-01 09:00:00')
+    set_partner(odoo, 1, '2024-05-01 10:00:00')
+    rejected = {'create': [{'id': 0, 'error': {'code': 'internal', 'message': 'Erreur'}}, {'id': 5000}],
+                'update': []}
+    wc.batch_customers.side_effect = [rejected]
+    customers = CustomerSync(wc=wc, odoo=odoo)
+
+    assert customers.run_once()['failed'] == 1
+    assert sync_state.get_cursor('customers') == ['2024-05-01 10:00:00', 1]
+    assert sync_state.get_cursor('customers_retry') == {'2': 1}
+
+    # Refus passager : le partenaire, non modifié dans Odoo et antérieur au curseur, est renvoyé
+    wc.batch_customers.side_effect = [{'create': [{'id': 5001}], 'update': []}]
+    stats = customers.run_once()
+    assert (stats['created'], stats['failed']) == (1, 0)
+    assert wc.batch_customers.call_args.kwargs['creates'][0]['email'] == 'c2@example.com'
+    assert sync_state.get_cursor('customers_retry') is None
+
+    # Refus persistant : abandonné après CUSTOMER_MAX_ATTEMPTS envois
+    set_partner(odoo, 3, '2024-05-03 10:00:00')
+    error = {'create': [{'id': 0, 'error': {'code': 'internal', 'message': 'Erreur'}}], 'update': []}
+    wc.batch_customers.side_effect = lambda creates=(), updates=(): error
+    for attempts in (1, 2):
+        customers.run_once()
+        assert sync_state.get_cursor('customers_retry') == {'3': attempts}
+    customers.run_once()
+    assert sync_state.get_cursor('customers_retry') is None
+
+
+def test_partner_edited_during_the_scan_does_not_hide_the_next_one(state, odoo, wc, monkeypatch):
+    for i in range(1, 6):
+        set_partner(odoo, i, '2024-05-01 10:00:00')
+    search_read = odoo.search_read
+
+    def search_read_during_edits(model, domain, fields, **kwargs):
+        records = search_read(model, domain, fields, **kwargs)
+        if len(odoo.reads) == 1:
+            # Partenaire déjà lu, de nouveau modifié entre deux pages : passe en fin de parcours
+            set_partner(odoo, 1, '2024-05-01 10:00:30', street='2 avenue Foch')
+        return records
+
+    monkeypatch.setattr(odoo, 'search_read', search_read_during_edits)
+    customers = CustomerSync(wc=wc, odoo=odoo, page_size=2)
+
+    assert customers.run_once()['created'] == 5
+    sent = [customer['email'] for call in wc.batch_customers.call_args_list for customer in call.kwargs['creates']]
+    assert sorted(sent) == [f'c{i}@example.com' for i in range(1, 6)]
+    assert sync_state.get_cursor('customers') == ['2024-05-01 10:00:30', 1]
+
+
+def test_partner_written_by_odoo_client_is_remembered(state, monkeypatch):
+    import xmlrpc.client
+    from unittest.mock import MagicMock
+    from core.odoo_client import OdooClient
+
+    proxy = MagicMock()
+    proxy.authenticate.return_value = 1
+    proxy.execute_kw.return_value = 7
+    monkeypatch.setattr(xmlrpc.client, 'ServerProxy', lambda url: proxy)
+    database.init_db()
+    odoo = OdooClient(on_partner_written=remember_partner)
+
+    assert odoo.create_customer({'name': 'Client 7', 'email': 'c7@example.com'}, wc_id=42) == 7
+    assert database.get_wc_customers([7])[7][0] == 42
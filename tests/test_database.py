@@ -25,3 +25,21 @@ def test_db_sync_order():
             c.execute('SELECT COUNT(*) FROM synced_orders WHERE order_id = ?', (order_id,))
             count = c.fetchone()[0]
             assert count == 1
+
+def test_pending_orders_track_oldest_unsynced():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database.DB_PATH = os.path.join(tmpdir, 'test_sync_local.db')
+        database.init_db()
+        assert database.get_oldest_pending_created_at() is None
+        database.record_pending_order(1, 2000.0, "Erreur Odoo")
+        database.record_pending_order(2, 1000.0, "Erreur Odoo")
+        database.record_pending_order(2, None, "Nouvelle erreur")
+        assert database.get_oldest_pending_created_at() == 1000.0
+        with sqlite3.connect(database.DB_PATH) as conn:
+            attempts, error = conn.execute(
+                'SELECT attempts, last_error FROM pending_orders WHERE order_id = ?', ('2',)
+            ).fetchone()
+        assert (attempts, error) == (2, "Nouvelle erreur")
+        # Une commande synchronisée n'est plus en attente
+        database.mark_order_as_synced_db(2)
+        assert database.get_oldest_pending_created_at() == 2000.0
@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from core.health import HealthProber
+from utils import database, sync_state
+
+
+def _state(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'sync_local.db'))
+    monkeypatch.setattr(sync_state, 'SYNC_FILE', str(tmp_path / 'last_synced_at.txt'))
+    database.init_db()
+    database.record_pending_order(1, time.time() - 600, "Odoo indisponible")
+    database.record_pending_order(2, None, "Odoo indisponible")
+    sync_state.set_last_synced_at()
+
+
+def test_refresh_reports_local_state_and_upstream_rtt(tmp_path, monkeypatch):
+    _state(tmp_path, monkeypatch)
+
+    def odoo_down(timeout):
+        raise ConnectionError("connexion refusée")
+
+    prober = HealthProber({'woocommerce': lambda timeout: time.sleep(0.01), 'odoo': odoo_down})
+    prober.refresh()
+    report = prober.report()
+
+    assert report['status'] == 'degraded'
+    assert report['sync']['retry_backlog'] == 2
+    assert 590 <= report['sync']['oldest_retry_age_s'] < 700
+    assert report['sync']['cursor_lag_s'] < 60 and report['sync']['last_success_at']
+    assert report['upstreams']['woocommerce']['reachable']
+    assert report['upstreams']['woocommerce']['rtt_ms'] >= 10
+    assert report['upstreams']['odoo'] == {'reachable': False, 'rtt_ms': None, 'error': 'connexion refusée'}
+
+
+def test_slow_upstream_is_bounded_by_timeout(tmp_path, monkeypatch):
+    _state(tmp_path, monkeypatch)
+    prober = HealthProber({'odoo': lambda timeout: time.sleep(5)}, timeout=0.1)
+    start = time.perf_counter()
+    report = prober.refresh()
+    assert time.perf_counter() - start < 2
+    assert report['upstreams']['odoo']['reachable'] is False
+
+
+def test_deep_endpoint_serves_cache_without_probing(tmp_path, monkeypatch):
+    import healthcheck
+
+    _state(tmp_path, monkeypatch)
+    calls = []
+    prober = HealthProber({'woocommerce': calls.append}, interval=3600)
+    client = healthcheck.create_app(prober).test_client()
+    deadline = time.time() + 5
+    while prober._report is None and time.time() < deadline:
+        time.sleep(0.01)
+
+    for _ in range(20):
+        response = client.get('/health/deep')
+    prober.stop(timeout=1)
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ok'
+    assert len(calls) == 1
+
+    # Relevé périmé (thread arrêté) : le répartiteur de charge doit l'apprendre
+    prober._report['checked_at'] -= 4 * 3600
+    assert client.get('/health/deep').status_code == 503
+
+
+def test_woocommerce_5xx_is_unreachable(monkeypatch):
+    import requests
+    from core import health
+
+    def get(url, timeout):
+        response = requests.models.Response()
+        response.status_code = status
+        response.url = url
+        return response
+
+    monkeypatch.setattr(requests, 'get', get)
+    prober = HealthProber({'woocommerce': health.probe_woocommerce})
+    # Requête non authentifiée : 401 prouve que l'API répond
+    status = 401
+    assert prober.refresh()['upstreams']['woocommerce']['reachable']
+    status = 502
+    upstream = prober.refresh()['upstreams']['woocommerce']
+    assert not upstream['reachable'] and '502' in upstream['error']
+
+
+def test_each_store_is_reported(state):
+    from config.stores import Store
+    from utils.store_context import use_store
+
+    stores = [Store(name=name, wc_api_url='https://example.com', consumer_key='ck', consumer_secret='cs')
+              for name in ('shop_a', 'shop_b')]
+    with use_store('shop_a'):
+        database.init_db()
+        sync_state.set_last_synced_at()
+    with use_store('shop_b'):
+        database.init_db()
+        database.record_pending_order(7, time.time() - 60, "Odoo indisponible")
+        # Boutique bloquée depuis deux jours
+        sync_state.set_last_synced_at((datetime.now() - timedelta(days=2)).isoformat())
+
+    prober = HealthProber({}, stores=stores)
+    prober.refresh()
+    report = prober.report()
+
+    assert 'sync' not in report and sorted(report['stores']) == ['shop_a', 'shop_b']
+    assert report['stores']['shop_a']['cursor_lag_s'] < 60
+    assert report['stores']['shop_b']['cursor_lag_s'] > 86400
+    assert report['stores']['shop_b']['retry_backlog'] == 1
+    assert report['status'] == 'degraded'
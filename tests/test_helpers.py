@@ -4,3 +4,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Ancien test helpers supprimé car la gestion par fichier texte n’est plus utilisée.
 # Les tests pertinents sont dans test_database.py (gestion SQLite) et test_audit.py (audit CSV).
+
+from utils.helpers import wc_gmt_timestamp
+
+def test_wc_gmt_timestamp():
+    assert wc_gmt_timestamp('1970-01-01T00:01:40') == 100.0
+    assert wc_gmt_timestamp(None) is None
+    assert wc_gmt_timestamp('pas une date') is None
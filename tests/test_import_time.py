@@ -0,0 +1,49 @@
+import sys
+import os
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Budget d'import de core.sync_manager (ms), ajustable sur une machine lente
+IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', 200))
+
+# Modules chargés seulement au premier appel d'API ou au premier lot réconcilié
+LAZY_MODULES = ('woocommerce', 'requests', 'tenacity', 'ratelimit', 'xmlrpc.client', 'numpy')
+
+
+def _importtime(module, env=None):
+    """Exécute ``python -X importtime -c 'import module'`` et retourne {module: cumul en µs}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, env=env, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_sync_manager_import_defers_heavy_modules():
+    timings = _importtime('core.sync_manager')
+    assert 'core.sync_manager' in timings
+    assert [name for name in LAZY_MODULES if name in timings] == []
+
+
+def test_sync_manager_import_time_budget():
+    best = min(_importtime('core.sync_manager')['core.sync_manager'] for _ in range(3))
+    assert best / 1000 < IMPORT_TIME_BUDGET_MS
+
+
+def test_settings_import_does_not_validate():
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith(('WC_', 'ODOO_'))}
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    # Un .env local fournirait les variables : seul l'import est vérifié ici
+    subprocess.run(
+        [sys.executable, '-c', 'import config.settings'], cwd=ROOT, env=env, check=True,
+        capture_output=True,
+    )
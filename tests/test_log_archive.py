@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import log_archive
+
+BLOCK = 4096
+
+
+def _write(path, text, mode='w'):
+    with open(path, mode) as f:
+        f.write(text)
+
+
+def _blocks(archive_dir):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(archive_dir, 'blocks')))
+
+
+def test_unchanged_and_appended_logs_store_only_new_data(tmp_path):
+    logs, archive = tmp_path / 'logs', str(tmp_path / 'archive')
+    logs.mkdir()
+    _write(logs / 'sync.log', 'ligne de log\n' * 2000)
+    _write(logs / 'errors.log', 'erreur\n' * 10)
+    first = log_archive.archive_logs(str(logs), archive, BLOCK)
+    assert first['files'] == 2 and first['new_blocks'] > 1
+
+    unchanged = log_archive.archive_logs(str(logs), archive, BLOCK)
+    assert unchanged['read_bytes'] == 0 and unchanged['new_blocks'] == 0
+
+    _write(logs / 'sync.log', 'nouvelle ligne\n' * 10, 'a')
+    appended = log_archive.archive_logs(str(logs), archive, BLOCK)
+    assert appended['read_bytes'] < 2 * BLOCK
+    assert appended['new_blocks'] <= 2
+
+
+def test_rotated_log_is_not_read_again(tmp_path):
+    logs, archive = tmp_path / 'logs', str(tmp_path / 'archive')
+    logs.mkdir()
+    _write(logs / 'sync.log', 'ligne de log\n' * 2000)
+    log_archive.archive_logs(str(logs), archive, BLOCK)
+    os.rename(logs / 'sync.log', logs / 'sync.log.1')
+    _write(logs / 'sync.log', '')
+
+    rotated = log_archive.archive_logs(str(logs), archive, BLOCK)
+    assert rotated['read_bytes'] == 0 and rotated['new_blocks'] == 0
+
+
+def test_restore_rebuilds_each_backup(tmp_path):
+    logs, archive = tmp_path / 'logs', str(tmp_path / 'archive')
+    (logs / 'sub').mkdir(parents=True)
+    _write(logs / 'sync.log', 'ligne de log\n' * 1000)
+    _write(logs / 'sub' / 'audit.log', '')
+    first = log_archive.archive_logs(str(logs), archive, BLOCK)
+    _write(logs / 'sync.log', 'suite\n' * 500, 'a')
+    log_archive.archive_logs(str(logs), archive, BLOCK)
+
+    target = tmp_path / 'restored'
+    assert log_archive.restore_logs(first['manifest'], str(target), archive) == 2
+    assert (target / 'sync.log').read_text() == 'ligne de log\n' * 1000
+    assert (target / 'sub' / 'audit.log').read_text() == ''
+
+
+def test_prune_removes_unreferenced_blocks(tmp_path):
+    logs, archive = tmp_path / 'logs', str(tmp_path / 'archive')
+    logs.mkdir()
+    for day in range(3):
+        _write(logs / 'sync.log', f'jour {day}\n' * 2000)
+        log_archive.archive_logs(str(logs), archive, BLOCK)
+    total = _blocks(archive)
+
+    manifests, blocks = log_archive.prune(archive, keep=1)
+    assert manifests == 2 and blocks > 0
+    assert _blocks(archive) == total - blocks
+    latest = os.listdir(os.path.join(archive, 'manifests'))[0]
+    log_archive.restore_logs(latest, str(tmp_path / 'restored'), archive)
+    assert (tmp_path / 'restored' / 'sync.log').read_text() == 'jour 2\n' * 2000
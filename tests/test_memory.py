@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import memory
+from utils.memory import MemoryGuard
+
+def test_rss_bytes_is_positive():
+    assert memory.rss_bytes() > 0
+
+def test_batch_size_shrinks_over_budget_and_recovers(monkeypatch):
+    rss = {'value': 200 * 1048576}
+    monkeypatch.setattr(memory, 'rss_bytes', lambda: rss['value'])
+    guard = MemoryGuard(budget_mb=100, min_batch=10, trace=False)
+
+    assert guard.batch_size(100) == 50
+    assert guard.batch_size(100) == 25
+    assert guard.batch_size(100) == 12
+    assert guard.batch_size(100) == 10
+    assert guard.batch_size(100) == 10
+
+    # Entre 80 % et 100 % du budget : taille inchangée
+    rss['value'] = 90 * 1048576
+    assert guard.batch_size(100) == 10
+
+    rss['value'] = 50 * 1048576
+    sizes = [guard.batch_size(100) for _ in range(5)]
+    assert sizes[-1] == 100
+
+def test_no_budget_keeps_requested_size(monkeypatch):
+    monkeypatch.setattr(memory, 'rss_bytes', lambda: 10 ** 12)
+    assert MemoryGuard(budget_mb=0, trace=False).batch_size(100) == 100
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prometheus_client import REGISTRY
+from utils.metrics import (
+    time_stage, record_order_outcome, observe_api_call, count_retry
+)
+
+def _value(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_stage_and_outcome_metrics():
+    before = _value('sync_stage_duration_seconds_count', {'stage': 'validate'})
+    with time_stage('validate'):
+        pass
+    assert _value('sync_stage_duration_seconds_count', {'stage': 'validate'}) == before + 1
+
+    before = _value('orders_processed_total', {'outcome': 'error'})
+    record_order_outcome('error')
+    assert _value('orders_processed_total', {'outcome': 'error'}) == before + 1
+
+def test_api_metrics_count_throttling_and_retries():
+    before = _value('api_throttled_total', {'api': 'woocommerce'})
+    observe_api_call('woocommerce', 'orders', 'GET', 0.2, status_code=429)
+    assert _value('api_throttled_total', {'api': 'woocommerce'}) == before + 1
+
+    before = _value('api_retries_total', {'api': 'odoo', 'endpoint': 'sale.order/create'})
+    count_retry('odoo', 'sale.order/create')(None)
+    assert _value('api_retries_total', {'api': 'odoo', 'endpoint': 'sale.order/create'}) == before + 1
+
+def test_archive_keeps_samples_of_exited_processes(tmp_path, monkeypatch):
+    from prometheus_client.mmap_dict import MmapedDict, mmap_key
+    import utils.metrics as metrics
+
+    monkeypatch.setattr(metrics, 'MULTIPROC_DIR', str(tmp_path))
+    key = mmap_key('sync_success_total', 'sync_success_total', (), (), 'Nombre de synchronisations réussies')
+
+    # Deux exécutions courtes successives de la synchronisation
+    for identifier, value in (('host-101', 1.0), ('host-102', 2.0)):
+        values = MmapedDict(str(tmp_path / f'counter_{identifier}.db'))
+        values.write_value(key, value, 0)
+        values.close()
+        metrics.archive_process_metrics(identifier)
+
+    assert sorted(p.name for p in tmp_path.glob('*.db')) == ['counter_archive.db']
+    registry = metrics.aggregated_registry()
+    assert registry.get_sample_value('sync_success_total') == 3.0
+
+def test_render_metrics_exposes_prometheus_text(tmp_path, monkeypatch):
+    import utils.metrics as metrics
+
+    monkeypatch.setattr(metrics, 'MULTIPROC_DIR', str(tmp_path))
+    output, content_type = metrics.render_metrics()
+    assert content_type.startswith('text/plain')
+    assert isinstance(output, bytes)
+
+def test_order_freshness_and_oldest_unsynced_age():
+    from utils.metrics import observe_order_freshness, set_oldest_unsynced_age
+
+    before = _value('order_sync_freshness_seconds_count', {'trigger': 'webhook'})
+    observe_order_freshness('webhook', 1000.0, synced_at=1012.5)
+    observe_order_freshness('webhook', None)
+    assert _value('order_sync_freshness_seconds_count', {'trigger': 'webhook'}) == before + 1
+
+    set_oldest_unsynced_age(1000.0, now=1600.0)
+    assert REGISTRY.get_sample_value('order_oldest_unsynced_age_seconds') == 600.0
+    set_oldest_unsynced_age(None)
+    assert REGISTRY.get_sample_value('order_oldest_unsynced_age_seconds') == 0
+
+def test_import_has_no_side_effects_until_init_metrics(tmp_path, monkeypatch):
+    import subprocess
+    import utils.metrics as metrics
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    env = {k: v for k, v in os.environ.items() if k != 'PROMETHEUS_MULTIPROC_DIR'}
+    code = (
+        "import os, sys\n"
+        "from prometheus_client import values\n"
+        "import utils.metrics as metrics\n"
+        "assert 'PROMETHEUS_MULTIPROC_DIR' not in os.environ\n"
+        "assert values.ValueClass is values.MutexValue\n"
+        "os.environ['PROMETHEUS_MULTIPROC_DIR'] = sys.argv[1]\n"
+        "metrics.init_metrics()\n"
+        "metrics.sync_success_counter.inc()\n"
+        "metrics.record_order_outcome('success')\n"
+    )
+    subprocess.run([sys.executable, '-c', code, str(tmp_path)], cwd=root, env=env, check=True)
+
+    # Les échantillons du processus terminé sont archivés dans le dossier partagé
+    assert 'counter_archive.db' in {p.name for p in tmp_path.glob('*.db')}
+    assert all(p.name.endswith('_archive.db') for p in tmp_path.glob('*.db'))
+    monkeypatch.setattr(metrics, 'MULTIPROC_DIR', str(tmp_path))
+    registry = metrics.aggregated_registry()
+    assert registry.get_sample_value('sync_success_total') == 1.0
+    assert registry.get_sample_value('orders_processed_total', {'outcome': 'success'}) == 1.0
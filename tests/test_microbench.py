@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from microbench import case_thresholds, compare, measure
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {'a[1]': 100.0, 'b[1]': 100.0, 'c[1]': 100.0}
+    results = {'a[1]': 119.0, 'b[1]': 130.0, 'c[1]': 70.0, 'd[1]': 5.0}
+    statuses = {row[0]: row[4] for row in compare(results, baseline, 0.2)}
+    assert statuses == {'a[1]': 'ok', 'b[1]': 'regression', 'c[1]': 'improvement', 'd[1]': 'new'}
+
+
+def test_compare_applies_per_case_threshold_and_speed():
+    baseline = {'map_wc_order_to_odoo[1]': 100.0, 'db.mark_order_as_synced[100]': 100.0}
+    results = {'map_wc_order_to_odoo[1]': 150.0, 'db.mark_order_as_synced[100]': 150.0}
+    thresholds = case_thresholds(0.2)
+    statuses = {row[0]: row[4] for row in compare(results, baseline, thresholds)}
+    assert statuses == {'map_wc_order_to_odoo[1]': 'regression', 'db.mark_order_as_synced[100]': 'ok'}
+    # Machine deux fois plus lente que la référence : mesures ramenées de moitié
+    statuses = {row[0]: row[4] for row in compare(results, baseline, thresholds, speed=2.0)}
+    assert statuses['map_wc_order_to_odoo[1]'] == 'improvement'
+
+
+def test_measure_returns_time_per_call():
+    assert measure(lambda: None, repeat=2, min_time=0.001) > 0
@@ -0,0 +1,75 @@
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import monitoring
+
+
+def _line(message, level='ERROR', at=None):
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(at or time.time()))
+    return f"{stamp},123 - sync_woocommerce_odoo - {level} - [logging_utils.py:59] - {message}\n"
+
+
+def _append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_scanner_reads_only_new_complete_lines(tmp_path):
+    log, state = str(tmp_path / 'errors.log'), str(tmp_path / 'state.json')
+    _append(log, _line("Champs manquants dans la commande: customer_id") + _line("ok", level='INFO'))
+    _append(log, "Traceback (most recent call last):\n" + _line("Odoo indisponible")[:30])
+
+    scanner = monitoring.LogScanner(state)
+    assert scanner.scan(log) == {'validation': 1}
+    scanner.save()
+
+    # Fin de la ligne partielle puis une nouvelle erreur : seules elles sont lues
+    _append(log, _line("Odoo indisponible")[30:] + _line("Erreur lors de la synchronisation"))
+    scanner = monitoring.LogScanner(state)
+    offset = scanner.files[log]['offset']
+    assert scanner.scan(log) == {'odoo': 1, 'sync': 1}
+    assert scanner.files[log]['offset'] == os.path.getsize(log) > offset
+    assert scanner.totals() == {'validation': 1, 'odoo': 1, 'sync': 1}
+
+
+def test_scanner_follows_rotation_and_truncation(tmp_path):
+    log, state = str(tmp_path / 'errors.log'), str(tmp_path / 'state.json')
+    _append(log, _line("Odoo indisponible"))
+    scanner = monitoring.LogScanner(state)
+    scanner.scan(log)
+
+    # Rotation : l'ancien fichier a reçu une ligne de plus avant d'être renommé
+    _append(log, _line("Odoo indisponible"))
+    os.rename(log, log + '.1')
+    _append(log, _line("Données de commande invalides"))
+    assert scanner.scan(log) == {'odoo': 1, 'validation': 1}
+
+    # Troncature sur place
+    open(log, 'w').close()
+    _append(log, _line("webhook refusé"))
+    assert scanner.scan(log) == {'webhook': 1}
+
+
+def test_old_buckets_leave_the_window(tmp_path):
+    log, state = str(tmp_path / 'errors.log'), str(tmp_path / 'state.json')
+    _append(log, _line("Odoo indisponible", at=time.time() - 3 * 3600) + _line("Odoo indisponible"))
+    scanner = monitoring.LogScanner(state, bucket_seconds=300, window_hours=1)
+    scanner.scan(log)
+    assert scanner.totals() == {'odoo': 2}
+    scanner.expire()
+    assert scanner.totals() == {'odoo': 1}
+
+
+def test_count_errors_exports_metrics(tmp_path):
+    from prometheus_client import REGISTRY
+
+    log, state = str(tmp_path / 'errors.log'), str(tmp_path / 'state.json')
+    before = REGISTRY.get_sample_value('log_errors_total', {'category': 'odoo'}) or 0
+    _append(log, _line("Odoo indisponible") * 3)
+    assert monitoring.count_errors(log, state) == {'odoo': 3}
+    assert monitoring.count_errors(log, state) == {'odoo': 3}
+    assert REGISTRY.get_sample_value('log_errors_total', {'category': 'odoo'}) == before + 3
+    assert REGISTRY.get_sample_value('log_errors_window', {'category': 'odoo'}) == 3
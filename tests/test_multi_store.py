@@ -0,0 +1,181 @@
+import sys
+import os
+import json
+import threading
+from unittest.mock import MagicMock, patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from config.stores import Store, load_stores
+from core.multi_store import MultiStoreSync
+from core.resilience import FairScheduler, rate_limited_retry
+from utils import database, sync_state
+from utils.store_context import current_store, store_path, use_store
+
+
+def _store(name, **values):
+    return Store(name=name, wc_api_url=f'https://{name}.example.com/wp-json/wc/v3',
+                 consumer_key='ck', consumer_secret='cs', **values)
+
+
+def test_state_is_namespaced_per_store(state):
+    sync_state.set_last_synced_at('2024-05-01T00:00:00')
+    database.init_db()
+    with use_store('shop_a'):
+        assert sync_state.get_last_synced_at() is None
+        database.init_db()
+        database.mark_order_as_synced_db(42)
+        sync_state.set_cursor('stock', 'a')
+        assert database.is_order_already_synced_db(42)
+    # La même commande d'une autre boutique n'est pas considérée comme synchronisée
+    assert not database.is_order_already_synced_db(42)
+    assert sync_state.get_cursor('stock') is None
+    assert sync_state.get_last_synced_at() == '2024-05-01T00:00:00'
+    assert (state / 'sync_local.shop_a.db').exists()
+    assert (state / 'sync_cursors.stock.shop_a.json').exists()
+    assert store_path('/tmp/sync_audit.csv') == '/tmp/sync_audit.csv'
+
+
+def test_cursors_are_written_independently(state):
+    # Ancien fichier commun : relu tant que le curseur n'a pas son propre fichier
+    (state / 'sync_cursors.json').write_text(json.dumps({'stock': 'old', 'customers': 'c0'}))
+    threads = [threading.Thread(target=sync_state.set_cursor, args=(name, f'{name}-{i}'))
+               for i in range(20) for name in ('stock', 'order_status')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sync_state.get_cursor('stock').startswith('stock-')
+    assert sync_state.get_cursor('order_status').startswith('order_status-')
+    assert sync_state.get_cursor('customers') == 'c0'
+    assert sorted(p.name for p in state.glob('sync_cursors.*')) == [
+        'sync_cursors.json', 'sync_cursors.order_status.json', 'sync_cursors.stock.json']
+
+
+def test_load_stores(tmp_path, monkeypatch):
+    path = tmp_path / 'stores.json'
+    assert load_stores(str(path)) == []
+    monkeypatch.setenv('WC_CONSUMER_KEY_SHOP_BE', 'ck_be')
+    monkeypatch.setenv('WC_CONSUMER_SECRET_SHOP_BE', 'cs_be')
+    path.write_text(json.dumps([
+        {'name': 'shop_fr', 'wc_api_url': 'https://fr.example.com', 'consumer_key': 'ck', 'consumer_secret': 'cs',
+         'company_id': 1, 'pricelist_id': 2, 'weight': 2},
+        {'name': 'shop-be', 'wc_api_url': 'https://be.example.com', 'company_id': 3},
+    ]))
+    shop_fr, shop_be = load_stores(str(path))
+    assert shop_fr.odoo_order_defaults() == {'company_id': 1, 'pricelist_id': 2}
+    assert (shop_be.consumer_key, shop_be.consumer_secret) == ('ck_be', 'cs_be')
+    assert shop_be.odoo_order_defaults() == {'company_id': 3}
+
+    path.write_text(json.dumps([{'name': 'Shop FR', 'wc_api_url': 'x'}, {'name': 'shop_nl'}]))
+    with pytest.raises(EnvironmentError) as error:
+        load_stores(str(path))
+    assert 'Shop FR' in str(error.value) and 'shop_nl' in str(error.value)
+
+
+def test_fair_scheduler_shares_capacity_by_weight():
+    scheduler = FairScheduler(6000, weights={'big': 2})
+    grants, lock = [], threading.Lock()
+    b_started = threading.Event()
+
+    def worker(tenant, count):
+        for _ in range(count):
+            scheduler.acquire(tenant)
+            with lock:
+                grants.append(tenant)
+                if len(grants) == 5:
+                    b_started.set()
+
+    big = threading.Thread(target=worker, args=('big', 40))
+    big.start()
+    b_started.wait(5)
+    small = threading.Thread(target=worker, args=('small', 10))
+    small.start()
+    big.join(10)
+    small.join(10)
+
+    assert grants.count('small') == 10
+    # Boutiques simultanément en attente : deux créneaux pour « big », un pour « small »
+    first = grants.index('small')
+    window = grants[first:first + 15]
+    assert 4 <= window.count('small') <= 6
+
+
+def test_rate_budget_per_scope(monkeypatch):
+    import ratelimit
+
+    budgets = []
+    monkeypatch.setattr(ratelimit, 'limits', lambda calls, period: budgets.append(calls) or (lambda f: f))
+
+    class Client:
+        def __init__(self, scope, calls):
+            self.rate_scope = scope
+            self.calls = calls
+
+        def rate_budget(self, endpoint, default):
+            return self.calls if self.rate_scope else default
+
+        @rate_limited_retry("woocommerce", "orders", 80)
+        def get(self):
+            return self.rate_scope
+
+    assert Client('shop_a', 30).get() == 'shop_a'
+    assert Client('shop_b', 50).get() == 'shop_b'
+    assert Client('shop_a', 30).get() == 'shop_a'
+    assert Client(None, 0).get() is None
+    assert budgets == [30, 50, 80]
+
+
+def test_stores_sync_concurrently_in_their_own_namespace(state):
+    seen = {}
+    barrier = threading.Barrier(2, timeout=5)
+
+    def make_workers(store, scheduler):
+        sync = MagicMock()
+
+        def sync_orders(trigger):
+            # Les deux boutiques tournent en même temps
+            barrier.wait()
+            seen[store.name] = current_store.get()
+            sync_state.set_last_synced_at(f'{store.name}-cursor')
+            if store.name == 'shop_b':
+                raise RuntimeError("WooCommerce injoignable")
+
+        sync.sync_orders.side_effect = sync_orders
+        return sync, None
+
+    results = MultiStoreSync([_store('shop_a'), _store('shop_b')], make_workers=make_workers).run()
+
+    assert results == {'shop_a': None, 'shop_b': 'WooCommerce injoignable'}
+    assert seen == {'shop_a': 'shop_a', 'shop_b': 'shop_b'}
+    assert (state / 'last_synced_at.shop_a.txt').read_text() == 'shop_a-cursor'
+    assert not (state / 'last_synced_at.txt').exists()
+
+
+@patch('core.sync_manager.WooCommerceClient')
+@patch('core.sync_manager.OdooClient')
+def test_store_orders_get_company_and_fair_slot(mock_odoo_cls, mock_wc_cls, state):
+    mock_wc = MagicMock()
+    mock_wc.get_orders.return_value = [
+        {"id": 42, "customer_id": 1, "total": 20.0, "line_items": [
+            {"product_id": 1, "quantity": 2, "price": 10.0, "total": 20.0}
+        ]}
+    ]
+    mock_wc.last_total = 1
+    mock_wc_cls.return_value = mock_wc
+    mock_odoo_cls.return_value.create_order.return_value = 123
+    scheduler = MagicMock()
+    scheduler.acquire.return_value = 0.0
+    store = _store('shop_fr', company_id=2, pricelist_id=5)
+
+    from core.sync_manager import SyncManager
+    with use_store(store.name):
+        SyncManager(store=store, odoo_scheduler=scheduler).sync_orders()
+
+    mock_wc_cls.assert_called_once_with(store)
+    scheduler.acquire.assert_called_once_with('shop_fr')
+    data = mock_odoo_cls.return_value.create_order.call_args.args[0]
+    assert (data['company_id'], data['pricelist_id']) == (2, 5)
+    assert (state / 'sync_local.shop_fr.db').exists()
+    assert (state / 'sync_audit.shop_fr.csv').exists()
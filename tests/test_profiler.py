@@ -0,0 +1,31 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+from utils.profiler import SamplingProfiler, list_profiles
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="worker")
+    worker.start()
+    try:
+        profiler = SamplingProfiler(duration=0.2, interval=0.005)
+        profiler.run()
+    finally:
+        stop.set()
+        worker.join()
+
+    path = profiler.write(str(tmp_path))
+    lines = open(path).read().splitlines()
+    assert profiler.samples > 0
+    assert any(line.startswith("worker;") and "test_profiler:_busy_loop" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+    names = [name for name, _, _ in list_profiles(str(tmp_path))]
+    assert names == [os.path.basename(path)]
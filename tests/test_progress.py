@@ -0,0 +1,79 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from utils.progress import SyncProgress, read_progress
+
+
+def test_progress_reports_rate_and_eta(tmp_path):
+    path = str(tmp_path / 'progress.json')
+    progress = SyncProgress('backfill', 'run-1', path=path, interval=3600)
+    progress.started_at -= 10
+    progress.page(100, total=1000)
+    for outcome in ['success'] * 95 + ['ignored'] * 3 + ['error'] * 2:
+        progress.order(outcome)
+
+    snapshot = progress.snapshot(progress.started_at + 10)
+    assert (snapshot['pages'], snapshot['fetched'], snapshot['processed']) == (1, 100, 100)
+    assert (snapshot['success'], snapshot['ignored'], snapshot['errors']) == (95, 3, 2)
+    assert snapshot['orders_per_s'] == 10 and snapshot['eta_s'] == 90
+
+    # Publications limitées par l'intervalle : seule la première page a été écrite
+    assert read_progress(path)['processed'] == 0
+    progress.finish()
+    published = read_progress(path)
+    assert published['state'] == 'done' and published['processed'] == 100
+    assert published['eta_s'] is None
+
+
+def test_progress_stream_sends_published_progress(tmp_path):
+    import admin_dashboard
+
+    path = str(tmp_path / 'progress.json')
+    events = admin_dashboard.progress_events(path, poll=0.01, keepalive=0.05)
+    assert next(events).startswith('retry:')
+    assert next(events) == ': keepalive\n\n'
+
+    progress = SyncProgress('poll', 'run-2', path=path)
+    progress.finish(error=RuntimeError("Odoo indisponible"))
+    event = next(events)
+    assert event.startswith('event: progress\n')
+    data = json.loads(event.split('data: ', 1)[1])
+    assert (data['run_id'], data['state'], data['error']) == ('run-2', 'failed', 'Odoo indisponible')
+
+
+def test_progress_endpoint_is_an_event_stream(tmp_path, monkeypatch):
+    import admin_dashboard
+    from utils import progress
+
+    monkeypatch.setattr(progress, 'PROGRESS_FILE', str(tmp_path / 'progress.json'))
+    SyncProgress('webhook', 'run-3')
+    response = admin_dashboard.app.test_client().get('/sync/progress', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    next(chunks)
+    assert b'"run_id": "run-3"' in next(chunks)
+    response.close()
+
+
+def test_progress_stream_follows_every_store(tmp_path, monkeypatch):
+    import admin_dashboard
+    from config.stores import Store
+    from utils import progress
+    from utils.store_context import use_store
+
+    monkeypatch.setattr(progress, 'PROGRESS_FILE', str(tmp_path / 'sync_progress.json'))
+    stores = [Store(name=name, wc_api_url='https://example.com', consumer_key='ck', consumer_secret='cs')
+              for name in ('shop_a', 'shop_b')]
+    events = admin_dashboard.progress_events(poll=0.01, keepalive=0.05, stores=stores)
+    assert next(events).startswith('retry:')
+
+    for name in ('shop_a', 'shop_b'):
+        with use_store(name):
+            SyncProgress('poll', f'run-{name}').finish()
+    received = [json.loads(next(events).split('data: ', 1)[1]) for _ in range(2)]
+    assert sorted((data['store'], data['run_id']) for data in received) == [
+        ('shop_a', 'run-shop_a'), ('shop_b', 'run-shop_b')]
+    assert not (tmp_path / 'sync_progress.json').exists()
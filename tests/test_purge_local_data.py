@@ -0,0 +1,117 @@
+import sys
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import purge_local_data
+from utils import database
+
+
+def _fill(db_path, days_ago, start, count):
+    stamp = (datetime.utcnow() - timedelta(days=days_ago)).strftime('%Y-%m-%d %H:%M:%S')
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany('INSERT INTO synced_orders(order_id, synced_at) VALUES (?, ?)',
+                         ((str(i), stamp) for i in range(start, start + count)))
+        conn.executemany('INSERT INTO pending_orders(order_id, last_error, updated_at) VALUES (?, ?, ?)',
+                         ((f'p{i}', 'x' * 200, stamp) for i in range(start, start + count // 10)))
+
+
+def test_purge_keeps_recent_rows_and_releases_space(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'sync_local.db')
+    monkeypatch.setattr(database, 'DB_PATH', db_path)
+    database.init_db()
+    _fill(db_path, 200, 0, 5000)
+    _fill(db_path, 1, 5000, 100)
+    with sqlite3.connect(db_path) as conn:
+        pages_before = conn.execute('PRAGMA page_count').fetchone()[0]
+
+    result = purge_local_data.purge_older_than(90, db_path, str(tmp_path / 'absent.csv'))
+
+    assert result['synced_orders'] == 5000 and result['pending_orders'] == 500
+    assert result['freed_pages'] > 0 and result['audit'] == 0
+    assert database.is_order_already_synced_db(5000)
+    assert not database.is_order_already_synced_db(0)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('PRAGMA page_count').fetchone()[0] < pages_before
+        assert conn.execute('PRAGMA freelist_count').fetchone()[0] == 0
+
+
+def test_purge_deletes_in_batches(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'sync_local.db')
+    monkeypatch.setattr(database, 'DB_PATH', db_path)
+    database.init_db()
+    _fill(db_path, 200, 0, 1050)
+    sleeps = []
+    monkeypatch.setattr(purge_local_data.time, 'sleep', sleeps.append)
+
+    deleted = purge_local_data.purge_old_rows(
+        db_path, datetime.utcnow() - timedelta(days=90), batch_size=100, pause=0.01
+    )
+    assert deleted == {'synced_orders': 1050, 'pending_orders': 105, 'order_status': 0}
+    # Une pause entre chaque lot complet : 10 pour synced_orders, 1 pour pending_orders
+    assert len(sleeps) == 11
+
+
+def test_purge_audit_keeps_recent_entries(tmp_path):
+    audit = tmp_path / 'sync_audit.csv'
+    old = (datetime.now() - timedelta(days=100)).isoformat()
+    recent = (datetime.now() - timedelta(days=1)).isoformat()
+    audit.write_text(f'{old},1,success,Synchronisation OK\n{old},2,error,"Erreur\nmultiligne"\n'
+                     f'{recent},3,success,Synchronisation OK\n')
+
+    assert purge_local_data.purge_audit(str(audit), datetime.now() - timedelta(days=90)) == 2
+    assert audit.read_text() == f'{recent},3,success,Synchronisation OK\n'
+    assert purge_local_data.purge_audit(str(audit), datetime.now() - timedelta(days=90)) == 0
+
+
+def test_purge_audit_keeps_entries_written_during_rewrite(tmp_path, monkeypatch):
+    from utils import helpers
+
+    audit = tmp_path / 'sync_audit.csv'
+    monkeypatch.setattr(helpers, 'AUDIT_LOG', str(audit))
+    old = (datetime.now() - timedelta(days=100)).isoformat()
+    audit.write_text(f'{old},1,success,Synchronisation OK\n')
+    writer = []
+    real_replace = os.replace
+
+    def replace(src, dst):
+        # Une synchronisation journalise pendant la réécriture : elle attend la substitution
+        thread = threading.Thread(target=helpers.log_audit, args=(2, 'success', 'Synchronisation OK'))
+        thread.start()
+        writer.append(thread)
+        thread.join(0.2)
+        assert thread.is_alive()
+        real_replace(src, dst)
+
+    monkeypatch.setattr(purge_local_data.os, 'replace', replace)
+    assert purge_local_data.purge_audit(str(audit), datetime.now() - timedelta(days=90)) == 1
+    writer[0].join(5)
+    lines = audit.read_text().splitlines()
+    assert len(lines) == 1 and lines[0].split(',')[1:] == ['2', 'success', 'Synchronisation OK']
+
+
+def test_purge_covers_every_store(tmp_path, monkeypatch):
+    from config.stores import Store
+    from utils.store_context import store_path, use_store
+
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'sync_local.db'))
+    monkeypatch.setattr(purge_local_data, 'DB_PATH', str(tmp_path / 'sync_local.db'))
+    monkeypatch.setattr(purge_local_data, 'AUDIT_PATH', str(tmp_path / 'sync_audit.csv'))
+    stores = [Store(name=name, wc_api_url='https://example.com', consumer_key='ck', consumer_secret='cs')
+              for name in ('shop_a', 'shop_b')]
+    old = (datetime.now() - timedelta(days=100)).isoformat()
+    for count, store in enumerate(stores, 1):
+        with use_store(store.name):
+            database.init_db()
+            _fill(store_path(database.DB_PATH), 200, 0, 10 * count)
+            with open(store_path(str(tmp_path / 'sync_audit.csv')), 'w') as audit:
+                audit.write(f'{old},1,success,Synchronisation OK\n')
+
+    results = purge_local_data.purge_stores_older_than(90, stores)
+
+    assert {name: result['synced_orders'] for name, result in results.items()} == {'shop_a': 10, 'shop_b': 20}
+    assert results['shop_b']['audit'] == 1
+    assert not (tmp_path / 'sync_local.db').exists()
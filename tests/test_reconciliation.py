@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from core import reconciliation
+from core.reconciliation import reconcile_amounts, to_cents
+
+ORDERS = [
+    # Commande cohérente avec taxes et frais de port
+    {"id": 1, "total": "27.00", "total_tax": "4.50", "shipping_total": "2.50", "shipping_tax": "0.50",
+     "line_items": [{"total": "10.00", "total_tax": "2.00"}, {"total": "10.00", "total_tax": "2.00"}],
+     "shipping_lines": [{"total": "2.50"}]},
+    # Total incohérent
+    {"id": 2, "total": "30.00", "line_items": [{"total": "20.00"}]},
+    # Frais de port incohérents avec les lignes de port
+    {"id": 3, "total": "25.00", "shipping_total": "5.00",
+     "line_items": [{"total": "20.00"}], "shipping_lines": [{"total": "4.00"}]},
+    # Montant de ligne illisible
+    {"id": 4, "total": "10.00", "line_items": [{"total": "dix"}]},
+    # Commande sans ligne
+    {"id": 5, "total": "0", "line_items": []},
+]
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(reconciliation, "np", None)
+    return request.param
+
+def test_to_cents():
+    assert to_cents("19.99") == 1999
+    assert to_cents(0.1 + 0.2) == 30
+    assert to_cents(None) == 0
+    with pytest.raises(ValueError):
+        to_cents("abc")
+
+def test_reconcile_amounts(backend):
+    result = reconcile_amounts(ORDERS)
+    assert result.failing_order_ids == [2, 3, 4]
+    assert result.mismatches == [1, 2]
+    assert result.invalid == [3]
+    assert result.total_diff[1] == 1000
+    assert result.shipping_diff[2] == 100
+    assert result.message(3) == "Montants de ligne invalides"
+
+def test_reconcile_rejects_boolean_amounts(backend):
+    orders = [
+        {"id": 6, "total": "1.00", "line_items": [{"total": True}]},
+        {"id": 7, "total": False, "line_items": []},
+        ORDERS[0],
+    ]
+    result = reconcile_amounts(orders)
+    assert result.invalid == [0, 1]
+    assert result.failing_order_ids == [6, 7]
+
+def test_reconcile_empty_batch(backend):
+    assert reconcile_amounts([]).failing_order_ids == []
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.fingerprint import order_fingerprint
+from core.models.order import map_wc_order_to_odoo
+from core.models.records import OrderRecord, WC_ORDER_FIELDS
+from core.transformers.order_transformer import OrderTransformer
+from core.validator import validate_order, validate_orders
+
+WC_ORDER = {
+    'id': 12,
+    'status': 'processing',
+    'customer_id': 4,
+    'date_created': '2024-03-01T09:00:00',
+    'total': '15.00',
+    'shipping_total': '5.00',
+    'line_items': [{'product_id': 8, 'name': 'Tasse', 'quantity': 2, 'price': '5.00',
+                    'total': '10.00', 'meta_data': [{'key': 'couleur', 'value': 'bleu'}]}],
+    'shipping_lines': [{'method_id': 'flat_rate', 'total': '5.00'}],
+    'meta_data': [{'key': '_wc_order_attribution', 'value': 'x' * 200}],
+    '_links': {'self': [{'href': 'https://shop.example.com/wp-json/wc/v3/orders/12'}]},
+}
+
+def test_order_record_is_a_drop_in_for_the_sync_path():
+    record = OrderRecord.from_wc(WC_ORDER)
+    assert record['id'] == 12
+    assert record.get('missing', 'defaut') == 'defaut'
+    assert validate_order(record) is True
+    assert validate_orders([record]) == [[]]
+    assert map_wc_order_to_odoo(record) == map_wc_order_to_odoo(WC_ORDER)
+    transformer = OrderTransformer()
+    assert transformer.transform_many([record]) == transformer.transform_many([WC_ORDER])
+    assert order_fingerprint(record) == order_fingerprint(WC_ORDER)
+
+def test_order_record_drops_unused_fields():
+    record = OrderRecord.from_wc(WC_ORDER)
+    assert not hasattr(record, '__dict__')
+    assert 'meta_data' not in record.to_dict()
+    assert 'meta_data' not in WC_ORDER_FIELDS.split(',')
+    assert record.to_dict()['line_items'][0]['name'] == 'Tasse'
@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.status_writeback import StatusWriteBack, odoo_status
+from utils import database, sync_state
+
+
+def set_order(odoo, odoo_id, write_date, state='draft', invoice_status='no', effective_date=False):
+    odoo.write('sale.order', odoo_id, name=f'S{odoo_id:05d}', state=state, invoice_status=invoice_status,
+               effective_date=effective_date, write_date=write_date)
+
+
+def _sent(wc):
+    return [update for call in wc.batch_update_orders.call_args_list for update in call.args[0]]
+
+
+def test_odoo_status():
+    assert odoo_status({'state': 'draft'}) == 'created'
+    assert odoo_status({'state': 'sale', 'effective_date': False}) == 'confirmed'
+    assert odoo_status({'state': 'sale', 'effective_date': '2024-05-02'}) == 'delivered'
+    assert odoo_status({'state': 'done', 'effective_date': '2024-05-02', 'invoice_status': 'invoiced'}) == 'invoiced'
+    # Facturée d'avance mais pas encore livrée : la commande reste confirmée
+    assert odoo_status({'state': 'sale', 'invoice_status': 'invoiced'}) == 'confirmed'
+    assert odoo_status({'state': 'cancel'}) == 'cancelled'
+
+
+def test_statuses_are_sent_in_batches_once(state, odoo, wc):
+    database.init_db()
+    for i in range(1, 251):
+        database.mark_order_as_synced_db(1000 + i, i)
+        set_order(odoo, i, '2024-05-01 10:00:00', state='sale')
+    writeback = StatusWriteBack(wc=wc, odoo=odoo)
+
+    assert writeback.run_once() == {'updated': 250, 'failed': 0}
+    assert [len(call.args[0]) for call in wc.batch_update_orders.call_args_list] == [100, 100, 50]
+    first = _sent(wc)[0]
+    assert first == {'id': 1001, 'meta_data': [{'key': 'odoo_order_ref', 'value': 'S00001'},
+                                               {'key': 'odoo_status', 'value': 'confirmed'}]}
+    assert sync_state.get_cursor('order_status') == ['2024-05-01 10:00:00', 250]
+
+    # Sans changement dans Odoo : aucun appel WooCommerce
+    wc.batch_update_orders.reset_mock()
+    assert writeback.run_once() == {'updated': 0, 'failed': 0}
+    wc.batch_update_orders.assert_not_called()
+
+    # Livraison d'une commande : seul son statut est renvoyé
+    set_order(odoo, 7, '2024-05-01 12:00:00', state='sale', effective_date='2024-05-01')
+    writeback.run_once()
+    assert _sent(wc) == [{'id': 1007, 'status': 'completed', 'meta_data': [
+        {'key': 'odoo_order_ref', 'value': 'S00007'}, {'key': 'odoo_status', 'value': 'delivered'}]}]
+
+    # Relevé suivant : seules les commandes modifiées depuis le curseur (recouvrement compris) sont lues
+    odoo.reads.clear()
+    writeback.poll()
+    assert odoo.reads == [('sale.order', 1)]
+
+
+def test_refused_statuses_are_retried(state, odoo, wc):
+    database.init_db()
+    for i in (1, 2):
+        database.mark_order_as_synced_db(1000 + i, i)
+        set_order(odoo, i, '2024-05-01 10:00:00', state='cancel')
+    wc.batch_update_orders.side_effect = [
+        [{'id': 1001}, {'id': 1002, 'error': {'code': 'woocommerce_rest_shop_order_invalid_id',
+                                               'message': 'ID invalide.'}}],
+        [{'id': 1002}],
+    ]
+    writeback = StatusWriteBack(wc=wc, odoo=odoo)
+
+    assert writeback.run_once() == {'updated': 1, 'failed': 1}
+    assert writeback.run_once() == {'updated': 1, 'failed': 0}
+    assert [update['id'] for update in wc.batch_update_orders.call_args_list[1].args[0]] == [1002]
+    assert database.get_unsent_order_statuses() == []
+
+
+def test_request_failure_keeps_statuses_unsent(state, odoo, wc):
+    database.init_db()
+    database.mark_order_as_synced_db(1001, 1)
+    set_order(odoo, 1, '2024-05-01 10:00:00', state='sale')
+    wc.batch_update_orders.side_effect = Exception("503")
+    writeback = StatusWriteBack(wc=wc, odoo=odoo)
+
+    assert writeback.run_once() == {'updated': 0, 'failed': 1}
+    assert database.get_unsent_order_statuses() == [('1001', 'S00001', 'confirmed')]
+
+
+def test_order_modified_during_the_scan_is_not_skipped(state, odoo, wc, monkeypatch):
+    monkeypatch.setattr('core.status_writeback._READ_LIMIT', 2)
+    database.init_db()
+    for i in range(1, 6):
+        database.mark_order_as_synced_db(1000 + i, i)
+        set_order(odoo, i, '2024-05-01 10:00:00')
+    writeback = StatusWriteBack(wc=wc, odoo=odoo)
+    writeback.run_once()
+    for i in range(1, 6):
+        set_order(odoo, i, '2024-05-01 11:00:00', state='sale')
+    search_read = odoo.search_read
+
+    def search_read_during_writes(model, domain, fields, **kwargs):
+        records = search_read(model, domain, fields, **kwargs)
+        if len(odoo.reads) == 1:
+            # Commande 1, déjà lue, de nouveau modifiée entre deux pages : passe en fin de parcours
+            set_order(odoo, 1, '2024-05-01 11:00:05', state='sale', effective_date='2024-05-01')
+        return records
+
+    monkeypatch.setattr(odoo, 'search_read', search_read_during_writes)
+    odoo.reads.clear()
+    assert writeback.poll() == 5
+    assert {order_id: status for order_id, _, status in database.get_unsent_order_statuses()} == {
+        '1001': 'delivered', '1002': 'confirmed', '1003': 'confirmed', '1004': 'confirmed', '1005': 'confirmed'}
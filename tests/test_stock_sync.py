@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.stock_sync import StockSync
+from utils import database, sync_state
+
+
+def set_stock(odoo, product_id, sku, quantity, write_date):
+    odoo.write('product.product', product_id, default_code=sku, free_qty=quantity, write_date=write_date)
+    odoo.write('stock.quant', product_id, product_id=[product_id, sku], write_date=write_date)
+
+
+def _with_catalog(wc, catalog):
+    wc.get_products_by_sku.side_effect = lambda skus: [catalog[sku] for sku in skus if sku in catalog]
+    return wc
+
+
+def test_changes_are_coalesced_per_sku_and_sent_in_batches(state, odoo, wc):
+    catalog = {f'SKU{i}': {'id': 1000 + i, 'sku': f'SKU{i}', 'parent_id': 0, 'type': 'simple'}
+               for i in range(250)}
+    catalog['TSHIRT-M'] = {'id': 77, 'sku': 'TSHIRT-M', 'parent_id': 70, 'type': 'variation'}
+    for i in range(250):
+        set_stock(odoo, i, f'SKU{i}', 10, '2024-05-01 10:00:00')
+    set_stock(odoo, 500, 'TSHIRT-M', 4.0, '2024-05-01 10:00:00')
+    wc = _with_catalog(wc, catalog)
+    stock = StockSync(wc=wc, odoo=odoo, window=10)
+
+    stock.poll(now=0)
+    # Trois ventes successives pendant la fenêtre : une seule mise à jour, la dernière quantité
+    for quantity, minute in ((9, '01'), (8, '02'), (7.6, '03')):
+        set_stock(odoo, 3, 'SKU3', quantity, f'2024-05-01 10:{minute}:00')
+        stock.poll(now=5)
+    assert not stock.due(now=9) and stock.due(now=10)
+    stats = stock.flush(now=10)
+
+    assert stats == {'updated': 251, 'failed': 0, 'unknown_sku': 0}
+    calls = wc.batch_update_products.call_args_list
+    simple = [c.args[0] for c in calls if not c.kwargs.get('parent_id')]
+    assert [len(batch) for batch in simple] == [100, 100, 50]
+    assert {'id': 1003, 'manage_stock': True, 'stock_quantity': 7} in simple[0]
+    assert [c.kwargs['parent_id'] for c in calls if c.kwargs.get('parent_id')] == [70]
+    # SKU résolus par lots de 100 puis mémorisés
+    assert wc.get_products_by_sku.call_count == 3
+    assert sync_state.get_cursor('stock') == {'stock.quant': ['2024-05-01 10:03:00', 3],
+                                              'product.product': ['2024-05-01 10:03:00', 3]}
+
+    # Relevé suivant sans changement de quantité : rien n'est renvoyé
+    wc.batch_update_products.reset_mock()
+    assert stock.run_once() == {'updated': 0, 'failed': 0, 'unknown_sku': 0}
+    wc.batch_update_products.assert_not_called()
+    assert wc.get_products_by_sku.call_count == 3
+
+
+def test_failed_items_stay_pending_and_unknown_skus_are_dropped(state, odoo, wc):
+    set_stock(odoo, 1, 'A', 5, '2024-05-01 10:00:00')
+    set_stock(odoo, 2, 'B', 3, '2024-05-01 10:00:00')
+    set_stock(odoo, 3, 'GHOST', 1, '2024-05-01 10:00:00')
+    catalog = {'A': {'id': 11, 'sku': 'A', 'parent_id': 0, 'type': 'simple'},
+               'B': {'id': 12, 'sku': 'B', 'parent_id': 0, 'type': 'simple'}}
+    wc = _with_catalog(wc, catalog)
+    wc.batch_update_products.side_effect = lambda updates, parent_id=None: [
+        {'id': 11, 'stock_quantity': 5},
+        {'id': 12, 'error': {'code': 'woocommerce_rest_product_invalid_id', 'message': 'ID invalide.'}},
+    ]
+    stock = StockSync(wc=wc, odoo=odoo)
+
+    assert stock.run_once() == {'updated': 1, 'failed': 1, 'unknown_sku': 1}
+    assert stock.pending == {'B': 3}
+    # Le produit supprimé est oublié : nouvelle recherche par SKU au prochain envoi
+    assert database.get_wc_products(['A', 'B']) == {'A': (11, 0)}
+    assert sync_state.get_cursor('stock') is None
+
+
+def test_quant_moved_during_the_scan_does_not_hide_the_next_one(state, odoo, wc, monkeypatch):
+    monkeypatch.setattr('core.stock_sync._READ_LIMIT', 2)
+    for i in range(1, 6):
+        set_stock(odoo, i, f'SKU{i}', i, '2024-05-01 08:00:00')
+        odoo.write('stock.quant', i, write_date='2024-05-01 10:00:00')
+    sync_state.set_cursor('stock', {'stock.quant': ['2024-05-01 09:00:00', 0],
+                                    'product.product': ['2024-05-01 09:00:00', 0]})
+    search_read = odoo.search_read
+
+    def search_read_during_moves(model, domain, fields, **kwargs):
+        records = search_read(model, domain, fields, **kwargs)
+        if model == 'stock.quant' and odoo.reads == [('stock.quant', 2)]:
+            # Quant déjà lu, de nouveau modifié entre deux pages : passe en fin de parcours
+            odoo.write('stock.quant', 1, write_date='2024-05-01 10:00:30')
+        return records
+
+    monkeypatch.setattr(odoo, 'search_read', search_read_during_moves)
+    stock = StockSync(wc=wc, odoo=odoo)
+
+    assert stock.poll(now=0) == 5
+    assert stock.pending == {f'SKU{i}': i for i in range(1, 6)}
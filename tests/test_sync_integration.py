@@ -8,14 +8,14 @@ import sys
 import os
 import pytest
 from unittest.mock import patch, MagicMock
-import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from core.sync_manager import SyncManager
+from core.validator import validate_orders
 
 @patch('core.sync_manager.WooCommerceClient')
 @patch('core.sync_manager.OdooClient')
-def test_sync_orders_integration(mock_odoo_cls, mock_wc_cls):
+def test_sync_orders_integration(mock_odoo_cls, mock_wc_cls, state):
     """
     Test d'intégration du processus de synchronisation des commandes.
     
@@ -28,7 +28,7 @@ def test_sync_orders_integration(mock_odoo_cls, mock_wc_cls):
     Utilise des mocks pour simuler :
     - L'API WooCommerce
     - L'API Odoo
-    - La base de données locale
+    - La base de données locale (fixture ``state``)
     - Les fonctions de logging
     """
     # Configuration du mock WooCommerce
@@ -38,6 +38,7 @@ def test_sync_orders_integration(mock_odoo_cls, mock_wc_cls):
             {"product_id": 1, "quantity": 2, "price": 10.0, "total": 20.0}
         ]}
     ]
+    mock_wc.last_total = 1
     mock_wc_cls.return_value = mock_wc
 
     # Configuration du mock Odoo
@@ -45,26 +46,161 @@ def test_sync_orders_integration(mock_odoo_cls, mock_wc_cls):
     mock_odoo.create_order.return_value = 123
     mock_odoo_cls.return_value = mock_odoo
 
-    # Création d'un répertoire temporaire pour la base de données de test
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, 'test_sync_local.db')
-        
-        # Mock des fonctions de base de données et de logging
-        with patch('utils.database.DB_PATH', db_path), \
-             patch('core.sync_manager.is_order_already_synced_db', return_value=False), \
-             patch('core.sync_manager.mark_order_as_synced_db') as mark_synced, \
-             patch('core.sync_manager.log_audit') as log_audit:
-            
-            # Exécution de la synchronisation
-            sync = SyncManager()
-            sync.sync_orders()
-            
-            # Vérifications
-            # 1. La commande a été créée dans Odoo
-            mock_odoo.create_order.assert_called_once()
-            
-            # 2. La commande a été marquée comme synchronisée
-            mark_synced.assert_called_once_with(42)
-            
-            # 3. L'audit a été loggé avec succès
-            log_audit.assert_any_call(42, 'success', 'Synchronisation OK')
+    with patch('core.sync_manager.is_order_already_synced_db', return_value=False), \
+         patch('core.sync_manager.mark_order_as_synced_db') as mark_synced, \
+         patch('core.sync_manager.log_audit') as log_audit:
+
+        # Exécution de la synchronisation
+        sync = SyncManager()
+        sync.sync_orders()
+
+        # Vérifications
+        # 1. La commande a été créée dans Odoo
+        mock_odoo.create_order.assert_called_once()
+
+        # 2. La commande a été marquée comme synchronisée
+        mark_synced.assert_called_once_with(42, 123)
+
+        # 3. L'audit a été loggé avec succès
+        log_audit.assert_any_call(42, 'success', 'Synchronisation OK')
+
+        # 4. L'avancement de l'exécution a été publié
+        from utils.progress import read_progress
+        progress = read_progress(str(state / 'sync_progress.json'))
+        assert progress['state'] == 'done'
+        assert (progress['pages'], progress['expected'], progress['success']) == (1, 1, 1)
+
+
+@patch('core.sync_manager.WooCommerceClient')
+@patch('core.sync_manager.OdooClient')
+def test_page_is_validated_once_and_inconsistent_orders_are_kept_pending(mock_odoo_cls, mock_wc_cls, state):
+    """
+    La page est validée en une seule passe : une commande aux montants
+    incohérents reste en attente sans bloquer les autres.
+    """
+    from utils import database
+
+    def order(order_id, total):
+        return {"id": order_id, "customer_id": 1, "total": total,
+                "line_items": [{"product_id": 1, "quantity": 2, "price": 10.0, "total": 20.0}]}
+
+    mock_wc = MagicMock()
+    mock_wc.get_orders.return_value = [order(1, 20.0), order(2, 35.0), order(3, 20.0)]
+    mock_wc.last_total = 3
+    mock_wc_cls.return_value = mock_wc
+    mock_odoo_cls.return_value.create_order.return_value = 7
+
+    with patch('core.sync_manager.validate_orders', wraps=validate_orders) as batch:
+        SyncManager().sync_orders()
+
+    batch.assert_called_once()
+    assert mock_odoo_cls.return_value.create_order.call_count == 2
+    assert database.is_order_already_synced_db(1) and database.is_order_already_synced_db(3)
+    assert database.get_retryable_pending_orders() == ['2']
+
+
+@patch('core.sync_manager.WooCommerceClient')
+@patch('core.sync_manager.OdooClient')
+def test_failed_orders_are_retried_then_dropped(mock_odoo_cls, mock_wc_cls, state):
+    """
+    Les commandes en échec sont relues par identifiant : retentées si WooCommerce
+    les renvoie encore, retirées de la file sinon, abandonnées après
+    PENDING_MAX_ATTEMPTS tentatives. La jauge compte aussi les commandes
+    récupérées mais pas encore traitées.
+    """
+    import time
+    from utils import database, progress, sync_state
+
+    database.init_db()
+    now = time.time()
+    database.record_pending_order(10, now - 3600, "Odoo indisponible")
+    database.record_pending_order(11, now - 1800, "Odoo indisponible")
+    for _ in range(database.PENDING_MAX_ATTEMPTS):
+        database.record_pending_order(12, now - 7200, "Client inconnu")
+
+    def order(order_id, age):
+        created = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now - age))
+        return {"id": order_id, "customer_id": 1, "total": 20.0, "date_created_gmt": created,
+                "line_items": [{"product_id": 1, "quantity": 2, "price": 10.0, "total": 20.0}]}
+
+    mock_wc = MagicMock()
+    # 11 n'est plus renvoyée (annulée dans WooCommerce) ; 42 est une nouvelle commande
+    mock_wc.get_orders.side_effect = lambda include=None, **kwargs: (
+        [order(10, 3600)] if include else [order(42, 600)])
+    mock_wc.last_total = 1
+    mock_wc_cls.return_value = mock_wc
+    oldest_seen = []
+
+    def create_order(data):
+        oldest_seen.append(round(now - database.get_oldest_pending_created_at()))
+        return 100 + len(oldest_seen)
+
+    mock_odoo_cls.return_value.create_order.side_effect = create_order
+
+    SyncManager().sync_orders()
+
+    assert mock_wc.get_orders.call_args_list[0].kwargs['include'] == ['10', '11']
+    assert database.is_order_already_synced_db(10) and database.is_order_already_synced_db(42)
+    assert database.get_retryable_pending_orders() == []
+    # Pendant le traitement de la page, la commande 42 récupérée compte comme non synchronisée
+    assert 3590 <= oldest_seen[0] <= 3610 and 590 <= oldest_seen[1] <= 610
+    assert database.get_oldest_pending_created_at() is None
+
+
+@patch('core.sync_manager.WooCommerceClient')
+@patch('core.sync_manager.OdooClient')
+def test_backfill_walks_every_page_as_compact_records(mock_odoo_cls, mock_wc_cls, state, monkeypatch):
+    """
+    Le rattrapage lancé par ``scripts/sync_orders.py --backfill`` parcourt
+    toutes les pages avec ``_fields`` et traite des OrderRecord.
+    """
+    import json
+    import requests
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+    import sync_orders
+    from config.stores import Store
+    from core.models.records import OrderRecord, WC_ORDER_FIELDS
+    from core.wc_client import WooCommerceClient
+    from utils import database, progress, sync_state
+
+    orders = [{"id": i, "customer_id": 1, "total": "20.00", "date_created_gmt": "2024-01-02T10:00:00",
+               "meta_data": [{"key": "_wc_order_attribution", "value": "x" * 200}],
+               "line_items": [{"product_id": 1, "quantity": 2, "price": 10.0, "total": "20.00"}]}
+              for i in range(1, 251)]
+    requested = []
+
+    def get(endpoint, params):
+        requested.append(params)
+        page = orders[params['offset']:params['offset'] + params['per_page']]
+        response = requests.models.Response()
+        response.status_code = 200
+        response.headers['X-WP-Total'] = str(len(orders))
+        response._content = json.dumps([
+            {key: value for key, value in order.items() if key in params['_fields'].split(',')}
+            for order in page
+        ]).encode()
+        return response
+
+    mock_odoo_cls.return_value.create_order.side_effect = lambda data: 1000 + len(requested)
+    # Vrai client (pagination, _fields), identifiants de test explicites et API simulée
+    wc = WooCommerceClient(Store(name='test', wc_api_url='https://shop.example.com/wp-json/wc/v3',
+                                 consumer_key='ck', consumer_secret='cs'))
+    wc.wcapi = MagicMock()
+    wc.wcapi.get.side_effect = get
+    mock_wc_cls.return_value = wc
+    sync = SyncManager()
+    processed_types = set()
+    process_order = sync._process_order
+    monkeypatch.setattr(sync, '_process_order', lambda order, *args: (
+        processed_types.add(type(order)) or process_order(order, *args)))
+
+    assert sync_orders.run_backfill(sync, sync_orders._iso_date('2024-01-01'))
+
+    assert [(p['offset'], p['per_page']) for p in requested] == [(0, 100), (100, 100), (200, 100)]
+    assert all(p['after'] == '2024-01-01T00:00:00' and p['_fields'] == WC_ORDER_FIELDS for p in requested)
+    assert processed_types == {OrderRecord}
+    assert mock_odoo_cls.return_value.create_order.call_count == 250
+    assert database.is_order_already_synced_db(250)
+    assert progress.read_progress(str(state / 'sync_progress.json'))['success'] == 250
+    # La date de dernière synchronisation n'est pas modifiée
+    assert sync_state.get_last_synced_at() is None
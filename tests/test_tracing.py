@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from utils import tracing
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'traces.jsonl')
+    monkeypatch.setattr(tracing, 'TRACE_FILE', path)
+    monkeypatch.setattr(tracing, 'TRACE_EXPORTER', 'file')
+    return path
+
+def test_sampled_trace_is_exported_as_a_tree(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 1.0)
+    run_id = tracing.new_run_id()
+    with tracing.start_trace("sync.order", **{"order.id": 42}):
+        with tracing.span("sync.validate"):
+            pass
+        with pytest.raises(ValueError):
+            with tracing.span("odoo.execute_kw", **{"rpc.model": "sale.order"}):
+                raise ValueError("refus")
+
+    spans = next(iter(tracing.load_traces(trace_file).values()))
+    by_name = {record['name']: record for record in spans}
+    root = by_name['sync.order']
+    assert root['parent_id'] is None
+    assert root['attributes'] == {'run.id': run_id, 'order.id': 42}
+    assert by_name['sync.validate']['parent_id'] == root['span_id']
+    assert by_name['odoo.execute_kw']['error'] == "ValueError: refus"
+
+    lines = tracing.format_trace(spans).splitlines()
+    assert [line.split()[4] for line in lines] == ['sync.order', 'sync.validate', 'odoo.execute_kw']
+
+def test_unsampled_trace_is_a_noop(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 0.0)
+    with tracing.start_trace("sync.order") as root:
+        with tracing.span("sync.validate") as child:
+            tracing.annotate(ignored=True)
+    assert root is None and child is None
+    assert not os.path.exists(trace_file)
+
+def test_otlp_payload(monkeypatch, trace_file):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 1.0)
+    exported = []
+    monkeypatch.setattr(tracing, 'export', exported.append)
+    with tracing.start_trace("sync.order", **{"order.id": 7}):
+        pass
+    payload = tracing.otlp_payload(exported[0])
+    otlp_span = payload['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+    assert otlp_span['name'] == 'sync.order'
+    assert len(otlp_span['traceId']) == 32 and len(otlp_span['spanId']) == 16
+    assert {'key': 'order.id', 'value': {'intValue': '7'}} in otlp_span['attributes']
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from core.exceptions import TransformationError
+from core.models.customer import map_wc_customer_to_odoo
+from core.models.order import map_wc_order_to_odoo
+from core.transformers.customer_transformer import CustomerTransformer
+from core.transformers.order_transformer import OrderTransformer
+
+WC_ORDER = {
+    'id': 7,
+    'customer_id': 3,
+    'date_created': '2024-01-01T10:00:00',
+    'total': '25.00',
+    'line_items': [
+        {'product_id': 1, 'name': 'Stylo', 'quantity': 2, 'price': '5.00', 'total': '10.00'},
+        {'product_id': 2, 'name': 'Cahier', 'price': '15.00', 'total': '15.00'},
+    ],
+}
+
+WC_CUSTOMER = {
+    'id': 9,
+    'email': 'jane@example.com',
+    'first_name': 'Jane',
+    'last_name': 'Doe',
+    'billing': {'phone': '0102030405', 'address_1': '1 rue de la Paix',
+                'city': 'Paris', 'postcode': '75001', 'country': 'FR'},
+}
+
+def test_order_transform_many_matches_transform():
+    transformer = OrderTransformer()
+    odoo_order = transformer.transform(WC_ORDER)
+    assert transformer.transform_many([WC_ORDER, WC_ORDER]) == [odoo_order, odoo_order]
+    assert odoo_order['name'] == 'SO7'
+    assert odoo_order['amount_total'] == 25.0
+    assert odoo_order['order_line'][1] == (0, 0, {
+        'product_id': 2, 'name': 'Cahier', 'product_uom_qty': 1,
+        'price_unit': 15.0, 'price_subtotal': 15.0,
+    })
+
+def test_order_transform_many_rejects_incomplete_order():
+    with pytest.raises(TransformationError):
+        OrderTransformer().transform_many([WC_ORDER, {'id': 8}])
+
+def test_customer_transform_many_matches_transform():
+    transformer = CustomerTransformer()
+    odoo_customer = transformer.transform(WC_CUSTOMER)
+    assert transformer.transform_many([WC_CUSTOMER]) == [odoo_customer]
+    assert odoo_customer['country_id'] == 76
+    assert odoo_customer['customer_rank'] == 1
+
+def test_models_use_the_same_spec():
+    assert map_wc_order_to_odoo(WC_ORDER) == {
+        'partner_id': 3,
+        'order_line': [
+            (0, 0, {'product_id': 1, 'product_uom_qty': 2, 'price_unit': 5.0}),
+            (0, 0, {'product_id': 2, 'product_uom_qty': 1, 'price_unit': 15.0}),
+        ],
+    }
+    odoo_customer = map_wc_customer_to_odoo(WC_CUSTOMER)
+    assert odoo_customer == {
+        'name': 'Jane Doe', 'email': 'jane@example.com', 'phone': '0102030405',
+        'street': '1 rue de la Paix', 'city': 'Paris', 'zip': '75001', 'country_id': 76,
+    }
+
+def test_missing_customer_fields_default_to_empty_strings():
+    odoo_customer = map_wc_customer_to_odoo({'first_name': 'Jane', 'last_name': 'Doe'})
+    assert None not in odoo_customer.values()
+    assert odoo_customer['email'] == odoo_customer['phone'] == odoo_customer['zip'] == ''
+    assert None not in CustomerTransformer._map_customer({'billing': {}}).values()
+
+def test_order_fingerprint_is_canonical():
+    from core.fingerprint import order_fingerprint
+    reordered = {key: WC_ORDER[key] for key in reversed(list(WC_ORDER))}
+    reordered['line_items'] = [
+        dict(item, total=float(item['total'])) for item in reversed(WC_ORDER['line_items'])
+    ]
+    reordered['_links'] = {'self': [{'href': 'https://shop.example.com/orders/7'}]}
+    assert order_fingerprint(reordered) == order_fingerprint(WC_ORDER)
+    changed = dict(WC_ORDER, total='26.00')
+    assert order_fingerprint(changed) != order_fingerprint(WC_ORDER)
+    assert len(order_fingerprint(WC_ORDER)) == 16
+
+def test_order_fingerprint_normalizes_ids_and_quantities():
+    from decimal import Decimal
+    from core.fingerprint import canonical_number, order_fingerprint
+    retyped = dict(WC_ORDER, id='7', customer_id=3.0, line_items=[
+        dict(WC_ORDER['line_items'][0], product_id='1', quantity=Decimal('2.00')),
+        dict(WC_ORDER['line_items'][1], product_id=2.0),
+    ])
+    assert order_fingerprint(retyped) == order_fingerprint(WC_ORDER)
+    assert order_fingerprint(dict(WC_ORDER, customer_id=4)) != order_fingerprint(WC_ORDER)
+    assert [canonical_number(v) for v in (2, '2', 2.0, ' 2.50 ', Decimal('2.5'), None, 'abc')] == [
+        '2', '2', '2', '2.5', '2.5', 'None', 'abc']
@@ -3,7 +3,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
-from core.validator import validate_order
+from core.validator import validate_order, validate_orders, validate_customers
 
 def test_validate_order_ok():
     order = {"id": 1, "customer_id": 1, "total": 20.0, "line_items": [
@@ -20,3 +20,26 @@ def test_validate_order_empty_lines():
     order = {"id": 3, "customer_id": 1, "total": 10.0, "line_items": []}
     with pytest.raises(Exception):
         validate_order(order)
+
+def test_validate_orders_batch_returns_errors_without_raising():
+    orders = [
+        {"id": 1, "customer_id": 1, "total": "20.00", "line_items": [{"total": "20.00"}]},
+        {"id": 2, "total": "10.00", "line_items": [{"total": "10.00"}]},
+        {"id": 3, "customer_id": 1, "total": "abc", "line_items": [{"total": "10.00"}]},
+        {"id": 4, "customer_id": 1, "total": "30.00", "line_items": [{"total": "10.00"}]},
+    ]
+    errors = validate_orders(orders)
+    assert len(errors) == 4
+    assert errors[0] == []
+    assert errors[1] == ["Champs manquants dans la commande: customer_id"]
+    assert errors[2] == ["Montant invalide: total"]
+    assert errors[3][0].startswith("Montants de commande invalides")
+
+def test_validate_customers_batch():
+    customers = [
+        {"id": 1, "email": "jane@example.com", "first_name": "Jane", "last_name": "Doe"},
+        {"id": 2, "email": "invalid-email", "first_name": "John", "last_name": "Doe"},
+    ]
+    errors = validate_customers(customers)
+    assert errors[0] == []
+    assert errors[1] == ["Email invalide: email"]
@@ -0,0 +1,86 @@
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from core.webhook_queue import WebhookQueue
+
+
+def _blocking_sync():
+    started, release = threading.Event(), threading.Event()
+
+    def run_sync():
+        started.set()
+        release.wait(5)
+    return run_sync, started, release
+
+
+def test_webhooks_received_during_a_sync_are_coalesced():
+    run_sync, started, release = _blocking_sync()
+    ingest = WebhookQueue(run_sync=run_sync, maxsize=100).start()
+    assert ingest.submit(1)
+    assert started.wait(5)
+    for order_id in range(2, 50):
+        assert ingest.submit(order_id)
+    release.set()
+    ingest.stop(timeout=5)
+    assert ingest.runs == 2
+    assert ingest.depth() == 0
+
+
+def test_full_queue_rejects_without_blocking():
+    ingest = WebhookQueue(run_sync=lambda: None, maxsize=2)
+    assert ingest.submit(1)
+    assert ingest.submit(2)
+    assert not ingest.submit(3)
+
+
+def test_sync_errors_do_not_stop_the_worker():
+    calls = []
+
+    def run_sync():
+        calls.append(1)
+        raise RuntimeError("Odoo indisponible")
+
+    ingest = WebhookQueue(run_sync=run_sync).start()
+    ingest.submit(1)
+    ingest.stop(timeout=5)
+    ingest.start()
+    ingest.submit(2)
+    ingest.stop(timeout=5)
+    assert len(calls) == 2
+
+
+def test_webhook_endpoint_acknowledges_and_queues():
+    import webhook_server
+
+    ingest = WebhookQueue(run_sync=lambda: None, maxsize=1)
+    client = webhook_server.create_app(ingest).test_client()
+    ingest.stop(timeout=5)
+
+    response = client.post('/webhook', json={'id': 42, 'status': 'processing'})
+    assert response.status_code == 202
+    assert client.post('/webhook', json={'id': 43}).status_code == 503
+    assert client.post('/webhook', data={'webhook_id': '7'}).status_code == 200
+    assert client.post('/webhook', data='pas du json', content_type='text/plain').status_code == 400
+
+
+def test_webhook_sync_waits_for_the_running_sync(state):
+    from unittest.mock import patch
+    from core.sync_manager import SyncManager
+    from utils import sync_state
+
+    with patch('core.sync_manager.WooCommerceClient'), patch('core.sync_manager.OdooClient'):
+        manager = SyncManager()
+    manager.wc.get_orders.return_value = []
+    manager.wc.last_total = 0
+    ingest = WebhookQueue(run_sync=lambda: manager.sync_orders(trigger="webhook")).start()
+
+    # Synchronisation en cours dans un autre processus (service sync)
+    with sync_state.sync_lock():
+        ingest.submit(1)
+        threading.Event().wait(0.2)
+        manager.wc.get_orders.assert_not_called()
+    ingest.stop(timeout=5)
+    manager.wc.get_orders.assert_called_once()
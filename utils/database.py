@@ -7,28 +7,78 @@ pour éviter les doublons et garder une trace des commandes synchronisées.
 import sqlite3
 import os
 
+from utils.store_context import store_path
+from utils.sync_state import get_cursor
+from utils.tracing import span
+
 # Chemin vers la base de données SQLite locale
 DB_PATH = os.path.join(os.path.dirname(__file__), '../sync_local.db')
+# Tentatives au-delà desquelles une commande en échec est abandonnée (plus retentée)
+PENDING_MAX_ATTEMPTS = int(os.getenv('PENDING_MAX_ATTEMPTS', 5))
+# Curseur (utils/sync_state.py) : création de la plus ancienne commande récupérée non encore traitée
+UNPROCESSED_CURSOR = 'oldest_unprocessed'
 
 def get_connection():
     """
     Crée et retourne une connexion à la base de données SQLite.
+
+    En mode multi-boutiques, chaque boutique a sa propre base
+    (voir utils/store_context.py).
     
     Returns:
         sqlite3.Connection: Connexion à la base de données
     """
-    return sqlite3.connect(DB_PATH)
+    return sqlite3.connect(store_path(DB_PATH))
 
 def init_db():
     """
-    Initialise la base de données en créant la table synced_orders
-    si elle n'existe pas déjà.
+    Initialise la base de données en créant les tables synced_orders
+    et pending_orders si elles n'existent pas déjà.
     
-    La table stocke :
+    La table synced_orders stocke :
     - order_id : Identifiant unique de la commande (clé primaire)
     - synced_at : Date et heure de la synchronisation
+
+    La table pending_orders stocke les commandes récupérées dont la
+    synchronisation a échoué :
+    - order_id : Identifiant unique de la commande (clé primaire)
+    - created_at : Date de création WooCommerce (timestamp Unix UTC)
+    - attempts : Nombre de tentatives échouées
+    - last_error : Dernière erreur rencontrée
+    - updated_at : Date et heure de la dernière tentative
+
+    La table wc_products associe les SKU aux produits et variations
+    WooCommerce (synchronisation du stock, core/stock_sync.py) :
+    - sku : Référence interne (default_code Odoo)
+    - product_id : Identifiant du produit ou de la variation WooCommerce
+    - parent_id : Produit parent d'une variation (0 pour un produit simple)
+
+    La table wc_customers associe les partenaires Odoo aux clients
+    WooCommerce (synchronisation des clients, core/customer_sync.py) :
+    - odoo_id : Identifiant du partenaire Odoo (res.partner)
+    - wc_id : Identifiant du client WooCommerce (NULL tant qu'il n'est pas connu)
+    - fingerprint : Empreinte de la dernière fiche échangée, dans un sens ou
+      dans l'autre (évite de renvoyer à WooCommerce ses propres données)
+
+    La table order_status suit l'avancement dans Odoo des commandes créées,
+    à renvoyer vers WooCommerce (core/status_writeback.py) :
+    - order_id : Identifiant de la commande WooCommerce (clé primaire)
+    - odoo_id : Identifiant de la commande Odoo (sale.order)
+    - odoo_ref : Référence de la commande Odoo (ex. S00042), connue au premier relevé
+    - status : Dernier statut relevé (created, confirmed, delivered, invoiced, cancelled)
+    - sent_status : Dernier statut accepté par WooCommerce
+    - updated_at : Date et heure du dernier changement de statut
+
+    La base passe en mode WAL (réglage conservé dans le fichier) : les
+    lectures, dont la sauvegarde à chaud (scripts/backup.py), ne bloquent
+    plus les écritures de la synchronisation. Une base neuve est créée en
+    ``auto_vacuum`` incrémental : la purge par ancienneté
+    (scripts/purge_local_data.py) rend l'espace libéré sans VACUUM bloquant.
     """
     with get_connection() as conn:
+        # Sans effet sur une base existante (voir scripts/purge_local_data.py --convert)
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('PRAGMA journal_mode=WAL')
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS synced_orders (
@@ -36,6 +86,41 @@ def init_db():
                 synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS pending_orders (
+                order_id TEXT PRIMARY KEY,
+                created_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                last_error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS wc_products (
+                sku TEXT PRIMARY KEY,
+                product_id INTEGER NOT NULL,
+                parent_id INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS wc_customers (
+                odoo_id INTEGER PRIMARY KEY,
+                wc_id INTEGER,
+                fingerprint TEXT
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS order_status (
+                order_id TEXT PRIMARY KEY,
+                odoo_id INTEGER NOT NULL,
+                odoo_ref TEXT,
+                status TEXT NOT NULL DEFAULT 'created',
+                sent_status TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Commandes Odoo modifiées -> commandes suivies (core/status_writeback.py)
+        c.execute('CREATE INDEX IF NOT EXISTS order_status_odoo_id ON order_status(odoo_id)')
         conn.commit()
 
 def is_order_already_synced_db(order_id):
@@ -48,19 +133,290 @@ def is_order_already_synced_db(order_id):
     Returns:
         bool: True si la commande a déjà été synchronisée, False sinon
     """
-    with get_connection() as conn:
+    with span("db.is_order_already_synced"), get_connection() as conn:
         c = conn.cursor()
         c.execute('SELECT 1 FROM synced_orders WHERE order_id = ?', (str(order_id),))
         return c.fetchone() is not None
 
-def mark_order_as_synced_db(order_id):
+def mark_order_as_synced_db(order_id, odoo_id=None):
     """
     Marque une commande comme synchronisée dans la base de données.
     
     Args:
         order_id: Identifiant de la commande à marquer
+        odoo_id (int, optional): Identifiant de la commande créée dans Odoo,
+            dont le statut sera renvoyé vers WooCommerce
     """
-    with get_connection() as conn:
+    with span("db.mark_order_as_synced"), get_connection() as conn:
         c = conn.cursor()
         c.execute('INSERT OR IGNORE INTO synced_orders(order_id) VALUES (?)', (str(order_id),))
+        c.execute('DELETE FROM pending_orders WHERE order_id = ?', (str(order_id),))
+        if odoo_id is not None:
+            c.execute('INSERT OR IGNORE INTO order_status(order_id, odoo_id) VALUES (?, ?)',
+                      (str(order_id), odoo_id))
+        conn.commit()
+
+def record_pending_order(order_id, created_at, error):
+    """
+    Enregistre l'échec de synchronisation d'une commande.
+
+    Args:
+        order_id: Identifiant de la commande
+        created_at (float): Date de création WooCommerce (timestamp Unix UTC), ou None
+        error (str): Erreur rencontrée
+
+    Returns:
+        int: Nombre de tentatives échouées de la commande
+    """
+    with span("db.record_pending_order"), get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO pending_orders(order_id, created_at, last_error) VALUES (?, ?, ?)
+            ON CONFLICT(order_id) DO UPDATE SET
+                attempts = attempts + 1,
+                created_at = COALESCE(excluded.created_at, created_at),
+                last_error = excluded.last_error,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (str(order_id), created_at, error))
+        c.execute('SELECT attempts FROM pending_orders WHERE order_id = ?', (str(order_id),))
+        attempts = c.fetchone()[0]
+        conn.commit()
+        return attempts
+
+def get_retryable_pending_orders(max_attempts=None):
+    """
+    Retourne les commandes en échec à retenter, les plus anciennes d'abord.
+
+    Args:
+        max_attempts (int, optional): Tentatives au-delà desquelles une commande
+            est abandonnée (PENDING_MAX_ATTEMPTS par défaut)
+
+    Returns:
+        list: Identifiants des commandes
+    """
+    max_attempts = max_attempts or PENDING_MAX_ATTEMPTS
+    with get_connection() as conn:
+        rows = conn.execute(
+            'SELECT order_id FROM pending_orders WHERE attempts < ? ORDER BY created_at, order_id',
+            (max_attempts,)
+        ).fetchall()
+    return [order_id for (order_id,) in rows]
+
+def forget_pending_orders(order_ids):
+    """
+    Retire de la file des nouvelles tentatives des commandes qui ne sont plus à synchroniser.
+
+    Args:
+        order_ids (iterable): Identifiants des commandes
+    """
+    with get_connection() as conn:
+        conn.executemany('DELETE FROM pending_orders WHERE order_id = ?',
+                         ((str(order_id),) for order_id in order_ids))
+        conn.commit()
+
+def get_oldest_pending_created_at(max_attempts=None):
+    """
+    Retourne la date de création de la plus ancienne commande non synchronisée.
+
+    Sont comptées les commandes en échec encore retentées (les commandes
+    abandonnées après ``max_attempts`` tentatives ne le sont pas) et celles
+    récupérées par une synchronisation mais pas encore traitées.
+
+    Args:
+        max_attempts (int, optional): Tentatives au-delà desquelles une commande
+            est abandonnée (PENDING_MAX_ATTEMPTS par défaut)
+
+    Returns:
+        float: Timestamp Unix UTC, ou None si aucune commande n'est en attente
+    """
+    max_attempts = max_attempts or PENDING_MAX_ATTEMPTS
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT MIN(created_at) FROM pending_orders WHERE attempts < ?', (max_attempts,))
+        oldest = c.fetchone()[0]
+    unprocessed = get_cursor(UNPROCESSED_CURSOR)
+    candidates = [value for value in (oldest, unprocessed) if value is not None]
+    return min(candidates) if candidates else None
+
+def get_wc_products(skus):
+    """
+    Retourne les produits WooCommerce connus pour une liste de SKU.
+
+    Args:
+        skus (iterable): SKU recherchés
+
+    Returns:
+        dict: SKU -> (product_id, parent_id), pour les SKU connus
+    """
+    skus = list(skus)
+    found = {}
+    with get_connection() as conn:
+        # Par tranches : limite du nombre de paramètres SQLite
+        for start in range(0, len(skus), 500):
+            chunk = skus[start:start + 500]
+            rows = conn.execute(
+                f'SELECT sku, product_id, parent_id FROM wc_products WHERE sku IN ({",".join("?" * len(chunk))})',
+                chunk
+            ).fetchall()
+            found.update((sku, (product_id, parent_id)) for sku, product_id, parent_id in rows)
+    return found
+
+def save_wc_products(products):
+    """
+    Enregistre l'association SKU -> produit WooCommerce.
+
+    Args:
+        products (dict): SKU -> (product_id, parent_id)
+    """
+    with get_connection() as conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO wc_products(sku, product_id, parent_id) VALUES (?, ?, ?)',
+            ((sku, product_id, parent_id) for sku, (product_id, parent_id) in products.items())
+        )
+        conn.commit()
+
+def forget_wc_product(sku):
+    """
+    Oublie un SKU dont le produit WooCommerce n'existe plus.
+
+    Args:
+        sku (str): SKU à oublier
+    """
+    with get_connection() as conn:
+        conn.execute('DELETE FROM wc_products WHERE sku = ?', (sku,))
+        conn.commit()
+
+def get_wc_customers(odoo_ids):
+    """
+    Retourne les clients WooCommerce associés à des partenaires Odoo.
+
+    Args:
+        odoo_ids (iterable): Identifiants des partenaires Odoo
+
+    Returns:
+        dict: odoo_id -> (wc_id, fingerprint), pour les partenaires connus
+    """
+    odoo_ids = list(odoo_ids)
+    found = {}
+    with get_connection() as conn:
+        # Par tranches : limite du nombre de paramètres SQLite
+        for start in range(0, len(odoo_ids), 500):
+            chunk = odoo_ids[start:start + 500]
+            rows = conn.execute(
+                f'SELECT odoo_id, wc_id, fingerprint FROM wc_customers '
+                f'WHERE odoo_id IN ({",".join("?" * len(chunk))})',
+                chunk
+            ).fetchall()
+            found.update((odoo_id, (wc_id, fingerprint)) for odoo_id, wc_id, fingerprint in rows)
+    return found
+
+def save_wc_customers(customers):
+    """
+    Enregistre l'association partenaire Odoo -> client WooCommerce.
+
+    Args:
+        customers (dict): odoo_id -> (wc_id, fingerprint)
+    """
+    with get_connection() as conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO wc_customers(odoo_id, wc_id, fingerprint) VALUES (?, ?, ?)',
+            ((odoo_id, wc_id, fingerprint) for odoo_id, (wc_id, fingerprint) in customers.items())
+        )
+        conn.commit()
+
+def get_tracked_order_statuses(final=()):
+    """
+    Retourne les commandes dont le statut Odoo est suivi.
+
+    Args:
+        final (iterable): Statuts définitifs : ces commandes sont exclues une
+            fois leur statut accepté par WooCommerce
+
+    Returns:
+        dict: odoo_id -> (order_id, odoo_ref, status)
+    """
+    final = list(final)
+    query = 'SELECT odoo_id, order_id, odoo_ref, status FROM order_status'
+    if final:
+        query += (f' WHERE NOT (sent_status IS status AND status IN ({",".join("?" * len(final))}))')
+    with get_connection() as conn:
+        return {odoo_id: (order_id, odoo_ref, status)
+                for odoo_id, order_id, odoo_ref, status in conn.execute(query, final)}
+
+def get_order_statuses(odoo_ids):
+    """
+    Retourne les commandes suivies parmi des commandes Odoo.
+
+    Args:
+        odoo_ids (iterable): Identifiants des commandes Odoo
+
+    Returns:
+        dict: odoo_id -> (order_id, odoo_ref, status), pour les commandes suivies
+    """
+    odoo_ids = list(odoo_ids)
+    found = {}
+    with get_connection() as conn:
+        # Par tranches : limite du nombre de paramètres SQLite
+        for start in range(0, len(odoo_ids), 500):
+            chunk = odoo_ids[start:start + 500]
+            rows = conn.execute(
+                f'SELECT odoo_id, order_id, odoo_ref, status FROM order_status '
+                f'WHERE odoo_id IN ({",".join("?" * len(chunk))})',
+                chunk
+            ).fetchall()
+            found.update((odoo_id, (order_id, odoo_ref, status)) for odoo_id, order_id, odoo_ref, status in rows)
+    return found
+
+def get_unpolled_order_statuses():
+    """
+    Retourne les commandes suivies dont le statut n'a jamais été relevé dans Odoo.
+
+    Returns:
+        dict: odoo_id -> (order_id, odoo_ref, status)
+    """
+    with get_connection() as conn:
+        return {odoo_id: (order_id, odoo_ref, status) for odoo_id, order_id, odoo_ref, status in conn.execute(
+            'SELECT odoo_id, order_id, odoo_ref, status FROM order_status WHERE odoo_ref IS NULL')}
+
+def update_order_statuses(changes):
+    """
+    Enregistre les statuts relevés dans Odoo.
+
+    Args:
+        changes (dict): order_id -> (odoo_ref, status)
+    """
+    with get_connection() as conn:
+        conn.executemany('''
+            UPDATE order_status SET odoo_ref = ?, status = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE order_id = ?
+        ''', ((odoo_ref, status, str(order_id)) for order_id, (odoo_ref, status) in changes.items()))
+        conn.commit()
+
+def get_unsent_order_statuses(limit=None):
+    """
+    Retourne les statuts relevés que WooCommerce n'a pas encore acceptés.
+
+    Args:
+        limit (int, optional): Nombre maximal de commandes
+
+    Returns:
+        list: (order_id, odoo_ref, status), par ordre de changement
+    """
+    with get_connection() as conn:
+        return conn.execute('''
+            SELECT order_id, odoo_ref, status FROM order_status
+            WHERE odoo_ref IS NOT NULL AND sent_status IS NOT status
+            ORDER BY updated_at, rowid LIMIT ?
+        ''', (-1 if limit is None else limit,)).fetchall()
+
+def mark_order_statuses_sent(sent):
+    """
+    Enregistre les statuts acceptés par WooCommerce.
+
+    Args:
+        sent (dict): order_id -> statut envoyé
+    """
+    with get_connection() as conn:
+        conn.executemany('UPDATE order_status SET sent_status = ? WHERE order_id = ?',
+                         ((status, str(order_id)) for order_id, status in sent.items()))
         conn.commit()
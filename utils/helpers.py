@@ -5,11 +5,66 @@ Ce module contient des fonctions d'aide pour le formatage et l'audit.
 
 import os
 import csv
-from datetime import datetime
+import fcntl
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from utils.store_context import store_path
 
 # Chemin vers le fichier de log d'audit
 AUDIT_LOG = os.path.join(os.path.dirname(__file__), '../sync_audit.csv')
 
+# Verrou partagé des ajouts : fichier .lock ouvert une fois par processus et par
+# fichier d'audit -> [fichier, nombre d'ajouts en cours]
+_shared_audit_locks = {}
+_shared_audit_guard = threading.Lock()
+
+@contextmanager
+def audit_lock(audit_path, exclusive=False):
+    """
+    Verrou du fichier d'audit, partagé entre processus.
+
+    Les ajouts (``log_audit``) prennent le verrou partagé et peuvent écrire
+    simultanément ; la purge (scripts/purge_local_data.py) le prend en
+    exclusif le temps de réécrire le fichier, sans perdre d'entrée. Le
+    verrou porte sur un fichier ``.lock`` distinct, que la réécriture ne
+    remplace pas.
+
+    Pour les ajouts, le fichier ``.lock`` reste ouvert : un ajout ne coûte
+    que le ``flock``. Un verrou ``flock`` appartenant au fichier ouvert et
+    non au thread, il est pris au premier ajout en cours du processus et
+    rendu au dernier.
+
+    Args:
+        audit_path (str): Fichier d'audit CSV
+        exclusive (bool): Verrou exclusif (réécriture) plutôt que partagé
+    """
+    if exclusive:
+        with open(audit_path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+    # Par processus : un fichier hérité d'un fork partagerait le verrou du parent
+    key = (os.getpid(), audit_path)
+    with _shared_audit_guard:
+        entry = _shared_audit_locks.get(key)
+        if entry is None:
+            entry = _shared_audit_locks[key] = [open(audit_path + '.lock', 'a'), 0]
+        if not entry[1]:
+            fcntl.flock(entry[0], fcntl.LOCK_SH)
+        entry[1] += 1
+    try:
+        yield
+    finally:
+        with _shared_audit_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                fcntl.flock(entry[0], fcntl.LOCK_UN)
+
 def format_date(date_str):
     """
     Formate une date selon le format attendu par Odoo.
@@ -23,6 +78,24 @@ def format_date(date_str):
     # TODO: Implémenter le formatage de date selon les besoins
     return date_str
 
+def wc_gmt_timestamp(value):
+    """
+    Convertit une date GMT WooCommerce (ex. ``date_created_gmt``) en timestamp.
+
+    Args:
+        value (str): Date ISO 8601 sans fuseau, exprimée en UTC
+
+    Returns:
+        float: Timestamp Unix, ou None si la date est absente ou invalide
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', ''))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
+
 def log_audit(order_id, status, message):
     """
     Enregistre une entrée dans le fichier d'audit CSV.
@@ -32,13 +105,16 @@ def log_audit(order_id, status, message):
     - order_id : Identifiant de la commande
     - status : Statut de la synchronisation (success, error, ignored)
     - message : Message détaillant l'événement
+
+    En mode multi-boutiques, chaque boutique a son propre fichier d'audit.
     
     Args:
         order_id: Identifiant de la commande
         status (str): Statut de la synchronisation
         message (str): Message détaillant l'événement
     """
-    with open(AUDIT_LOG, 'a', newline='') as csvfile:
+    path = store_path(AUDIT_LOG)
+    with audit_lock(path), open(path, 'a', newline='') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow([
             datetime.now().isoformat(),
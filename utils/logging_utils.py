@@ -2,6 +2,10 @@
 Module utilitaire pour le logging.
 Ce module fournit des fonctions pour faciliter l'utilisation du système de logging
 avec différents niveaux et formats de messages.
+
+La configuration (config/logging.conf) est chargée une seule fois par
+processus, à l'import de ce module ; utils/logger.py la réutilise. Les
+fichiers de log sont ouverts au premier message écrit.
 """
 
 import os
@@ -10,23 +14,25 @@ import os
 logs_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../logs'))
 os.makedirs(logs_dir, exist_ok=True)
 
-# Créer les fichiers de log s'ils n'existent pas
-sync_log = os.path.join(logs_dir, 'sync.log')
-error_log = os.path.join(logs_dir, 'errors.log')
-
-for log_file in [sync_log, error_log]:
-    if not os.path.exists(log_file):
-        with open(log_file, 'w') as f:
-            pass
-
 import logging
 import logging.config
 from datetime import datetime
 from functools import wraps
 import time
 
-# Charger la configuration logging si ce n'est pas déjà fait
-def _load_logging_config():
+# Vrai une fois la configuration chargée par ce module
+_configured = False
+
+def configure_logging():
+    """
+    Charge la configuration du logging si ce n'est pas déjà fait.
+
+    Sans effet aux appels suivants : le fichier de configuration n'est lu
+    qu'une fois par processus.
+    """
+    global _configured
+    if _configured:
+        return
     LOGGING_CONF = os.path.join(os.path.dirname(__file__), '../config/logging.conf')
     LOGGING_CONF = os.path.abspath(LOGGING_CONF)
     if os.path.exists(LOGGING_CONF):
@@ -35,8 +41,9 @@ def _load_logging_config():
             'log_dir': logs_dir
         }
         logging.config.fileConfig(LOGGING_CONF, defaults=defaults, disable_existing_loggers=False)
+    _configured = True
 
-_load_logging_config()
+configure_logging()
 
 # Configuration du logger
 logger = logging.getLogger('sync_woocommerce_odoo')
@@ -0,0 +1,126 @@
+"""
+Surveillance de la mémoire d'un processus de synchronisation résident.
+
+La mémoire résidente (RSS) et, si MEMORY_TRACEMALLOC=1, les statistiques
+tracemalloc sont publiées en métriques à chaque lot. Lorsqu'un budget est
+défini (MEMORY_BUDGET_MB) et dépassé, la taille des lots et des pages
+demandées à WooCommerce est divisée par deux (jusqu'à un minimum), puis
+rétablie progressivement une fois la mémoire redescendue sous 80 % du
+budget.
+
+Exemple :
+    guard = MemoryGuard(budget_mb=256)
+    per_page = guard.batch_size(100)
+"""
+
+import gc
+import os
+import resource
+import tracemalloc
+
+from utils.logging_utils import log_info, log_warning
+from utils.metrics import (
+    memory_budget_exceeded_counter, memory_rss_gauge, sync_batch_size_gauge,
+    tracemalloc_current_gauge, tracemalloc_peak_gauge
+)
+
+# Budget mémoire en Mo (0 : pas de budget)
+MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', 0))
+# Active tracemalloc (surcoût notable, à réserver au diagnostic)
+MEMORY_TRACEMALLOC = os.getenv('MEMORY_TRACEMALLOC', '0') == '1'
+
+# Taille minimale d'un lot une fois réduit
+MIN_BATCH_SIZE = 10
+# Seuil (fraction du budget) sous lequel la taille des lots est rétablie
+RECOVERY_RATIO = 0.8
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes():
+    """
+    Retourne la mémoire résidente du processus.
+
+    Returns:
+        int: RSS en octets (pic de RSS si /proc n'est pas disponible)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss est exprimé en Ko sous Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryGuard:
+    """
+    Adapte la taille des lots au budget mémoire du processus.
+    """
+
+    def __init__(self, budget_mb=None, min_batch=MIN_BATCH_SIZE, trace=None):
+        """
+        Args:
+            budget_mb (int, optional): Budget en Mo (MEMORY_BUDGET_MB par défaut, 0 : aucun)
+            min_batch (int): Taille minimale d'un lot réduit
+            trace (bool, optional): Activer tracemalloc (MEMORY_TRACEMALLOC par défaut)
+        """
+        budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+        self.budget = budget_mb * 1024 * 1024
+        self.min_batch = min_batch
+        self.scale = 1.0
+        if (MEMORY_TRACEMALLOC if trace is None else trace) and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def sample(self):
+        """
+        Mesure la mémoire et met à jour les métriques.
+
+        Returns:
+            int: RSS en octets
+        """
+        rss = rss_bytes()
+        memory_rss_gauge.set(rss)
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc_current_gauge.set(current)
+            tracemalloc_peak_gauge.set(peak)
+        return rss
+
+    def batch_size(self, requested):
+        """
+        Retourne la taille de lot à utiliser compte tenu du budget.
+
+        Args:
+            requested (int): Taille de lot nominale
+
+        Returns:
+            int: Taille de lot ajustée (entre min(requested, min_batch) et requested)
+        """
+        rss = self.sample()
+        if self.budget:
+            if rss > self.budget:
+                memory_budget_exceeded_counter.inc()
+                self.scale = max(self.scale / 2, self.min_batch / max(requested, 1))
+                gc.collect()
+                log_warning(
+                    f"Budget mémoire dépassé ({rss / 1048576:.0f} Mo > {self.budget / 1048576:.0f} Mo), "
+                    f"taille de lot réduite à {self._size(requested)}"
+                )
+                self._log_top_allocations()
+            elif self.scale < 1 and rss < self.budget * RECOVERY_RATIO:
+                self.scale = min(self.scale * 2, 1.0)
+                log_info(f"Mémoire revenue sous le budget, taille de lot portée à {self._size(requested)}")
+        size = self._size(requested)
+        sync_batch_size_gauge.set(size)
+        return size
+
+    def _size(self, requested):
+        """Taille de lot correspondant au facteur de réduction courant."""
+        return max(min(requested, self.min_batch), int(requested * self.scale))
+
+    def _log_top_allocations(self, limit=5):
+        """Journalise les principales sources d'allocation (si tracemalloc est actif)."""
+        if not tracemalloc.is_tracing():
+            return
+        for stat in tracemalloc.take_snapshot().statistics('lineno')[:limit]:
+            log_info(f"Allocation : {stat}")
@@ -1,10 +1,51 @@
 """
 Module de collecte de métriques pour la synchronisation.
 Expose des compteurs et timers pour Prometheus ou logs custom.
+
+Les séries étiquetées les plus fréquentes (étapes du pipeline, issues des
+commandes) sont pré-instanciées afin que leur enregistrement se limite à une
+opération atomique, sans résolution d'étiquettes sur le chemin critique.
+
+Mode multi-processus : la synchronisation, le serveur de webhooks et le
+dashboard écrivent leurs échantillons dans des fichiers partagés du dossier
+PROMETHEUS_MULTIPROC_DIR (par défaut ``metrics_multiproc/`` à la racine du
+projet) dès que leur point d'entrée a appelé ``init_metrics``. Le dashboard
+agrège tous les processus derrière un seul endpoint ``/metrics`` (voir
+``render_metrics``). À la sortie d'un processus, ses
+compteurs et histogrammes sont fusionnés dans des fichiers d'archive : les
+exécutions courtes ne perdent aucun échantillon et le nombre de fichiers
+reste borné.
 """
 
-from prometheus_client import Counter, Histogram, start_http_server
+import atexit
+import fcntl
+import glob
+import os
+import socket
 import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess, start_http_server, values
+)
+from prometheus_client.mmap_dict import MmapedDict
+
+# Dossier partagé par défaut (PROMETHEUS_MULTIPROC_DIR, fixé par init_metrics)
+DEFAULT_MULTIPROC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../metrics_multiproc'))
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', DEFAULT_MULTIPROC_DIR)
+
+
+def _process_identifier():
+    """
+    Identifiant du processus pour les fichiers de métriques.
+
+    Le nom d'hôte évite les collisions entre conteneurs partageant le même
+    dossier (chacun a son propre PID 1). Le caractère '_' est réservé par
+    le format des noms de fichiers de prometheus_client.
+    """
+    return f"{socket.gethostname().replace('_', '-')}-{os.getpid()}"
+
 
 # Compteurs de succès/erreurs
 sync_success_counter = Counter('sync_success_total', 'Nombre de synchronisations réussies')
@@ -13,12 +54,367 @@ sync_error_counter = Counter('sync_error_total', 'Nombre de synchronisations éc
 # Histogramme de durée de synchronisation
 sync_duration_histogram = Histogram('sync_duration_seconds', 'Durée de la synchronisation (s)')
 
+# Étapes du pipeline de synchronisation d'une commande
+STAGES = ('fetch', 'dedup', 'validate', 'transform', 'odoo_write', 'state_commit')
+
+# Issues possibles du traitement d'une commande
+OUTCOMES = ('success', 'ignored', 'error')
+
+# Seaux adaptés à des opérations allant de la milliseconde à quelques dizaines de secondes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+sync_stage_duration_histogram = Histogram(
+    'sync_stage_duration_seconds', "Durée d'une étape du pipeline (s)",
+    ['stage'], buckets=LATENCY_BUCKETS
+)
+api_request_duration_histogram = Histogram(
+    'api_request_duration_seconds', "Durée des appels aux API externes (s)",
+    ['api', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+orders_processed_counter = Counter(
+    'orders_processed_total', 'Nombre de commandes traitées par issue', ['outcome']
+)
+api_retries_counter = Counter(
+    'api_retries_total', "Nombre de nouvelles tentatives d'appels API", ['api', 'endpoint']
+)
+api_throttled_counter = Counter(
+    'api_throttled_total', "Nombre de réponses 429 (limitation de débit)", ['api']
+)
+sync_queue_depth_gauge = Gauge(
+    'sync_queue_depth', "Commandes récupérées restant à traiter dans le lot courant",
+    multiprocess_mode='livesum'
+)
+api_rate_limit_gauge = Gauge(
+    'api_rate_limit_per_minute', "Limite de débit appliquée côté client (appels/min)", ['api'],
+    multiprocess_mode='max'
+)
+api_rate_limit_remaining_gauge = Gauge(
+    'api_rate_limit_remaining', "Appels restants annoncés par l'API (en-têtes X-RateLimit)", ['api'],
+    multiprocess_mode='mostrecent'
+)
+
+# Déclencheurs d'une synchronisation
+TRIGGERS = ('poll', 'webhook', 'backfill')
+
+# Seaux de fraîcheur : de quelques secondes (webhook) à une journée (rattrapage)
+FRESHNESS_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 21600, 86400)
+
+order_freshness_histogram = Histogram(
+    'order_sync_freshness_seconds',
+    "Délai entre la création d'une commande WooCommerce et sa création dans Odoo (s)",
+    ['trigger'], buckets=FRESHNESS_BUCKETS
+)
+oldest_unsynced_order_gauge = Gauge(
+    'order_oldest_unsynced_age_seconds',
+    "Ancienneté de la plus ancienne commande non synchronisée (s)",
+    multiprocess_mode='mostrecent'
+)
+
+# Mémoire du processus de synchronisation (voir utils/memory.py)
+memory_rss_gauge = Gauge(
+    'sync_memory_rss_bytes', "Mémoire résidente du processus de synchronisation (octets)",
+    multiprocess_mode='livemax'
+)
+tracemalloc_current_gauge = Gauge(
+    'sync_tracemalloc_current_bytes', "Mémoire Python allouée selon tracemalloc (octets)",
+    multiprocess_mode='livemax'
+)
+tracemalloc_peak_gauge = Gauge(
+    'sync_tracemalloc_peak_bytes', "Pic de mémoire Python allouée selon tracemalloc (octets)",
+    multiprocess_mode='livemax'
+)
+memory_budget_exceeded_counter = Counter(
+    'sync_memory_budget_exceeded_total', "Nombre de dépassements du budget mémoire"
+)
+sync_batch_size_gauge = Gauge(
+    'sync_batch_size', "Taille de lot (commandes par page) ajustée au budget mémoire",
+    multiprocess_mode='mostrecent'
+)
+
+# Métriques des processus web (dashboard et webhooks)
+dashboard_sync_launch_counter = Counter(
+    'app_sync_count', "Nombre de synchronisations lancées via le dashboard"
+)
+dashboard_uptime_gauge = Gauge(
+    'app_uptime_seconds', "Uptime du dashboard en secondes", multiprocess_mode='livemax'
+)
+webhook_received_counter = Counter(
+    'webhook_received_total', "Nombre de webhooks WooCommerce reçus"
+)
+webhook_rejected_counter = Counter(
+    'webhook_rejected_total', "Nombre de webhooks refusés (file d'ingestion pleine)"
+)
+webhook_queue_depth_gauge = Gauge(
+    'webhook_queue_depth', "Webhooks en attente de synchronisation", multiprocess_mode='livesum'
+)
+webhook_sync_runs_counter = Counter(
+    'webhook_sync_runs_total', "Nombre de synchronisations déclenchées par des webhooks"
+)
+
+# Synchronisation du stock Odoo → WooCommerce (core/stock_sync.py)
+stock_updates_counter = Counter(
+    'stock_updates_total', "Mises à jour de stock poussées vers WooCommerce, par issue", ['outcome']
+)
+stock_pending_gauge = Gauge(
+    'stock_pending_updates', "Mises à jour de stock regroupées en attente d'envoi",
+    multiprocess_mode='livesum'
+)
+
+# Retour des statuts de commande Odoo → WooCommerce (core/status_writeback.py)
+status_writeback_counter = Counter(
+    'order_status_writeback_total', "Statuts de commande renvoyés vers WooCommerce, par issue", ['outcome']
+)
+
+# Synchronisation des clients Odoo → WooCommerce (core/customer_sync.py)
+customer_sync_counter = Counter(
+    'customers_pushed_total', "Fiches clients Odoo traitées pour WooCommerce, par issue", ['outcome']
+)
+
+# Attente d'un créneau d'écriture Odoo partagé (mode multi-boutiques, scripts/sync_stores.py)
+odoo_queue_wait_histogram = Histogram(
+    'odoo_write_queue_seconds', "Attente d'un créneau d'écriture Odoo partagé, par boutique (s)",
+    ['store'], buckets=LATENCY_BUCKETS
+)
+
+# Erreurs relevées dans les logs par scripts/monitoring.py
+log_errors_counter = Counter(
+    'log_errors_total', "Nombre de lignes d'erreur relevées dans les logs, par catégorie", ['category']
+)
+log_errors_window_gauge = Gauge(
+    'log_errors_window', "Lignes d'erreur des logs sur la fenêtre glissante, par catégorie", ['category'],
+    multiprocess_mode='mostrecent'
+)
+
+# Séries pré-instanciées pour le chemin critique
+_stage_children = {stage: sync_stage_duration_histogram.labels(stage) for stage in STAGES}
+_outcome_children = {outcome: orders_processed_counter.labels(outcome) for outcome in OUTCOMES}
+_freshness_children = {trigger: order_freshness_histogram.labels(trigger) for trigger in TRIGGERS}
+
+
+def time_stage(stage):
+    """
+    Chronomètre une étape du pipeline.
+
+    Args:
+        stage (str): Nom de l'étape (voir STAGES)
+
+    Returns:
+        Gestionnaire de contexte / décorateur enregistrant la durée
+
+    Exemple :
+        with time_stage('validate'):
+            validate_order(order)
+    """
+    child = _stage_children.get(stage)
+    if child is None:
+        child = sync_stage_duration_histogram.labels(stage)
+    return child.time()
+
+
+def record_order_outcome(outcome):
+    """
+    Comptabilise l'issue du traitement d'une commande.
+
+    Args:
+        outcome (str): Issue ('success', 'ignored' ou 'error')
+    """
+    _outcome_children[outcome].inc()
+
+
+def observe_order_freshness(trigger, created_at, synced_at=None):
+    """
+    Enregistre la fraîcheur d'une commande synchronisée.
+
+    Args:
+        trigger (str): Déclencheur de la synchronisation (voir TRIGGERS)
+        created_at (float): Date de création WooCommerce (timestamp Unix UTC), ou None
+        synced_at (float, optional): Date de création dans Odoo (maintenant par défaut)
+    """
+    if created_at is None:
+        return
+    synced_at = time.time() if synced_at is None else synced_at
+    _freshness_children[trigger].observe(max(synced_at - created_at, 0))
+
+
+def observe_odoo_queue_wait(store, seconds):
+    """
+    Enregistre l'attente d'un créneau d'écriture Odoo partagé.
+
+    Args:
+        store (str): Nom de la boutique
+        seconds (float): Temps d'attente (s)
+    """
+    odoo_queue_wait_histogram.labels(store).observe(seconds)
+
+
+def set_oldest_unsynced_age(created_at, now=None):
+    """
+    Publie l'ancienneté de la plus ancienne commande non synchronisée.
+
+    Args:
+        created_at (float): Date de création de cette commande (timestamp Unix UTC),
+            ou None si aucune commande n'est en attente
+        now (float, optional): Instant de référence (maintenant par défaut)
+    """
+    if created_at is None:
+        oldest_unsynced_order_gauge.set(0)
+        return
+    now = time.time() if now is None else now
+    oldest_unsynced_order_gauge.set(max(now - created_at, 0))
+
+
+def observe_api_call(api, endpoint, method, duration, status_code=None):
+    """
+    Enregistre la durée d'un appel API et les éventuelles limitations de débit.
+
+    Args:
+        api (str): Nom de l'API ('woocommerce' ou 'odoo')
+        endpoint (str): Endpoint ou modèle appelé (faible cardinalité)
+        method (str): Méthode HTTP ou RPC
+        duration (float): Durée en secondes
+        status_code (int, optional): Code de statut HTTP
+    """
+    api_request_duration_histogram.labels(api, endpoint, method).observe(duration)
+    if status_code == 429:
+        api_throttled_counter.labels(api).inc()
+
+
+def count_retry(api, endpoint):
+    """
+    Construit un callback ``before_sleep`` tenacity comptant les nouvelles tentatives.
+
+    Args:
+        api (str): Nom de l'API
+        endpoint (str): Endpoint concerné
+
+    Returns:
+        callable: Callback pour ``tenacity.retry(before_sleep=...)``
+    """
+    child = api_retries_counter.labels(api, endpoint)
+
+    def before_sleep(retry_state):
+        child.inc()
+    return before_sleep
+
+
+@contextmanager
+def _multiproc_lock(exclusive):
+    """Verrou de fichier coordonnant la lecture et l'archivage des métriques."""
+    with open(os.path.join(MULTIPROC_DIR, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def aggregated_registry():
+    """
+    Construit un registre agrégeant les métriques de tous les processus.
+
+    Returns:
+        CollectorRegistry: Registre à exposer
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+    return registry
+
+
+def render_metrics():
+    """
+    Sérialise les métriques agrégées au format texte Prometheus.
+
+    Returns:
+        tuple: (contenu, type MIME)
+    """
+    registry = aggregated_registry()
+    with _multiproc_lock(exclusive=False):
+        output = generate_latest(registry)
+    return output, CONTENT_TYPE_LATEST
+
+
 def start_metrics_server(port=8001):
-    """Démarre un serveur HTTP pour exposer les métriques Prometheus."""
-    start_http_server(port)
+    """Démarre un serveur HTTP exposant les métriques agrégées de tous les processus."""
+    start_http_server(port, registry=aggregated_registry())
+
+
+# Fusion des valeurs d'un processus terminé dans l'archive, par type de fichier.
+# Les jauges 'live*' sont simplement supprimées (mark_process_dead).
+_ARCHIVE_MERGE = {
+    'counter': lambda old, new: old + new,
+    'histogram': lambda old, new: old + new,
+    'summary': lambda old, new: old + new,
+    'gauge_sum': lambda old, new: old + new,
+    'gauge_max': max,
+    'gauge_min': min,
+}
+
+
+def archive_process_metrics(identifier=None):
+    """
+    Fusionne les fichiers de métriques d'un processus dans les fichiers d'archive.
+
+    Appelée automatiquement à la sortie des processus initialisés par init_metrics.
+
+    Args:
+        identifier (str, optional): Identifiant du processus (par défaut le processus courant)
+    """
+    identifier = identifier or _process_identifier()
+    with _multiproc_lock(exclusive=True):
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, f'*_{identifier}.db')):
+            prefix = os.path.basename(path)[:-len(f'_{identifier}.db')]
+            merge = _ARCHIVE_MERGE.get(prefix)
+            if merge is None and prefix != 'gauge_mostrecent':
+                continue
+            archive = MmapedDict(os.path.join(MULTIPROC_DIR, f'{prefix}_archive.db'))
+            try:
+                for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(path):
+                    old_value, old_timestamp = archive.read_value(key)
+                    if merge is not None:
+                        archive.write_value(key, merge(old_value, value), timestamp)
+                    elif timestamp >= old_timestamp:
+                        archive.write_value(key, value, timestamp)
+            finally:
+                archive.close()
+            os.remove(path)
+        multiprocess.mark_process_dead(identifier, MULTIPROC_DIR)
+
+
+_initialized = False
+
+
+def init_metrics():
+    """
+    Active le mode multi-processus des métriques.
+
+    À appeler au démarrage de chaque point d'entrée (scripts de
+    synchronisation, serveur de webhooks, dashboard, monitoring) :
+    fixe PROMETHEUS_MULTIPROC_DIR, crée le dossier, fait écrire les métriques
+    du processus dans les fichiers partagés et les archive à sa sortie.
+    L'import du module n'a aucun de ces effets : les bibliothèques et les
+    tests qui l'importent conservent des métriques en mémoire. Les appels
+    suivants sont sans effet.
+    """
+    global MULTIPROC_DIR, _initialized
+    if _initialized:
+        return
+    MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', DEFAULT_MULTIPROC_DIR)
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    values.ValueClass = values.MultiProcessValue(_process_identifier)
+    # Les métriques (et séries pré-instanciées) créées à l'import sont
+    # rattachées aux fichiers partagés ; les séries créées ensuite le sont d'office
+    for metric in list(globals().values()):
+        if isinstance(metric, (Counter, Gauge, Histogram)):
+            children = list(metric._metrics.values()) if metric._is_parent() else [metric]
+            for child in children:
+                child._metric_init()
+    atexit.register(archive_process_metrics)
+    _initialized = True
 
 # Exemple d'utilisation dans le code principal :
 # with sync_duration_histogram.time():
 #     ... synchronisation ...
 # sync_success_counter.inc()
 # sync_error_counter.inc()
+# with time_stage('odoo_write'):
+#     odoo.create_order(data)
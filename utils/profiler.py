@@ -0,0 +1,227 @@
+"""
+Profilage à la demande d'un processus de synchronisation en cours d'exécution.
+
+Un thread échantillonne périodiquement la pile de tous les autres threads
+(``sys._current_frames``) pendant une durée bornée, puis écrit le résultat
+au format « collapsed stacks » (une pile par ligne, frames séparées par des
+points-virgules, suivie du nombre d'échantillons), directement exploitable
+par flamegraph.pl ou speedscope.
+
+Le coût est maîtrisé : aucun hook de traçage n'est installé, seul le thread
+d'échantillonnage travaille (100 Hz par défaut), un seul profil peut tourner
+à la fois et sa durée est plafonnée. En production, le profil est déclenché
+par un signal envoyé au processus de synchronisation :
+
+    docker kill -s USR2 sync_woocommerce_odoo
+
+Les profils sont écrits dans ``profiles/`` et listés par le dashboard.
+"""
+
+import atexit
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from utils.logging_utils import log_error, log_info, log_warning
+
+# Dossier des profils, partagé avec le dashboard via le volume du projet
+PROFILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../profiles'))
+
+# Extension des fichiers produits
+PROFILE_SUFFIX = '.collapsed'
+
+# Limites garantissant un impact négligeable en production
+DEFAULT_DURATION = 30
+MAX_DURATION = 300
+DEFAULT_INTERVAL = 0.01
+MAX_PROFILES = 20
+
+# Réentrant : le gestionnaire de signal peut interrompre le thread principal
+_lock = threading.RLock()
+_running = None
+_running_profiler = None
+
+
+def _frame_label(frame):
+    """Libellé d'une frame : module:fonction."""
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+def _collapse(frame, thread_name):
+    """Pile d'un thread, de la racine vers la frame courante."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage des piles de tous les threads du processus.
+
+    Exemple :
+        profiler = SamplingProfiler(duration=10)
+        profiler.run()
+        path = profiler.write()
+    """
+
+    def __init__(self, duration=DEFAULT_DURATION, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            duration (float): Durée d'échantillonnage en secondes (plafonnée à MAX_DURATION)
+            interval (float): Intervalle entre deux échantillons en secondes
+        """
+        self.duration = min(float(duration), MAX_DURATION)
+        self.interval = max(float(interval), 0.001)
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+
+    def run(self):
+        """Échantillonne les piles jusqu'à la fin de la durée demandée ou l'appel à ``stop``."""
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline and not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.stacks[_collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        """Interrompt l'échantillonnage (le profil partiel reste exploitable)."""
+        self._stop.set()
+
+    def collapsed(self):
+        """
+        Retourne le profil au format collapsed stacks.
+
+        Returns:
+            str: Une ligne « frame;frame;... nombre » par pile distincte
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, directory=None):
+        """
+        Écrit le profil dans un fichier nommé d'après l'hôte, le PID et l'heure.
+
+        Args:
+            directory (str, optional): Dossier de destination (PROFILES_DIR par défaut)
+
+        Returns:
+            str: Chemin du fichier écrit
+        """
+        directory = directory or PROFILES_DIR
+        os.makedirs(directory, exist_ok=True)
+        name = (
+            f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-"
+            f"{socket.gethostname()}-{os.getpid()}{PROFILE_SUFFIX}"
+        )
+        path = os.path.join(directory, name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.collapsed())
+        os.replace(tmp_path, path)
+        _prune_profiles(directory)
+        return path
+
+
+def _prune_profiles(directory, keep=MAX_PROFILES):
+    """Supprime les profils les plus anciens au-delà de ``keep``."""
+    for name in sorted(os.listdir(directory))[:-keep]:
+        if name.endswith(PROFILE_SUFFIX):
+            os.remove(os.path.join(directory, name))
+
+
+def list_profiles(directory=None):
+    """
+    Liste les profils disponibles, du plus récent au plus ancien.
+
+    Args:
+        directory (str, optional): Dossier des profils (PROFILES_DIR par défaut)
+
+    Returns:
+        list: Tuples (nom, taille en octets, date de modification)
+    """
+    directory = directory or PROFILES_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith(PROFILE_SUFFIX):
+            stat = os.stat(os.path.join(directory, name))
+            profiles.append((name, stat.st_size, datetime.fromtimestamp(stat.st_mtime)))
+    return sorted(profiles, key=lambda profile: profile[2], reverse=True)
+
+
+def start_profiling(duration=DEFAULT_DURATION, interval=DEFAULT_INTERVAL):
+    """
+    Lance un profil en arrière-plan, sauf si un profil est déjà en cours.
+
+    Args:
+        duration (float): Durée d'échantillonnage en secondes
+        interval (float): Intervalle entre deux échantillons en secondes
+
+    Returns:
+        threading.Thread: Thread de profilage, ou None si un profil est déjà en cours
+    """
+    global _running, _running_profiler
+    with _lock:
+        if _running is not None and _running.is_alive():
+            log_warning("Profilage déjà en cours, demande ignorée")
+            return None
+        profiler = SamplingProfiler(duration, interval)
+
+        def _run():
+            try:
+                profiler.run()
+                path = profiler.write()
+                log_info(f"Profil écrit ({profiler.samples} échantillons) : {path}")
+            except Exception as e:
+                log_error("Erreur lors du profilage", exc_info=e)
+
+        _running_profiler = profiler
+        _running = threading.Thread(target=_run, name="sampling-profiler", daemon=True)
+        _running.start()
+        log_info(f"Profilage démarré pour {profiler.duration:.0f} s")
+        return _running
+
+
+def _flush_on_exit():
+    """Écrit le profil partiel si le processus se termine pendant un profilage."""
+    if _running is not None and _running.is_alive():
+        _running_profiler.stop()
+        _running.join(timeout=5)
+
+
+atexit.register(_flush_on_exit)
+
+
+def install_signal_handler(signum=signal.SIGUSR2, duration=None):
+    """
+    Déclenche un profil à la réception d'un signal.
+
+    Le gestionnaire se contente de démarrer le thread d'échantillonnage :
+    il rend la main immédiatement au code interrompu.
+
+    Args:
+        signum (int): Signal à intercepter (SIGUSR2 par défaut)
+        duration (float, optional): Durée du profil (variable PROFILE_SECONDS, 30 s par défaut)
+    """
+    if duration is None:
+        duration = float(os.getenv('PROFILE_SECONDS', DEFAULT_DURATION))
+
+    def _handler(signum, frame):
+        start_profiling(duration)
+
+    signal.signal(signum, _handler)
@@ -0,0 +1,160 @@
+"""
+Avancement de l'exécution de synchronisation en cours.
+
+Le moteur de synchronisation tient ses compteurs en mémoire (pages
+récupérées, commandes traitées par issue, total annoncé par WooCommerce) et
+les publie dans un petit fichier JSON (SYNC_PROGRESS_FILE, remplacé de façon
+atomique) au plus toutes les SYNC_PROGRESS_INTERVAL secondes. Le dashboard
+relit ce fichier quand il change et le diffuse en server-sent events : ni
+la base locale ni les métriques ne sont interrogées.
+
+Exemple :
+    progress = SyncProgress("backfill", run_id)
+    progress.page(len(orders), total=wc.last_total)
+    progress.order("success")
+    progress.finish()
+"""
+
+import json
+import os
+import time
+
+from utils.store_context import store_path
+
+PROGRESS_FILE = os.getenv('SYNC_PROGRESS_FILE', os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../sync_progress.json')))
+# Intervalle minimal entre deux publications (s)
+SYNC_PROGRESS_INTERVAL = float(os.getenv('SYNC_PROGRESS_INTERVAL', 0.5))
+
+OUTCOMES = ('success', 'ignored', 'error')
+
+
+class SyncProgress:
+    """
+    Compteurs d'une exécution, publiés périodiquement.
+    """
+
+    def __init__(self, trigger, run_id=None, path=None, interval=SYNC_PROGRESS_INTERVAL):
+        """
+        Args:
+            trigger (str): Déclencheur de l'exécution ('poll', 'webhook', 'backfill')
+            run_id (str, optional): Identifiant de l'exécution
+            path (str, optional): Fichier de publication (PROGRESS_FILE de la
+                boutique courante par défaut)
+            interval (float): Intervalle minimal entre deux publications (s)
+        """
+        self.path = path or store_path(PROGRESS_FILE)
+        self.interval = interval
+        self.trigger = trigger
+        self.run_id = run_id
+        self.started_at = time.time()
+        self.state = 'running'
+        self.error = None
+        self.pages = 0
+        self.fetched = 0
+        self.expected = None
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self._published_at = 0.0
+        self._publish(force=True)
+
+    def page(self, count, total=None):
+        """
+        Comptabilise une page récupérée.
+
+        Args:
+            count (int): Nombre de commandes de la page
+            total (int, optional): Nombre total de commandes annoncé par WooCommerce
+        """
+        self.pages += 1
+        self.fetched += count
+        if total and self.expected is None:
+            self.expected = total
+        self._publish(force=self.pages == 1)
+
+    def order(self, outcome):
+        """
+        Comptabilise le traitement d'une commande.
+
+        Args:
+            outcome (str): Issue ('success', 'ignored' ou 'error')
+        """
+        if outcome in self.outcomes:
+            self.outcomes[outcome] += 1
+        self._publish()
+
+    def finish(self, error=None):
+        """
+        Publie la fin de l'exécution.
+
+        Args:
+            error (Exception, optional): Erreur ayant interrompu l'exécution
+        """
+        self.state = 'failed' if error is not None else 'done'
+        self.error = str(error) if error is not None else None
+        self._publish(force=True)
+
+    def snapshot(self, now=None):
+        """
+        Compteurs courants et valeurs dérivées (débit, temps restant estimé).
+
+        Args:
+            now (float, optional): Instant de référence (maintenant par défaut)
+
+        Returns:
+            dict: Avancement de l'exécution
+        """
+        now = time.time() if now is None else now
+        elapsed = max(now - self.started_at, 1e-6)
+        processed = sum(self.outcomes.values())
+        rate = processed / elapsed
+        eta = None
+        if self.state == 'running' and self.expected and rate > 0:
+            eta = round(max(self.expected - processed, 0) / rate, 1)
+        return {
+            'run_id': self.run_id,
+            'trigger': self.trigger,
+            'state': self.state,
+            'error': self.error,
+            'started_at': self.started_at,
+            'updated_at': now,
+            'elapsed_s': round(elapsed, 1),
+            'pages': self.pages,
+            'fetched': self.fetched,
+            'expected': self.expected,
+            'processed': processed,
+            'success': self.outcomes['success'],
+            'ignored': self.outcomes['ignored'],
+            'errors': self.outcomes['error'],
+            'orders_per_s': round(rate, 2),
+            'eta_s': eta,
+        }
+
+    def _publish(self, force=False):
+        now = time.time()
+        if not force and now - self._published_at < self.interval:
+            return
+        self._published_at = now
+        try:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump(self.snapshot(now), f)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            # L'avancement est informatif : ne jamais interrompre la synchronisation
+            pass
+
+
+def read_progress(path=None):
+    """
+    Lit le dernier avancement publié.
+
+    Args:
+        path (str, optional): Fichier de publication (PROGRESS_FILE par défaut)
+
+    Returns:
+        dict: Avancement, ou None si aucune exécution n'a été publiée
+    """
+    try:
+        with open(path or PROGRESS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
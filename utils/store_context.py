@@ -0,0 +1,53 @@
+"""
+Boutique WooCommerce en cours de synchronisation (mode multi-boutiques).
+
+Chaque boutique synchronisée par scripts/sync_stores.py s'exécute dans son
+propre thread, sous ``use_store(nom)``. Les fichiers d'état locaux (base
+SQLite, date de dernière synchronisation, curseurs, avancement, audit) sont
+alors suffixés par le nom de la boutique : ``sync_local.db`` devient
+``sync_local.<boutique>.db``. Sans boutique courante (mode historique à une
+seule boutique), les chemins sont inchangés.
+
+Exemple :
+    with use_store("boutique_fr"):
+        SyncManager(store=store).sync_orders()
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Chaque thread démarre avec la valeur par défaut : aucune boutique
+current_store = ContextVar('current_store', default=None)
+
+
+@contextmanager
+def use_store(name):
+    """
+    Sélectionne la boutique courante pour la durée du bloc.
+
+    Args:
+        name (str): Nom de la boutique (None : mode à une seule boutique)
+    """
+    token = current_store.set(name)
+    try:
+        yield name
+    finally:
+        current_store.reset(token)
+
+
+def store_path(path):
+    """
+    Chemin d'un fichier d'état pour la boutique courante.
+
+    Args:
+        path (str): Chemin du fichier en mode à une seule boutique
+
+    Returns:
+        str: Chemin suffixé par le nom de la boutique courante, s'il y en a une
+    """
+    name = current_store.get()
+    if not name:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name}{ext}"
@@ -1,22 +1,113 @@
 """
 Gestion de la date de dernière synchronisation pour la sync incrémentale.
 Stocke la date dans un fichier texte (last_synced_at.txt).
+
+Les synchronisations secondaires (stock, statuts, clients) conservent leur
+propre curseur, par nom, chacun dans son fichier JSON (sync_cursors.<nom>.json).
+
+Les synchronisations des commandes (périodique, webhooks, rattrapage)
+peuvent tourner dans des processus différents sur la même base locale :
+``sync_lock`` les exécute l'une après l'autre.
+
+En mode multi-boutiques, chaque boutique a ses propres fichiers
+(voir utils/store_context.py).
 """
+import fcntl
+import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime, UTC
 
+from utils.store_context import store_path
+
 SYNC_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../last_synced_at.txt'))
+CURSOR_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sync_cursors.json'))
+SYNC_LOCK_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../sync.lock'))
+
+
+@contextmanager
+def sync_lock():
+    """
+    Verrou exclusif de synchronisation des commandes, partagé entre processus.
+
+    Sans ce verrou, deux synchronisations simultanées (service ``sync`` et
+    serveur de webhooks) peuvent toutes deux juger une commande non
+    synchronisée et la créer deux fois dans Odoo. Le verrou est propre à la
+    boutique courante et libéré à la fin du bloc, même en cas d'erreur.
+    """
+    with open(store_path(SYNC_LOCK_FILE), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 
 
 def get_last_synced_at():
-    if os.path.exists(SYNC_FILE):
-        with open(SYNC_FILE) as f:
+    path = store_path(SYNC_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
             return f.read().strip()
     return None
 
 def set_last_synced_at(dt=None):
     if dt is None:
         dt = datetime.now(UTC).isoformat()
-    with open(SYNC_FILE, 'w') as f:
+    with open(store_path(SYNC_FILE), 'w') as f:
         f.write(dt)
     return dt
+
+def _cursor_path(name):
+    """Fichier du curseur ``name`` (ex. sync_cursors.stock.json) de la boutique courante."""
+    root, ext = os.path.splitext(CURSOR_FILE)
+    return store_path(f"{root}.{name}{ext}")
+
+def _read_legacy_cursors():
+    # Ancien fichier commun à tous les curseurs, lu tant qu'un curseur n'a pas son fichier
+    path = store_path(CURSOR_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def get_cursor(name, default=None):
+    """
+    Retourne le curseur d'une synchronisation secondaire.
+
+    Args:
+        name (str): Nom du curseur (ex. 'stock')
+        default: Valeur retournée si le curseur n'existe pas
+
+    Returns:
+        Valeur du curseur (chaîne ou nombre)
+    """
+    path = _cursor_path(name)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return _read_legacy_cursors().get(name, default)
+
+def set_cursor(name, value):
+    """
+    Enregistre le curseur d'une synchronisation secondaire (écriture atomique).
+
+    Chaque curseur a son propre fichier : les services qui tournent en
+    parallèle (stock, clients, retour des statuts) n'écrasent jamais le
+    curseur d'un autre, et le fichier temporaire est propre au processus
+    et au thread.
+
+    Args:
+        name (str): Nom du curseur
+        value: Nouvelle valeur (sérialisable en JSON)
+
+    Returns:
+        Valeur enregistrée
+    """
+    path = _cursor_path(name)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+    return value
@@ -0,0 +1,363 @@
+"""
+Traçage léger du parcours d'une commande dans la synchronisation.
+
+Chaque commande synchronisée forme une trace dont les spans couvrent les
+étapes du pipeline (dédoublonnage, validation, transformation, écriture
+Odoo, enregistrement local) ainsi que chaque appel RPC ou SQL. Les traces
+d'une même exécution partagent l'attribut ``run.id`` ; l'identifiant de la
+commande est porté par ``order.id``.
+
+L'échantillonnage est décidé en tête de trace (TRACE_SAMPLE_RATE, entre 0
+et 1, désactivé par défaut) : hors trace échantillonnée, ``span`` retourne
+un gestionnaire de contexte vide et ne coûte qu'une lecture de variable de
+contexte.
+
+Exporteurs (TRACE_EXPORTER) :
+- ``file`` (par défaut) : une ligne JSON par span dans TRACE_FILE
+  (``logs/traces.jsonl``), lisible avec ``scripts/show_trace.py`` ;
+- ``otlp`` : envoi en arrière-plan au format OTLP/HTTP JSON vers
+  OTEL_EXPORTER_OTLP_ENDPOINT (ex. http://localhost:4318).
+
+Exemple :
+    with start_trace("sync.order", **{"order.id": 42}):
+        with span("sync.validate"):
+            validate_order(order)
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager, nullcontext
+
+from utils.logging_utils import log_error
+
+SERVICE_NAME = 'sync_woocommerce_odoo'
+
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0))
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'file')
+TRACE_FILE = os.getenv(
+    'TRACE_FILE', os.path.abspath(os.path.join(os.path.dirname(__file__), '../logs/traces.jsonl'))
+)
+OTLP_ENDPOINT = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318')
+
+# Span courant de la trace échantillonnée en cours (None hors trace)
+_current_span = contextvars.ContextVar('current_span', default=None)
+# Attributs communs à toutes les traces du contexte courant (ex. run.id)
+_run_attributes = contextvars.ContextVar('run_attributes', default={})
+
+_NOOP = nullcontext()
+
+
+def _new_id(size):
+    """Identifiant hexadécimal aléatoire de ``size`` octets."""
+    return random.getrandbits(size * 8).to_bytes(size, 'big').hex()
+
+
+class Span:
+    """Opération chronométrée appartenant à une trace."""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, trace, name, parent_id, attributes):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        """Ajoute un attribut au span."""
+        self.attributes[key] = value
+
+    def to_dict(self):
+        """Représentation JSON du span (format de l'exporteur fichier)."""
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class _Trace:
+    """Spans terminés d'une trace, exportés à la fin du span racine."""
+
+    __slots__ = ('trace_id', 'spans')
+
+    def __init__(self):
+        self.trace_id = _new_id(16)
+        self.spans = []
+
+
+@contextmanager
+def _run_span(trace, name, parent_id, attributes):
+    """Ouvre un span, le rend courant puis l'enregistre à sa fermeture."""
+    current = Span(trace, name, parent_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+        if parent_id is None:
+            export(trace.spans)
+
+
+def start_trace(name, **attributes):
+    """
+    Démarre une trace (ou un span enfant si une trace est déjà en cours).
+
+    La décision d'échantillonnage est prise ici, une fois pour toute la trace.
+
+    Args:
+        name (str): Nom du span racine
+        **attributes: Attributs du span (ex. ``**{"order.id": 42}``)
+
+    Returns:
+        Gestionnaire de contexte produisant le Span, ou vide si non échantillonné
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        return _run_span(parent.trace, name, parent.span_id, attributes)
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return _NOOP
+    return _run_span(_Trace(), name, None, {**_run_attributes.get(), **attributes})
+
+
+def span(name, **attributes):
+    """
+    Ouvre un span enfant du span courant.
+
+    Args:
+        name (str): Nom du span (ex. ``odoo.execute_kw``)
+        **attributes: Attributs du span
+
+    Returns:
+        Gestionnaire de contexte produisant le Span, ou vide hors trace échantillonnée
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return _run_span(parent.trace, name, parent.span_id, attributes)
+
+
+def annotate(**attributes):
+    """
+    Ajoute des attributs au span courant (sans effet hors trace échantillonnée).
+
+    Args:
+        **attributes: Attributs à ajouter
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def record_error(error):
+    """
+    Marque le span courant en erreur (sans effet hors trace échantillonnée).
+
+    Args:
+        error (Exception): Erreur interceptée par l'appelant
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.error = f"{type(error).__name__}: {error}"
+
+
+def new_run_id():
+    """
+    Génère un identifiant d'exécution et l'attache aux traces suivantes.
+
+    Returns:
+        str: Identifiant de l'exécution (attribut ``run.id``)
+    """
+    run_id = _new_id(6)
+    _run_attributes.set({'run.id': run_id})
+    return run_id
+
+
+def _write_file(spans):
+    """Exporteur fichier : une ligne JSON par span."""
+    os.makedirs(os.path.dirname(TRACE_FILE), exist_ok=True)
+    lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+    with open(TRACE_FILE, 'a') as f:
+        f.write(lines)
+
+
+def _otlp_value(value):
+    """Valeur d'attribut au format OTLP JSON."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_payload(spans):
+    """
+    Construit le corps d'une requête OTLP/HTTP JSON (/v1/traces).
+
+    Args:
+        spans (list): Spans terminés
+
+    Returns:
+        dict: Corps de la requête
+    """
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+        'scopeSpans': [{
+            'scope': {'name': __name__},
+            'spans': [{
+                'traceId': s.trace.trace_id,
+                'spanId': s.span_id,
+                'parentSpanId': s.parent_id or '',
+                'name': s.name,
+                'kind': 1,
+                'startTimeUnixNano': str(s.start_ns),
+                'endTimeUnixNano': str(s.end_ns),
+                'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in s.attributes.items()],
+                'status': {'code': 2, 'message': s.error} if s.error else {'code': 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class _OtlpExporter:
+    """Exporteur OTLP/HTTP JSON en arrière-plan, par lots."""
+
+    def __init__(self, endpoint, max_queue=1000):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = threading.Thread(target=self._loop, name="otlp-exporter", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, spans):
+        try:
+            self.queue.put_nowait(spans)
+        except queue.Full:
+            pass  # Mieux vaut perdre une trace que ralentir la synchronisation
+
+    def _send(self, spans):
+        body = json.dumps(otlp_payload(spans)).encode()
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            log_error(f"Export OTLP des traces impossible vers {self.url}: {e}")
+
+    def _loop(self):
+        while True:
+            spans = self.queue.get()
+            while len(spans) < 512:
+                try:
+                    spans = spans + self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._send(spans)
+
+    def flush(self):
+        """Vide la file d'export (appelée à la sortie du processus)."""
+        pending = []
+        while True:
+            try:
+                pending.extend(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self._send(pending)
+
+
+_otlp_exporter = None
+
+
+def export(spans):
+    """
+    Exporte les spans d'une trace terminée via l'exporteur configuré.
+
+    Args:
+        spans (list): Spans de la trace
+    """
+    global _otlp_exporter
+    try:
+        if TRACE_EXPORTER == 'otlp':
+            if _otlp_exporter is None:
+                _otlp_exporter = _OtlpExporter(OTLP_ENDPOINT)
+            _otlp_exporter.submit(spans)
+        else:
+            _write_file(spans)
+    except Exception as e:
+        log_error("Erreur lors de l'export d'une trace", exc_info=e)
+
+
+def load_traces(path=None):
+    """
+    Relit les traces exportées au format fichier.
+
+    Args:
+        path (str, optional): Fichier de traces (TRACE_FILE par défaut)
+
+    Returns:
+        dict: Spans (dicts) par identifiant de trace, dans l'ordre du fichier
+    """
+    traces = {}
+    with open(path or TRACE_FILE) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                traces.setdefault(record['trace_id'], []).append(record)
+    return traces
+
+
+def format_trace(spans):
+    """
+    Présente une trace sous forme d'arbre chronologique.
+
+    Args:
+        spans (list): Spans (dicts) d'une même trace
+
+    Returns:
+        str: Une ligne par span : décalage, durée, nom, attributs et erreur
+    """
+    children = {}
+    for record in spans:
+        children.setdefault(record['parent_id'], []).append(record)
+    roots = children.get(None, [])
+    origin = min(record['start_ns'] for record in spans)
+    lines = []
+
+    def _walk(record, depth):
+        offset = (record['start_ns'] - origin) / 1e6
+        attributes = " ".join(f"{k}={v}" for k, v in record['attributes'].items())
+        error = f" ERREUR {record['error']}" if record['error'] else ""
+        lines.append(
+            f"{offset:9.1f} ms {record['duration_ms']:9.1f} ms  "
+            f"{'  ' * depth}{record['name']} {attributes}{error}".rstrip()
+        )
+        for child in sorted(children.get(record['span_id'], []), key=lambda c: c['start_ns']):
+            _walk(child, depth + 1)
+
+    for root in roots:
+        _walk(root, 0)
+    return "\n".join(lines)